@@ -0,0 +1,100 @@
+"""ticket_stats_rollup
+
+Revision ID: 2c7d9f4a6e51
+Revises: 9e6a4c2f1b38
+Create Date: 2026-10-16 17:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '2c7d9f4a6e51'
+down_revision = '9e6a4c2f1b38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Per-organization ticket count rollup maintained by trigger.
+
+    The trigger is installed and the rollup populated under a SHARE lock on
+    tickets, so no write can slip in between the backfill snapshot and the
+    trigger taking over. The lock only blocks writers for the duration of a
+    single grouped scan.
+    """
+    op.create_table(
+        'ticket_stats_rollup',
+        sa.Column('organization_id', sa.UUID(), nullable=False, comment='Organization the counts belong to'),
+        sa.Column('status', postgresql.ENUM(name='ticketstatus', create_type=False), nullable=False, comment='Ticket status'),
+        sa.Column('priority', postgresql.ENUM(name='ticketpriority', create_type=False), nullable=False, comment='Ticket priority level'),
+        sa.Column('category', postgresql.ENUM(name='ticketcategory', create_type=False), nullable=False, comment='Ticket category'),
+        sa.Column('ticket_count', sa.Integer(), nullable=False, comment='Number of non-deleted tickets with this status, priority and category'),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('organization_id', 'status', 'priority', 'category')
+    )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION tickets_stats_rollup_update() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' THEN
+                IF (OLD.organization_id, OLD.status, OLD.priority, OLD.category, OLD.is_deleted)
+                   IS NOT DISTINCT FROM (NEW.organization_id, NEW.status, NEW.priority, NEW.category, NEW.is_deleted) THEN
+                    RETURN NULL;
+                END IF;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                IF NOT OLD.is_deleted THEN
+                    UPDATE ticket_stats_rollup SET ticket_count = ticket_count - 1
+                    WHERE organization_id = OLD.organization_id
+                      AND status = OLD.status AND priority = OLD.priority AND category = OLD.category;
+                END IF;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                IF NOT NEW.is_deleted THEN
+                    INSERT INTO ticket_stats_rollup (organization_id, status, priority, category, ticket_count)
+                    VALUES (NEW.organization_id, NEW.status, NEW.priority, NEW.category, 1)
+                    ON CONFLICT (organization_id, status, priority, category)
+                    DO UPDATE SET ticket_count = ticket_stats_rollup.ticket_count + 1;
+                END IF;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("LOCK TABLE tickets IN SHARE MODE")
+    op.execute("""
+        CREATE TRIGGER tickets_stats_rollup_trigger
+        AFTER INSERT OR DELETE OR UPDATE OF organization_id, status, priority, category, is_deleted ON tickets
+        FOR EACH ROW EXECUTE FUNCTION tickets_stats_rollup_update()
+    """)
+    op.execute("""
+        INSERT INTO ticket_stats_rollup (organization_id, status, priority, category, ticket_count)
+        SELECT organization_id, status, priority, category, count(*)
+        FROM tickets
+        WHERE is_deleted = false
+        GROUP BY organization_id, status, priority, category
+    """)
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_tickets_org_open_sla',
+            'tickets',
+            ['organization_id', 'sla_due_date'],
+            unique=False,
+            postgresql_where=sa.text("is_deleted = false AND status IN ('new', 'open', 'in_progress')"),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_tickets_org_open_sla', table_name='tickets', postgresql_concurrently=True)
+
+    op.execute("DROP TRIGGER IF EXISTS tickets_stats_rollup_trigger ON tickets")
+    op.execute("DROP FUNCTION IF EXISTS tickets_stats_rollup_update()")
+    op.drop_table('ticket_stats_rollup')
@@ -0,0 +1,25 @@
+"""api_token_usage_count
+
+Revision ID: 3c9e4a7b1f58
+Revises: 8b3e5f7a2d14
+Create Date: 2026-10-16 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9e4a7b1f58'
+down_revision = '8b3e5f7a2d14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Request counter for API tokens, written by the batched usage flush."""
+    op.add_column('api_tokens', sa.Column('usage_count', sa.Integer(), server_default='0', nullable=False, comment='Number of requests authenticated with this token'))
+
+
+def downgrade() -> None:
+    op.drop_column('api_tokens', 'usage_count')
@@ -0,0 +1,52 @@
+"""content_addressed_file_dedup
+
+Revision ID: 3f9a6c2d8b17
+Revises: 7c1e5b2a9d43
+Create Date: 2026-10-16 11:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a6c2d8b17'
+down_revision = '7c1e5b2a9d43'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Allow duplicate uploads to share one content-addressed blob.
+
+    file_hash is no longer globally unique (the same content may be uploaded by
+    different users and organizations) and file_path may be shared by several
+    rows pointing at the same blob. Dedup lookups use (organization_id, file_hash).
+    """
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_files_org_hash',
+            'files',
+            ['organization_id', 'file_hash'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.drop_index('ix_files_file_hash', table_name='files', postgresql_concurrently=True)
+        op.drop_index('ix_files_file_path', table_name='files', postgresql_concurrently=True)
+        op.create_index(
+            'ix_files_file_path',
+            'files',
+            ['file_path'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    # Fails if duplicate uploads have been stored since the upgrade
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_files_file_path', table_name='files', postgresql_concurrently=True)
+        op.create_index('ix_files_file_path', 'files', ['file_path'], unique=True, postgresql_concurrently=True)
+        op.create_index('ix_files_file_hash', 'files', ['file_hash'], unique=True, postgresql_concurrently=True)
+        op.drop_index('idx_files_org_hash', table_name='files', postgresql_concurrently=True)
@@ -0,0 +1,50 @@
+"""thread_message_full_text_search
+
+Revision ID: 5b8f3e1d7a26
+Revises: 8d4e2b7a1c95
+Create Date: 2026-10-16 15:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8f3e1d7a26'
+down_revision = '8d4e2b7a1c95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Full-text and trigram search indexes for thread titles and message content.
+    
+    Expression indexes are used instead of stored tsvector columns: adding a
+    generated column rewrites the table under an exclusive lock, while
+    CREATE INDEX CONCURRENTLY indexes existing rows online. The expressions
+    must stay identical to the ones in app/services/thread_service.py.
+    """
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_messages_content_fts "
+            "ON messages USING gin (to_tsvector('english'::regconfig, content))"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_threads_title_fts "
+            "ON threads USING gin (to_tsvector('english'::regconfig, coalesce(title, '')))"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_threads_title_trgm "
+            "ON threads USING gin (title gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    # pg_trgm is left installed; other objects may depend on it
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_threads_title_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_threads_title_fts")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_messages_content_fts")
@@ -0,0 +1,48 @@
+"""unique_file_hash_per_uploader
+
+Revision ID: 6a2d9c4e8f17
+Revises: 3c9e4a7b1f58
+Create Date: 2026-10-16 23:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a2d9c4e8f17'
+down_revision = '3c9e4a7b1f58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    One file row per (organization, uploader, content hash).
+
+    Upload dedup looks a row up by these three columns; without a unique index
+    two concurrent uploads of the same content could both insert one.
+    """
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT count(*) FROM (SELECT 1 FROM files GROUP BY organization_id, uploaded_by_id, file_hash "
+        "HAVING count(*) > 1) AS duplicate_groups"
+    )).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} (organization_id, uploaded_by_id, file_hash) groups have more than one file row; "
+            "merge or delete the extra rows before upgrading"
+        )
+    
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_files_org_uploader_hash',
+            'files',
+            ['organization_id', 'uploaded_by_id', 'file_hash'],
+            unique=True,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_files_org_uploader_hash', table_name='files', postgresql_concurrently=True)
@@ -0,0 +1,51 @@
+"""agent_task_leases
+
+Revision ID: 6f2b8d1e4c93
+Revises: d4a1e8c3f672
+Create Date: 2026-10-16 18:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f2b8d1e4c93'
+down_revision = 'd4a1e8c3f672'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Worker leases for SKIP LOCKED task claiming, with partial indexes for claim and sweep."""
+    op.add_column('agent_tasks', sa.Column('lease_owner', sa.String(length=255), nullable=True, comment='Claim token of the worker holding the task'))
+    op.add_column('agent_tasks', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True, comment="When the worker's claim lapses and the task can be reclaimed"))
+    op.add_column('agent_tasks', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True, comment='Last heartbeat from the worker holding the task'))
+    
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_agent_tasks_claimable',
+            'agent_tasks',
+            ['priority', 'scheduled_at'],
+            unique=False,
+            postgresql_where=sa.text("status = 'pending'"),
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'idx_agent_tasks_lease',
+            'agent_tasks',
+            ['lease_expires_at'],
+            unique=False,
+            postgresql_where=sa.text("status IN ('assigned', 'processing')"),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_agent_tasks_lease', table_name='agent_tasks', postgresql_concurrently=True)
+        op.drop_index('idx_agent_tasks_claimable', table_name='agent_tasks', postgresql_concurrently=True)
+    
+    op.drop_column('agent_tasks', 'heartbeat_at')
+    op.drop_column('agent_tasks', 'lease_expires_at')
+    op.drop_column('agent_tasks', 'lease_owner')
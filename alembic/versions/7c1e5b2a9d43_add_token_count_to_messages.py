@@ -0,0 +1,42 @@
+"""add_token_count_to_messages
+
+Revision ID: 7c1e5b2a9d43
+Revises: db23781d1fd2
+Create Date: 2026-10-16 09:12:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e5b2a9d43'
+down_revision = 'db23781d1fd2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Persist per-message token counts for context window accounting.
+    
+    Existing rows keep NULL token_count; the context window query falls back to a
+    character-based estimate for them, so no blocking backfill is required.
+    """
+    op.add_column('messages', sa.Column('token_count', sa.Integer(), nullable=True, comment='Token count of role + content, computed at insert time'))
+    
+    # Supports the newest-first running token total per thread
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_messages_thread_created_at',
+            'messages',
+            ['thread_id', 'created_at'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_messages_thread_created_at', table_name='messages', postgresql_concurrently=True)
+    op.drop_column('messages', 'token_count')
@@ -0,0 +1,58 @@
+"""task_ready_notifications
+
+Revision ID: 8b3e5f7a2d14
+Revises: 6f2b8d1e4c93
+Create Date: 2026-10-16 19:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8b3e5f7a2d14'
+down_revision = '6f2b8d1e4c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """NOTIFY triggers that wake the task dispatcher when agent tasks and files become ready."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION agent_tasks_notify_ready() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' AND NEW.scheduled_at <= clock_timestamp() THEN
+                RETURN NULL;
+            END IF;
+            PERFORM pg_notify('agent_task_ready', to_char(NEW.scheduled_at AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"'));
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER agent_tasks_ready_trigger
+        AFTER INSERT OR UPDATE OF status, scheduled_at ON agent_tasks
+        FOR EACH ROW WHEN (NEW.status = 'pending')
+        EXECUTE FUNCTION agent_tasks_notify_ready()
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION files_notify_ready() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('file_ready', NEW.id::text);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER files_ready_trigger
+        AFTER UPDATE OF status ON files
+        FOR EACH ROW WHEN (NEW.status = 'UPLOADED' AND OLD.status IS DISTINCT FROM NEW.status AND NOT NEW.is_deleted)
+        EXECUTE FUNCTION files_notify_ready()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS files_ready_trigger ON files")
+    op.execute("DROP FUNCTION IF EXISTS files_notify_ready()")
+    op.execute("DROP TRIGGER IF EXISTS agent_tasks_ready_trigger ON agent_tasks")
+    op.execute("DROP FUNCTION IF EXISTS agent_tasks_notify_ready()")
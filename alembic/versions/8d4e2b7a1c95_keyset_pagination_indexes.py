@@ -0,0 +1,70 @@
+"""keyset_pagination_indexes
+
+Revision ID: 8d4e2b7a1c95
+Revises: 3f9a6c2d8b17
+Create Date: 2026-10-16 14:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4e2b7a1c95'
+down_revision = '3f9a6c2d8b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Composite indexes matching the keyset pagination sort keys.
+    
+    The (thread_id, created_at, id) index supersedes (thread_id, created_at),
+    which only served the same prefix.
+    """
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_threads_agent_user_updated_id',
+            'threads',
+            ['agent_id', 'user_id', 'updated_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'idx_messages_thread_created_id',
+            'messages',
+            ['thread_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.drop_index('idx_messages_thread_created_at', table_name='messages', postgresql_concurrently=True)
+        op.create_index(
+            'idx_tickets_created_at_id',
+            'tickets',
+            ['created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'idx_tickets_updated_at_id',
+            'tickets',
+            ['updated_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_tickets_updated_at_id', table_name='tickets', postgresql_concurrently=True)
+        op.drop_index('idx_tickets_created_at_id', table_name='tickets', postgresql_concurrently=True)
+        op.create_index(
+            'idx_messages_thread_created_at',
+            'messages',
+            ['thread_id', 'created_at'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.drop_index('idx_messages_thread_created_id', table_name='messages', postgresql_concurrently=True)
+        op.drop_index('idx_threads_agent_user_updated_id', table_name='threads', postgresql_concurrently=True)
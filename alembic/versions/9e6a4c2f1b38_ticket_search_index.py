@@ -0,0 +1,120 @@
+"""ticket_search_index
+
+Revision ID: 9e6a4c2f1b38
+Revises: 5b8f3e1d7a26
+Create Date: 2026-10-16 16:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9e6a4c2f1b38'
+down_revision = '5b8f3e1d7a26'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+SEARCH_VECTOR_EXPRESSION = """
+    setweight(to_tsvector('english'::regconfig, coalesce({prefix}title, '')), 'A') ||
+    setweight(to_tsvector('english'::regconfig, coalesce({prefix}description, '')), 'B') ||
+    setweight(to_tsvector('english'::regconfig, coalesce({prefix}subcategory, '')), 'C')
+"""
+
+
+def upgrade() -> None:
+    """
+    Weighted ticket search vector, organization-first indexes.
+    
+    Online rollout for large tables:
+    1. Add a nullable column (metadata-only, no rewrite)
+    2. Install the trigger so new writes are indexed
+    3. Backfill existing rows in small autocommitted batches, skipping locked
+       rows first and then waiting for the stragglers
+    4. Build indexes CONCURRENTLY
+    """
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    op.add_column(
+        'tickets',
+        sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True, comment='Full-text search vector maintained by trigger')
+    )
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION tickets_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR_EXPRESSION.format(prefix='NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER tickets_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, description, subcategory ON tickets
+        FOR EACH ROW EXECUTE FUNCTION tickets_search_vector_update()
+    """)
+    
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        backfill = f"""
+            UPDATE tickets SET search_vector = {SEARCH_VECTOR_EXPRESSION.format(prefix='')}
+            WHERE id IN (
+                SELECT id FROM tickets WHERE search_vector IS NULL
+                LIMIT {BACKFILL_BATCH_SIZE} FOR UPDATE {{lock_mode}}
+            )
+        """
+        # Skip rows held by live writers so batches never queue behind them...
+        while bind.execute(sa.text(backfill.format(lock_mode='SKIP LOCKED'))).rowcount:
+            pass
+        # ...then wait for the ones that were skipped. The trigger only fires when
+        # title/description/subcategory change, so other writes leave them NULL.
+        while bind.execute(sa.text(backfill.format(lock_mode=''))).rowcount:
+            pass
+        
+        op.create_index(
+            'idx_tickets_org_search',
+            'tickets',
+            ['organization_id', 'search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'idx_tickets_org_created_id',
+            'tickets',
+            ['organization_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'idx_tickets_org_updated_id',
+            'tickets',
+            ['organization_id', 'updated_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'idx_tickets_org_status',
+            'tickets',
+            ['organization_id', 'status'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+        # Superseded by the organization-first keyset indexes
+        op.drop_index('idx_tickets_created_at_id', table_name='tickets', postgresql_concurrently=True)
+        op.drop_index('idx_tickets_updated_at_id', table_name='tickets', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('idx_tickets_updated_at_id', 'tickets', ['updated_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.create_index('idx_tickets_created_at_id', 'tickets', ['created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('idx_tickets_org_status', table_name='tickets', postgresql_concurrently=True)
+        op.drop_index('idx_tickets_org_updated_id', table_name='tickets', postgresql_concurrently=True)
+        op.drop_index('idx_tickets_org_created_id', table_name='tickets', postgresql_concurrently=True)
+        op.drop_index('idx_tickets_org_search', table_name='tickets', postgresql_concurrently=True)
+    
+    op.execute("DROP TRIGGER IF EXISTS tickets_search_vector_trigger ON tickets")
+    op.execute("DROP FUNCTION IF EXISTS tickets_search_vector_update()")
+    op.drop_column('tickets', 'search_vector')
@@ -0,0 +1,49 @@
+"""orphan_file_cleanup_indexes
+
+Revision ID: d4a1e8c3f672
+Revises: 2c7d9f4a6e51
+Create Date: 2026-10-16 18:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a1e8c3f672'
+down_revision = '2c7d9f4a6e51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """
+    Indexes for the set-based orphaned file cleanup.
+    
+    The attachment GIN indexes were dropped by 2ffad472666e because they are
+    not declared on the models (SQLite test schemas can't create them); the
+    cleanup's containment probes on (attachments::jsonb) depend on them.
+    """
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_messages_attachments "
+            "ON messages USING gin ((attachments::jsonb) jsonb_path_ops)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tickets_attachments "
+            "ON tickets USING gin ((attachments::jsonb) jsonb_path_ops)"
+        )
+        op.create_index(
+            'idx_files_org_id',
+            'files',
+            ['organization_id', 'id'],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_files_org_id', table_name='files', postgresql_concurrently=True)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_tickets_attachments")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_messages_attachments")
@@ -14,7 +14,7 @@ from app.database import get_db_session
 from app.schemas.chat import (
     ThreadResponse, CreateThreadRequest, MessageResponse, SendMessageRequest, 
     GenerateTitleResponse, UpdateThreadRequest, ThreadUpdateResponse,
-    ThreadListResponse, MessageListResponse
+    ThreadListResponse, MessageListResponse, ThreadSearchResponse, ThreadSearchResultResponse
 )
 from app.models.user import User
 from app.models.chat import Message
@@ -22,6 +22,7 @@ from app.services.thread_service import thread_service
 from app.services.ai_chat_service import ai_chat_service
 from app.middleware.auth_middleware import get_current_user
 from app.services.auth_provider import decode_jwt_token
+from app.utils.pagination import InvalidCursorError
 
 router = APIRouter(prefix="/chat", tags=["Agent-Centric Chat"])
 logger = logging.getLogger(__name__)
@@ -32,8 +33,10 @@ async def list_threads(
     agent_id: UUID = Path(..., description="Agent ID"),
     archived: bool = Query(False, description="Filter by archive status"),
     q: Optional[str] = Query(None, description="Search threads by title and content"),
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
     page_size: int = Query(20, ge=1, le=100, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous response's next_cursor"),
+    include_total: bool = Query(False, description="Count all matching threads on cursor pages"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session)
 ):
@@ -42,20 +45,33 @@ async def list_threads(
     logger.info(f"[CHAT_API] Listing threads for agent {agent_id}, user: {current_user.id}")
     
     try:
-        # Calculate offset from page number
-        offset = (page - 1) * page_size
-        
-        # Get threads for the agent and user
         user_id = str(current_user.id)
-        threads, total = await thread_service.list_threads(
-            db=db,
-            agent_id=agent_id,
-            user_id=user_id,
-            offset=offset,
-            limit=page_size,
-            archived=archived,
-            query=q
-        )
+        next_cursor = None
+        
+        if cursor or page == 1:
+            # Keyset pagination: first page also returns the total for page-based clients
+            thread_page = await thread_service.list_threads_page(
+                db=db,
+                agent_id=agent_id,
+                user_id=user_id,
+                cursor=cursor,
+                limit=page_size,
+                archived=archived,
+                query=q,
+                include_total=include_total or not cursor
+            )
+            threads, total, next_cursor = thread_page.items, thread_page.total, thread_page.next_cursor
+        else:
+            # Legacy page-number pagination
+            threads, total = await thread_service.list_threads(
+                db=db,
+                agent_id=agent_id,
+                user_id=user_id,
+                offset=(page - 1) * page_size,
+                limit=page_size,
+                archived=archived,
+                query=q
+            )
         
         logger.debug(f"[CHAT_API] Found {len(threads)} threads for agent {agent_id}")
         
@@ -65,11 +81,14 @@ async def list_threads(
         return ThreadListResponse(
             threads=thread_responses,
             total=total,
-            page=page,
+            page=None if cursor else page,
             page_size=page_size,
-            agent_id=agent_id
+            agent_id=agent_id,
+            next_cursor=next_cursor
         )
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"[CHAT_API] Error listing threads for agent {agent_id}: {e}")
         if "not found" in str(e).lower() or "not active" in str(e).lower():
@@ -77,6 +96,49 @@ async def list_threads(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/{agent_id}/threads/search", response_model=ThreadSearchResponse)
+async def search_threads(
+    agent_id: UUID = Path(..., description="Agent ID"),
+    q: str = Query(..., min_length=1, max_length=500, description="Search query (supports quoted phrases, OR and -exclusions)"),
+    archived: Optional[bool] = Query(None, description="Filter by archive status (all threads when omitted)"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """Search the user's threads for an agent by title and message content, ranked with highlighted snippets"""
+    
+    logger.info(f"[CHAT_API] Searching threads for agent {agent_id}, user: {current_user.id}")
+    
+    try:
+        results = await thread_service.search_threads(
+            db=db,
+            agent_id=agent_id,
+            user_id=str(current_user.id),
+            query=q,
+            limit=limit,
+            archived=archived
+        )
+        
+        return ThreadSearchResponse(
+            results=[
+                ThreadSearchResultResponse(
+                    thread=ThreadResponse.model_validate(result.thread.__dict__),
+                    rank=result.rank,
+                    title_highlight=result.title_highlight,
+                    matched_message_id=result.matched_message_id,
+                    snippet=result.snippet
+                )
+                for result in results
+            ],
+            query=q,
+            agent_id=agent_id
+        )
+        
+    except Exception as e:
+        logger.error(f"[CHAT_API] Error searching threads for agent {agent_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.post("/{agent_id}/threads", response_model=ThreadResponse)
 async def create_thread(
     agent_id: UUID = Path(..., description="Agent ID"),
@@ -431,8 +493,9 @@ async def generate_thread_title(
 async def get_thread_messages(
     agent_id: UUID = Path(..., description="Agent ID"),
     thread_id: UUID = Path(..., description="Thread ID"),
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (ignored when cursor is given)"),
     page_size: int = Query(100, ge=1, le=200, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous response's next_cursor"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session)
 ):
@@ -441,19 +504,30 @@ async def get_thread_messages(
     logger.info(f"[CHAT_API] Getting messages for thread {thread_id}, agent {agent_id}, user: {current_user.id}")
     
     try:
-        # Calculate offset from page number
-        offset = (page - 1) * page_size
+        user_id = str(current_user.id)
+        next_cursor = None
         
         # Get messages with ownership validation
-        user_id = str(current_user.id)
-        messages = await thread_service.get_thread_messages(
-            db=db,
-            agent_id=agent_id,
-            thread_id=thread_id,
-            user_id=user_id,
-            offset=offset,
-            limit=page_size
-        )
+        if cursor or page == 1:
+            message_page = await thread_service.get_thread_messages_page(
+                db=db,
+                agent_id=agent_id,
+                thread_id=thread_id,
+                user_id=user_id,
+                cursor=cursor,
+                limit=page_size
+            )
+            messages = message_page.items if message_page else None
+            next_cursor = message_page.next_cursor if message_page else None
+        else:
+            messages = await thread_service.get_thread_messages(
+                db=db,
+                agent_id=agent_id,
+                thread_id=thread_id,
+                user_id=user_id,
+                offset=(page - 1) * page_size,
+                limit=page_size
+            )
         
         if messages is None:  # Thread not found
             logger.warning(f"[CHAT_API] Thread {thread_id} not found for agent {agent_id}")
@@ -467,11 +541,14 @@ async def get_thread_messages(
         return MessageListResponse(
             messages=message_responses,
             total=len(messages),  # Note: This is page total, not overall total
-            thread_id=thread_id
+            thread_id=thread_id,
+            next_cursor=next_cursor
         )
         
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"[CHAT_API] Error getting messages for thread {thread_id}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
@@ -3,40 +3,63 @@
 File Cleanup API endpoints for administrative tasks
 """
 
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db_session
 from app.middleware.auth_middleware import get_current_user
 from app.models.user import User
-from app.services.file_cleanup_service import file_cleanup_service
+from app.services.file_cleanup_service import OrphanCleanupReport, file_cleanup_service
+from app.utils.pagination import InvalidCursorError
 
 router = APIRouter(prefix="/admin/file-cleanup", tags=["File Cleanup"])
 
 
+def _report_details(report: OrphanCleanupReport) -> dict:
+    return {
+        "files_scanned": report.files_scanned,
+        "orphaned_bytes": report.orphaned_bytes,
+        "batches": report.batches,
+        "completed": report.completed,
+        "next_cursor": report.next_cursor,
+    }
+
+
 @router.post("/orphaned-files/scan")
 async def scan_orphaned_files(
+    cursor: Optional[str] = Query(None, description="next_cursor of an unfinished scan to resume from"),
+    batch_size: Optional[int] = Query(None, ge=1, le=10000, description="Files checked per batch"),
+    max_batches: Optional[int] = Query(None, ge=1, description="Stop after this many batches"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
     Scan for orphaned files that are no longer referenced by any thread or ticket.
-    This is a dry-run operation that only counts orphaned files without deleting them.
+    This is a dry-run operation that reports orphaned files without deleting them.
     """
     try:
-        orphaned_count = await file_cleanup_service.cleanup_orphaned_files(
+        report = await file_cleanup_service.scan_orphaned_files(
             db=db,
             organization_id=current_user.organization_id,
-            dry_run=True
+            dry_run=True,
+            cursor=cursor,
+            batch_size=batch_size,
+            max_batches=max_batches
         )
         
         return {
             "message": "Orphaned file scan completed",
             "organization_id": str(current_user.organization_id),
-            "orphaned_files_found": orphaned_count,
+            "orphaned_files_found": report.orphaned_files,
+            "orphaned_files_sample": report.orphan_samples,
+            **_report_details(report),
             "action": "scan_only"
         }
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to scan orphaned files: {str(e)}")
 
@@ -44,12 +67,18 @@ async def scan_orphaned_files(
 @router.delete("/orphaned-files/cleanup")
 async def cleanup_orphaned_files(
     confirm: bool = Query(False, description="Must be True to actually delete files"),
+    cursor: Optional[str] = Query(None, description="next_cursor of an unfinished cleanup to resume from"),
+    batch_size: Optional[int] = Query(None, ge=1, le=10000, description="Files checked per batch"),
+    max_batches: Optional[int] = Query(None, ge=1, description="Stop after this many batches"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
     Delete orphaned files that are no longer referenced by any thread or ticket.
     Requires confirmation parameter to prevent accidental deletion.
+    
+    Files are soft-deleted and their stored content is kept, so orphaned_bytes
+    reports the size of the orphaned files, not storage freed by the run.
     """
     if not confirm:
         raise HTTPException(
@@ -58,18 +87,24 @@ async def cleanup_orphaned_files(
         )
     
     try:
-        deleted_count = await file_cleanup_service.cleanup_orphaned_files(
+        report = await file_cleanup_service.scan_orphaned_files(
             db=db,
             organization_id=current_user.organization_id,
-            dry_run=False
+            dry_run=False,
+            cursor=cursor,
+            batch_size=batch_size,
+            max_batches=max_batches
         )
         
         return {
             "message": "Orphaned file cleanup completed",
             "organization_id": str(current_user.organization_id),
-            "files_deleted": deleted_count,
+            "files_deleted": report.files_deleted,
+            **_report_details(report),
             "action": "cleanup_performed"
         }
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to cleanup orphaned files: {str(e)}")
\ No newline at end of file
@@ -6,7 +6,7 @@ Implements the file attachment system according to PRP specifications
 
 import logging
 import urllib.parse
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
 from fastapi.responses import StreamingResponse
@@ -14,6 +14,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.middleware.auth_middleware import get_current_user
 from app.database import get_db_session
+from app.config.settings import get_settings
 from app.models.user import User
 from app.models.file import File as FileModel, FileStatus, FileType
 from app.schemas.file import (
@@ -57,6 +58,71 @@ def build_file_url(request: Request, file_id: UUID, filename: str) -> str:
     return f"{base_url}/api/v1/files/{file_id}/storage/{filename}"
 
 
+def parse_range_header(range_header: Optional[str], file_size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range "bytes=" Range header into an inclusive (start, end)
+    
+    Returns None when the whole file should be served (no header, or a form we
+    don't handle such as multiple ranges). Raises 416 for unsatisfiable ranges.
+    """
+    if not range_header:
+        return None
+    
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = min(int(end_text), file_size - 1) if end_text else file_size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(file_size - int(end_text), 0)
+            end = file_size - 1
+    except ValueError:
+        return None
+    
+    if start > end or start >= file_size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+    return start, end
+
+
+async def stream_file_response(
+    file_service: FileService,
+    file_obj: FileModel,
+    request: Request,
+    db: AsyncSession
+) -> StreamingResponse:
+    """Stream a file's content, honouring a single byte Range with 206 Partial Content"""
+    byte_range = parse_range_header(request.headers.get("range"), file_obj.file_size)
+    
+    # Open a chunked stream from storage (content is never fully buffered)
+    file_stream = await file_service.open_file_stream(file_obj, byte_range=byte_range)
+    
+    # Count a download once, not for every range request of a resumed/seeking client
+    if byte_range is None or byte_range[0] == 0:
+        file_obj.record_download()
+        await db.commit()
+    
+    headers = {
+        "Content-Disposition": get_content_disposition(file_obj.mime_type, file_obj.filename),
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(file_obj.file_size)
+    }
+    if byte_range is None:
+        return StreamingResponse(file_stream, media_type=file_obj.mime_type, headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{file_obj.file_size}"
+    return StreamingResponse(file_stream, status_code=206, media_type=file_obj.mime_type, headers=headers)
+
+
 @router.post("/upload", response_model=FileUploadResponse)
 async def upload_file(
     request: Request,
@@ -71,38 +137,48 @@ async def upload_file(
     Files are uploaded independently and can be associated with tickets/threads later
     """
     try:
-        # Read file content
-        file_content = await file.read()
-        logger.info(f"File upload started: {file.filename}, size: {len(file_content)} bytes")
+        logger.info(f"File upload started: {file.filename}, size: {file.size} bytes")
         
         # Basic validation
         if not file.filename:
             raise HTTPException(status_code=400, detail="Filename is required")
         
-        if len(file_content) == 0:
+        # Read the first chunk up front so empty uploads are rejected before touching storage
+        chunk_size = get_settings().upload_chunk_size
+        first_chunk = await file.read(chunk_size)
+        if not first_chunk:
             raise HTTPException(status_code=400, detail="File cannot be empty")
         
+        async def file_chunks():
+            # The spooled upload is streamed to storage chunk by chunk
+            chunk = first_chunk
+            while chunk:
+                yield chunk
+                chunk = await file.read(chunk_size)
+        
         # Initialize services
         file_service = FileService()
         
         # Create file record
         logger.info(f"Creating file record for {file.filename}")
-        file_obj = await file_service.create_file_record(
+        file_obj = await file_service.create_file_record_from_stream(
             db=db,
             filename=file.filename,
             mime_type=file.content_type or "application/octet-stream",
-            file_size=len(file_content),
-            file_content=file_content,
+            chunks=file_chunks(),
             uploaded_by_id=current_user.id,
             organization_id=current_user.organization_id,
             description=description
         )
         logger.info(f"File record created successfully: {file_obj.id}")
         
-        # Schedule Celery processing task
+        # Schedule Celery processing task (duplicates of processed content are already complete)
         try:
-            task_result = process_file_upload.delay(str(file_obj.id))
-            logger.info(f"Enqueued file processing task for file {file_obj.id}, task_id: {task_result.id}")
+            if file_obj.status == FileStatus.PROCESSED:
+                logger.info(f"File {file_obj.id} reused existing extraction results, skipping processing")
+            else:
+                task_result = process_file_upload.delay(str(file_obj.id))
+                logger.info(f"Enqueued file processing task for file {file_obj.id}, task_id: {task_result.id}")
         except ConnectionError as conn_error:
             logger.error(f"Celery connection error for file {file_obj.id}: {conn_error}")
             # Don't fail the upload, just log the error
@@ -153,15 +229,6 @@ async def upload_file(
         raise HTTPException(status_code=400, detail="File upload failed")
     except Exception as e:
         logger.error(f"File upload failed: {e}")
-        
-        # Check for duplicate file hash (unique constraint violation) - fallback for edge cases
-        if "duplicate key value violates unique constraint" in str(e) and "file_hash" in str(e):
-            raise HTTPException(
-                status_code=409, 
-                detail="File already exists"
-            )
-        
-        # Generic server error for other issues
         raise HTTPException(status_code=500, detail="File upload failed")
 
 
@@ -207,6 +274,7 @@ async def get_file_metadata(
 @router.get("/{file_id}/content")
 async def download_file_content(
     file_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_db_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -229,26 +297,12 @@ async def download_file_content(
         raise HTTPException(status_code=403, detail="Access denied")
     
     try:
-        # Get file content from storage
-        file_content = await file_service.get_file_content(db, file_id)
-        
-        # Record download
-        file_obj.record_download()
-        await db.commit()
-        
-        # Return streaming response
-        def generate_content():
-            yield file_content
-        
-        return StreamingResponse(
-            generate_content(),
-            media_type=file_obj.mime_type,
-            headers={
-                "Content-Disposition": get_content_disposition(file_obj.mime_type, file_obj.filename),
-                "Content-Length": str(file_obj.file_size)
-            }
-        )
-        
+        return await stream_file_response(file_service, file_obj, request, db)
+    except HTTPException:
+        raise
+    except FileNotFoundError:
+        logger.error(f"Stored content missing for file {file_id} ({file_obj.file_path})")
+        raise HTTPException(status_code=404, detail="File content not found")
     except Exception as e:
         logger.error(f"File download failed for {file_id}: {e}")
         raise HTTPException(status_code=500, detail="File download failed")
@@ -258,6 +312,7 @@ async def download_file_content(
 async def serve_file_with_filename(
     file_id: UUID,
     filename: str,
+    request: Request,
     db: AsyncSession = Depends(get_db_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -282,29 +337,12 @@ async def serve_file_with_filename(
         raise HTTPException(status_code=403, detail="Access denied")
     
     try:
-        # Get file content from storage
-        file_content = await file_service.get_file_content(db, file_id)
-        
-        # Record download
-        file_obj.record_download()
-        await db.commit()
-        
-        # Determine Content-Disposition based on file type
-        content_disposition = get_content_disposition(file_obj.mime_type, file_obj.filename)
-        
-        # Return streaming response
-        def generate_content():
-            yield file_content
-        
-        return StreamingResponse(
-            generate_content(),
-            media_type=file_obj.mime_type,
-            headers={
-                "Content-Disposition": content_disposition,
-                "Content-Length": str(file_obj.file_size)
-            }
-        )
-        
+        return await stream_file_response(file_service, file_obj, request, db)
+    except HTTPException:
+        raise
+    except FileNotFoundError:
+        logger.error(f"Stored content missing for file {file_id} ({file_obj.file_path})")
+        raise HTTPException(status_code=404, detail="File content not found")
     except Exception as e:
         logger.error(f"Enhanced file serving failed for {file_id}: {e}")
         raise HTTPException(status_code=500, detail="File serving failed")
@@ -337,8 +375,8 @@ async def delete_file(
         from app.services.task_cancellation_service import TaskCancellationService
         task_canceller = TaskCancellationService()
         
-        # Cancel processing if file is being processed
-        if file_obj.status == FileStatus.PROCESSING:
+        # Cancel processing if file is queued or being processed
+        if file_obj.status in (FileStatus.UPLOADED, FileStatus.PROCESSING):
             cancellation_result = task_canceller.cancel_file_processing_tasks(str(file_id))
             logger.info(f"Task cancellation for file {file_id}: {cancellation_result}")
         
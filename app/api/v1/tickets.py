@@ -3,6 +3,7 @@
 Ticket API endpoints
 """
 
+from typing import Any, Dict, Optional
 from uuid import UUID
 from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query, status
@@ -18,10 +19,11 @@ from app.schemas.ticket import (
     TicketSortParams,
     TicketAICreateRequest,
     TicketAICreateResponse,
-    TicketStatsResponse
+    TicketStatsResponse,
+    TicketSearchResponse
 )
 from app.schemas.base import PaginationParams, PaginatedResponse
-from app.services.ticket_service import ticket_service
+from app.services.ticket_service import ticket_service, KEYSET_SORT_FIELDS
 from app.services.ai_service import ai_service
 from app.middleware.auth_middleware import get_current_user
 from app.models.user import User
@@ -32,52 +34,77 @@ router = APIRouter(prefix="/tickets")
 # Helper function removed - detailed file info should be fetched via GET /api/v1/files/{file_id}
 
 
+def build_ticket_filters(search_params: TicketSearchParams) -> Dict[str, Any]:
+    """Convert search params to the ticket service filters dict"""
+    filters = {}
+    if search_params.q:
+        filters['search'] = search_params.q
+    if search_params.status:
+        filters['status'] = [s.value for s in search_params.status]
+    if search_params.category:
+        filters['category'] = [c.value for c in search_params.category]
+    if search_params.priority:
+        filters['priority'] = [p.value for p in search_params.priority]
+    if search_params.department:
+        filters['department'] = search_params.department
+    if search_params.created_by_id:
+        filters['created_by_id'] = search_params.created_by_id
+    if search_params.assigned_to_id:
+        filters['assigned_to_id'] = search_params.assigned_to_id
+    if search_params.is_overdue is not None:
+        filters['is_overdue'] = search_params.is_overdue
+    
+    # Add date filters
+    if search_params.created_after:
+        filters['created_after'] = search_params.created_after
+    if search_params.created_before:
+        filters['created_before'] = search_params.created_before
+    
+    return filters
+
+
 @router.get("/", response_model=PaginatedResponse)
 async def list_tickets(
     pagination: PaginationParams = Depends(),
     search_params: TicketSearchParams = Depends(),
     sort_params: TicketSortParams = Depends(),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous response's next_cursor"),
+    include_total: bool = Query(False, description="Count all matching tickets on cursor pages"),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session)
 ):
     """
     List tickets with search, filtering, and pagination.
+    
+    Pass the returned next_cursor as ?cursor= for constant-cost deep paging
+    (created_at and updated_at sorts).
     """
     try:
-        # Convert search params to filters dict
-        filters = {}
-        if search_params.q:
-            filters['search'] = search_params.q
-        if search_params.status:
-            filters['status'] = [s.value for s in search_params.status]
-        if search_params.category:
-            filters['category'] = [c.value for c in search_params.category]
-        if search_params.priority:
-            filters['priority'] = [p.value for p in search_params.priority]
-        if search_params.department:
-            filters['department'] = search_params.department
-        if search_params.created_by_id:
-            filters['created_by_id'] = search_params.created_by_id
-        if search_params.assigned_to_id:
-            filters['assigned_to_id'] = search_params.assigned_to_id
-        if search_params.is_overdue is not None:
-            filters['is_overdue'] = search_params.is_overdue
-        
-        # Add date filters
-        if search_params.created_after:
-            filters['created_after'] = search_params.created_after
-        if search_params.created_before:
-            filters['created_before'] = search_params.created_before
-        
-        tickets, total = await ticket_service.list_tickets(
-            db=db,
-            organization_id=current_user.organization_id,
-            offset=pagination.offset,
-            limit=pagination.size,
-            filters=filters,
-            sort_by=sort_params.sort_by,
-            sort_order=sort_params.sort_order
-        )
+        filters = build_ticket_filters(search_params)
+        
+        next_cursor = None
+        if cursor or (pagination.page == 1 and sort_params.sort_by in KEYSET_SORT_FIELDS):
+            ticket_page = await ticket_service.list_tickets_page(
+                db=db,
+                organization_id=current_user.organization_id,
+                cursor=cursor,
+                limit=pagination.size,
+                filters=filters,
+                sort_by=sort_params.sort_by,
+                sort_order=sort_params.sort_order,
+                include_total=include_total or not cursor
+            )
+            tickets, total, next_cursor = ticket_page.items, ticket_page.total, ticket_page.next_cursor
+        else:
+            tickets, total = await ticket_service.list_tickets(
+                db=db,
+                organization_id=current_user.organization_id,
+                offset=pagination.offset,
+                limit=pagination.size,
+                filters=filters,
+                sort_by=sort_params.sort_by,
+                sort_order=sort_params.sort_order
+            )
         
         # Convert Ticket models to TicketDetailResponse
         ticket_responses = []
@@ -85,13 +112,24 @@ async def list_tickets(
             ticket_response = TicketDetailResponse.model_validate(ticket)
             ticket_responses.append(ticket_response)
         
+        if cursor:
+            return PaginatedResponse.create_from_cursor(
+                items=ticket_responses,
+                size=pagination.size,
+                next_cursor=next_cursor,
+                total=total
+            )
+        
         return PaginatedResponse.create(
             items=ticket_responses,
             total=total,
             page=pagination.page,
-            size=pagination.size
+            size=pagination.size,
+            next_cursor=next_cursor
         )
         
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -99,6 +137,51 @@ async def list_tickets(
         )
 
 
+@router.get("/search", response_model=TicketSearchResponse)
+async def search_tickets(
+    pagination: PaginationParams = Depends(),
+    search_params: TicketSearchParams = Depends(),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session)
+):
+    """
+    Ranked full-text ticket search with status, priority and category facet counts.
+    
+    The q parameter is required and supports quoted phrases, OR and -exclusions.
+    """
+    if not search_params.q or not search_params.q.strip():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search query (q) is required")
+    
+    try:
+        filters = build_ticket_filters(search_params)
+        query = filters.pop('search')
+        
+        result = await ticket_service.search_tickets(
+            db=db,
+            organization_id=current_user.organization_id,
+            query=query,
+            filters=filters,
+            offset=pagination.offset,
+            limit=pagination.size
+        )
+        
+        response = TicketSearchResponse.create(
+            items=[TicketDetailResponse.model_validate(ticket) for ticket in result.tickets],
+            total=result.total,
+            page=pagination.page,
+            size=pagination.size
+        )
+        response.facets = result.facets
+        response.ranks = result.ranks
+        return response
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to search tickets: {str(e)}"
+        )
+
+
 @router.post("/", response_model=TicketDetailResponse, status_code=status.HTTP_201_CREATED)
 async def create_ticket(
     ticket_data: TicketCreateRequest,
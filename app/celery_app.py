@@ -18,11 +18,12 @@ celery_app = Celery(
     backend=settings.effective_celery_result_backend,
     include=[
         "app.tasks.file_tasks",
+        # Agent tasks claimed by the task dispatcher must be registered on the workers
+        "app.tasks.agent_tasks",
         # Temporarily disabled for testing
         # "app.tasks.ai_tasks", 
         # "app.tasks.integration_tasks",
         # "app.tasks.notification_tasks",
-        # "app.tasks.agent_tasks"
     ]
 )
 
@@ -38,11 +39,13 @@ celery_app.conf.update(
     # Task routing
     task_routes={
         "app.tasks.file_tasks.*": {"queue": "file_processing"},
+        "app.tasks.agent_tasks.monitor_agent_health": {"queue": "agent_maintenance"},
+        "app.tasks.agent_tasks.cleanup_completed_tasks": {"queue": "agent_maintenance"},
+        "app.tasks.agent_tasks.*": {"queue": "agent_processing"},
         # Temporarily disabled for testing
         # "app.tasks.ai_tasks.*": {"queue": "ai_processing"},
         # "app.tasks.integration_tasks.*": {"queue": "integrations"},
         # "app.tasks.notification_tasks.*": {"queue": "notifications"},
-        # "app.tasks.agent_tasks.*": {"queue": "agent_processing"},
     },
     
     # Task execution settings
@@ -67,10 +70,11 @@ celery_app.conf.update(
     
     # Periodic task schedule
     beat_schedule={
-        # Process pending file uploads every 5 minutes
+        # Safety net for file uploads the dispatcher missed; ready files are
+        # normally queued on upload or by the task dispatcher's notifications
         "process-pending-files": {
             "task": "app.tasks.file_tasks.process_pending_files",
-            "schedule": crontab(minute="*/5"),
+            "schedule": crontab(minute="*/30"),
         },
         
         # Clean up failed uploads every hour
@@ -108,12 +112,12 @@ celery_app.conf.update(
 
 # Import task modules to ensure registration
 try:
-    from app.tasks import file_tasks
+    from app.tasks import file_tasks, agent_tasks
     # Temporarily disabled for testing
-    # from app.tasks import ai_tasks, integration_tasks, notification_tasks, agent_tasks
-    print("✅ File task module imported successfully for Celery registration")
+    # from app.tasks import ai_tasks, integration_tasks, notification_tasks
+    print("✅ File and agent task modules imported successfully for Celery registration")
 except ImportError as e:
-    print(f"⚠️ Failed to import file task module: {e}")
+    print(f"⚠️ Failed to import task modules: {e}")
 
 # Task autodiscovery
 celery_app.autodiscover_tasks()
@@ -42,6 +42,10 @@ class Settings(BaseSettings):
     ai_total_tokens_limit: int = Field(default=5000, description="Default AI total tokens limit per conversation")
     ai_max_iterations: int = Field(default=5, description="Default maximum AI agent iterations")
     
+    # Pydantic AI agent cache (per process)
+    agent_cache_max_size: int = Field(default=256, description="Maximum number of constructed Pydantic AI agents to cache")
+    agent_cache_ttl_seconds: int = Field(default=900, description="Seconds a cached Pydantic AI agent may be reused")
+    
     # JWT Authentication
     secret_key: str = Field(default="your-secret-key-change-in-production", description="JWT secret key")
     jwt_secret_key: str = Field(default="your-jwt-secret-key-change-in-production", description="JWT secret key")
@@ -49,10 +53,35 @@ class Settings(BaseSettings):
     algorithms: List[str] = Field(default=["HS256", "RS256"], description="Allowed JWT algorithms")
     access_token_expire_minutes: int = Field(default=30, description="Access token expiration time")
     
+    # Clerk Session Verification
+    clerk_jwt_key: Optional[str] = Field(default=None, description="Clerk PEM public key; verifies session tokens without fetching the JWKS")
+    clerk_authorized_parties: List[str] = Field(default=[], description="Allowed azp (origin) values for Clerk session tokens; empty allows any")
+    clerk_clock_skew_seconds: int = Field(default=5, description="Leeway for Clerk session token exp/nbf/iat checks")
+    clerk_jwks_refresh_seconds: int = Field(default=3600, description="Seconds before cached Clerk signing keys are refreshed in the background")
+    clerk_jwks_min_refresh_seconds: int = Field(default=30, description="Minimum seconds between JWKS fetches triggered by unknown key IDs")
+    clerk_verified_token_cache_size: int = Field(default=10000, description="Maximum verified Clerk session tokens kept until they expire")
+    clerk_profile_cache_ttl_seconds: int = Field(default=300, description="Seconds a Clerk user profile is reused before refetching")
+    clerk_profile_cache_size: int = Field(default=10000, description="Maximum cached Clerk user profiles")
+    
+    # Identity Cache
+    identity_cache_ttl_seconds: int = Field(default=60, description="Seconds a resolved user/organization is reused in-process")
+    identity_cache_redis_ttl_seconds: int = Field(default=900, description="Seconds a clerk_id -> local user mapping is shared through Redis")
+    identity_cache_size: int = Field(default=10000, description="Maximum identities cached in-process")
+    login_flush_interval_seconds: int = Field(default=60, description="Seconds between batched writes of login tracking")
+    
+    # Principal Cache
+    principal_local_cache_ttl_seconds: int = Field(default=30, description="Seconds a resolved principal is reused in-process before checking Redis")
+    principal_local_cache_size: int = Field(default=10000, description="Maximum principals cached in-process")
+    principal_invalidation_channel: str = Field(default="principal_invalidation", description="Redis pub/sub channel for principal cache invalidation")
+    api_token_usage_flush_seconds: int = Field(default=30, description="Seconds between batched writes of API token last-used times and request counts")
+    
     # File Upload Settings
     max_file_size: int = Field(default=25 * 1024 * 1024, description="Maximum file size in bytes (25MB)", env="MAX_FILE_SIZE_BYTES")
     upload_directory: str = Field(default="uploads", description="Directory for file uploads")
     hard_delete_files: bool = Field(default=True, description="Whether to hard delete files (True) or soft delete (False)")
+    upload_chunk_size: int = Field(default=1024 * 1024, description="Chunk size in bytes for streaming uploads to storage")
+    orphan_file_grace_hours: int = Field(default=24, description="Minimum age in hours before an unreferenced file counts as orphaned")
+    orphan_cleanup_batch_size: int = Field(default=1000, description="Files checked per batch during orphaned file cleanup")
     allowed_file_types: List[str] = Field(
         default=[
             "image/jpeg", "image/png", "image/gif",
@@ -65,6 +94,14 @@ class Settings(BaseSettings):
         description="Allowed MIME types for file uploads"
     )
     
+    # File Extraction Settings
+    extraction_process_workers: int = Field(default=2, description="Process pool size for CPU-bound document/OCR extraction (0 disables the pool)")
+    extraction_max_concurrency: int = Field(default=4, description="Maximum concurrent extraction jobs per worker")
+    extraction_timeout_seconds: float = Field(default=120.0, description="Timeout for a single extraction job in seconds")
+    extraction_process_min_bytes: int = Field(default=256 * 1024, description="Payloads at or above this size run in the process pool; smaller ones run in a thread")
+    pdf_page_batch_size: int = Field(default=8, description="Number of PDF pages extracted per worker job")
+    document_context_max_chars: int = Field(default=200_000, description="Character budget for extracted document text kept for AI context (~4 chars per token); 0 disables the cutoff")
+    
     # Storage Backend Settings
     storage_backend: str = Field(default="local", description="Storage backend (local, s3)")
     
@@ -75,6 +112,11 @@ class Settings(BaseSettings):
     s3_bucket_name: Optional[str] = Field(default=None, description="S3 bucket name for file storage")
     s3_bucket_path: str = Field(default="", description="S3 bucket path prefix")
     cloudfront_domain: Optional[str] = Field(default=None, description="CloudFront domain for CDN URLs")
+    s3_multipart_part_size: int = Field(default=8 * 1024 * 1024, description="Part size for S3 multipart uploads in bytes (minimum 5MB)")
+    s3_endpoint_url: Optional[str] = Field(default=None, description="Custom S3-compatible endpoint URL (e.g. MinIO for local testing)")
+    s3_max_pool_connections: int = Field(default=50, description="Maximum pooled HTTP connections (and I/O threads) for the S3 client")
+    s3_connect_timeout: float = Field(default=5.0, description="S3 connection timeout in seconds")
+    s3_read_timeout: float = Field(default=60.0, description="S3 read timeout in seconds")
     
     # WebSocket Settings
     websocket_heartbeat_interval: int = Field(default=30, description="WebSocket heartbeat interval in seconds")
@@ -85,6 +127,13 @@ class Settings(BaseSettings):
     celery_result_backend: Optional[str] = Field(default=None, description="Celery result backend (defaults to redis_url)")
     celery_worker_concurrency: int = Field(default=4, description="Number of concurrent worker processes")
     celery_worker_prefetch_multiplier: int = Field(default=1, description="Worker prefetch multiplier")
+    agent_task_lease_seconds: int = Field(default=300, description="Seconds a claimed agent task stays leased to its worker without a heartbeat")
+    task_dispatcher_batch_size: int = Field(default=50, description="Agent tasks claimed per dispatcher round")
+    task_dispatcher_sweep_seconds: int = Field(default=900, description="Seconds between the dispatcher's safety-net sweeps for missed work and expired leases")
+    task_dispatcher_sweep_file_limit: int = Field(default=500, description="Maximum stale UPLOADED files one dispatcher sweep re-queues")
+    task_dispatcher_reconnect_max_seconds: int = Field(default=60, description="Maximum backoff before the dispatcher reconnects its LISTEN connection")
+    dispatch_latency_window_minutes: int = Field(default=60, description="Window for the enqueue-to-start latency metric")
+    file_task_registry_ttl_seconds: int = Field(default=86400, description="Seconds a file's task registry entry survives without its tasks finishing")
     
     # Third-party Integration Settings
     salesforce_client_id: Optional[str] = Field(default=None, description="Salesforce client ID")
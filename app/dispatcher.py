@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Task dispatcher process - queues agent tasks and files as they become ready
+
+Run one or more alongside the Celery workers:
+
+    python -m app.dispatcher
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.config.settings import get_settings
+from app.services.task_dispatcher import task_dispatcher
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, task_dispatcher.stop)
+    await task_dispatcher.run()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=getattr(logging, get_settings().log_level.upper(), logging.INFO),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    logger.info("📡 Starting task dispatcher...")
+    asyncio.run(main())
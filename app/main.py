@@ -50,7 +50,7 @@ def setup_logging():
 # Set up logging immediately
 logger = setup_logging()
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
 from fastapi.openapi.utils import get_openapi
@@ -64,6 +64,7 @@ from app.celery_app import celery_app
 
 # Import middleware
 from app.middleware.rate_limiting import FastAPIRateLimitMiddleware
+from app.middleware.auth_middleware import get_current_admin_user
 
 # Import route modules
 from app.api.v1.tickets import router as tickets_router
@@ -295,7 +296,9 @@ async def startup_event():
     
     # Step 5: Initialize AI services (optional for now)
     try:
-        # AI services will be initialized on first use
+        # Build the default token encoding now instead of on the first chat turn
+        from app.services.token_counter_service import token_counter_service
+        await token_counter_service.load_encoding()
         logger.info("✅ AI services ready for initialization on demand")
     except Exception as e:
         logger.error(f"❌ Failed to prepare AI services: {e}")
@@ -310,6 +313,20 @@ async def shutdown_event():
     # Clean up WebSocket manager and Redis connections (TODO: Implement WebSocket manager)
     # WebSocket cleanup will be implemented in a future update
     logger.info("ℹ️  WebSocket manager cleanup skipped - not yet implemented")
+    
+    # Stop the extraction process pool
+    from app.services.extraction_executor import extraction_executor
+    extraction_executor.shutdown()
+    
+    # Write buffered login and API token usage tracking
+    from app.services.identity_cache_service import identity_cache
+    from app.services.api_token_usage_service import api_token_usage
+    await identity_cache.close()
+    await api_token_usage.close()
+    
+    # Stop the principal cache invalidation listener
+    from app.services.principal_service import principal_service
+    await principal_service.close()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -789,6 +806,34 @@ async def health_check():
             status_code=503
         )
 
+@app.get("/health/metrics", tags=["System"], dependencies=[Depends(get_current_admin_user)])
+async def runtime_metrics():
+    """In-process cache and performance counters for this worker (platform admins only)"""
+    from app.services.dynamic_agent_factory import dynamic_agent_factory
+    from app.services.token_counter_service import token_counter_service
+    from app.services.extraction_executor import extraction_executor
+    from app.services.file_service import get_dedup_stats
+    from app.services.storage.factory import get_storage_service
+    from app.services.task_dispatcher import task_dispatcher
+    from app.services.clerk_service import clerk_service
+    from app.services.identity_cache_service import identity_cache
+    from app.services.principal_service import principal_service
+    from app.services.api_token_usage_service import api_token_usage
+    
+    return {
+        "timestamp": time.time(),
+        "agent_cache": dynamic_agent_factory.get_cache_stats(),
+        "token_count_cache": token_counter_service.get_cache_stats(),
+        "extraction": extraction_executor.get_stats(),
+        "file_dedup": get_dedup_stats(),
+        "storage": get_storage_service().get_stats(),
+        "dispatch_latency": await task_dispatcher.get_latency_stats(),
+        "clerk": clerk_service.get_stats(),
+        "identity_cache": identity_cache.get_stats(),
+        "principal_cache": principal_service.get_stats(),
+        "api_token_usage": api_token_usage.get_stats()
+    }
+
 @app.get("/openapi.yaml", tags=["System"])
 async def get_openapi_yaml():
     """Serve the OpenAPI specification as YAML"""
@@ -4,7 +4,7 @@ Authentication middleware for FastAPI with dual authentication support
 """
 
 import logging
-from typing import Optional
+from typing import Optional, Tuple
 from datetime import datetime, timezone, timedelta
 from fastapi import Request, HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -14,6 +14,9 @@ from passlib.context import CryptContext
 from jose import jwt, JWTError
 
 from app.services.clerk_service import clerk_service
+from app.services.api_token_usage_service import api_token_usage
+from app.services.identity_cache_service import identity_cache
+from app.services.principal_service import AuthenticatedIdentity, principal_service
 from app.models.user import User
 from app.models.organization import Organization
 from app.models.api_token import APIToken
@@ -153,17 +156,35 @@ class AuthMiddleware:
         if not credentials:
             return None
         
-        token = credentials.credentials
+        # Resolved through the principal cache shared with the MCP server;
+        # Clerk and database work only happens on cache misses
+        identity = await principal_service.authenticate(credentials.credentials)
+        if not identity:
+            return None
         
-        # Check if it's an API token (starts with "ai_")
-        if token.startswith("ai_"):
-            return await self._validate_api_token(token, request)
-        else:
-            # Standard Clerk token validation
-            return await self._validate_clerk_token(token, request)
+        identity.apply_to_request(request)
+        self._record_request(identity)
+        return identity.user
+    
+    @staticmethod
+    def _record_request(identity: AuthenticatedIdentity) -> None:
+        """Count Clerk logins and API token usage; both are written in batches"""
+        if identity.auth_method == "clerk":
+            identity_cache.record_login(identity.user.id)
+        elif identity.auth_method == "api_token":
+            api_token_usage.record_use(identity.api_token.id)
     
     async def _validate_api_token(self, token: str, request: Request) -> Optional[User]:
         """Validate API token and return user with organization context"""
+        identity = await self._authenticate_api_token(token)
+        if not identity:
+            return None
+        identity.apply_to_request(request)
+        self._record_request(identity)
+        return identity.user
+    
+    async def _authenticate_api_token(self, token: str) -> Optional[AuthenticatedIdentity]:
+        """Look up an API token, its user and organization"""
         
         try:
             # Parse environment-specific token format: ai_env_token
@@ -209,18 +230,14 @@ class AuthMiddleware:
                 
                 api_token, user, organization = token_data
                 
-                # Update last used timestamp
-                api_token.update_last_used()
-                await db.commit()
-                
-                # Set organization context in request state for later middleware
-                request.state.api_token = api_token
-                request.state.organization_id = organization.id
-                request.state.organization = organization
-                request.state.user_permissions = api_token.permissions or ["*"]
-                
                 logger.debug(f"API token authenticated: user={user.email}, org={organization.name}")
-                return user
+                return AuthenticatedIdentity(
+                    user=user,
+                    organization=organization,
+                    auth_method="api_token",
+                    claims={"exp": int(api_token.expires_at.timestamp())},
+                    api_token=api_token
+                )
                 
         except Exception as e:
             logger.error(f"API token validation failed: {e}")
@@ -228,6 +245,15 @@ class AuthMiddleware:
     
     async def _validate_clerk_token(self, token: str, request: Request) -> Optional[User]:
         """Validate Clerk session token and return user"""
+        identity = await self._authenticate_clerk_token(token)
+        if not identity:
+            return None
+        identity.apply_to_request(request)
+        self._record_request(identity)
+        return identity.user
+    
+    async def _authenticate_clerk_token(self, token: str) -> Optional[AuthenticatedIdentity]:
+        """Verify a Clerk session token and resolve the local user and organization"""
         
         try:
             # Verify with Clerk
@@ -239,36 +265,23 @@ class AuthMiddleware:
                 logger.warning("Clerk service returned None")
                 return None
             
-            # Get or create local user record
-            logger.debug("Syncing local user")
-            user = await self._sync_local_user(clerk_user)
-            logger.debug(f"_sync_local_user returned: {user}")
-            
-            if not user:
+            # Resolve the local user from the identity cache; only unknown
+            # identities or changed claims go through the write path
+            identity = await identity_cache.resolve(clerk_user, AsyncSessionLocal)
+            if identity is None:
+                logger.debug("Syncing local user")
+                identity = await self._sync_local_user(clerk_user)
+                logger.debug(f"_sync_local_user returned: {identity}")
+                if identity:
+                    await identity_cache.store(clerk_user, *identity)
+            
+            if not identity:
                 logger.warning("Failed to sync local user")
                 return None
             
-            # Set user context in request state
-            request.state.clerk_user = clerk_user
-            request.state.auth_method = "clerk"
-            
-            # Set organization context if user has organization
-            if user.organization_id:
-                try:
-                    async with AsyncSessionLocal() as db:
-                        org_result = await db.execute(
-                            select(Organization).where(Organization.id == user.organization_id)
-                        )
-                        organization = org_result.scalar_one_or_none()
-                        if organization:
-                            request.state.organization = organization
-                            request.state.organization_id = organization.id
-                            logger.debug(f"Set organization context: {organization.name}")
-                except Exception as e:
-                    logger.warning(f"Failed to set organization context: {e}")
-            
+            user, organization = identity
             logger.debug(f"Clerk token authenticated: user={user.email}")
-            return user
+            return AuthenticatedIdentity(user=user, organization=organization, auth_method="clerk", claims=clerk_user)
             
         except Exception as e:
             logger.error(f"Clerk token validation failed: {e}")
@@ -276,8 +289,8 @@ class AuthMiddleware:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return None
     
-    async def _sync_local_user(self, clerk_user: dict) -> Optional[User]:
-        """Sync Clerk user data with local database, including organization"""
+    async def _sync_local_user(self, clerk_user: dict) -> Optional[Tuple[User, Optional[Organization]]]:
+        """Sync Clerk user data with local database, returning the user and organization"""
         
         try:
             logger.debug(f"Syncing clerk_user: {clerk_user}")
@@ -327,14 +340,11 @@ class AuthMiddleware:
                         logger.debug(f"Updated user organization: {organization_id}, role: {org_role}")
                     # Note: If Clerk doesn't provide org data, we preserve existing org assignment
                     
-                    # Ensure defaults are set before recording login
+                    # Ensure defaults are set before logins are counted
                     if user.login_count is None:
                         user.login_count = 0
                     if user.failed_login_attempts is None:
                         user.failed_login_attempts = 0
-                    
-                    logger.debug(f"Recording login for existing user: login_count={user.login_count}")
-                    user.record_login()
                 else:
                     # Create new user (JIT provisioning)
                     logger.debug("Creating new user via JIT provisioning")
@@ -357,16 +367,18 @@ class AuthMiddleware:
                         joined_organization_at=datetime.now(timezone.utc) if organization_id else None
                     )
                     logger.debug(f"Creating new user with org: {organization_id}, role: {org_role if organization_id else None}")
-                    logger.debug(f"Recording login for new user: login_count={user.login_count}")
-                    user.record_login()
                     db.add(user)
                 
                 logger.debug("Committing database changes")
                 await db.commit()
                 await db.refresh(user)
                 
+                organization = None
+                if user.organization_id:
+                    organization = await db.get(Organization, user.organization_id)
+                
                 logger.debug(f"Successfully synced user: {user.id} - {user.email}, org: {user.organization_id}, role: {user.organization_role}")
-                return user
+                return user, organization
                 
         except Exception as e:
             logger.error(f"Failed to sync local user: {e}")
@@ -514,6 +526,18 @@ async def get_current_user(
     return user
 
 
+async def get_current_admin_user(
+    user: User = Depends(get_current_user)
+) -> User:
+    """Dependency to require a platform admin"""
+    if not user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return user
+
+
 async def get_current_user_optional(
     user: Optional[User] = Depends(clerk_auth)
 ) -> Optional[User]:
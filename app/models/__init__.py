@@ -9,7 +9,7 @@ from app.models.base import Base
 from app.models.user import User, UserRole
 from app.models.organization import Organization
 from app.models.organization_invitation import OrganizationInvitation, OrganizationRole, InvitationStatus
-from app.models.ticket import Ticket, TicketStatus, TicketPriority, TicketCategory
+from app.models.ticket import Ticket, TicketStatus, TicketPriority, TicketCategory, TicketStatsRollup
 from app.models.file import File, FileStatus, FileType
 from app.models.integration import Integration, IntegrationCategory, IntegrationStatus
 from app.models.ai_agent_config import AIAgentConfig, AIAgentType
@@ -41,6 +41,7 @@ __all__ = [
     "TicketStatus",
     "TicketPriority", 
     "TicketCategory",
+    "TicketStatsRollup",
     
     # File models
     "File",
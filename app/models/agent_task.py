@@ -5,7 +5,8 @@ Agent Task model for autonomous task processing and queue management
 
 from typing import Optional, Dict, Any
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import Column, String, Text, Integer, ForeignKey, DateTime, JSON, CheckConstraint
+from sqlalchemy import Column, String, Text, Integer, ForeignKey, DateTime, JSON, CheckConstraint, Index, text
+from sqlalchemy import DDL, event
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -102,6 +103,26 @@ class AgentTask(BaseModel):
         comment="When task was completed"
     )
     
+    # Worker lease - a claimed task belongs to lease_owner until the lease
+    # expires; heartbeats extend it while the task is being processed
+    lease_owner = Column(
+        String(255),
+        nullable=True,
+        comment="Claim token of the worker holding the task"
+    )
+    
+    lease_expires_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="When the worker's claim lapses and the task can be reclaimed"
+    )
+    
+    heartbeat_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        comment="Last heartbeat from the worker holding the task"
+    )
+    
     # Celery integration
     celery_task_id = Column(
         String(255),
@@ -208,6 +229,18 @@ class AgentTask(BaseModel):
             "priority >= 1 AND priority <= 10",
             name='ck_agent_task_priority'
         ),
+        # Claim order for pending tasks (FOR UPDATE SKIP LOCKED)
+        Index(
+            'idx_agent_tasks_claimable',
+            'priority', 'scheduled_at',
+            postgresql_where=text("status = 'pending'")
+        ),
+        # Expired lease sweep over in-flight tasks
+        Index(
+            'idx_agent_tasks_lease',
+            'lease_expires_at',
+            postgresql_where=text("status IN ('assigned', 'processing')")
+        ),
         {'comment': 'Agent task queue with autonomous processing and retry logic'}
     )
     
@@ -311,6 +344,7 @@ class AgentTask(BaseModel):
         """Mark task as completed successfully"""
         self.status = "completed"
         self.completed_at = datetime.now(timezone.utc)
+        self.lease_expires_at = None
         self.result_data = result_data
         self.result_metadata = result_metadata or {}
         
@@ -337,6 +371,7 @@ class AgentTask(BaseModel):
         
         self.last_error = error_message
         self.retry_count += 1
+        self.lease_expires_at = None
         
         # Determine if task should be retried or marked as failed
         if retry_allowed and self.can_retry:
@@ -352,6 +387,7 @@ class AgentTask(BaseModel):
         """Cancel the task"""
         self.status = "cancelled"
         self.completed_at = datetime.now(timezone.utc)
+        self.lease_expires_at = None
         
         if reason:
             cancellation_data = self.result_metadata or {}
@@ -437,4 +473,32 @@ class AgentTask(BaseModel):
             data.pop('last_error', None)
             data.pop('error_history', None)
         
-        return data
\ No newline at end of file
+        return data
+
+
+# Wakes the task dispatcher when a task becomes pending. Tasks inserted already
+# due are queued directly by AgentTaskService.create_task, so only future,
+# retried, rescheduled and released tasks are announced. The payload is the
+# scheduled time so the dispatcher can set a timer for future tasks. The same
+# function and trigger are installed by the event dispatch migration.
+AGENT_TASK_READY_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION agent_tasks_notify_ready() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' AND NEW.scheduled_at <= clock_timestamp() THEN
+        RETURN NULL;
+    END IF;
+    PERFORM pg_notify('agent_task_ready', to_char(NEW.scheduled_at AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"'));
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""")
+
+AGENT_TASK_READY_TRIGGER = DDL("""
+CREATE TRIGGER agent_tasks_ready_trigger
+AFTER INSERT OR UPDATE OF status, scheduled_at ON agent_tasks
+FOR EACH ROW WHEN (NEW.status = 'pending')
+EXECUTE FUNCTION agent_tasks_notify_ready()
+""")
+
+event.listen(AgentTask.__table__, 'after_create', AGENT_TASK_READY_FUNCTION.execute_if(dialect='postgresql'))
+event.listen(AgentTask.__table__, 'after_create', AGENT_TASK_READY_TRIGGER.execute_if(dialect='postgresql'))
@@ -4,7 +4,7 @@ API Token model for organization-scoped programmatic access
 """
 
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Boolean, DateTime, JSON, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, JSON, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from uuid import uuid4
@@ -72,6 +72,14 @@ class APIToken(BaseModel):
         comment="Last time this token was used"
     )
     
+    usage_count = Column(
+        Integer,
+        default=0,
+        server_default="0",
+        nullable=False,
+        comment="Number of requests authenticated with this token"
+    )
+    
     is_active = Column(
         Boolean,
         default=True,
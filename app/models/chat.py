@@ -44,6 +44,8 @@ class Thread(BaseModel):
         Index('idx_threads_user_archived', 'user_id', 'archived'),
         Index('idx_threads_created_at', 'created_at'),
         Index('idx_threads_updated_at', 'updated_at'),
+        # Keyset pagination of a user's threads per agent
+        Index('idx_threads_agent_user_updated_id', 'agent_id', 'user_id', 'updated_at', 'id'),
     )
 
 
@@ -79,6 +81,9 @@ class Message(BaseModel):
     response_time_ms = Column(Integer, nullable=True)
     confidence_score = Column(Float, nullable=True)
     
+    # Context window accounting - computed once when the message is stored
+    token_count = Column(Integer, nullable=True, comment="Token count of role + content, computed at insert time")
+    
     # Relationships
     thread = relationship("Thread", back_populates="messages")
     
@@ -86,6 +91,7 @@ class Message(BaseModel):
         Index('idx_messages_thread_id', 'thread_id'),
         Index('idx_messages_created_at', 'created_at'),
         Index('idx_messages_role', 'role'),
+        Index('idx_messages_thread_created_id', 'thread_id', 'created_at', 'id'),
     )
 
 
@@ -6,7 +6,8 @@ File model for attachment management and AI processing
 import enum
 from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Enum as SQLEnum, JSON, ForeignKey, Integer, BigInteger
+from sqlalchemy import Column, String, Boolean, DateTime, Text, Enum as SQLEnum, JSON, ForeignKey, Integer, BigInteger, Index
+from sqlalchemy import DDL, event
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -55,9 +56,8 @@ class File(BaseModel):
     file_path = Column(
         String(500),
         nullable=False,
-        unique=True,
         index=True,
-        comment="Server file path"
+        comment="Storage key (content-addressed, may be shared by duplicate uploads)"
     )
     
     mime_type = Column(
@@ -75,8 +75,6 @@ class File(BaseModel):
     file_hash = Column(
         String(64),
         nullable=False,
-        unique=True,
-        index=True,
         comment="SHA-256 hash of file content"
     )
     
@@ -294,6 +292,15 @@ class File(BaseModel):
         back_populates="files"
     )
     
+    __table_args__ = (
+        # Content-addressed dedup lookups are scoped per organization
+        Index('idx_files_org_hash', 'organization_id', 'file_hash'),
+        # One row per uploader and content - concurrent duplicate uploads conflict here
+        Index('uq_files_org_uploader_hash', 'organization_id', 'uploaded_by_id', 'file_hash', unique=True),
+        # Batched orphan cleanup walks an organization's files in id order
+        Index('idx_files_org_id', 'organization_id', 'id'),
+    )
+    
     def __repr__(self):
         return f"<File(id={self.id}, filename={self.filename}, status={self.status})>"
     
@@ -381,6 +388,24 @@ class File(BaseModel):
             delta = self.processing_completed_at - self.processing_started_at.replace(tzinfo=timezone.utc)
             self.processing_time_seconds = int(delta.total_seconds())
     
+    def copy_extraction_from(self, source: "File"):
+        """Reuse extraction results from a processed file with identical content"""
+        self.extracted_context = source.extracted_context
+        self.extraction_method = source.extraction_method
+        self.content_summary = source.content_summary
+        self.key_topics = source.key_topics
+        self.sentiment_analysis = source.sentiment_analysis
+        self.language_detection = source.language_detection
+        self.ai_analysis_version = source.ai_analysis_version
+        self.ai_confidence_score = source.ai_confidence_score
+        self.file_quality_score = source.file_quality_score
+        
+        now = datetime.now(timezone.utc)
+        self.status = FileStatus.PROCESSED
+        self.processing_started_at = now
+        self.processing_completed_at = now
+        self.processing_time_seconds = 0
+    
     def fail_processing(self, error_message: str):
         """Mark file processing as failed"""
         self.status = FileStatus.FAILED
@@ -602,4 +627,28 @@ class File(BaseModel):
         data['processing_time_minutes'] = self.processing_time_minutes
         data['can_be_deleted'] = self.can_be_deleted()
         
-        return data
\ No newline at end of file
+        return data
+
+
+# Wakes the task dispatcher when a file goes back to UPLOADED (restored or
+# reset for reprocessing). Fresh uploads are queued directly by the upload
+# endpoint, so inserts are not announced. The payload is the file id. The same
+# function and trigger are installed by the event dispatch migration.
+FILE_READY_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION files_notify_ready() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('file_ready', NEW.id::text);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""")
+
+FILE_READY_TRIGGER = DDL("""
+CREATE TRIGGER files_ready_trigger
+AFTER UPDATE OF status ON files
+FOR EACH ROW WHEN (NEW.status = 'UPLOADED' AND OLD.status IS DISTINCT FROM NEW.status AND NOT NEW.is_deleted)
+EXECUTE FUNCTION files_notify_ready()
+""")
+
+event.listen(File.__table__, 'after_create', FILE_READY_FUNCTION.execute_if(dialect='postgresql'))
+event.listen(File.__table__, 'after_create', FILE_READY_TRIGGER.execute_if(dialect='postgresql'))
@@ -6,11 +6,12 @@ Ticket model for support ticket management
 import enum
 from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Enum as SQLEnum, JSON, ForeignKey, Integer
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Boolean, DateTime, Text, Enum as SQLEnum, JSON, ForeignKey, Integer, Index
+from sqlalchemy import DDL, event, text
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
 
-from app.models.base import BaseModel
+from app.models.base import Base, BaseModel
 
 
 class TicketStatus(enum.Enum):
@@ -98,6 +99,15 @@ class Ticket(BaseModel):
         comment="Specific subcategory within main category"
     )
     
+    # Weighted full-text vector (title A, description B, subcategory C), kept
+    # current by the tickets_search_vector_trigger; deferred so list and detail
+    # queries don't load it
+    search_vector = deferred(Column(
+        TSVECTOR,
+        nullable=True,
+        comment="Full-text search vector maintained by trigger"
+    ))
+    
     # User relationships
     created_by_id = Column(
         UUID(as_uuid=True),
@@ -396,6 +406,21 @@ class Ticket(BaseModel):
         foreign_keys=[organization_id]
     )
     
+    __table_args__ = (
+        # Organization-first keyset pagination on the list sorts
+        Index('idx_tickets_org_created_id', 'organization_id', 'created_at', 'id'),
+        Index('idx_tickets_org_updated_id', 'organization_id', 'updated_at', 'id'),
+        Index('idx_tickets_org_status', 'organization_id', 'status'),
+        # Organization-scoped full-text search (requires btree_gin)
+        Index('idx_tickets_org_search', 'organization_id', 'search_vector', postgresql_using='gin'),
+        # Live overdue count for the stats dashboard (open tickets past SLA)
+        Index(
+            'idx_tickets_org_open_sla',
+            'organization_id', 'sla_due_date',
+            postgresql_where=text("is_deleted = false AND status IN ('new', 'open', 'in_progress')")
+        ),
+    )
+    
     def __repr__(self):
         return f"<Ticket(id={self.id}, title={self.title[:50]}, status={self.status})>"
     
@@ -514,4 +539,121 @@ class Ticket(BaseModel):
         data['age_in_hours'] = self.age_in_hours
         data['can_be_closed'] = self.can_be_closed()
         
-        return data
\ No newline at end of file
+        return data
+
+
+
+class TicketStatsRollup(Base):
+    """
+    Per-organization ticket counts by status, priority and category.
+    
+    Maintained incrementally by the tickets_stats_rollup_trigger so dashboard
+    statistics are read from a handful of rows instead of scanning tickets.
+    Soft-deleted tickets are not counted.
+    """
+    
+    __tablename__ = "ticket_stats_rollup"
+    
+    organization_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        primary_key=True,
+        comment="Organization the counts belong to"
+    )
+    
+    status = Column(
+        SQLEnum(TicketStatus, values_callable=lambda x: [e.value for e in x]),
+        primary_key=True,
+        comment="Ticket status"
+    )
+    
+    priority = Column(
+        SQLEnum(TicketPriority, values_callable=lambda x: [e.value for e in x]),
+        primary_key=True,
+        comment="Ticket priority level"
+    )
+    
+    category = Column(
+        SQLEnum(TicketCategory, values_callable=lambda x: [e.value for e in x]),
+        primary_key=True,
+        comment="Ticket category"
+    )
+    
+    ticket_count = Column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="Number of non-deleted tickets with this status, priority and category"
+    )
+    
+    def __repr__(self):
+        return (
+            f"<TicketStatsRollup(organization_id={self.organization_id}, status={self.status}, "
+            f"priority={self.priority}, category={self.category}, ticket_count={self.ticket_count})>"
+        )
+
+# Keeps Ticket.search_vector in sync on write. The same function and trigger
+# are installed by the ticket search migration for existing databases.
+TICKET_SEARCH_VECTOR_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION tickets_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english'::regconfig, coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(NEW.description, '')), 'B') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(NEW.subcategory, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+""")
+
+TICKET_SEARCH_VECTOR_TRIGGER = DDL("""
+CREATE TRIGGER tickets_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, description, subcategory ON tickets
+FOR EACH ROW EXECUTE FUNCTION tickets_search_vector_update()
+""")
+
+event.listen(Ticket.__table__, 'before_create', DDL("CREATE EXTENSION IF NOT EXISTS btree_gin").execute_if(dialect='postgresql'))
+event.listen(Ticket.__table__, 'after_create', TICKET_SEARCH_VECTOR_FUNCTION.execute_if(dialect='postgresql'))
+event.listen(Ticket.__table__, 'after_create', TICKET_SEARCH_VECTOR_TRIGGER.execute_if(dialect='postgresql'))
+
+
+# Keeps ticket_stats_rollup in sync on write. Updates that leave the counted
+# columns unchanged are skipped; the same function and trigger are installed
+# by the ticket stats rollup migration for existing databases.
+TICKET_STATS_ROLLUP_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION tickets_stats_rollup_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF (OLD.organization_id, OLD.status, OLD.priority, OLD.category, OLD.is_deleted)
+           IS NOT DISTINCT FROM (NEW.organization_id, NEW.status, NEW.priority, NEW.category, NEW.is_deleted) THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        IF NOT OLD.is_deleted THEN
+            UPDATE ticket_stats_rollup SET ticket_count = ticket_count - 1
+            WHERE organization_id = OLD.organization_id
+              AND status = OLD.status AND priority = OLD.priority AND category = OLD.category;
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        IF NOT NEW.is_deleted THEN
+            INSERT INTO ticket_stats_rollup (organization_id, status, priority, category, ticket_count)
+            VALUES (NEW.organization_id, NEW.status, NEW.priority, NEW.category, 1)
+            ON CONFLICT (organization_id, status, priority, category)
+            DO UPDATE SET ticket_count = ticket_stats_rollup.ticket_count + 1;
+        END IF;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""")
+
+TICKET_STATS_ROLLUP_TRIGGER = DDL("""
+CREATE TRIGGER tickets_stats_rollup_trigger
+AFTER INSERT OR DELETE OR UPDATE OF organization_id, status, priority, category, is_deleted ON tickets
+FOR EACH ROW EXECUTE FUNCTION tickets_stats_rollup_update()
+""")
+
+event.listen(Ticket.__table__, 'after_create', TICKET_STATS_ROLLUP_FUNCTION.execute_if(dialect='postgresql'))
+event.listen(Ticket.__table__, 'after_create', TICKET_STATS_ROLLUP_TRIGGER.execute_if(dialect='postgresql'))
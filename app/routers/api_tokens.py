@@ -24,6 +24,7 @@ from app.middleware.auth_middleware import get_current_user
 from app.middleware.organization_middleware import get_organization_context, OrganizationContext
 from app.middleware.auth_middleware import auth_middleware
 from app.config.settings import get_settings
+from app.services.principal_service import principal_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api-tokens", tags=["API Token Management"])
@@ -169,6 +170,7 @@ async def list_api_tokens(
             updated_at=token.updated_at,
             expires_at=token.expires_at,
             last_used_at=token.last_used_at,
+            usage_count=token.usage_count or 0,
             is_active=token.is_active,
             is_expired=is_expired,
             organization_id=context.organization.id,
@@ -229,6 +231,7 @@ async def update_api_token(
     
     await db.commit()
     await db.refresh(api_token)
+    await principal_service.invalidate_api_token(api_token.token_hash)
     
     # Log token update for audit
     logger.info(f"API token updated: user={context.user.email}, org={context.organization.name}, name={api_token.name}, id={token_id}")
@@ -242,6 +245,7 @@ async def update_api_token(
         updated_at=api_token.updated_at,
         expires_at=api_token.expires_at,
         last_used_at=api_token.last_used_at,
+        usage_count=api_token.usage_count or 0,
         is_active=api_token.is_active,
         is_expired=api_token.is_expired,
         organization_id=context.organization.id,
@@ -312,6 +316,7 @@ async def partially_update_api_token(
     
     await db.commit()
     await db.refresh(api_token)
+    await principal_service.invalidate_api_token(api_token.token_hash)
     
     # Log token update for audit
     logger.info(f"API token partially updated: user={context.user.email}, org={context.organization.name}, name={api_token.name}, id={token_id}, fields={updated_fields}")
@@ -325,6 +330,7 @@ async def partially_update_api_token(
         updated_at=api_token.updated_at,
         expires_at=api_token.expires_at,
         last_used_at=api_token.last_used_at,
+        usage_count=api_token.usage_count or 0,
         is_active=api_token.is_active,
         is_expired=api_token.is_expired,
         organization_id=context.organization.id,
@@ -360,12 +366,14 @@ async def delete_api_token(
     
     # Log token deletion for audit (before deletion)
     token_name = api_token.name
+    token_hash = api_token.token_hash
     deleted_at = datetime.now(timezone.utc)
     logger.info(f"API token deleted: user={context.user.email}, org={context.organization.name}, name={token_name}, id={token_id}")
     
     # Delete the token from database (this also revokes it)
     await db.delete(api_token)
     await db.commit()
+    await principal_service.invalidate_api_token(token_hash)
     
     return APITokenRevokeResponse(
         message=f"API token '{token_name}' has been deleted",
@@ -408,6 +416,7 @@ async def get_api_token(
         updated_at=api_token.updated_at,
         expires_at=api_token.expires_at,
         last_used_at=api_token.last_used_at,
+        usage_count=api_token.usage_count or 0,
         is_active=api_token.is_active,
         is_expired=api_token.is_expired,
         organization_id=context.organization.id,
@@ -17,6 +17,8 @@ from app.models.user import User
 from app.models.organization import Organization
 from app.models.organization_invitation import OrganizationRole
 from app.config.settings import get_settings
+from app.services.identity_cache_service import identity_cache
+from app.services.principal_service import principal_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/webhooks/clerk", tags=["Clerk Webhooks"])
@@ -211,6 +213,8 @@ async def handle_user_updated(db: AsyncSession, user_data: Dict[str, Any]):
     """Handle user updates from Clerk"""
     
     clerk_id = user_data.get('id')
+    await principal_service.invalidate_clerk_profile(clerk_id)
+    await identity_cache.invalidate(clerk_id)
     result = await db.execute(select(User).where(User.clerk_id == clerk_id))
     user = result.scalar_one_or_none()
     
@@ -225,6 +229,7 @@ async def handle_user_updated(db: AsyncSession, user_data: Dict[str, Any]):
             user.avatar_url = user_data.get('image_url')
         
         await db.commit()
+        await principal_service.invalidate_user(user.id)
         logger.info(f"Updated user from Clerk webhook: {email}")
 
 
@@ -232,6 +237,8 @@ async def handle_user_deleted(db: AsyncSession, user_data: Dict[str, Any]):
     """Handle user deletion from Clerk"""
     
     clerk_id = user_data.get('id')
+    await principal_service.invalidate_clerk_profile(clerk_id)
+    await identity_cache.invalidate(clerk_id)
     result = await db.execute(select(User).where(User.clerk_id == clerk_id))
     user = result.scalar_one_or_none()
     
@@ -242,6 +249,7 @@ async def handle_user_deleted(db: AsyncSession, user_data: Dict[str, Any]):
         user.full_name = "Deleted User"
         
         await db.commit()
+        await principal_service.invalidate_user(user.id)
         logger.info(f"Soft deleted user from Clerk webhook: {clerk_id}")
 
 
@@ -305,6 +313,7 @@ async def handle_organization_updated(db: AsyncSession, org_data: Dict[str, Any]
         org.clerk_metadata = org_data
         
         await db.commit()
+        await principal_service.invalidate_organization(org.id)
         logger.info(f"Updated organization from Clerk webhook: {org.name}")
 
 
@@ -320,6 +329,7 @@ async def handle_organization_deleted(db: AsyncSession, org_data: Dict[str, Any]
     if org:
         org.is_enabled = False
         await db.commit()
+        await principal_service.invalidate_organization(org.id)
         logger.info(f"Disabled organization from Clerk webhook: {org.name}")
 
 
@@ -353,6 +363,8 @@ async def handle_membership_created(db: AsyncSession, membership_data: Dict[str,
         user.joined_organization_at = datetime.now(timezone.utc)
         
         await db.commit()
+        await identity_cache.invalidate(clerk_user_id)
+        await principal_service.invalidate_user(user.id)
         logger.info(f"Updated membership: {user.email} -> {org.name} as {role}")
 
 
@@ -374,6 +386,8 @@ async def handle_membership_updated(db: AsyncSession, membership_data: Dict[str,
     if user:
         user.organization_role = role_mapping.get(role, OrganizationRole.MEMBER)
         await db.commit()
+        await identity_cache.invalidate(clerk_user_id)
+        await principal_service.invalidate_user(user.id)
         logger.info(f"Updated user role: {user.email} -> {role}")
 
 
@@ -389,6 +403,8 @@ async def handle_membership_deleted(db: AsyncSession, membership_data: Dict[str,
     if user:
         user.leave_organization()
         await db.commit()
+        await identity_cache.invalidate(clerk_user_id)
+        await principal_service.invalidate_user(user.id)
         logger.info(f"Removed user from organization: {user.email}")
 
 
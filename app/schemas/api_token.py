@@ -50,6 +50,7 @@ class APITokenListItem(BaseSchema):
     updated_at: datetime = Field(description="Last updated timestamp")
     expires_at: datetime = Field(description="Expiration timestamp")
     last_used_at: Optional[datetime] = Field(description="Last used timestamp")
+    usage_count: int = Field(default=0, description="Requests authenticated with this token (updated periodically)")
     is_active: bool = Field(description="Whether token is active")
     is_expired: bool = Field(description="Whether token has expired")
     organization_id: UUID = Field(description="Organization ID")
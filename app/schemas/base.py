@@ -81,12 +81,13 @@ class FilterParams(BaseSchema):
 class PaginatedResponse(BaseSchema):
     """Standard paginated response wrapper"""
     items: List[Any] = Field(description="List of items")
-    total: int = Field(description="Total number of items")
-    page: int = Field(description="Current page number")
+    total: Optional[int] = Field(description="Total number of items (null on cursor pages unless requested)")
+    page: Optional[int] = Field(description="Current page number (null on cursor pages)")
     size: int = Field(description="Items per page")
-    pages: int = Field(description="Total number of pages")
+    pages: Optional[int] = Field(description="Total number of pages (null when total is not computed)")
     has_next: bool = Field(description="Whether there are more pages")
     has_prev: bool = Field(description="Whether there are previous pages")
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the next page (pass as ?cursor=)")
     
     @classmethod
     def create(
@@ -94,7 +95,8 @@ class PaginatedResponse(BaseSchema):
         items: List[Any],
         total: int,
         page: int,
-        size: int
+        size: int,
+        next_cursor: Optional[str] = None
     ) -> "PaginatedResponse":
         """Create paginated response from items and counts"""
         pages = (total + size - 1) // size  # Ceiling division
@@ -106,7 +108,28 @@ class PaginatedResponse(BaseSchema):
             size=size,
             pages=pages,
             has_next=page < pages,
-            has_prev=page > 1
+            has_prev=page > 1,
+            next_cursor=next_cursor
+        )
+    
+    @classmethod
+    def create_from_cursor(
+        cls,
+        items: List[Any],
+        size: int,
+        next_cursor: Optional[str],
+        total: Optional[int] = None
+    ) -> "PaginatedResponse":
+        """Create paginated response for a page reached through a cursor"""
+        return cls(
+            items=items,
+            total=total,
+            page=None,
+            size=size,
+            pages=(total + size - 1) // size if total is not None else None,
+            has_next=next_cursor is not None,
+            has_prev=True,
+            next_cursor=next_cursor
         )
 
 
@@ -228,11 +228,11 @@ class ThreadListResponse(BaseSchema):
     threads: List[ThreadResponse] = Field(
         description="List of threads"
     )
-    total: int = Field(
-        description="Total number of threads"
+    total: Optional[int] = Field(
+        description="Total number of threads (null on cursor pages unless include_total is set)"
     )
-    page: int = Field(
-        description="Current page number"
+    page: Optional[int] = Field(
+        description="Current page number (null on cursor pages)"
     )
     page_size: int = Field(
         description="Number of items per page"
@@ -240,6 +240,47 @@ class ThreadListResponse(BaseSchema):
     agent_id: UUID = Field(
         description="Agent ID these threads belong to"
     )
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Opaque cursor for the next page (pass as ?cursor=)"
+    )
+
+
+class ThreadSearchResultResponse(BaseSchema):
+    """Single thread search hit"""
+    
+    thread: ThreadResponse = Field(
+        description="Matching thread"
+    )
+    rank: float = Field(
+        description="Relevance score (higher is better)"
+    )
+    title_highlight: Optional[str] = Field(
+        None,
+        description="Thread title with matches wrapped in <mark> tags"
+    )
+    matched_message_id: Optional[UUID] = Field(
+        None,
+        description="ID of the best matching message, if the match was in message content"
+    )
+    snippet: Optional[str] = Field(
+        None,
+        description="Excerpt of the best matching message with matches wrapped in <mark> tags"
+    )
+
+
+class ThreadSearchResponse(BaseSchema):
+    """Response schema for thread search"""
+    
+    results: List[ThreadSearchResultResponse] = Field(
+        description="Matching threads, most relevant first"
+    )
+    query: str = Field(
+        description="Search query"
+    )
+    agent_id: UUID = Field(
+        description="Agent ID the search was scoped to"
+    )
 
 
 class MessageListResponse(BaseSchema):
@@ -254,6 +295,10 @@ class MessageListResponse(BaseSchema):
     thread_id: Union[str, UUID] = Field(
         description="ID of the thread"
     )
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Opaque cursor for the next page (pass as ?cursor=)"
+    )
 
 
 # End of clean agent-centric thread schemas
\ No newline at end of file
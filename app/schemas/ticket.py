@@ -9,7 +9,7 @@ from uuid import UUID
 from pydantic import Field, field_validator, model_validator, computed_field
 from enum import Enum
 
-from app.schemas.base import BaseSchema, BaseCreate, BaseUpdate, BaseResponse
+from app.schemas.base import BaseSchema, BaseCreate, BaseUpdate, BaseResponse, PaginatedResponse
 from app.schemas.chat import FileAttachment
 
 
@@ -410,6 +410,15 @@ class TicketPublicResponse(BaseSchema):
     external_ticket_id: Optional[str] = Field(None, description="External reference ID")
 
 
+class TicketSearchResponse(PaginatedResponse):
+    """Ranked ticket search results with facet counts over all matches"""
+    ranks: List[float] = Field(default_factory=list, description="Relevance score of each item, in item order")
+    facets: Dict[str, Dict[str, int]] = Field(
+        default_factory=dict,
+        description="Match counts per value for status, priority and category"
+    )
+
+
 class TicketStatsResponse(BaseSchema):
     """Ticket statistics response"""
     total_tickets: int = Field(description="Total number of tickets")
@@ -438,7 +447,7 @@ class TicketActivityResponse(BaseSchema):
 # Search and filter schemas
 class TicketSearchParams(BaseSchema):
     """Ticket search parameters"""
-    q: Optional[str] = Field(None, description="Search query (title, description)")
+    q: Optional[str] = Field(None, description="Full-text search query (title, description, subcategory)")
     status: Optional[List[TicketStatusSchema]] = Field(None, description="Filter by status")
     category: Optional[List[TicketCategorySchema]] = Field(None, description="Filter by category")
     priority: Optional[List[TicketPrioritySchema]] = Field(None, description="Filter by priority")
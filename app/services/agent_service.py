@@ -29,6 +29,15 @@ class AgentService:
     - Agent personalization and file context integration
     """
     
+    def _invalidate_agent_cache(self, agent_id: UUID) -> None:
+        """Drop cached Pydantic AI agents built from the old configuration"""
+        try:
+            # Lazy import to avoid circular dependency with the agent factory
+            from app.services.dynamic_agent_factory import dynamic_agent_factory
+            dynamic_agent_factory.invalidate_agent(agent_id)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate agent cache for {agent_id}: {e}")
+    
     async def get_agent(
         self, 
         agent_id: UUID,
@@ -261,6 +270,7 @@ class AgentService:
                 
                 await session.commit()
                 await session.refresh(agent)
+                self._invalidate_agent_cache(agent_id)
                 
                 logger.info(f"✅ Updated agent {agent_id} with {len(updates)} changes")
                 return agent
@@ -318,6 +328,7 @@ class AgentService:
                 # Soft delete using ORM method
                 agent.soft_delete()
                 await session.commit()
+                self._invalidate_agent_cache(agent_id)
                 
                 logger.info(f"✅ Deleted agent {agent_id}")
                 return True
@@ -507,6 +518,7 @@ class AgentService:
                 agent.reset_to_defaults(default_config)
                 await session.commit()
                 await session.refresh(agent)
+                self._invalidate_agent_cache(agent_id)
                 
                 logger.info(f"✅ Reset agent {agent_id} to ai_config.yaml defaults")
                 return agent
@@ -8,11 +8,12 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone, timedelta
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc, func
+from sqlalchemy import select, and_, desc, func, or_, update
 from sqlalchemy.orm import selectinload
 
 from app.models.agent_task import AgentTask
 from app.models.ai_agent import Agent
+from app.config.settings import get_settings
 from app.database import get_async_db_session
 
 logger = logging.getLogger(__name__)
@@ -248,6 +249,282 @@ class AgentTaskService:
                 logger.error(f"Error getting pending tasks: {e}")
                 return []
     
+    async def claim_tasks(
+        self,
+        lease_owner: str,
+        limit: int = 50,
+        priority_threshold: int = 10,
+        agent_id: Optional[UUID] = None,
+        lease_seconds: Optional[int] = None,
+        db: Optional[AsyncSession] = None
+    ) -> List[AgentTask]:
+        """
+        Atomically claim due pending tasks for one worker.
+        
+        Candidate rows are locked with FOR UPDATE SKIP LOCKED, so concurrent
+        claimers never wait on each other or receive the same task; each one
+        takes the next unlocked rows in idx_agent_tasks_claimable order.
+        Claimed tasks move to "assigned" and are leased to lease_owner.
+        
+        Args:
+            lease_owner: Claim token of the worker taking the tasks
+            limit: Maximum number of tasks to claim
+            priority_threshold: Only claim tasks with priority <= threshold
+            agent_id: Only claim tasks of this agent
+            lease_seconds: Lease length (defaults to settings)
+            db: Database session (optional)
+            
+        Returns:
+            List[AgentTask]: Claimed tasks ordered by priority and schedule time
+        """
+        async with get_async_db_session() if db is None else db as session:
+            try:
+                now = datetime.now(timezone.utc)
+                conditions = [
+                    AgentTask.status == "pending",
+                    AgentTask.scheduled_at <= now,
+                    AgentTask.priority <= priority_threshold
+                ]
+                
+                if agent_id:
+                    conditions.append(AgentTask.agent_id == agent_id)
+                
+                claimable = (
+                    select(AgentTask.id)
+                    .where(and_(*conditions))
+                    .order_by(AgentTask.priority, AgentTask.scheduled_at)
+                    .limit(limit)
+                    .with_for_update(skip_locked=True)
+                )
+                stmt = (
+                    update(AgentTask)
+                    .where(AgentTask.id.in_(claimable.scalar_subquery()))
+                    .values(
+                        status="assigned",
+                        assigned_at=now,
+                        updated_at=now,
+                        **self._lease_values(lease_owner, now, lease_seconds)
+                    )
+                    .returning(AgentTask)
+                    .execution_options(synchronize_session=False)
+                )
+                
+                result = await session.execute(stmt)
+                tasks = sorted(result.scalars().all(), key=lambda task: (task.priority, task.scheduled_at))
+                await session.commit()
+                
+                logger.debug(f"Claimed {len(tasks)} pending tasks for {lease_owner}")
+                return tasks
+                
+            except Exception as e:
+                logger.error(f"Error claiming pending tasks: {e}")
+                await session.rollback()
+                return []
+    
+    async def start_task(
+        self,
+        task_id: UUID,
+        lease_owner: str,
+        lease_seconds: Optional[int] = None,
+        db: Optional[AsyncSession] = None
+    ) -> Optional[AgentTask]:
+        """
+        Atomically move a task to "processing" for the worker that will run it.
+        
+        Succeeds for a due pending task, or for an assigned task whose lease is
+        held by lease_owner. A task already claimed by someone else is left
+        alone, so duplicate deliveries of the same task are no-ops.
+        
+        Args:
+            task_id: Task ID
+            lease_owner: Claim token of the worker
+            lease_seconds: Lease length (defaults to settings)
+            db: Database session (optional)
+            
+        Returns:
+            AgentTask: The started task, or None if it is not available
+        """
+        async with get_async_db_session() if db is None else db as session:
+            try:
+                now = datetime.now(timezone.utc)
+                stmt = (
+                    update(AgentTask)
+                    .where(
+                        AgentTask.id == task_id,
+                        or_(
+                            and_(AgentTask.status == "pending", AgentTask.scheduled_at <= now),
+                            and_(AgentTask.status == "assigned", AgentTask.lease_owner == lease_owner)
+                        )
+                    )
+                    .values(
+                        status="processing",
+                        started_at=now,
+                        updated_at=now,
+                        **self._lease_values(lease_owner, now, lease_seconds)
+                    )
+                    .returning(AgentTask)
+                    .execution_options(synchronize_session=False)
+                )
+                
+                result = await session.execute(stmt)
+                task = result.scalar_one_or_none()
+                await session.commit()
+                
+                if not task:
+                    logger.info(f"Task {task_id} is not available to {lease_owner}, skipping")
+                return task
+                
+            except Exception as e:
+                logger.error(f"Error starting task {task_id}: {e}")
+                await session.rollback()
+                return None
+    
+    async def heartbeat(
+        self,
+        task_id: UUID,
+        lease_owner: str,
+        lease_seconds: Optional[int] = None,
+        db: Optional[AsyncSession] = None
+    ) -> bool:
+        """
+        Extend the lease of a task held by lease_owner.
+        
+        Args:
+            task_id: Task ID
+            lease_owner: Claim token of the worker
+            lease_seconds: Lease length (defaults to settings)
+            db: Database session (optional)
+            
+        Returns:
+            bool: False if the worker no longer holds the task
+        """
+        async with get_async_db_session() if db is None else db as session:
+            try:
+                stmt = (
+                    update(AgentTask)
+                    .where(
+                        AgentTask.id == task_id,
+                        AgentTask.lease_owner == lease_owner,
+                        AgentTask.status.in_(["assigned", "processing"])
+                    )
+                    .values(**self._lease_values(lease_owner, datetime.now(timezone.utc), lease_seconds))
+                    .execution_options(synchronize_session=False)
+                )
+                result = await session.execute(stmt)
+                await session.commit()
+                return result.rowcount == 1
+                
+            except Exception as e:
+                logger.error(f"Error extending lease of task {task_id}: {e}")
+                await session.rollback()
+                return False
+    
+    async def next_scheduled_at(
+        self,
+        priority_threshold: int = 10,
+        db: Optional[AsyncSession] = None
+    ) -> Optional[datetime]:
+        """
+        Earliest schedule time among tasks not yet due.
+        
+        Args:
+            priority_threshold: Only consider tasks with priority <= threshold
+            db: Database session (optional)
+        
+        Returns:
+            Optional[datetime]: When the next pending task becomes due, if any
+        """
+        async with get_async_db_session() if db is None else db as session:
+            stmt = select(func.min(AgentTask.scheduled_at)).where(
+                AgentTask.status == "pending",
+                AgentTask.scheduled_at > datetime.now(timezone.utc),
+                AgentTask.priority <= priority_threshold
+            )
+            result = await session.execute(stmt)
+            return result.scalar()
+    
+    async def release_expired_leases(
+        self,
+        db: Optional[AsyncSession] = None
+    ) -> int:
+        """
+        Return tasks whose worker stopped heartbeating to the queue.
+        
+        Assigned tasks that were never started go back to pending as is; tasks
+        that were processing count as a failed attempt, with the same retry
+        limit, backoff and error history as AgentTask.mark_failed.
+        
+        Args:
+            db: Database session (optional)
+            
+        Returns:
+            int: Number of tasks released
+        """
+        async with get_async_db_session() if db is None else db as session:
+            try:
+                now = datetime.now(timezone.utc)
+                expired = AgentTask.lease_expires_at < now
+                never_started = await session.execute(
+                    update(AgentTask)
+                    .where(AgentTask.status == "assigned", expired)
+                    .values(status="pending", lease_owner=None, lease_expires_at=None, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+                released = never_started.rowcount
+                
+                # Rows are locked so a late heartbeat or a second sweeper can't interleave
+                interrupted = await session.execute(
+                    select(AgentTask)
+                    .where(AgentTask.status == "processing", expired)
+                    .with_for_update(skip_locked=True)
+                )
+                for task in interrupted.scalars().all():
+                    self._fail_interrupted_attempt(task, now)
+                    released += 1
+                await session.commit()
+                
+                if released:
+                    logger.warning(f"⏰ Released {released} agent tasks with expired leases")
+                return released
+                
+            except Exception as e:
+                logger.error(f"Error releasing expired task leases: {e}")
+                await session.rollback()
+                return 0
+    
+    @staticmethod
+    def _fail_interrupted_attempt(task: AgentTask, now: datetime) -> None:
+        """Record a processing attempt whose worker died, retrying like mark_failed does"""
+        error_message = "Worker lease expired before the task completed"
+        task.error_history = [*(task.error_history or []), {
+            "attempt": task.retry_count + 1,
+            "error": error_message,
+            "failed_at": now.isoformat(),
+            "processing_duration_seconds": int((now - task.started_at).total_seconds()) if task.started_at else None
+        }]
+        task.last_error = error_message
+        task.retry_count += 1
+        task.lease_owner = None
+        task.lease_expires_at = None
+        task.updated_at = now
+        
+        if task.retry_count < task.max_retries:
+            task.status = "pending"
+            # Same exponential backoff as a normal failure, so a task that kills its worker isn't re-claimed at once
+            task.scheduled_at = now + timedelta(minutes=min(2 ** task.retry_count, 60))
+        else:
+            task.status = "failed"
+            task.completed_at = now
+    
+    @staticmethod
+    def _lease_values(lease_owner: str, now: datetime, lease_seconds: Optional[int]) -> Dict[str, Any]:
+        lease_seconds = lease_seconds or get_settings().agent_task_lease_seconds
+        return {
+            "lease_owner": lease_owner,
+            "heartbeat_at": now,
+            "lease_expires_at": now + timedelta(seconds=lease_seconds)
+        }
+    
     async def update_task_status(
         self,
         task_id: UUID,
@@ -22,20 +22,25 @@ from typing import List, Dict, Any, Optional, AsyncIterator, Union
 from uuid import UUID
 from enum import Enum
 from pydantic import BaseModel, Field
-from sqlalchemy import select
+from sqlalchemy import select, func, or_
 
 from app.models.chat import Thread, Message
 from app.models.ai_agent import Agent as AgentModel
 from app.database import get_async_db_session
 from app.services.agent_service import agent_service
 from app.schemas.ai_response import ChatResponse
+from app.schemas.principal import Principal
 
 # Use dynamic agent factory for generic context building and MCP integration
 from app.services.dynamic_agent_factory import dynamic_agent_factory
 from app.services.file_validation_service import FileValidationService
+from app.services.token_counter_service import token_counter_service
 
 logger = logging.getLogger(__name__)
 
+# Threads with this many messages or fewer are always sent whole
+SHORT_THREAD_MESSAGES = 10
+
 
 class MessageFormat(Enum):
     """Supported message formats for thread history retrieval"""
@@ -193,18 +198,18 @@ class AIChatService:
                     logger.warning(f"[AI_CHAT_SERVICE] Thread {thread_id} not found for user {user_id} and agent {agent_id}")
                     return []
                 
-                # Get messages in chronological order
-                messages_query = select(Message).where(
-                    Message.thread_id == UUID(thread_id)
-                ).order_by(Message.created_at)
+                if max_context_size and max_context_size > 0 and format_type != MessageFormat.DETAILED:
+                    # Only read the newest messages that fit the token budget
+                    messages_query = self._build_context_window_query(UUID(thread_id), max_context_size)
+                else:
+                    # Get messages in chronological order
+                    messages_query = select(Message).where(
+                        Message.thread_id == UUID(thread_id)
+                    ).order_by(Message.created_at)
                 
                 result = await db.execute(messages_query)
                 messages = result.scalars().all()
                 
-                # Apply context limits if specified (for SIMPLE and MODEL_MESSAGE formats)
-                if max_context_size and max_context_size > 0 and format_type != MessageFormat.DETAILED:
-                    messages = await self._apply_context_limits(messages, max_context_size)
-                
                 # Format messages based on requested type
                 if format_type == MessageFormat.DETAILED:
                     # Full message details with metadata
@@ -249,36 +254,86 @@ class AIChatService:
                 logger.error(f"[AI_CHAT_SERVICE] Error getting thread history ({format_type.value}): {e}")
                 return []
 
+    def _build_context_window_query(self, thread_id: UUID, max_context_size: int):
+        """
+        Build a query returning only the newest messages that fit the token budget.
+        
+        A running token total is computed newest-first over the persisted
+        ``token_count`` column (falling back to a ~4 chars/token estimate for
+        messages stored before token counts were recorded), so older messages
+        beyond the budget are never loaded from the database.
+        
+        Every message costs at least one token, so no more than
+        ``max_context_size`` messages can fit; the window sum only runs over
+        that many newest rows (an index range scan on thread_id, created_at)
+        instead of the whole thread.
+        
+        Threads of ``SHORT_THREAD_MESSAGES`` messages or fewer are returned
+        whole regardless of the budget, as ``_apply_context_limits`` does.
+        """
+        message_tokens = func.coalesce(
+            Message.token_count,
+            func.char_length(Message.content) / 4 + 1
+        )
+        recent = select(
+            Message.id,
+            Message.created_at,
+            message_tokens.label("tokens")
+        ).where(
+            Message.thread_id == thread_id
+        ).order_by(
+            Message.created_at.desc(), Message.id.desc()
+        ).limit(max(max_context_size, SHORT_THREAD_MESSAGES + 1)).subquery()
+        
+        running_tokens = func.sum(recent.c.tokens).over(
+            order_by=(recent.c.created_at.desc(), recent.c.id.desc())
+        )
+        window = select(
+            recent.c.id.label("message_id"),
+            running_tokens.label("running_tokens"),
+            func.count().over().label("window_size")
+        ).subquery()
+        
+        return select(Message).join(
+            window, Message.id == window.c.message_id
+        ).where(
+            or_(
+                window.c.running_tokens <= max_context_size,
+                window.c.window_size <= SHORT_THREAD_MESSAGES
+            )
+        ).order_by(Message.created_at, Message.id)
+    
     async def _apply_context_limits(
         self,
         messages: List[Message],
-        max_context_size: int
+        max_context_size: int,
+        model: Optional[str] = None
     ) -> List[Message]:
-        """Apply token-based context limits to raw messages."""
+        """Apply token-based context limits to already-loaded messages."""
         try:
             if not messages or max_context_size <= 0:
                 return messages
             
             # If we have a reasonable number of messages, just return them
-            if len(messages) <= 10:
+            if len(messages) <= SHORT_THREAD_MESSAGES:
                 return messages
             
+            # Prefer token counts persisted at insert time; batch-count the rest
+            token_counts = [getattr(message, "token_count", None) for message in messages]
+            uncounted = [i for i, count in enumerate(token_counts) if not isinstance(count, int)]
+            if uncounted:
+                counted = await token_counter_service.count_messages_tokens([
+                    {"role": messages[i].role, "content": messages[i].content} for i in uncounted
+                ], model=model)
+                for i, count in zip(uncounted, counted):
+                    token_counts[i] = count
+            
             # Apply token-based filtering (process from newest to oldest)
             filtered_messages = []
             total_tokens = 0
             
             # Work backwards through messages (newest first)
-            for message in reversed(messages):
-                # Convert to dict format for token counting
-                msg_dict = {
-                    "role": message.role,
-                    "content": message.content,
-                }
-                
-                # Count tokens for this message using existing token service
-                from app.services.token_counter_service import token_counter_service
-                message_tokens = await token_counter_service.count_message_tokens(msg_dict)
-                
+            for message, message_tokens in zip(reversed(messages), reversed(token_counts)):
                 # Check if adding this message would exceed context limit
                 if total_tokens + message_tokens > max_context_size:
                     logger.debug(f"Context limit reached at {total_tokens} tokens, skipping older messages")
@@ -305,7 +360,7 @@ class AIChatService:
         user_id: str, 
         message: str,
         attachments: Optional[List[Dict[str, Any]]] = None,
-        principal: Optional[Dict[str, Any]] = None
+        principal: Optional[Principal] = None
     ) -> ChatResponse:
         """
         Send message to a thread with agent-centric processing.
@@ -357,7 +412,7 @@ class AIChatService:
         
         return await self._send_message(context, message, attachments, principal=principal)
     
-    async def _send_message(self, context: ThreadContext, message: str, attachments: List[dict] = None, principal: Optional[Dict[str, Any]] = None) -> ChatResponse:
+    async def _send_message(self, context: ThreadContext, message: str, attachments: List[dict] = None, principal: Optional[Principal] = None) -> ChatResponse:
         """
         Consolidated method for processing thread messages with optional authentication.
         
@@ -448,7 +503,8 @@ class AIChatService:
                 logger.info(f"[AI_CHAT_SERVICE] ✅ Agent processing completed in {response_time:.2f}ms ({auth_status})")
                 
                 # Store the interaction (this is critical and must always happen)
-                await self._store_thread_interaction(context, message, ai_response, attachments, response_time)
+                model = dynamic_agent_factory.get_model_string(agent_model) if agent_model else None
+                await self._store_thread_interaction(context, message, ai_response, attachments, response_time, model=model)
                 
                 return ai_response
                 
@@ -577,10 +633,17 @@ class AIChatService:
         user_message: str, 
         ai_response: ChatResponse, 
         attachments: List[dict] = None,
-        response_time_ms: float = None
+        response_time_ms: float = None,
+        model: Optional[str] = None
     ):
         """Store user message and AI response in the thread"""
         
+        # Count tokens once at write time so context windows never re-encode history
+        user_tokens, ai_tokens = await token_counter_service.count_messages_tokens([
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": ai_response.content}
+        ], model=model)
+        
         async with get_async_db_session() as db:
             try:
                 # Store user message
@@ -588,7 +651,8 @@ class AIChatService:
                     thread_id=UUID(context.thread_id),
                     role="user",
                     content=user_message,
-                    attachments=attachments or []
+                    attachments=attachments or [],
+                    token_count=user_tokens
                 )
                 db.add(user_msg)
                 
@@ -625,16 +689,18 @@ class AIChatService:
                         "generation_timestamp": datetime.now(timezone.utc).isoformat()
                     },
                     response_time_ms=int(response_time_ms) if response_time_ms else None,
-                    confidence_score=ai_response.confidence if hasattr(ai_response, 'confidence') else None
+                    confidence_score=ai_response.confidence if hasattr(ai_response, 'confidence') else None,
+                    token_count=ai_tokens
                 )
                 db.add(ai_msg)
                 
-                # Commit the messages first
-                await db.commit()
-                
-                # Update thread counters (2 messages added: user + assistant)
+                # Update thread counters in the same transaction (2 messages added: user + assistant)
                 from app.services.thread_service import thread_service
-                await thread_service.update_message_counters(db, UUID(context.thread_id), increment_count=2)
+                await thread_service.update_message_counters(
+                    db, UUID(context.thread_id), increment_count=2, commit=False
+                )
+                
+                await db.commit()
                 
                 logger.debug("[AI_CHAT_SERVICE] Thread interaction stored successfully")
                 
@@ -704,20 +770,26 @@ class AIChatService:
         thread_id: str,
         user_id: str,
         message: str,
-        attachments: List[dict] = None
-    ) -> AsyncIterator[str]:
+        attachments: List[dict] = None,
+        principal: Optional[Principal] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
         Stream AI response for a thread message in real-time.
         
+        Model deltas and tool-call events are forwarded as they arrive from the
+        agent run; the complete interaction is persisted once the run finishes.
+        
         Args:
             agent_id: ID of the agent handling this thread
             thread_id: ID of the thread
             user_id: ID of the user sending the message
             message: User's message content
             attachments: Optional file attachments
+            principal: Principal object for authorization (from AuthMiddleware)
             
         Yields:
-            str: Response chunks as they become available
+            Dict[str, Any]: Stream events (``text_delta``, ``tool_call``, ``tool_result``)
+            followed by a single ``final`` event carrying the ChatResponse
         """
         
         # Get thread history and create context
@@ -730,83 +802,65 @@ class AIChatService:
             session_history=message_history
         )
         
+        start_time = datetime.now(timezone.utc)
+        ai_response = None
+        
         try:
             # Get agent model
             agent_model = await self._get_agent_model(UUID(agent_id))
             if not agent_model or not agent_model.is_active:
-                yield "Error: Agent not available. Please try again later."
+                yield {"type": "final", "response": await self._create_fallback_response(
+                    "Error: Agent not available. Please try again later."
+                )}
                 return
             
-            # Store user message first
-            await self._store_user_message(context, message, attachments)
-            
-            # For now, streaming is not supported with task-based processing
-            # TODO: Implement streaming support for task-based agents
-            yield "Processing your request with agent tools..."
-            
-            # Process message via task system (non-streaming for now)
-            response = await self._process_message_via_task(context, message, agent_model, attachments)
+            file_context = ""
+            file_ids = []
+            if attachments:
+                file_context = await self._process_attachments(attachments)
+                file_ids = [att.get("file_id") for att in attachments if att.get("file_id")]
             
-            # Stream the final response
-            yield response.content
+            agent_context = await dynamic_agent_factory.build_context(
+                agent_type=agent_model.agent_type or "customer_support",
+                message=message,
+                conversation_history=context.session_history,
+                file_context=file_context,
+                user_metadata={
+                    "user_id": context.user_id,
+                    "organization_id": context.organization_id,
+                    "thread_id": context.thread_id
+                },
+                session_id=context.thread_id,
+                organization_id=context.organization_id,
+                file_ids=file_ids
+            )
             
-            # Store the complete AI response
-            await self._store_ai_response(context, response)
+            async for event in dynamic_agent_factory.stream_message_with_agent(
+                agent_model=agent_model,
+                message=message,
+                context=agent_context,
+                principal=principal
+            ):
+                if event["type"] == "final":
+                    ai_response = event["response"]
+                yield event
             
         except Exception as e:
             logger.error(f"[AI_CHAT_SERVICE] Streaming failed: {e}")
-            yield "I encountered an error. Please try again."
-    
-    async def _store_user_message(self, context: ThreadContext, message: str, attachments: List[dict] = None):
-        """Store user message in thread"""
-        async with get_async_db_session() as db:
-            try:
-                user_msg = Message(
-                    thread_id=UUID(context.thread_id),
-                    role="user",
-                    content=message,
-                    attachments=attachments or []
-                )
-                db.add(user_msg)
-                await db.commit()
-            except Exception as e:
-                await db.rollback()
-                logger.error(f"Error storing user message: {e}")
-                raise
-    
-    async def _store_ai_response(self, context: ThreadContext, response: ChatResponse):
-        """Store AI response in thread"""
-        async with get_async_db_session() as db:
+            ai_response = await self._create_fallback_response("I encountered an error. Please try again.")
+            yield {"type": "final", "response": ai_response}
+            return
+        
+        response_time = (datetime.now(timezone.utc) - start_time).total_seconds() * 1000
+        logger.info(f"[AI_CHAT_SERVICE] ✅ Streaming completed in {response_time:.2f}ms")
+        
+        # Persist the full interaction once the stream has finished
+        if ai_response is not None:
             try:
-                ai_msg = Message(
-                    thread_id=UUID(context.thread_id),
-                    role="assistant",
-                    content=response.content,
-                    confidence_score=response.confidence if hasattr(response, 'confidence') else None
-                )
-                db.add(ai_msg)
-                await db.commit()
-
-                # Update thread metadata to reflect this interaction (user + assistant)
-                try:
-                    thread_query = select(Thread).where(Thread.id == UUID(context.thread_id))
-                    result = await db.execute(thread_query)
-                    thread = result.scalar_one_or_none()
-                    if thread:
-                        current_metadata = thread.thread_metadata or {}
-                        current_metadata.update({
-                            "last_message_at": datetime.now(timezone.utc).isoformat(),
-                            "total_messages": current_metadata.get("total_messages", 0) + 2,
-                            "last_agent_used": context.agent_id,
-                            "last_tools_used": response.tools_used if hasattr(response, 'tools_used') else []
-                        })
-                        thread.thread_metadata = current_metadata
-                        await db.commit()
-                except Exception as meta_err:
-                    logger.warning(f"[AI_CHAT_SERVICE] Failed to update thread metadata after streaming response: {meta_err}")
+                model = dynamic_agent_factory.get_model_string(agent_model) if agent_model else None
+                await self._store_thread_interaction(context, message, ai_response, attachments, response_time, model=model)
             except Exception as e:
-                await db.rollback()
-                logger.error(f"Error storing AI response: {e}")
+                logger.error(f"[AI_CHAT_SERVICE] Failed to store streamed interaction: {e}")
     
     # Task-based agent processing methods
     async def _get_agent_model(self, agent_id: UUID):
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Buffered API token usage tracking
+
+Machine clients can send many requests per second with the same token.
+Updating the token row on every request serializes them on that row, so
+requests only bump an in-memory counter here; a background loop writes the
+last-used timestamp and request count of every active token in one batched
+UPDATE per flush interval.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict
+
+from sqlalchemy import bindparam, case, or_, update
+
+from app.config.settings import get_settings
+from app.models.api_token import APIToken
+from app.utils.batched_writer import BatchedUsageWriter
+
+logger = logging.getLogger(__name__)
+
+
+def _usage_statement():
+    tokens = APIToken.__table__
+    last_used = bindparam("b_last_used_at")
+    return (
+        update(tokens)
+        .where(tokens.c.id == bindparam("b_token_id"))
+        .values(
+            # Other processes flush independently; never move last_used_at backwards
+            last_used_at=case(
+                (or_(tokens.c.last_used_at.is_(None), tokens.c.last_used_at < last_used), last_used),
+                else_=tokens.c.last_used_at
+            ),
+            usage_count=tokens.c.usage_count + bindparam("b_uses")
+        )
+    )
+
+
+def _usage_params(token_id, last_used_at: datetime, count: int) -> Dict[str, Any]:
+    return {"b_token_id": token_id, "b_last_used_at": last_used_at, "b_uses": count}
+
+
+class APITokenUsageService:
+    """Coalesces per-request API token usage into periodic batched writes"""
+    
+    def __init__(self):
+        self.writer = BatchedUsageWriter(
+            _usage_statement(),
+            _usage_params,
+            flush_seconds=get_settings().api_token_usage_flush_seconds,
+            log_tag="API_TOKENS"
+        )
+    
+    def record_use(self, token_id) -> None:
+        """Buffer one authenticated request; written by the next flush"""
+        self.writer.record(token_id)
+    
+    async def flush(self) -> int:
+        """Write buffered usage in one executemany UPDATE; returns the number of tokens updated"""
+        return await self.writer.flush()
+    
+    async def close(self) -> None:
+        """Flush buffered usage and stop the flush loop"""
+        await self.writer.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self.writer.stats
+        return {
+            "requests_recorded": stats["recorded"],
+            "flushes": stats["flushes"],
+            "tokens_flushed": stats["rows_flushed"],
+            "flush_failures": stats["flush_failures"],
+            "pending_tokens": len(self.writer.pending)
+        }
+
+
+# Global service instance
+api_token_usage = APITokenUsageService()
@@ -1,16 +1,153 @@
 #!/usr/bin/env python3
 """
 Clerk integration service for user authentication and management
+
+Session tokens are verified locally against Clerk's signing keys (JWKS),
+cached and refreshed in the background, so authenticating a request costs a
+signature check instead of a round trip to Clerk. Profile data that isn't in
+the token (email, name, avatar) comes from a TTL cache invalidated by the
+user.updated/user.deleted webhooks.
 """
 
 import os
+import asyncio
+import hashlib
 import logging
+import time
+from collections import OrderedDict
 from typing import Optional, Dict, Any, List
+
+import jwt
 from clerk_backend_api import Clerk
 
+from app.config.settings import get_settings
+
 logger = logging.getLogger(__name__)
 
 
+class ClerkSessionVerifier:
+    """Local Clerk session JWT verification with cached signing keys and verified claims"""
+    
+    def __init__(self, client: Optional[Clerk], jwt_key: Optional[str] = None):
+        settings = get_settings()
+        self.client = client
+        self.authorized_parties = settings.clerk_authorized_parties
+        self.leeway = settings.clerk_clock_skew_seconds
+        self.refresh_seconds = settings.clerk_jwks_refresh_seconds
+        self.min_refresh_seconds = settings.clerk_jwks_min_refresh_seconds
+        self.cache_size = settings.clerk_verified_token_cache_size
+        
+        # A configured PEM key needs no JWKS at all
+        self._static_key = jwt.algorithms.RSAAlgorithm(jwt.algorithms.RSAAlgorithm.SHA256).prepare_key(jwt_key) if jwt_key else None
+        self._keys: Dict[str, Any] = {}
+        self._fetched_at: Optional[float] = None
+        self._last_attempt: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        self._verified: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        
+        self.stats = {
+            "verified": 0,
+            "cache_hits": 0,
+            "rejected": 0,
+            "jwks_refreshes": 0,
+            "jwks_refresh_failures": 0
+        }
+    
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+    
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Verify a session token and return its claims.
+        
+        Raises:
+            jwt.InvalidTokenError: If the token is malformed, expired, not
+                signed by Clerk or issued for an unauthorized party
+        """
+        cache_key = hashlib.sha256(token.encode()).digest()
+        claims = self._verified.get(cache_key)
+        if claims is not None and claims["exp"] + self.leeway > time.time():
+            self._verified.move_to_end(cache_key)
+            self.stats["cache_hits"] += 1
+            return claims
+        
+        try:
+            header = jwt.get_unverified_header(token)
+            key = await self._signing_key(header.get("kid"))
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=["RS256"],
+                leeway=self.leeway,
+                options={"require": ["exp", "iat", "sub"], "verify_aud": False}
+            )
+            azp = claims.get("azp")
+            if self.authorized_parties and azp and azp not in self.authorized_parties:
+                raise jwt.InvalidTokenError(f"Unauthorized party: {azp}")
+        except jwt.InvalidTokenError:
+            self.stats["rejected"] += 1
+            raise
+        
+        self._verified[cache_key] = claims
+        if len(self._verified) > self.cache_size:
+            self._verified.popitem(last=False)
+        self.stats["verified"] += 1
+        return claims
+    
+    async def _signing_key(self, kid: Optional[str]):
+        if self._static_key is not None:
+            return self._static_key
+        
+        now = time.monotonic()
+        if kid not in self._keys:
+            # New key after a rotation, or nothing fetched yet; throttled so
+            # forged key IDs can't make us hammer the JWKS endpoint
+            if self._last_attempt is None or now - self._last_attempt >= self.min_refresh_seconds:
+                await self.refresh()
+        elif now - self._fetched_at >= self.refresh_seconds:
+            # Keys still work; refresh without holding up this request
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self.refresh())
+        
+        key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown Clerk signing key: {kid}")
+        return key
+    
+    async def refresh(self) -> None:
+        """Fetch the current signing keys; keeps the previous keys if the fetch fails"""
+        if self.client is None:
+            return
+        
+        async with self._get_lock():
+            # Another request may have refreshed while we waited
+            if self._last_attempt is not None and time.monotonic() - self._last_attempt < 1:
+                return
+            self._last_attempt = time.monotonic()
+            try:
+                jwks = await self.client.jwks.get_jwks_async()
+                self._keys = {
+                    key.kid: jwt.PyJWK(key.model_dump(exclude_none=True)).key
+                    for key in (jwks.keys or []) if key.kid and key.kty == "RSA"
+                }
+                self._fetched_at = time.monotonic()
+                self.stats["jwks_refreshes"] += 1
+                logger.info(f"🔑 [CLERK] Loaded {len(self._keys)} session signing keys")
+            except Exception as e:
+                self.stats["jwks_refresh_failures"] += 1
+                logger.error(f"❌ [CLERK] Failed to refresh session signing keys: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "cached_tokens": len(self._verified), "signing_keys": len(self._keys)}
+
+
 class ClerkService:
     """Service for Clerk authentication integration"""
     
@@ -23,104 +160,94 @@ class ClerkService:
         else:
             self.client = None
             logger.warning("CLERK_SECRET_KEY not found - Clerk functionality will be disabled")
+        
+        settings = get_settings()
+        self.session_verifier = ClerkSessionVerifier(self.client, settings.clerk_jwt_key)
+        self.profile_ttl_seconds = settings.clerk_profile_cache_ttl_seconds
+        self.profile_cache_size = settings.clerk_profile_cache_size
+        self._profiles: "OrderedDict[str, tuple]" = OrderedDict()
+        self.profile_stats = {"hits": 0, "misses": 0, "invalidations": 0}
     
     async def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify Clerk session token and return user data"""
-        logger.debug(f"Attempting to verify Clerk token")
-        
         if not self.client:
             logger.error("Clerk client not initialized - missing CLERK_SECRET_KEY")
             return None
-            
+        
         try:
-            # Use the official authenticate_request method as per SDK documentation
-            import httpx
-            from clerk_backend_api.security.types import AuthenticateRequestOptions
-            
-            logger.debug("Creating httpx request for Clerk authentication")
-            
-            # Create a mock request with the Bearer token
-            request = httpx.Request("GET", "http://localhost", headers={
-                "Authorization": f"Bearer {token}"
-            })
-            
-            # Use authenticate_request with proper options
-            logger.debug("Calling Clerk authenticate_request")
-            request_state = self.client.authenticate_request(
-                request,
-                AuthenticateRequestOptions()  # Try without authorized_parties first
-            )
-            
-            logger.debug(f"Clerk request state: is_signed_in={request_state.is_signed_in}")
-            
-            if not request_state.is_signed_in:
-                logger.warning("Clerk authentication failed - user not signed in")
-                return None
-            
-            # Debug: Check what attributes are available
-            logger.debug(f"RequestState attributes: {dir(request_state)}")
-            
-            # Try to get user ID and extract organization info from payload
-            user_id = None
-            org_info = {}
-            for attr in ['user_id', 'sub', 'user', 'payload']:
-                if hasattr(request_state, attr):
-                    attr_value = getattr(request_state, attr)
-                    logger.debug(f"RequestState.{attr} = {attr_value}")
-                    if attr == 'user_id' or attr == 'sub':
-                        user_id = attr_value
-                    elif attr == 'payload' and isinstance(attr_value, dict):
-                        user_id = attr_value.get('sub')
-                        # Extract organization information from JWT payload
-                        # Clerk stores org info in the 'o' field
-                        if 'o' in attr_value and isinstance(attr_value['o'], dict):
-                            org_data = attr_value['o']
-                            org_info = {
-                                'org_id': org_data.get('id'),
-                                'org_slug': org_data.get('slg'),  # 'slg' is the Clerk field for slug
-                                'org_role': org_data.get('rol')   # 'rol' is the Clerk field for role
-                            }
-                            logger.debug(f"Extracted organization info from 'o' field: {org_info}")
-                        # Also check for legacy format (direct fields)
-                        elif 'org_id' in attr_value:
-                            org_info = {
-                                'org_id': attr_value.get('org_id'),
-                                'org_slug': attr_value.get('org_slug'),
-                                'org_role': attr_value.get('org_role')
-                            }
-                            logger.debug(f"Extracted organization info from legacy format: {org_info}")
-            
-            if not user_id:
-                logger.error("Could not extract user_id from request state")
-                return None
-            
-            # Get user data from the user_id
-            logger.debug(f"Getting user data for user_id: {user_id}")
-            user = self.client.users.get(user_id=user_id)
-            logger.debug(f"Successfully retrieved user data from Clerk API")
-            
-            formatted_user = self._format_user_data(user, org_info)
-            logger.debug(f"Formatted user data: {formatted_user}")
-            
-            return formatted_user
-            
-        except Exception as e:
-            logger.error(f"Token verification failed: {e}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            claims = await self.session_verifier.verify(token)
+        except jwt.InvalidTokenError as e:
+            logger.warning(f"Clerk session token rejected: {e}")
             return None
+        
+        user_id = claims["sub"]
+        user_data = await self.get_user(user_id)
+        if not user_data:
+            logger.error(f"Could not load Clerk profile for user {user_id}")
+            return None
+        
+        org_info = self._extract_org_info(claims)
+        if org_info:
+            user_data.update(org_info)
+        
+        # Session timing, so callers caching the result don't outlive the token
+        user_data.update({'exp': claims['exp'], 'iat': claims['iat'], 'sid': claims.get('sid')})
+        return user_data
+    
+    @staticmethod
+    def _extract_org_info(claims: Dict[str, Any]) -> Dict[str, Any]:
+        """Active organization from session claims"""
+        # Clerk stores org info in the 'o' field ('slg' is the slug, 'rol' the role)
+        if isinstance(claims.get('o'), dict):
+            org_data = claims['o']
+            return {
+                'org_id': org_data.get('id'),
+                'org_slug': org_data.get('slg'),
+                'org_role': org_data.get('rol')
+            }
+        # Legacy format (direct fields)
+        if 'org_id' in claims:
+            return {
+                'org_id': claims.get('org_id'),
+                'org_slug': claims.get('org_slug'),
+                'org_role': claims.get('org_role')
+            }
+        return {}
     
     async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get user by Clerk user ID"""
+        """Get user by Clerk user ID, served from the profile cache when fresh"""
         if not self.client:
             return None
-            
+        
+        cached = self._profiles.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            self.profile_stats["hits"] += 1
+            return dict(cached[1])
+        
+        self.profile_stats["misses"] += 1
         try:
-            user = self.client.users.get(user_id)
-            return self._format_user_data(user)
+            user = await self.client.users.get_async(user_id=user_id)
+            user_data = self._format_user_data(user)
         except Exception as e:
             logger.error(f"Failed to get user {user_id}: {e}")
             return None
+        
+        self._profiles[user_id] = (time.monotonic() + self.profile_ttl_seconds, user_data)
+        self._profiles.move_to_end(user_id)
+        if len(self._profiles) > self.profile_cache_size:
+            self._profiles.popitem(last=False)
+        return dict(user_data)
+    
+    def invalidate_user_profile(self, user_id: str) -> None:
+        """Drop a cached profile after Clerk reports a change"""
+        if self._profiles.pop(user_id, None) is not None:
+            self.profile_stats["invalidations"] += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "session_verification": self.session_verifier.get_stats(),
+            "profile_cache": {**self.profile_stats, "size": len(self._profiles)}
+        }
     
     async def update_user_metadata(self, user_id: str, metadata: Dict[str, Any]) -> bool:
         """Update user metadata in Clerk"""
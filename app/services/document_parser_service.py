@@ -4,7 +4,12 @@ DocumentParserService - Extract structured content from documents (PDFs, Word, E
 Similar to AWS Textract functionality but using local libraries.
 """
 
-from typing import Dict, Any, List
+import asyncio
+import os
+import tempfile
+from collections import deque
+from contextlib import suppress
+from typing import Dict, Any, List, AsyncIterator, Deque, Optional, Union
 import logging
 from io import BytesIO
 
@@ -21,10 +26,251 @@ except ImportError:
     HAS_MAGIC = False
 
 from app.config.settings import get_settings
+from app.services.extraction_executor import extraction_executor
 
 logger = logging.getLogger(__name__)
 
 
+def _extract_pdf_tables(page) -> List[Dict[str, Any]]:
+    """Extract tables from PDF page using basic layout analysis"""
+    # Simple table detection - can be enhanced with more sophisticated algorithms
+    tables = []
+
+    # For now, return empty list - table extraction is complex
+    # In production, could use libraries like tabula-py or camelot
+
+    return tables
+
+
+def _pdf_page_count_sync(content: bytes) -> int:
+    """Count PDF pages (only parses the page tree, not page content)"""
+    if not HAS_PYMUPDF:
+        raise ValueError("PyMuPDF not available - install pymupdf package for PDF text extraction")
+
+    doc = pymupdf.open(stream=content, filetype="pdf")
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def _extract_pdf_page(page, features: List[str]) -> Dict[str, Any]:
+    """Extract text, layout blocks and tables from a single PDF page"""
+    page_data = {
+        "page_number": page.number + 1,  # PyMuPDF page numbers are 0-based
+        "text": "",
+        "blocks": [],
+        "confidence": 0.95
+    }
+
+    if "TEXT" in features:
+        try:
+            # Extract text exactly as shown in official PyMuPDF docs
+            text = page.get_text()  # get plain text (is in UTF-8)
+
+            # Check if PyMuPDF returned PDF source code instead of readable text
+            # This happens when PyMuPDF reads a malformed PDF or PDF source code
+            if text and len(text) > 10:
+                # Check for obvious PDF source markers
+                is_pdf_source = (
+                    text.startswith('%PDF') or 
+                    text.startswith('1 0 obj') or
+                    (text.count('obj') > 2 and text.count('endobj') > 2) or
+                    ('stream' in text and 'endstream' in text) or
+                    ('xref' in text and '%%EOF' in text)
+                )
+
+                if is_pdf_source:
+                    logger.warning(f"PyMuPDF returned PDF source code instead of readable text")
+                    # Set empty text so it can be handled appropriately
+                    text = ""
+
+            page_data["text"] = text
+
+        except Exception as e:
+            # If extraction fails, log and set empty text
+            logger.warning(f"PyMuPDF text extraction failed for page {page.number + 1}: {e}")
+            page_data["text"] = ""
+
+    if "LAYOUT" in features:
+        # Get text blocks with positioning
+        text_dict = page.get_text("dict")
+        blocks = text_dict.get("blocks", [])
+        for block in blocks:
+            if "lines" in block:  # Text block
+                block_text = ""
+                for line in block["lines"]:
+                    for span in line["spans"]:
+                        block_text += span.get("text", "")
+
+                if block_text.strip():  # Only add non-empty blocks
+                    page_data["blocks"].append({
+                        "type": "paragraph",
+                        "text": block_text,
+                        "confidence": 0.95,
+                        "geometry": {
+                            "bounding_box": {
+                                "left": block["bbox"][0] / page.rect.width,
+                                "top": block["bbox"][1] / page.rect.height,
+                                "width": (block["bbox"][2] - block["bbox"][0]) / page.rect.width,
+                                "height": (block["bbox"][3] - block["bbox"][1]) / page.rect.height
+                            }
+                        }
+                    })
+
+    if "TABLES" in features:
+        # Extract tables using layout analysis
+        tables = _extract_pdf_tables(page)
+        page_data["blocks"].extend(tables)
+
+    return page_data
+
+
+def _write_temp_pdf(content: bytes) -> str:
+    """Spill PDF bytes to a temp file so process-pool jobs receive a path instead of the content"""
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(content)
+    return path
+
+
+def _needs_ocr(text: str) -> bool:
+    return not text or text.startswith('%PDF')
+
+
+def _analyze_pdf_pages_sync(
+    source: Union[bytes, str],
+    features: List[str],
+    start: int,
+    stop: int,
+    render_empty_pages: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Analyze the PDF page range [start, stop) with structure detection
+
+    source is either the PDF bytes or a path to them. With render_empty_pages,
+    pages without extractable text also get a 2x PNG rendering under "image"
+    for OCR, using the same open document as the text extraction.
+    """
+    if not HAS_PYMUPDF:
+        raise ValueError("PyMuPDF not available - install pymupdf package for PDF text extraction")
+
+    doc = pymupdf.open(source) if isinstance(source, str) else pymupdf.open(stream=source, filetype="pdf")
+    try:
+        pages = []
+        for index in range(start, stop):
+            page_data = _extract_pdf_page(doc[index], features)
+            if render_empty_pages and _needs_ocr(page_data["text"]):
+                # 2x zoom gives Tesseract enough resolution on scanned pages
+                page_data["image"] = doc[index].get_pixmap(matrix=pymupdf.Matrix(2, 2)).tobytes("png")
+            pages.append(page_data)
+        return pages
+    finally:
+        doc.close()
+
+
+def _analyze_word_doc_sync(content: bytes, features: List[str]) -> Dict[str, Any]:
+    """Analyze Word document"""
+    from docx import Document
+
+    doc = Document(BytesIO(content))
+
+    page_data = {
+        "page_number": 1,
+        "text": "",
+        "blocks": [],
+        "confidence": 0.98
+    }
+
+    if "TEXT" in features:
+        full_text = []
+        for paragraph in doc.paragraphs:
+            full_text.append(paragraph.text)
+        page_data["text"] = "\n".join(full_text)
+
+    if "LAYOUT" in features:
+        for para in doc.paragraphs:
+            if para.text.strip():
+                page_data["blocks"].append({
+                    "type": "paragraph",
+                    "text": para.text,
+                    "confidence": 0.98
+                })
+
+    if "TABLES" in features:
+        for table in doc.tables:
+            rows = []
+            for row in table.rows:
+                cells = [cell.text.strip() for cell in row.cells]
+                rows.append({"cells": cells})
+
+            page_data["blocks"].append({
+                "type": "table",
+                "rows": rows,
+                "confidence": 0.95
+            })
+
+    return {
+        "pages": [page_data],
+        "metadata": {
+            "total_pages": 1,
+            "document_type": "word",
+            "language": "auto-detected"
+        }
+    }
+
+
+def _analyze_excel_doc_sync(content: bytes, features: List[str]) -> Dict[str, Any]:
+    """Analyze Excel document"""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(BytesIO(content))
+    pages = []
+
+    for sheet_name in workbook.sheetnames:
+        sheet = workbook[sheet_name]
+        page_data = {
+            "page_number": len(pages) + 1,
+            "text": "",
+            "blocks": [],
+            "confidence": 0.98
+        }
+
+        if "TEXT" in features or "TABLES" in features:
+            # Extract all cell values
+            rows = []
+            all_text = []
+
+            for row in sheet.iter_rows(values_only=True):
+                row_values = [str(cell) if cell is not None else "" for cell in row]
+                if any(val.strip() for val in row_values):  # Skip empty rows
+                    rows.append({"cells": row_values})
+                    all_text.extend([val for val in row_values if val.strip()])
+
+            if "TEXT" in features:
+                page_data["text"] = " ".join(all_text)
+
+            if "TABLES" in features and rows:
+                page_data["blocks"].append({
+                    "type": "table",
+                    "rows": rows,
+                    "confidence": 0.98
+                })
+
+        pages.append(page_data)
+
+    workbook.close()
+
+    return {
+        "pages": pages,
+        "metadata": {
+            "total_pages": len(pages),
+            "document_type": "excel",
+            "language": "auto-detected"
+        }
+    }
+
+
 class DocumentParserService:
     """Document structure parsing with layout detection"""
     
@@ -62,88 +308,7 @@ class DocumentParserService:
     
     async def _analyze_pdf(self, content: bytes, features: List[str]) -> Dict[str, Any]:
         """Analyze PDF document with structure detection"""
-        
-        logger.info(f"DEBUG: _analyze_pdf called with features {features}")
-
-        if not HAS_PYMUPDF:
-            raise ValueError("PyMuPDF not available - install pymupdf package for PDF text extraction")
-        
-        doc = pymupdf.open(stream=content, filetype="pdf")
-        pages = []
-        
-        for page in doc:  # Iterate directly over pages
-            page_data = {
-                "page_number": page.number + 1,  # PyMuPDF page numbers are 0-based
-                "text": "",
-                "blocks": [],
-                "confidence": 0.95
-            }
-            
-            if "TEXT" in features:
-                try:
-                    # Extract text exactly as shown in official PyMuPDF docs
-                    text = page.get_text()  # get plain text (is in UTF-8)
-                    logger.info(f"DEBUG: PyMuPDF returned text: {text}")
-
-                    # Check if PyMuPDF returned PDF source code instead of readable text
-                    # This happens when PyMuPDF reads a malformed PDF or PDF source code
-                    if text and len(text) > 10:
-                        # Check for obvious PDF source markers
-                        is_pdf_source = (
-                            text.startswith('%PDF') or 
-                            text.startswith('1 0 obj') or
-                            (text.count('obj') > 2 and text.count('endobj') > 2) or
-                            ('stream' in text and 'endstream' in text) or
-                            ('xref' in text and '%%EOF' in text)
-                        )
-                        
-                        if is_pdf_source:
-                            print(f"DEBUG: Detected PDF source code in extracted text, clearing...")
-                            logger.warning(f"PyMuPDF returned PDF source code instead of readable text")
-                            # Set empty text so it can be handled appropriately
-                            text = ""
-                    
-                    page_data["text"] = text
-                    
-                except Exception as e:
-                    # If extraction fails, log and set empty text
-                    logger.warning(f"PyMuPDF text extraction failed for page {page.number + 1}: {e}")
-                    page_data["text"] = ""
-            
-            if "LAYOUT" in features:
-                # Get text blocks with positioning
-                text_dict = page.get_text("dict")
-                blocks = text_dict.get("blocks", [])
-                for block in blocks:
-                    if "lines" in block:  # Text block
-                        block_text = ""
-                        for line in block["lines"]:
-                            for span in line["spans"]:
-                                block_text += span.get("text", "")
-                        
-                        if block_text.strip():  # Only add non-empty blocks
-                            page_data["blocks"].append({
-                                "type": "paragraph",
-                                "text": block_text,
-                                "confidence": 0.95,
-                                "geometry": {
-                                    "bounding_box": {
-                                        "left": block["bbox"][0] / page.rect.width,
-                                        "top": block["bbox"][1] / page.rect.height,
-                                        "width": (block["bbox"][2] - block["bbox"][0]) / page.rect.width,
-                                        "height": (block["bbox"][3] - block["bbox"][1]) / page.rect.height
-                                    }
-                                }
-                            })
-            
-            if "TABLES" in features:
-                # Extract tables using layout analysis
-                tables = await self._extract_pdf_tables(page)
-                page_data["blocks"].extend(tables)
-            
-            pages.append(page_data)
-        
-        doc.close()
+        pages = [page async for page in self.stream_pdf_pages(content, features)]
         
         return {
             "pages": pages,
@@ -154,105 +319,77 @@ class DocumentParserService:
             }
         }
     
-    async def _analyze_word_doc(self, content: bytes, features: List[str]) -> Dict[str, Any]:
-        """Analyze Word document"""
-        from docx import Document
-        
-        doc = Document(BytesIO(content))
+    async def get_pdf_page_count(self, content: bytes) -> int:
+        """Get the number of pages in a PDF"""
+        # Opening a PDF only reads the xref/page tree - cheap enough for a thread
+        return await extraction_executor.run(_pdf_page_count_sync, content, serial=True)
+    
+    async def stream_pdf_pages(
+        self,
+        content: bytes,
+        features: List[str],
+        page_count: Optional[int] = None,
+        render_empty_pages: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield analyzed PDF pages in order as they are extracted
         
-        page_data = {
-            "page_number": 1,
-            "text": "",
-            "blocks": [],
-            "confidence": 0.98
-        }
+        Pages are extracted in ranges of pdf_page_batch_size. When the document is
+        routed to the process pool, ranges are extracted in parallel (bounded by
+        the pool size and the extraction concurrency cap). Extraction stops as soon as the consumer stops
+        iterating, so callers can enforce a context budget without paying for
+        the rest of the document. Process-pool jobs read the PDF from a temp
+        file rather than each receiving a pickled copy of the content.
         
-        if "TEXT" in features:
-            full_text = []
-            for paragraph in doc.paragraphs:
-                full_text.append(paragraph.text)
-            page_data["text"] = "\n".join(full_text)
+        Args:
+            content: Raw PDF bytes
+            features: List of analysis features to perform
+            page_count: Page count if already known by the caller
+            render_empty_pages: Attach a PNG rendering ("image") to pages without text, for OCR
+            
+        Yields:
+            Page dictionaries (page_number, text, blocks, confidence, and image when rendered)
+        """
+        if page_count is None:
+            page_count = await self.get_pdf_page_count(content)
+        batch_size = max(1, self.settings.pdf_page_batch_size)
+        ranges = deque((start, min(start + batch_size, page_count)) for start in range(0, page_count, batch_size))
         
-        if "LAYOUT" in features:
-            for para in doc.paragraphs:
-                if para.text.strip():
-                    page_data["blocks"].append({
-                        "type": "paragraph",
-                        "text": para.text,
-                        "confidence": 0.98
-                    })
+        # PyMuPDF is not thread-safe, so ranges only fan out across separate processes
+        source: Union[bytes, str] = content
+        if extraction_executor.uses_process_pool(len(content)):
+            parallelism = min(extraction_executor.max_workers, extraction_executor.max_concurrency)
+            source = await asyncio.to_thread(_write_temp_pdf, content)
+        else:
+            parallelism = 1
         
-        if "TABLES" in features:
-            for table in doc.tables:
-                rows = []
-                for row in table.rows:
-                    cells = [cell.text.strip() for cell in row.cells]
-                    rows.append({"cells": cells})
+        pending: Deque[asyncio.Task] = deque()
+        try:
+            while ranges or pending:
+                while ranges and len(pending) < parallelism:
+                    start, stop = ranges.popleft()
+                    pending.append(asyncio.ensure_future(extraction_executor.run(
+                        _analyze_pdf_pages_sync, source, features, start, stop, render_empty_pages,
+                        payload_size=len(content), serial=True
+                    )))
                 
-                page_data["blocks"].append({
-                    "type": "table",
-                    "rows": rows,
-                    "confidence": 0.95
-                })
-        
-        return {
-            "pages": [page_data],
-            "metadata": {
-                "total_pages": 1,
-                "document_type": "word",
-                "language": "auto-detected"
-            }
-        }
+                for page in await pending.popleft():
+                    yield page
+        finally:
+            # Consumer stopped early (budget reached) or failed - drop ranges still in flight
+            for task in pending:
+                task.cancel()
+            if isinstance(source, str):
+                with suppress(FileNotFoundError):
+                    os.unlink(source)
+    
+    async def _analyze_word_doc(self, content: bytes, features: List[str]) -> Dict[str, Any]:
+        """Analyze Word document"""
+        return await extraction_executor.run(_analyze_word_doc_sync, content, features, payload_size=len(content))
     
     async def _analyze_excel_doc(self, content: bytes, features: List[str]) -> Dict[str, Any]:
         """Analyze Excel document"""
-        import openpyxl
-        
-        workbook = openpyxl.load_workbook(BytesIO(content))
-        pages = []
-        
-        for sheet_name in workbook.sheetnames:
-            sheet = workbook[sheet_name]
-            page_data = {
-                "page_number": len(pages) + 1,
-                "text": "",
-                "blocks": [],
-                "confidence": 0.98
-            }
-            
-            if "TEXT" in features or "TABLES" in features:
-                # Extract all cell values
-                rows = []
-                all_text = []
-                
-                for row in sheet.iter_rows(values_only=True):
-                    row_values = [str(cell) if cell is not None else "" for cell in row]
-                    if any(val.strip() for val in row_values):  # Skip empty rows
-                        rows.append({"cells": row_values})
-                        all_text.extend([val for val in row_values if val.strip()])
-                
-                if "TEXT" in features:
-                    page_data["text"] = " ".join(all_text)
-                
-                if "TABLES" in features and rows:
-                    page_data["blocks"].append({
-                        "type": "table",
-                        "rows": rows,
-                        "confidence": 0.98
-                    })
-            
-            pages.append(page_data)
-        
-        workbook.close()
-        
-        return {
-            "pages": pages,
-            "metadata": {
-                "total_pages": len(pages),
-                "document_type": "excel",
-                "language": "auto-detected"
-            }
-        }
+        return await extraction_executor.run(_analyze_excel_doc_sync, content, features, payload_size=len(content))
     
     async def _analyze_text_file(self, content: bytes, features: List[str]) -> Dict[str, Any]:
         """Analyze plain text file"""
@@ -298,16 +435,6 @@ class DocumentParserService:
             }
         }
     
-    async def _extract_pdf_tables(self, page) -> List[Dict[str, Any]]:
-        """Extract tables from PDF page using basic layout analysis"""
-        # Simple table detection - can be enhanced with more sophisticated algorithms
-        tables = []
-        
-        # For now, return empty list - table extraction is complex
-        # In production, could use libraries like tabula-py or camelot
-        
-        return tables
-    
     async def extract_text(self, content: bytes) -> str:
         """Simple text extraction without structure"""
         analysis = await self.analyze_document(content, ["TEXT"])
@@ -5,11 +5,26 @@ Dynamic Agent Factory for creating Pydantic AI agents from Agent models
 This factory replaces the hardcoded CustomerSupportAgent by creating Pydantic AI
 agents dynamically based on Agent model configuration, with direct MCP integration.
 """
+import hashlib
+import json
 import logging
-from typing import Optional, Dict, Any, List
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, AsyncIterator, Tuple
+from pydantic_core import from_json
 from pydantic_ai import Agent as PydanticAgent
 from pydantic_ai.usage import UsageLimits
-from pydantic_ai.messages import ModelMessage
+from pydantic_ai.messages import (
+    ModelMessage,
+    PartStartEvent,
+    PartDeltaEvent,
+    TextPart,
+    TextPartDelta,
+    ToolCallPart,
+    ToolCallPartDelta,
+    FunctionToolCallEvent,
+    FunctionToolResultEvent,
+)
 from pydantic_ai.exceptions import UsageLimitExceeded
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.ai_agent import Agent as AgentModel
@@ -22,6 +37,143 @@ from app.config.settings import get_settings
 logger = logging.getLogger(__name__)
 
 
+class _OutputContentStream:
+    """
+    Turns raw model stream events into user-visible text deltas.
+    
+    Plain text parts are forwarded as-is. For structured output (the
+    ``final_result`` output tool carrying a ChatResponse) the tool-call
+    arguments arrive as partial JSON, so the accumulated args are parsed
+    leniently and only the newly-completed suffix of ``content`` is emitted.
+    """
+    
+    OUTPUT_TOOL_PREFIX = "final_result"
+    
+    def __init__(self):
+        self._parts: Dict[int, Dict[str, Any]] = {}
+    
+    def feed(self, event: Any) -> Optional[str]:
+        """Consume a PartStartEvent/PartDeltaEvent and return any new text delta"""
+        if isinstance(event, PartStartEvent):
+            part = event.part
+            if isinstance(part, TextPart):
+                self._parts[event.index] = {"kind": "text"}
+                return part.content or None
+            if isinstance(part, ToolCallPart) and (part.tool_name or "").startswith(self.OUTPUT_TOOL_PREFIX):
+                state = {"kind": "output", "args": "", "emitted": ""}
+                self._parts[event.index] = state
+                return self._append_args(state, part.args)
+            self._parts[event.index] = {"kind": "other"}
+            return None
+        
+        if isinstance(event, PartDeltaEvent):
+            state = self._parts.get(event.index)
+            if not state:
+                return None
+            delta = event.delta
+            if state["kind"] == "text" and isinstance(delta, TextPartDelta):
+                return delta.content_delta or None
+            if state["kind"] == "output" and isinstance(delta, ToolCallPartDelta):
+                return self._append_args(state, delta.args_delta)
+        return None
+    
+    def _append_args(self, state: Dict[str, Any], args: Any) -> Optional[str]:
+        if not args:
+            return None
+        if isinstance(args, dict):
+            content = args.get("content")
+        else:
+            state["args"] += args
+            try:
+                parsed = from_json(state["args"], allow_partial="trailing-strings")
+            except ValueError:
+                # Incomplete escape sequence etc. - wait for the next delta
+                return None
+            content = parsed.get("content") if isinstance(parsed, dict) else None
+        
+        if not isinstance(content, str) or not content.startswith(state["emitted"]):
+            return None
+        new_text = content[len(state["emitted"]):]
+        state["emitted"] = content
+        return new_text or None
+
+
+class AgentCache:
+    """
+    Bounded, TTL-evicting LRU cache keyed by tuples starting with the agent ID.
+    
+    Holds constructed Pydantic AI agents, keyed on the agent ID and a hash of its
+    configuration (so any config change naturally produces a new key), and the
+    MCP tool lists discovered for an agent, additionally keyed on the principal's
+    identity and authorization scope since the server filters tools by it.
+    Neither depends on the bearer token: Clerk session tokens rotate about every
+    minute, so the authenticated MCP toolset itself is built per run.
+    
+    The cache is per process. Because the configuration hash is part of the key,
+    no worker serves an agent built from an outdated configuration; invalidate()
+    only frees the local entries, and other workers' leftovers expire by TTL.
+    """
+    
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, ...], Tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Tuple[str, ...]) -> Optional[Any]:
+        """Return cached value for key, or None if missing/expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        agent, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return agent
+    
+    def set(self, key: Tuple[str, ...], agent: Any) -> None:
+        """Store value, evicting least recently used entries beyond max_size"""
+        self._entries[key] = (agent, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, agent_id: Optional[str] = None) -> int:
+        """Drop cached entries for one agent ID (or all agents); returns count removed"""
+        if agent_id is None:
+            removed = len(self._entries)
+            self._entries.clear()
+            return removed
+        
+        stale_keys = [key for key in self._entries if key[0] == agent_id]
+        for key in stale_keys:
+            del self._entries[key]
+        return len(stale_keys)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
 class DynamicAgentFactory:
     """
     Factory for creating Pydantic AI agents from Agent model configurations.
@@ -32,7 +184,72 @@ class DynamicAgentFactory:
     
     def __init__(self):
         """Initialize the dynamic agent factory."""
-        self._agent_cache = {}  # Cache created agents
+        settings = get_settings()
+        self._agent_cache = AgentCache(
+            max_size=settings.agent_cache_max_size,
+            ttl_seconds=settings.agent_cache_ttl_seconds
+        )
+        # Discovered MCP tool lists, so runs skip tools/list (see get_toolsets)
+        self._tool_list_cache = AgentCache(
+            max_size=settings.agent_cache_max_size,
+            ttl_seconds=settings.agent_cache_ttl_seconds
+        )
+    
+    @staticmethod
+    def _get_principal_scope(principal: Optional['Principal']) -> str:
+        """Hash of the principal's identity, roles and permissions, independent of its token"""
+        if not principal:
+            return "anonymous"
+        scope = json.dumps(
+            {
+                "user_id": principal.user_id,
+                "organization_id": principal.organization_id,
+                "roles": sorted(principal.roles),
+                "permissions": sorted(principal.permissions)
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(scope.encode()).hexdigest()[:16]
+    
+    def _get_config_version(self, agent_model: AgentModel) -> str:
+        """Hash of the agent configuration and resolved model"""
+        config = agent_model.get_configuration()
+        version_source = json.dumps(
+            {"config": config, "model": self._get_model_string(agent_model, config)},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(version_source.encode()).hexdigest()[:16]
+    
+    def _get_cache_key(self, agent_model: AgentModel) -> Tuple[str, str]:
+        """Build agent cache key from agent ID and configuration version"""
+        return (str(agent_model.id), self._get_config_version(agent_model))
+    
+    def _get_tool_list_key(self, agent_model: AgentModel, principal: Optional['Principal']) -> Tuple[str, str, str]:
+        """Build tool list cache key from agent ID, configuration version and principal scope"""
+        return (str(agent_model.id), self._get_config_version(agent_model), self._get_principal_scope(principal))
+    
+    def invalidate_agent(self, agent_id: Optional[Any] = None) -> int:
+        """
+        Invalidate cached Pydantic AI agents after an Agent configuration change.
+        
+        Args:
+            agent_id: Agent ID to invalidate, or None to clear the whole cache
+            
+        Returns:
+            int: Number of cached agents removed
+        """
+        key = str(agent_id) if agent_id is not None else None
+        removed = self._agent_cache.invalidate(key)
+        self._tool_list_cache.invalidate(key)
+        if removed:
+            logger.info(f"Invalidated {removed} cached agent(s) for {agent_id or 'all agents'}")
+        return removed
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get agent cache hit/miss statistics; the tool list cache reports under tool_lists"""
+        return {**self._agent_cache.get_stats(), "tool_lists": self._tool_list_cache.get_stats()}
     
     async def create_agent(self, agent_model: AgentModel, principal: Optional['Principal'] = None) -> Optional[PydanticAgent]:
         """
@@ -43,28 +260,25 @@ class DynamicAgentFactory:
             principal: Principal object for authorization (from AuthMiddleware)
             
         Returns:
-            PydanticAgent: Configured agent with MCP tools and Principal context
+            PydanticAgent: Configured agent with Principal context; MCP tools come from get_toolsets()
         """
         try:
-            # Check cache first - include principal status in cache key
-            # cache_key = None
-            # if principal:
-            #     cache_key = principal.get_cache_hash()
-
-            # if cache_key in self._agent_cache:
-            #     auth_status = "authenticated" if principal else "non-authenticated"
-            #     logger.debug(f"Using cached {auth_status} agent for {agent_model.id}")
-            #     return self._agent_cache[cache_key]
-            
             if not agent_model.is_ready:
                 logger.error(f"Agent {agent_model.id} is not ready")
                 return None
             
+            # Check cache first - the agent holds no principal state, so the key
+            # is only the agent and its config version
+            cache_key = self._get_cache_key(agent_model)
+            cached_agent = self._agent_cache.get(cache_key)
+            if cached_agent is not None:
+                logger.debug(f"Using cached agent for {agent_model.id}")
+                return cached_agent
+            
             # Get agent configuration
             config = agent_model.get_configuration()
-            tools = config.get("tools", [])
             
-            logger.info(f"Creating Pydantic AI agent for {agent_model.id} with {len(tools)} tools")
+            logger.info(f"Creating Pydantic AI agent for {agent_model.id}")
             
             # Get model string
             model_string = self._get_model_string(agent_model, config)
@@ -72,80 +286,87 @@ class DynamicAgentFactory:
             # Get prompt
             agent_prompt = agent_model.prompt or "You are a helpful AI assistant."
             
-            # Create authenticated MCP client with Principal integration
-            toolsets = []
-            if tools:
-                logger.info(f"🔍 [TRACE] Tools enabled: {tools}")
-                
-                if principal:
-                    try:
-                        # Get agent-specific authenticated MCP client from global mcp_client
-                        agent_mcp_client = mcp_client.create_agent_client(
-                            agent_id=str(agent_model.id),
-                            tools=tools,
-                            principal=principal
-                        )
-                        
-                        if agent_mcp_client:
-                            toolsets = [agent_mcp_client]
-                            logger.info(f"✅ Created authenticated MCP toolset for {agent_model.id} with {len(tools)} tools")
-                        else:
-                            logger.error(f"❌ Failed to create authenticated MCP toolset for {agent_model.id}")
-                            toolsets = []
-                            
-                    except Exception as e:
-                        logger.error(f"❌ Failed to create authenticated FastMCP client for agent {agent_model.id}: {e}")
-                        toolsets = []
-                else:
-                    # No principal provided - cannot create authenticated MCP client
-                    logger.warning(f"⚠️ No principal provided for agent {agent_model.id} - cannot create authenticated MCP toolset")
-                    # Fallback to unauthenticated mode for backward compatibility
-                    try:
-                        # Use the global mcp_client's server URL but without authentication
-                        unauthenticated_client = mcp_client.create_mcp_client(principal=None)
-                        if unauthenticated_client:
-                            toolsets = [unauthenticated_client]
-                            logger.info(f"⚠️ Created unauthenticated MCP toolset for {agent_model.id} as fallback")
-                        else:
-                            toolsets = []
-                    except Exception as e:
-                        logger.error(f"❌ Failed to create fallback unauthenticated MCP client: {e}")
-                        toolsets = []
-            else:
-                logger.info(f"ℹ️ No tools configured for agent {agent_model.id}")
-            
             # Create Pydantic AI agent with Principal dependencies support
             # Follow official PydanticAI dependencies pattern: https://ai.pydantic.dev/dependencies/
             # Use instructions instead of system_prompt as recommended: https://ai.pydantic.dev/agents/#instructions
-            if toolsets:
-                pydantic_agent = PydanticAgent(
-                    model=model_string,
-                    deps_type=Principal,  # Define dependencies type
-                    output_type=ChatResponse,
-                    instructions=agent_prompt,
-                    toolsets=toolsets,
-                    end_strategy="exhaustive"
-                )
-                logger.info(f"✅ Created Pydantic AI agent with FastMCP tools and Principal dependencies for {agent_model.id}")
-            else:
-                pydantic_agent = PydanticAgent(
-                    model=model_string,
-                    deps_type=Principal,  # Define dependencies type
-                    output_type=ChatResponse,
-                    instructions=agent_prompt,
-                    end_strategy="exhaustive"
-                )
-                logger.info(f"✅ Created Pydantic AI agent with Principal dependencies (no FastMCP tools) for {agent_model.id}")
-            
-            # Cache the agent
-            # self._agent_cache[cache_key] = pydantic_agent
+            # MCP toolsets carry the caller's token and are passed per run (see get_toolsets)
+            pydantic_agent = PydanticAgent(
+                model=model_string,
+                deps_type=Principal,  # Define dependencies type
+                output_type=ChatResponse,
+                instructions=agent_prompt,
+                end_strategy="exhaustive"
+            )
+            logger.info(f"✅ Created Pydantic AI agent with Principal dependencies for {agent_model.id}")
             
+            self._agent_cache.set(cache_key, pydantic_agent)
             return pydantic_agent
             
         except Exception as e:
             logger.error(f"❌ Failed to create agent from model {agent_model.id}: {e}")
             return None
     
+    def get_toolsets(self, agent_model: AgentModel, principal: Optional['Principal'] = None) -> List[Any]:
+        """
+        Build the MCP toolsets for one agent run.
+        
+        Toolsets authenticate with the principal's current token, so they are
+        built per run and passed to run()/iter() instead of being cached with
+        the agent. Building one makes no network call, and the tool list it
+        discovers is cached per agent configuration and principal scope, so
+        later runs skip tools/list.
+        
+        Args:
+            agent_model: Agent database model with configuration
+            principal: Principal object for authorization (from AuthMiddleware)
+            
+        Returns:
+            List: MCP toolsets, empty when the agent has no tools or the client failed
+        """
+        tools = agent_model.get_configuration().get("tools", [])
+        if not tools:
+            logger.info(f"ℹ️ No tools configured for agent {agent_model.id}")
+            return []
+        
+        logger.info(f"🔍 [TRACE] Tools enabled: {tools}")
+        
+        if principal:
+            try:
+                # Get agent-specific authenticated MCP client from global mcp_client
+                agent_mcp_client = mcp_client.create_agent_toolset(
+                    agent_id=str(agent_model.id),
+                    tools=tools,
+                    principal=principal,
+                    tool_list_cache=self._tool_list_cache,
+                    tool_list_key=self._get_tool_list_key(agent_model, principal)
+                )
+                
+                if agent_mcp_client:
+                    logger.info(f"✅ Created authenticated MCP toolset for {agent_model.id} with {len(tools)} tools")
+                    return [agent_mcp_client]
+                logger.error(f"❌ Failed to create authenticated MCP toolset for {agent_model.id}")
+                
+            except Exception as e:
+                logger.error(f"❌ Failed to create authenticated FastMCP client for agent {agent_model.id}: {e}")
+            return []
+        
+        # No principal provided - cannot create authenticated MCP client
+        logger.warning(f"⚠️ No principal provided for agent {agent_model.id} - cannot create authenticated MCP toolset")
+        # Fallback to unauthenticated mode for backward compatibility
+        try:
+            # Use the global mcp_client's server URL but without authentication
+            unauthenticated_client = mcp_client.create_mcp_client(principal=None)
+            if unauthenticated_client:
+                logger.info(f"⚠️ Created unauthenticated MCP toolset for {agent_model.id} as fallback")
+                return [unauthenticated_client]
+        except Exception as e:
+            logger.error(f"❌ Failed to create fallback unauthenticated MCP client: {e}")
+        return []
+    
+    def get_model_string(self, agent_model: AgentModel) -> str:
+        """Pydantic AI model string for an agent, e.g. for token counting"""
+        return self._get_model_string(agent_model, agent_model.get_configuration())
+    
     def _get_model_string(self, agent_model: AgentModel, config: Dict[str, Any]) -> str:
         """
         Get model string for Pydantic AI from Agent configuration.
@@ -301,6 +522,64 @@ class DynamicAgentFactory:
             organization_id=final_context["organization_id"]
         )
     
+    def _get_usage_limits(self, agent_model: AgentModel) -> UsageLimits:
+        """Build usage limits from agent configuration with settings defaults"""
+        settings = get_settings()
+        
+        # TODO: token limits in agents instead of hardcoded settings
+        usage_limits = UsageLimits(
+            request_limit=max(settings.ai_request_limit, agent_model.max_iterations),  # Ensure minimum requests for FastMCP
+            total_tokens_limit=max(settings.ai_total_tokens_limit, 250000)  # Ensure minimum for FastMCP tool calls
+        )
+        logger.info(f"🔍 [TRACE] Usage limits: request_limit={usage_limits.request_limit}, total_tokens_limit={usage_limits.total_tokens_limit}")
+        return usage_limits
+    
+    def _enhance_message_with_file_ids(self, message: str, context: AgentContext) -> str:
+        """Append uploaded file IDs to the user message so tools can reference them"""
+        file_ids = context.file_ids or []
+        if not file_ids:
+            return message
+        
+        file_ids_str = ','.join(file_ids)
+        logger.info(f"🔍 [TRACE] Enhanced message with file_ids: {file_ids}")
+        return f"{message}\n\n[CONTEXT: User has uploaded {len(file_ids)} file(s) with IDs: {file_ids_str}. When creating tickets or using tools that support file attachments, use these file IDs with the file_ids parameter.]"
+    
+    def _extract_tool_calls(self, result: Any) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Extract tool call records and tool names from a finished agent run"""
+        tool_calls = []
+        tools_used = []
+        
+        try:
+            messages = result.all_messages()
+            for msg in messages:
+                if hasattr(msg, 'parts'):
+                    for part in msg.parts:
+                        part_type = type(part).__name__
+                        
+                        if 'ToolCall' in part_type:
+                            tool_info = {
+                                'tool_name': getattr(part, 'tool_name', None),
+                                'args': getattr(part, 'args', None),
+                                'tool_call_id': getattr(part, 'tool_call_id', None),
+                                'called_at': str(msg.timestamp) if hasattr(msg, 'timestamp') else None,
+                                'status': 'pending'
+                            }
+                            tool_calls.append(tool_info)
+                            tools_used.append(tool_info['tool_name'])
+                            
+                        elif 'ToolReturn' in part_type:
+                            # Update status of matching tool call
+                            tool_call_id = getattr(part, 'tool_call_id', None)
+                            for tool_call in tool_calls:
+                                if tool_call['tool_call_id'] == tool_call_id:
+                                    tool_call['status'] = 'completed'
+                                    tool_call['result'] = getattr(part, 'content', None)
+                                    
+        except Exception as e:
+            logger.warning(f"Failed to extract tool calls from result: {e}")
+        
+        return tool_calls, tools_used
+    
     async def process_message_with_agent(
         self,
         agent_model: AgentModel,
@@ -367,23 +646,11 @@ class DynamicAgentFactory:
                     message_history = []
             
             # Configure usage limits based on agent configuration with settings defaults
-            
-            settings = get_settings()
-            
-            # TODO: token limits in agents instead of hardcoded settings
-            usage_limits = UsageLimits(
-                request_limit=max(settings.ai_request_limit, agent_model.max_iterations),  # Ensure minimum requests for FastMCP
-                total_tokens_limit=max(settings.ai_total_tokens_limit, 250000)  # Ensure minimum for FastMCP tool calls
-            )
-            logger.info(f"🔍 [TRACE] Usage limits: request_limit={usage_limits.request_limit}, total_tokens_limit={usage_limits.total_tokens_limit}")
+            usage_limits = self._get_usage_limits(agent_model)
+            toolsets = self.get_toolsets(agent_model, principal)
             
             # Enhance message with file ID information if attachments are present
-            enhanced_message = message
-            file_ids = context.file_ids or []
-            if file_ids:
-                file_ids_str = ','.join(file_ids)
-                enhanced_message = f"{message}\n\n[CONTEXT: User has uploaded {len(file_ids)} file(s) with IDs: {file_ids_str}. When creating tickets or using tools that support file attachments, use these file IDs with the file_ids parameter.]"
-                logger.info(f"🔍 [TRACE] Enhanced message with file_ids: {file_ids}")
+            enhanced_message = self._enhance_message_with_file_ids(message, context)
             
             # CORRECT PYDANTIC AI USAGE - Use message_history and deps for Principal context
             if message_history:
@@ -392,6 +659,7 @@ class DynamicAgentFactory:
                     enhanced_message,
                     message_history=message_history,  # Conversation history
                     usage_limits=usage_limits,
+                    toolsets=toolsets,
                     deps=principal  # Principal context for tools
                 )
             else:
@@ -399,6 +667,7 @@ class DynamicAgentFactory:
                 result = await pydantic_agent.run(
                     enhanced_message,
                     usage_limits=usage_limits,
+                    toolsets=toolsets,
                     deps=principal  # Principal context for tools
                 )
             
@@ -409,37 +678,7 @@ class DynamicAgentFactory:
                 response = result
             
             # Extract actual tool calls from messages
-            tool_calls = []
-            tools_used = []
-            
-            try:
-                messages = result.all_messages()
-                for msg in messages:
-                    if hasattr(msg, 'parts'):
-                        for part in msg.parts:
-                            part_type = type(part).__name__
-                            
-                            if 'ToolCall' in part_type:
-                                tool_info = {
-                                    'tool_name': getattr(part, 'tool_name', None),
-                                    'args': getattr(part, 'args', None),
-                                    'tool_call_id': getattr(part, 'tool_call_id', None),
-                                    'called_at': str(msg.timestamp) if hasattr(msg, 'timestamp') else None,
-                                    'status': 'pending'
-                                }
-                                tool_calls.append(tool_info)
-                                tools_used.append(tool_info['tool_name'])
-                                
-                            elif 'ToolReturn' in part_type:
-                                # Update status of matching tool call
-                                tool_call_id = getattr(part, 'tool_call_id', None)
-                                for tool_call in tool_calls:
-                                    if tool_call['tool_call_id'] == tool_call_id:
-                                        tool_call['status'] = 'completed'
-                                        tool_call['result'] = getattr(part, 'content', None)
-                                        
-            except Exception as e:
-                logger.warning(f"Failed to extract tool calls from result: {e}")
+            tool_calls, tools_used = self._extract_tool_calls(result)
             
             # Add tool information to response
             if hasattr(response, 'tools_used'):
@@ -537,8 +776,141 @@ class DynamicAgentFactory:
                 requires_escalation=True,
                 tools_used=[]
             )
-    
 
+    async def stream_message_with_agent(
+        self,
+        agent_model: AgentModel,
+        message: str,
+        context: AgentContext,
+        principal: Optional['Principal'] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream an agent run event-by-event using Pydantic AI's graph iteration API.
+        
+        Model deltas and tool activity are yielded as soon as they arrive instead of
+        waiting for the whole run to complete.
+        
+        Yields dict events with a ``type`` key:
+            - ``text_delta``: ``{"delta": str}`` new response text
+            - ``tool_call``: ``{"tool_name", "tool_call_id", "args"}`` tool invocation started
+            - ``tool_result``: ``{"tool_name", "tool_call_id", "content"}`` tool returned
+            - ``final``: ``{"response": ChatResponse}`` always the last event
+        """
+        try:
+            pydantic_agent = await self.create_agent(agent_model, principal=principal)
+            
+            if not pydantic_agent:
+                logger.error(f"Failed to create agent from model {agent_model.id}")
+                yield {"type": "final", "response": ChatResponse(
+                    content="I'm temporarily unavailable. Please try again shortly.",
+                    confidence=0.0,
+                    requires_escalation=True,
+                    tools_used=[]
+                )}
+                return
+            
+            usage_limits = self._get_usage_limits(agent_model)
+            toolsets = self.get_toolsets(agent_model, principal)
+            enhanced_message = self._enhance_message_with_file_ids(message, context)
+            
+            content_stream = _OutputContentStream()
+            streamed_text = ""
+            tool_names: Dict[str, str] = {}
+            
+            async with pydantic_agent.iter(
+                enhanced_message,
+                usage_limits=usage_limits,
+                toolsets=toolsets,
+                deps=principal
+            ) as run:
+                async for node in run:
+                    if PydanticAgent.is_model_request_node(node):
+                        async with node.stream(run.ctx) as request_stream:
+                            async for event in request_stream:
+                                delta = content_stream.feed(event)
+                                if delta:
+                                    streamed_text += delta
+                                    yield {"type": "text_delta", "delta": delta}
+                    
+                    elif PydanticAgent.is_call_tools_node(node):
+                        async with node.stream(run.ctx) as handle_stream:
+                            async for event in handle_stream:
+                                if isinstance(event, FunctionToolCallEvent):
+                                    tool_names[event.tool_call_id] = event.part.tool_name
+                                    yield {
+                                        "type": "tool_call",
+                                        "tool_name": event.part.tool_name,
+                                        "tool_call_id": event.tool_call_id,
+                                        "args": event.part.args
+                                    }
+                                elif isinstance(event, FunctionToolResultEvent):
+                                    yield {
+                                        "type": "tool_result",
+                                        "tool_name": tool_names.get(event.tool_call_id),
+                                        "tool_call_id": event.tool_call_id,
+                                        "content": getattr(event.result, 'content', None)
+                                    }
+                
+                result = run.result
+            
+            response = result.output if result is not None else None
+            if isinstance(response, str):
+                response = ChatResponse(content=response, confidence=1.0, requires_escalation=False)
+            if response is None:
+                response = ChatResponse(content=streamed_text, confidence=0.0, requires_escalation=True)
+            
+            # Emit any tail of the final content the partial parser could not see
+            if response.content.startswith(streamed_text) and len(response.content) > len(streamed_text):
+                yield {"type": "text_delta", "delta": response.content[len(streamed_text):]}
+            
+            tool_calls, tools_used = self._extract_tool_calls(result)
+            response.tools_used = tools_used
+            try:
+                response._tool_calls_data = tool_calls
+            except AttributeError:
+                pass
+            
+            if tools_used:
+                logger.info(f"🔧 FastMCP Tools used (streaming): {tools_used}")
+            
+            try:
+                await agent_service.record_agent_usage(
+                    agent_id=agent_model.id,
+                    success=True,
+                    tools_called=len(tools_used)
+                )
+            except Exception as usage_error:
+                logger.warning(f"Failed to record agent usage: {usage_error}")
+            
+            yield {"type": "final", "response": response}
+            
+        except UsageLimitExceeded as e:
+            logger.error(f"❌ Tool usage limit exceeded during streaming: {e}")
+            try:
+                await agent_service.record_agent_usage(agent_id=agent_model.id, success=False)
+            except Exception as usage_error:
+                logger.warning(f"Failed to record failed agent usage: {usage_error}")
+            
+            yield {"type": "final", "response": ChatResponse(
+                content="This request exceeded the tool usage limit. Please try with a more specific request or increase the limits of this agent.",
+                confidence=0.0,
+                requires_escalation=True,
+                tools_used=[]
+            )}
+        except Exception as e:
+            logger.error(f"❌ Error streaming message with dynamic agent: {e}")
+            try:
+                await agent_service.record_agent_usage(agent_id=agent_model.id, success=False)
+            except Exception as usage_error:
+                logger.warning(f"Failed to record failed agent usage: {usage_error}")
+            
+            yield {"type": "final", "response": ChatResponse(
+                content="I encountered an error processing your request. Please try again or contact support if the issue persists.",
+                confidence=0.0,
+                requires_escalation=True,
+                tools_used=[]
+            )}
+    
 
 # Global dynamic agent factory
 dynamic_agent_factory = DynamicAgentFactory()
\ No newline at end of file
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+ExtractionExecutor - Run CPU-bound file extraction off the event loop
+
+PDF/Word/Excel parsing, Tesseract OCR and SVG rasterization are synchronous and
+can take seconds on large uploads. Jobs are routed by payload size: small
+payloads run in a worker thread (no pickling overhead), large payloads run in a
+dedicated process pool so they don't contend for the GIL with request handling.
+
+The process pool needs a non-daemonic host process: Celery prefork children
+are daemonic and cannot start one, so the file_processing worker runs with
+the threads pool. Where the pool is unavailable every job runs in a thread.
+PyMuPDF is not thread-safe, so jobs marked serial share a single thread.
+
+A timed-out job only fails its own caller. A stuck process job retires its pool:
+a fresh pool takes new work and the jobs still queued on the old one, the old
+one finishes the jobs its workers already picked up, and its workers are
+terminated once no caller is waiting on it any more. Work that cannot be
+interrupted (threads, retired workers not yet reaped) keeps its concurrency
+slot until it actually stops.
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import multiprocessing.context
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class _TrackedSpawnContext(multiprocessing.context.SpawnContext):
+    """spawn context that keeps the worker processes it creates, so a retired pool can be reaped"""
+
+    def __init__(self):
+        super().__init__()
+        self.processes: List[multiprocessing.process.BaseProcess] = []
+
+    def Process(self, *args: Any, **kwargs: Any) -> multiprocessing.process.BaseProcess:
+        process = multiprocessing.context.SpawnProcess(*args, **kwargs)
+        self.processes.append(process)
+        return process
+
+
+class ExtractionExecutor:
+    """Size-routed thread/process execution stage with timeouts and a concurrency cap"""
+
+    def __init__(self):
+        settings = get_settings()
+        self.max_workers = settings.extraction_process_workers
+        self.max_concurrency = settings.extraction_max_concurrency
+        self.timeout_seconds = settings.extraction_timeout_seconds
+        self.process_min_bytes = settings.extraction_process_min_bytes
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Callers currently waiting on each pool, worker processes per pool, and retired pools
+        self._pool_waiters: Dict[ProcessPoolExecutor, int] = {}
+        self._pool_processes: Dict[ProcessPoolExecutor, List[multiprocessing.process.BaseProcess]] = {}
+        self._retired_pools: Dict[ProcessPoolExecutor, List[multiprocessing.process.BaseProcess]] = {}
+        self._serial_executor: Optional[ThreadPoolExecutor] = None
+        self._warned_no_pool = False
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.stats = {
+            "thread_jobs": 0,
+            "serial_jobs": 0,
+            "process_jobs": 0,
+            "timeouts": 0,
+            "failures": 0,
+            "pool_restarts": 0,
+            "in_flight": 0,
+            "abandoned": 0,
+            "total_seconds": 0.0
+        }
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Concurrency cap bound to the running loop (Celery tasks may run on a fresh loop)"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _process_pool_available(self) -> bool:
+        if self.max_workers <= 0:
+            return False
+        # Daemonic processes (e.g. Celery prefork children) cannot spawn children
+        if multiprocessing.current_process().daemon:
+            if not self._warned_no_pool:
+                self._warned_no_pool = True
+                logger.warning(
+                    "⚠️ [EXTRACTION] Running in a daemonic process; extraction runs in threads. "
+                    "Start the file_processing worker with --pool=threads to use the process pool"
+                )
+            return False
+        return True
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn avoids forking a process that is running an event loop and threads
+            context = _TrackedSpawnContext()
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+            self._pool_waiters[self._pool] = 0
+            self._pool_processes[self._pool] = context.processes
+            logger.info(f"🔧 [EXTRACTION] Started process pool with {self.max_workers} workers")
+        return self._pool
+
+    def _retire_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Stop routing work to a pool without cancelling the jobs already queued on it"""
+        if pool is None or pool is not self._pool:
+            return
+        self._pool = None
+        self.stats["pool_restarts"] += 1
+        self._retired_pools[pool] = self._pool_processes.pop(pool, [])
+        # Jobs still queued are cancelled and resubmitted by their callers; running ones drain here
+        pool.shutdown(wait=False, cancel_futures=True)
+        self._reap_pool(pool)
+
+    def _reap_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Terminate a retired pool's workers once no caller is waiting on it"""
+        if pool not in self._retired_pools or self._pool_waiters.get(pool):
+            return
+        self._pool_waiters.pop(pool, None)
+        # Every remaining job belongs to a caller that already gave up on it
+        for process in self._retired_pools.pop(pool):
+            if process.is_alive():
+                process.terminate()
+
+    def _get_serial_executor(self) -> ThreadPoolExecutor:
+        if self._serial_executor is None:
+            self._serial_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="extraction-serial")
+        return self._serial_executor
+
+    def _release_abandoned(self, semaphore: asyncio.Semaphore, job: asyncio.Future) -> None:
+        self.stats["abandoned"] -= 1
+        if not job.cancelled():
+            job.exception()  # retrieved so asyncio doesn't log it as unhandled
+        semaphore.release()
+
+    def uses_process_pool(self, payload_size: int) -> bool:
+        """Whether a payload of this size is routed to the process pool"""
+        return payload_size >= self.process_min_bytes and self._process_pool_available()
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        payload_size: int = 0,
+        timeout: Optional[float] = None,
+        serial: bool = False
+    ) -> Any:
+        """
+        Run a synchronous extractor without blocking the event loop.
+
+        Args:
+            func: Module-level (picklable) function to execute
+            *args: Picklable positional arguments for func
+            payload_size: Size of the input in bytes, used for routing
+            timeout: Per-job timeout in seconds (defaults to settings)
+            serial: func uses a library that is not thread-safe (PyMuPDF); thread
+                jobs run one at a time on a dedicated thread
+
+        Returns:
+            The return value of func
+
+        Raises:
+            TimeoutError: If the job does not finish within the timeout
+        """
+        timeout = timeout or self.timeout_seconds
+        use_process = self.uses_process_pool(payload_size)
+        job_name = getattr(func, "__name__", repr(func))
+
+        semaphore = self._get_semaphore()
+        await semaphore.acquire()
+        self.stats["in_flight"] += 1
+        self.stats["process_jobs" if use_process else "thread_jobs"] += 1
+        if serial and not use_process:
+            self.stats["serial_jobs"] += 1
+        start = time.monotonic()
+        pool: Optional[ProcessPoolExecutor] = None
+        future: Optional[Future] = None
+        job: Optional[asyncio.Future] = None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            while True:
+                if use_process:
+                    pool = self._get_pool()
+                    self._pool_waiters[pool] += 1
+                    future = pool.submit(func, *args)
+                    job = asyncio.wrap_future(future)
+                elif serial:
+                    job = loop.run_in_executor(self._get_serial_executor(), functools.partial(func, *args))
+                else:
+                    job = asyncio.ensure_future(asyncio.to_thread(func, *args))
+                try:
+                    # Shielded so a timeout leaves the job to finish (or be reaped) on its own
+                    return await asyncio.wait_for(asyncio.shield(job), timeout=deadline - loop.time())
+                except asyncio.CancelledError:
+                    if future is None or not future.cancelled() or pool is self._pool:
+                        raise
+                # Still queued when its pool was retired - resubmit it to the fresh pool
+                self._pool_waiters[pool] -= 1
+                self._reap_pool(pool)
+                pool = None
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.error(f"⏱️ [EXTRACTION] {job_name} timed out after {timeout}s ({payload_size} bytes)")
+            if future is not None and not future.cancel():
+                # A worker is busy with the abandoned job - route new work to a fresh pool
+                self._retire_pool(pool)
+            raise TimeoutError(f"{job_name} exceeded {timeout}s extraction timeout")
+        except BrokenProcessPool:
+            self.stats["failures"] += 1
+            logger.error(f"❌ [EXTRACTION] Process pool broke while running {job_name}")
+            self._retire_pool(pool)
+            raise
+        except Exception:
+            self.stats["failures"] += 1
+            raise
+        finally:
+            self.stats["in_flight"] -= 1
+            self.stats["total_seconds"] += time.monotonic() - start
+            if pool is not None:
+                self._pool_waiters[pool] -= 1
+                self._reap_pool(pool)
+            if job is None or job.done() or (future is not None and future.cancelled()):
+                semaphore.release()
+            else:
+                # The work is still running - hold its slot until it actually stops
+                self.stats["abandoned"] += 1
+                job.add_done_callback(lambda done: self._release_abandoned(semaphore, done))
+
+    def shutdown(self) -> None:
+        """Stop the process pools (called on application shutdown)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool_waiters.pop(self._pool, None)
+            self._pool_processes.pop(self._pool, None)
+            self._pool = None
+        for pool in list(self._retired_pools):
+            self._pool_waiters.pop(pool, None)
+            self._reap_pool(pool)
+        if self._serial_executor is not None:
+            self._serial_executor.shutdown(wait=False, cancel_futures=True)
+            self._serial_executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get execution counters"""
+        jobs = self.stats["thread_jobs"] + self.stats["process_jobs"]
+        return {
+            **self.stats,
+            "total_seconds": round(self.stats["total_seconds"], 3),
+            "avg_seconds": round(self.stats["total_seconds"] / jobs, 4) if jobs else 0.0,
+            "max_workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout_seconds,
+            "process_min_bytes": self.process_min_bytes,
+            "process_pool_available": self._process_pool_available()
+        }
+
+
+extraction_executor = ExtractionExecutor()
@@ -4,17 +4,67 @@ File Cleanup Service for cascade deletion of attached files
 """
 
 import logging
-from typing import List, Set
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, delete
+from sqlalchemy import String, select, and_, cast, delete, exists, func, literal_column, not_, or_, update
+from sqlalchemy.dialects.postgresql import JSONB
 
+from app.config.settings import get_settings
 from app.models.file import File, FileStatus
-from app.models.chat import Message
+from app.models.chat import Message, Thread
 from app.models.ticket import Ticket
+from app.utils.pagination import decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
+ORPHAN_SCAN_CURSOR_KEY = "orphan_files:id"
+ORPHAN_SAMPLE_SIZE = 100
+
+
+def _file_is_referenced(file_id_column, organization_id: UUID):
+    """
+    Whether an attachment of the organization's messages or tickets points at the file.
+    
+    Containment on (attachments::jsonb) matches the jsonb_path_ops GIN indexes,
+    so each probe is an index lookup rather than a scan of every attachment.
+    """
+    reference = func.jsonb_build_array(
+        func.jsonb_build_object(literal_column("'file_id'"), cast(file_id_column, String))
+    )
+    in_messages = exists().where(
+        cast(Message.attachments, JSONB).contains(reference),
+        Message.thread_id == Thread.id,
+        Thread.organization_id == organization_id
+    )
+    in_tickets = exists().where(
+        cast(Ticket.attachments, JSONB).contains(reference),
+        Ticket.organization_id == organization_id
+    )
+    return or_(in_messages, in_tickets)
+
+
+@dataclass
+class OrphanCleanupReport:
+    """Outcome of one orphaned file cleanup run, resumable via next_cursor"""
+    organization_id: UUID
+    dry_run: bool
+    files_scanned: int = 0
+    orphaned_files: int = 0
+    # Recorded size of the orphaned files. Cleanup is a soft delete that keeps
+    # the stored blobs, so this is not storage that a run frees.
+    orphaned_bytes: int = 0
+    files_deleted: int = 0
+    batches: int = 0
+    next_cursor: Optional[str] = None
+    orphan_samples: List[Dict[str, Any]] = field(default_factory=list)
+    
+    @property
+    def completed(self) -> bool:
+        return self.next_cursor is None
+
 
 class FileCleanupService:
     """Service for cleaning up orphaned files when threads or tickets are deleted"""
@@ -213,6 +263,10 @@ class FileCleanupService:
             
             # Perform soft delete by updating status
             file_ids_to_delete = [f.id for f in files_to_delete]
+            pending_ids = [
+                str(f.id) for f in files_to_delete
+                if f.status in (FileStatus.UPLOADED, FileStatus.PROCESSING)
+            ]
             
             # Option 1: Soft delete (recommended for audit trail)
             from sqlalchemy import update
@@ -236,6 +290,13 @@ class FileCleanupService:
             await db.commit()
             
             logger.info(f"Successfully soft-deleted {deleted_count} files")
+            
+            # Stop queued or running processing for the deleted files in one revoke
+            if pending_ids:
+                from app.services.task_cancellation_service import TaskCancellationService
+                cancellation = TaskCancellationService().cancel_files_processing_tasks(pending_ids)
+                logger.info(f"Cancelled {cancellation['total_cancelled']} processing tasks for deleted files")
+            
             return deleted_count
             
         except Exception as e:
@@ -243,6 +304,141 @@ class FileCleanupService:
             logger.error(f"Error deleting files by IDs: {e}")
             return 0
     
+    async def scan_orphaned_files(
+        self,
+        db: AsyncSession,
+        organization_id: UUID,
+        dry_run: bool = True,
+        cursor: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        max_batches: Optional[int] = None
+    ) -> OrphanCleanupReport:
+        """
+        Find and optionally delete files that no thread message or ticket of the
+        organization references.
+        
+        Files are walked in primary-key order in bounded batches; each batch is
+        checked with a single anti-join against the JSON attachment references
+        (served by the idx_messages_attachments / idx_tickets_attachments GIN
+        indexes) and, unless dry_run, soft-deleted and committed on its own.
+        A run stopped by max_batches can be resumed from report.next_cursor.
+        Files younger than the grace period are skipped so uploads that are not
+        attached yet are never collected.
+        
+        Args:
+            db: Database session
+            organization_id: Organization ID to limit cleanup scope
+            dry_run: If True, only report orphaned files without deleting
+            cursor: next_cursor of a previous, unfinished run
+            batch_size: Files checked per batch (defaults to settings)
+            max_batches: Stop after this many batches; None scans to the end
+            
+        Returns:
+            OrphanCleanupReport with counts and the cursor to resume from
+            
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        settings = get_settings()
+        batch_size = batch_size or settings.orphan_cleanup_batch_size
+        created_before = datetime.now(timezone.utc) - timedelta(hours=settings.orphan_file_grace_hours)
+        after_id = decode_cursor(cursor, ORPHAN_SCAN_CURSOR_KEY)[0] if cursor else None
+        report = OrphanCleanupReport(organization_id=organization_id, dry_run=dry_run)
+        
+        while max_batches is None or report.batches < max_batches:
+            conditions = [
+                File.organization_id == organization_id,
+                File.status != FileStatus.DELETED,
+                File.created_at < created_before
+            ]
+            if after_id is not None:
+                conditions.append(File.id > after_id)
+            batch = select(File.id, File.filename, File.file_size, File.status).where(
+                *conditions
+            ).order_by(File.id).limit(batch_size).cte("batch")
+            
+            query = select(
+                batch.c.id,
+                batch.c.filename,
+                batch.c.file_size,
+                batch.c.status,
+                not_(_file_is_referenced(batch.c.id, organization_id)).label("orphaned")
+            ).order_by(batch.c.id)
+            rows = (await db.execute(query)).all()
+            if not rows:
+                after_id = None
+                break
+            
+            report.batches += 1
+            report.files_scanned += len(rows)
+            after_id = rows[-1].id
+            orphans = [row for row in rows if row.orphaned]
+            report.orphaned_files += len(orphans)
+            report.orphaned_bytes += sum(row.file_size or 0 for row in orphans)
+            for row in orphans[:max(0, ORPHAN_SAMPLE_SIZE - len(report.orphan_samples))]:
+                report.orphan_samples.append({"file_id": str(row.id), "filename": row.filename, "file_size": row.file_size})
+            
+            if orphans and not dry_run:
+                report.files_deleted += await self._soft_delete_orphans(
+                    db,
+                    [row.id for row in orphans],
+                    organization_id,
+                    pending_ids={row.id for row in orphans if row.status in (FileStatus.UPLOADED, FileStatus.PROCESSING)}
+                )
+            
+            if len(rows) < batch_size:
+                after_id = None
+                break
+        
+        report.next_cursor = encode_cursor(ORPHAN_SCAN_CURSOR_KEY, [after_id]) if after_id is not None else None
+        logger.info(
+            f"🧹 [ORPHAN_CLEANUP] org={organization_id} dry_run={dry_run}: {report.orphaned_files} orphaned "
+            f"of {report.files_scanned} scanned in {report.batches} batches, {report.files_deleted} deleted, "
+            f"{'complete' if report.completed else 'resumable'}"
+        )
+        return report
+    
+    async def _soft_delete_orphans(
+        self,
+        db: AsyncSession,
+        file_ids: List[UUID],
+        organization_id: UUID,
+        pending_ids: Optional[Set[UUID]] = None
+    ) -> int:
+        """
+        Soft-delete one batch of orphaned files and commit it.
+        
+        The reference check is repeated in the UPDATE so a file attached since
+        the scan is left alone. Processing tasks of deleted files that were
+        still pending (pending_ids) are revoked, as in _delete_files_by_ids.
+        Stored blobs are kept.
+        """
+        try:
+            result = await db.execute(
+                update(File).where(
+                    File.id.in_(file_ids),
+                    File.organization_id == organization_id,
+                    File.status != FileStatus.DELETED,
+                    not_(_file_is_referenced(File.id, organization_id))
+                ).values(
+                    status=FileStatus.DELETED,
+                    updated_at=datetime.now(timezone.utc)
+                ).returning(File.id).execution_options(synchronize_session=False)
+            )
+            deleted_ids = set(result.scalars().all())
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        
+        cancel_ids = [str(file_id) for file_id in deleted_ids & (pending_ids or set())]
+        if cancel_ids:
+            from app.services.task_cancellation_service import TaskCancellationService
+            cancellation = TaskCancellationService().cancel_files_processing_tasks(cancel_ids)
+            logger.info(f"Cancelled {cancellation['total_cancelled']} processing tasks for orphaned files")
+        
+        return len(deleted_ids)
+    
     async def cleanup_orphaned_files(
         self,
         db: AsyncSession,
@@ -262,71 +458,12 @@ class FileCleanupService:
             Number of orphaned files found (or deleted if not dry run)
         """
         try:
-            # Get all file IDs in the organization
-            all_files_query = select(File.id).where(
-                and_(
-                    File.organization_id == organization_id,
-                    File.status != FileStatus.DELETED
-                )
-            )
-            result = await db.execute(all_files_query)
-            all_file_ids = set(result.scalars().all())
-            
-            if not all_file_ids:
-                logger.info("No files found for orphan cleanup")
-                return 0
-            
-            # Get all referenced file IDs from messages
-            messages_query = select(Message.attachments).where(
-                Message.attachments.isnot(None)
-            )
-            result = await db.execute(messages_query)
-            message_attachments = result.scalars().all()
-            
-            referenced_file_ids = set()
-            for attachments in message_attachments:
-                if attachments and isinstance(attachments, list):
-                    for attachment in attachments:
-                        if isinstance(attachment, dict) and 'file_id' in attachment:
-                            try:
-                                referenced_file_ids.add(UUID(attachment['file_id']))
-                            except (ValueError, TypeError):
-                                pass  # Skip invalid UUIDs
-            
-            # Get all referenced file IDs from tickets
-            tickets_query = select(Ticket.attachments).where(
-                Ticket.attachments.isnot(None)
-            )
-            result = await db.execute(tickets_query)
-            ticket_attachments = result.scalars().all()
-            
-            for attachments in ticket_attachments:
-                if attachments and isinstance(attachments, list):
-                    for attachment in attachments:
-                        if isinstance(attachment, dict) and 'file_id' in attachment:
-                            try:
-                                referenced_file_ids.add(UUID(attachment['file_id']))
-                            except (ValueError, TypeError):
-                                pass  # Skip invalid UUIDs
-            
-            # Find orphaned files
-            orphaned_file_ids = all_file_ids - referenced_file_ids
-            
-            logger.info(f"Found {len(orphaned_file_ids)} orphaned files out of {len(all_file_ids)} total")
-            
-            if dry_run or not orphaned_file_ids:
-                return len(orphaned_file_ids)
-            
-            # Delete orphaned files
-            deleted_count = await self._delete_files_by_ids(db, orphaned_file_ids, organization_id)
-            logger.info(f"Cleaned up {deleted_count} orphaned files")
-            
-            return deleted_count
+            report = await self.scan_orphaned_files(db, organization_id, dry_run=dry_run)
+            return report.orphaned_files if dry_run else report.files_deleted
             
         except Exception as e:
             logger.error(f"Error during orphaned file cleanup: {e}")
             return 0
 
-
 # Global service instance
 file_cleanup_service = FileCleanupService()
\ No newline at end of file
@@ -5,9 +5,11 @@ Coordinates DocumentParserService, OCRService, TranscriptionService, VisionAnaly
 """
 
 import logging
+from contextlib import aclosing
 from typing import Dict, Any, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config.settings import get_settings
 from app.models.file import File, FileStatus
 from app.schemas.file import FileProcessingStatusResponse
 from app.services.document_parser_service import DocumentParserService
@@ -30,6 +32,7 @@ class FileProcessingService:
         self.vision_service = VisionAnalysisService()   # Computer vision analysis
         self.ai_service = AIAnalysisService()          # LLM-based content analysis
         self.file_service = FileService()              # File storage operations
+        self.settings = get_settings()
     
     async def process_uploaded_file(self, db: AsyncSession, file_obj: File) -> None:
         """Process file and store extracted context in unified JSON format"""
@@ -109,58 +112,62 @@ class FileProcessingService:
         logger.debug(f"DEBUG: _extract_document_content called with MIME: {file_obj.mime_type}")
         
         if file_obj.mime_type == "application/pdf":
-            logger.debug(f"DEBUG: Calling document_parser.analyze_document for PDF")
-            # Use document parser with structure detection
-            result = await self.document_parser.analyze_document(
+            # Stream pages and stop once the AI context budget is spent, so large
+            # PDFs only pay extraction cost for the text the agent will use
+            char_budget = self.settings.document_context_max_chars
+            total_pages = await self.document_parser.get_pdf_page_count(file_content)
+            pages_data = []
+            extracted_chars = 0
+            
+            async with aclosing(self.document_parser.stream_pdf_pages(
                 file_content,
-                features=["TEXT", "TABLES", "FORMS", "LAYOUT"]
-            )
-            logger.debug(f"DEBUG: Document parser returned result with {len(result.get('pages', []))} pages")
+                features=["TEXT", "TABLES", "FORMS", "LAYOUT"],
+                page_count=total_pages,
+                render_empty_pages=True
+            )) as pages:
+                async for page in pages:
+                    page_data = {
+                        "page_number": page["page_number"],
+                        "text": page["text"],
+                        "blocks": page["blocks"],  # Paragraphs, tables, forms
+                        "confidence": page["confidence"]
+                    }
+                    
+                    # Text extraction came back empty - OCR the page image rendered alongside it
+                    if page.get("image"):
+                        try:
+                            ocr_result = await self.ocr_service.extract_text_with_regions(page["image"])
+                            if ocr_result.get("full_text"):
+                                page_data["text"] = ocr_result["full_text"]
+                                page_data["confidence"] = ocr_result.get("total_confidence", 0.5)
+                                # Update extraction method to indicate OCR was used
+                                file_obj.extraction_method = "document_parser_ocr_fallback"
+                            
+                        except Exception as e:
+                            # OCR failed too, leave as empty text
+                            logger.warning(f"PDF text extraction and OCR fallback failed for page {page['page_number']}: {e}")
+                    
+                    pages_data.append(page_data)
+                    extracted_chars += len(page_data["text"])
+                    
+                    if char_budget and extracted_chars >= char_budget:
+                        break
             
-            # Check if PDF text extraction failed and fallback to OCR if needed
-            pages_data = []
-            for page in result["pages"]:
-                page_data = {
-                    "page_number": page["page_number"],
-                    "text": page["text"],
-                    "blocks": page["blocks"],  # Paragraphs, tables, forms
-                    "confidence": page["confidence"]
-                }
-                
-                # If text extraction failed (empty or contains PDF bytes), try OCR
-                if not page_data["text"] or page_data["text"].startswith('%PDF'):
-                    try:
-                        # Convert PDF page to image and use OCR
-                        import pymupdf
-                        doc = pymupdf.open(stream=file_content, filetype="pdf")
-                        pdf_page = doc[page["page_number"] - 1]  # Convert to 0-based index
-                        
-                        # Render page as image with 2x zoom for better OCR
-                        matrix = pymupdf.Matrix(2, 2)
-                        pix = pdf_page.get_pixmap(matrix=matrix)
-                        img_data = pix.tobytes("png")
-                        doc.close()
-                        
-                        # Use OCR service to extract text from the image
-                        ocr_result = await self.ocr_service.extract_text_with_regions(img_data)
-                        if ocr_result.get("full_text"):
-                            page_data["text"] = ocr_result["full_text"]
-                            page_data["confidence"] = ocr_result.get("total_confidence", 0.5)
-                            # Update extraction method to indicate OCR was used
-                            file_obj.extraction_method = "document_parser_ocr_fallback"
-                        
-                    except Exception as e:
-                        # OCR failed too, leave as empty text
-                        logger.warning(f"PDF text extraction and OCR fallback failed for page {page['page_number']}: {e}")
-                
-                pages_data.append(page_data)
+            truncated = len(pages_data) < total_pages
+            if truncated:
+                logger.info(
+                    f"📄 [EXTRACTION] Context budget of {char_budget} chars reached for file {file_obj.id} "
+                    f"after {len(pages_data)}/{total_pages} pages"
+                )
             
             return {
                 "pages": pages_data,
                 "metadata": {
-                    "total_pages": result["metadata"]["total_pages"],
-                    "language": result["metadata"].get("language", "auto-detected"),
-                    "document_type": result["metadata"]["document_type"]
+                    "total_pages": total_pages,
+                    "extracted_pages": len(pages_data),
+                    "truncated": truncated,
+                    "language": "auto-detected",
+                    "document_type": "pdf"
                 }
             }
         
@@ -5,14 +5,16 @@ File Service - Business logic for file management, processing, and analysis usin
 
 import os
 import uuid
+import asyncio
 import logging
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, AsyncIterator, Awaitable, Callable
 from uuid import UUID
 from datetime import datetime, timezone
 from pathlib import Path
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 
 from app.models.file import File, FileStatus, FileType
@@ -32,6 +34,29 @@ from app.services.storage.factory import get_storage_service
 logger = logging.getLogger(__name__)
 
 
+# Per-process content dedup counters (reported by /health/metrics)
+_dedup_stats = {
+    "uploads": 0,
+    "blob_reuses": 0,
+    "extraction_reuses": 0,
+    "bytes_saved": 0
+}
+
+
+def record_extraction_reuse() -> None:
+    """Count an upload whose extraction results were copied from a duplicate"""
+    _dedup_stats["extraction_reuses"] += 1
+
+
+def get_dedup_stats() -> Dict[str, Any]:
+    """Get content dedup statistics for this process"""
+    uploads = _dedup_stats["uploads"]
+    return {
+        **_dedup_stats,
+        "dedup_hit_rate": round(_dedup_stats["blob_reuses"] / uploads, 4) if uploads else 0.0
+    }
+
+
 class DuplicateFileError(Exception):
     """Exception raised when attempting to upload a duplicate file"""
     def __init__(self, message: str, existing_file_id: UUID):
@@ -317,12 +342,19 @@ class FileService:
         should_hard_delete = hard_delete if hard_delete is not None else self.settings.hard_delete_files
         
         if should_hard_delete:
-            # Hard delete: remove from storage and database
-            try:
-                await self.storage_service.delete_file(db_file.file_path)
-            except Exception:
-                # Log error but continue
-                pass
+            # Hard delete: remove from storage and database. The blob is
+            # content-addressed, so keep it while other uploads still reference it.
+            shared_count = await db.scalar(
+                select(func.count(File.id)).where(
+                    and_(File.file_path == db_file.file_path, File.id != db_file.id)
+                )
+            )
+            if not shared_count:
+                try:
+                    await self.storage_service.delete_file(db_file.file_path)
+                except Exception:
+                    # Log error but continue
+                    pass
             
             # Delete from database
             await db.delete(db_file)
@@ -367,6 +399,45 @@ class FileService:
         except Exception:
             return None
     
+    async def open_file_stream(
+        self,
+        db_file: File,
+        chunk_size: Optional[int] = None,
+        byte_range: Optional[Tuple[int, int]] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Open a chunked stream of a file's stored content
+        
+        The first chunk is fetched eagerly so a missing blob or storage error
+        surfaces here, before a response has started streaming.
+        
+        Args:
+            db_file: File record
+            chunk_size: Size of yielded chunks in bytes
+            byte_range: Optional inclusive (start, end) byte range
+            
+        Returns:
+            Async iterator of content chunks
+            
+        Raises:
+            FileNotFoundError: If the stored blob is missing
+        """
+        stream = self.storage_service.download_stream(
+            db_file.file_path, chunk_size=chunk_size, byte_range=byte_range
+        )
+        first_chunk = await anext(stream, b"")
+        
+        async def chunks() -> AsyncIterator[bytes]:
+            try:
+                if first_chunk:
+                    yield first_chunk
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                await stream.aclose()
+        
+        return chunks()
+    
     async def get_file_url(
         self,
         db: AsyncSession,
@@ -711,22 +782,101 @@ class FileService:
         """
         Create a new file record with simplified parameters for PRP implementation.
         Handles soft-deleted files with same hash by reusing or updating them.
+        
+        Storage is content-addressed per organization: if another upload in the
+        organization has identical content, its blob (and extraction results, if
+        already processed) are reused instead of storing and processing it again.
         """
         import hashlib
         
-        # Calculate file hash first
-        file_hash = hashlib.sha256(file_content).hexdigest()
+        # Calculate file hash first (hashlib releases the GIL for large buffers)
+        file_hash = await asyncio.to_thread(lambda: hashlib.sha256(file_content).hexdigest())
         
-        # Check for existing file with same hash (including soft-deleted ones)
-        existing_query = select(File).where(
-            and_(
-                File.file_hash == file_hash,
-                File.organization_id == organization_id,
-                File.uploaded_by_id == uploaded_by_id
+        async def store_blob(storage_key: str, file_id: UUID) -> None:
+            await self.storage_service.upload_content(
+                content=file_content,
+                storage_key=storage_key,
+                content_type=mime_type,
+                metadata=self._storage_metadata(file_id, filename, file_size, uploaded_by_id, organization_id)
             )
+        
+        return await self._register_file_content(
+            db, filename, mime_type, file_size, file_hash, uploaded_by_id, organization_id, store_blob
         )
-        result = await db.execute(existing_query)
-        existing_file = result.scalar_one_or_none()
+    
+    async def create_file_record_from_stream(
+        self,
+        db: AsyncSession,
+        filename: str,
+        mime_type: str,
+        chunks: AsyncIterator[bytes],
+        uploaded_by_id: UUID,
+        organization_id: UUID,
+        description: Optional[str] = None
+    ) -> File:
+        """
+        Create a new file record from an async iterator of content chunks.
+        
+        The content is streamed to a staging key while being hashed, size-checked
+        and MIME-sniffed, so peak memory is bounded by the chunk size. Once the
+        hash is known the staged blob is promoted to its content address, or
+        discarded if identical content is already stored.
+        
+        Raises:
+            ValueError: If the content is empty or exceeds the maximum file size
+            DuplicateFileError: If the uploader already has an active file with this content
+        """
+        staging_key = f"attachments/{organization_id}/incoming/{uuid.uuid4()}"
+        promoted = False
+        
+        try:
+            upload = await self.storage_service.upload_stream(
+                chunks,
+                storage_key=staging_key,
+                content_type=mime_type,
+                max_size=self.max_file_size
+            )
+            if upload.size == 0:
+                raise ValueError("File cannot be empty")
+            
+            # Trust sniffed content over a generic client-provided type
+            if mime_type == "application/octet-stream" and upload.detected_mime_type:
+                mime_type = upload.detected_mime_type
+            
+            async def store_blob(storage_key: str, file_id: UUID) -> None:
+                nonlocal promoted
+                promoted = await self.storage_service.move_file(staging_key, storage_key)
+            
+            return await self._register_file_content(
+                db, filename, mime_type, upload.size, upload.sha256, uploaded_by_id, organization_id, store_blob
+            )
+        finally:
+            if not promoted:
+                # Duplicate content or failed upload - the staged blob is not referenced
+                try:
+                    await self.storage_service.delete_file(staging_key)
+                except Exception as e:
+                    logger.warning(f"Failed to remove staged upload {staging_key}: {e}")
+    
+    async def _register_file_content(
+        self,
+        db: AsyncSession,
+        filename: str,
+        mime_type: str,
+        file_size: int,
+        file_hash: str,
+        uploaded_by_id: UUID,
+        organization_id: UUID,
+        store_blob: Callable[[str, UUID], Awaitable[None]]
+    ) -> File:
+        """
+        Create (or restore) the file record for content with a known hash.
+        
+        store_blob(storage_key, file_id) is only called when the content is not
+        already stored for this organization.
+        """
+        # Check for existing file with same hash (including soft-deleted ones)
+        existing_file = await self._find_uploader_file(db, organization_id, uploaded_by_id, file_hash)
         
         # If we find an existing file (active or soft-deleted)
         if existing_file:
@@ -758,27 +908,24 @@ class FileService:
                 # File already exists and is active - this is a true duplicate
                 raise DuplicateFileError(f"File with hash {file_hash} already exists", existing_file.id)
         
-        # Generate unique file ID and storage key for new file
         file_id = uuid.uuid4()
-        file_extension = Path(filename).suffix
+        _dedup_stats["uploads"] += 1
         
-        # Create storage key with date organization
-        now = datetime.now()
-        storage_key = f"attachments/{now.year}/{now.month:02d}/{file_id}{file_extension}"
+        # Reuse the blob of an identical upload in this organization if there is one
+        duplicate = await self.find_duplicate_file(db, organization_id, file_hash)
+        if duplicate:
+            storage_key = duplicate.file_path
+        else:
+            storage_key = self._content_storage_key(organization_id, file_hash)
         
-        # Upload file using storage service
-        file_url = await self.storage_service.upload_content(
-            content=file_content,
-            storage_key=storage_key,
-            content_type=mime_type,
-            metadata={
-                "file_id": str(file_id),
-                "user_id": str(uploaded_by_id),
-                "organization_id": str(organization_id),
-                "original_filename": filename,
-                "file_size": str(file_size)
-            }
-        )
+        blob_stored = False
+        if duplicate or await self.storage_service.file_exists(storage_key):
+            _dedup_stats["blob_reuses"] += 1
+            _dedup_stats["bytes_saved"] += file_size
+            logger.info(f"♻️ [DEDUP] Reusing stored blob {storage_key} for {filename} ({file_size} bytes)")
+        else:
+            await store_blob(storage_key, file_id)
+            blob_stored = True
         
         # Create database record with new model structure
         db_file = File(
@@ -794,12 +941,115 @@ class FileService:
             status=FileStatus.UPLOADED
         )
         
+        # Identical content already went through OCR/vision/parsing - reuse the results
+        if duplicate and duplicate.status == FileStatus.PROCESSED:
+            db_file.copy_extraction_from(duplicate)
+            record_extraction_reuse()
+        
         db.add(db_file)
-        await db.commit()
+        try:
+            await db.commit()
+        except IntegrityError:
+            # A concurrent upload of the same content by this user inserted its row first
+            await db.rollback()
+            if blob_stored:
+                await self._discard_unreferenced_blob(db, storage_key)
+            existing_file = await self._find_uploader_file(db, organization_id, uploaded_by_id, file_hash)
+            if existing_file is None:
+                raise
+            raise DuplicateFileError(f"File with hash {file_hash} already exists", existing_file.id)
         await db.refresh(db_file)
         
         return db_file
     
+    async def _discard_unreferenced_blob(self, db: AsyncSession, storage_key: str) -> None:
+        """
+        Remove a blob stored for a row that was never committed.
+        
+        The winning row of a concurrent upload may point at a different key (e.g.
+        a legacy attachments/YYYY/MM/... path), so the blob is only kept while
+        some file row still references it.
+        """
+        referenced = await db.scalar(
+            select(func.count(File.id)).where(File.file_path == storage_key)
+        )
+        if referenced:
+            return
+        try:
+            await self.storage_service.delete_file(storage_key)
+        except Exception as e:
+            logger.warning(f"Failed to remove unreferenced blob {storage_key}: {e}")
+    
+    async def _find_uploader_file(
+        self,
+        db: AsyncSession,
+        organization_id: UUID,
+        uploaded_by_id: UUID,
+        file_hash: str
+    ) -> Optional[File]:
+        """The uploader's file row for this content, active or soft-deleted (unique per uploader)"""
+        result = await db.execute(
+            select(File).where(
+                and_(
+                    File.file_hash == file_hash,
+                    File.organization_id == organization_id,
+                    File.uploaded_by_id == uploaded_by_id
+                )
+            )
+        )
+        return result.scalar_one_or_none()
+    
+    def _storage_metadata(
+        self,
+        file_id: UUID,
+        filename: str,
+        file_size: int,
+        uploaded_by_id: UUID,
+        organization_id: UUID
+    ) -> Dict[str, Any]:
+        """Metadata stored alongside a blob in the storage backend"""
+        return {
+            "file_id": str(file_id),
+            "user_id": str(uploaded_by_id),
+            "organization_id": str(organization_id),
+            "original_filename": filename,
+            "file_size": str(file_size)
+        }
+    
+    async def find_duplicate_file(
+        self,
+        db: AsyncSession,
+        organization_id: UUID,
+        file_hash: str,
+        exclude_file_id: Optional[UUID] = None
+    ) -> Optional[File]:
+        """
+        Find a file in the organization with identical content
+        
+        Processed files are preferred so their extraction results can be reused.
+        Soft-deleted files qualify as their blobs are kept in storage.
+        """
+        query = select(File).where(
+            and_(
+                File.organization_id == organization_id,
+                File.file_hash == file_hash
+            )
+        )
+        if exclude_file_id:
+            query = query.where(File.id != exclude_file_id)
+        
+        query = query.order_by(
+            (File.status == FileStatus.PROCESSED).desc(),
+            File.created_at
+        ).limit(1)
+        
+        result = await db.execute(query)
+        return result.scalar_one_or_none()
+    
+    def _content_storage_key(self, organization_id: UUID, file_hash: str) -> str:
+        """Content-addressed storage key for a blob within an organization"""
+        return f"attachments/{organization_id}/{file_hash[:2]}/{file_hash}"
+    
     async def get_files_for_organization(
         self,
         db: AsyncSession,
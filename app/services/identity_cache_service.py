@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Identity cache for Clerk-authenticated requests
+
+Maps a Clerk user ID to the local user and organization so that an
+authenticated request is a cache lookup, not a write transaction. Two tiers:
+
+- in-process: column snapshots of the User and Organization rows, rebuilt into
+  detached instances per request (short TTL, bounded LRU)
+- Redis: the local IDs plus the claim hash, shared by all API processes; a hit
+  costs two primary-key reads (user and organization)
+
+Each entry carries a hash of the Clerk claims that were last synced to the
+database. The local rows are only rewritten when that hash changes (new
+email, name, avatar, organization or role) or when a webhook invalidates the
+entry. Logins are buffered in memory and written in one batched UPDATE per
+flush interval instead of on every request.
+"""
+
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import redis.asyncio as redis
+from sqlalchemy import Integer, String, bindparam, cast, func, inspect, update
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.config.settings import get_settings
+from app.models.organization import Organization
+from app.models.user import User
+from app.utils.batched_writer import BatchedUsageWriter
+
+logger = logging.getLogger(__name__)
+
+# Clerk claims that are copied onto the local user/organization rows
+SYNCED_CLAIMS = ("clerk_id", "email", "full_name", "image_url", "org_id", "org_slug", "org_role")
+
+
+def claims_hash(clerk_user: Dict[str, Any]) -> str:
+    """Stable hash of the Clerk claims synced to the local rows"""
+    synced = {claim: clerk_user.get(claim) for claim in SYNCED_CLAIMS}
+    return hashlib.sha256(json.dumps(synced, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+
+def snapshot_row(instance) -> Dict[str, Any]:
+    """Column values of a loaded row, safe to keep after its session closes"""
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(type(instance)).column_attrs}
+
+
+def restore_row(model, snapshot: Optional[Dict[str, Any]]):
+    """Rebuild a detached instance, as if loaded by a session that has since closed"""
+    if snapshot is None:
+        return None
+    instance = model(**snapshot)
+    make_transient_to_detached(instance)
+    return instance
+
+
+def _login_statement():
+    users = User.__table__
+    return (
+        update(users)
+        .where(users.c.id == bindparam("b_user_id"))
+        .values(
+            last_login_at=bindparam("b_last_login_at"),
+            login_count=cast(func.coalesce(cast(users.c.login_count, Integer), 0) + bindparam("b_logins"), String),
+            failed_login_attempts="0",
+            locked_until=None
+        )
+    )
+
+
+def _login_params(user_id, last_seen: datetime, count: int) -> Dict[str, Any]:
+    return {"b_user_id": user_id, "b_last_login_at": last_seen, "b_logins": count}
+
+
+@dataclass
+class IdentityEntry:
+    """Cached identity: local row snapshots and the claim hash they were synced from"""
+    claims_hash: str
+    user: Dict[str, Any]
+    organization: Optional[Dict[str, Any]]
+    expires_at: float
+
+    def restore(self) -> Tuple[User, Optional[Organization]]:
+        return restore_row(User, self.user), restore_row(Organization, self.organization)
+
+
+class IdentityCacheService:
+    """Two-tier clerk_id -> (User, Organization) cache with batched login tracking"""
+
+    REDIS_PREFIX = "identity:"
+
+    def __init__(self):
+        settings = get_settings()
+        self.settings = settings
+        self.local_ttl_seconds = settings.identity_cache_ttl_seconds
+        self.redis_ttl_seconds = settings.identity_cache_redis_ttl_seconds
+        self.max_entries = settings.identity_cache_size
+
+        self._entries: "OrderedDict[str, IdentityEntry]" = OrderedDict()
+        self._redis_client: Optional[redis.Redis] = None
+        self.login_writer = BatchedUsageWriter(
+            _login_statement(),
+            _login_params,
+            flush_seconds=settings.login_flush_interval_seconds,
+            log_tag="IDENTITY"
+        )
+
+        self.stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "stale_claims": 0,
+            "invalidations": 0
+        }
+
+    async def get_redis_client(self) -> Optional[redis.Redis]:
+        """Get or create Redis client; the cache degrades to in-process only without it"""
+        if self._redis_client is None:
+            try:
+                self._redis_client = redis.from_url(
+                    str(self.settings.redis_url),
+                    decode_responses=True,
+                    socket_connect_timeout=5,
+                    socket_timeout=5,
+                    retry_on_timeout=True,
+                    health_check_interval=30
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ [IDENTITY] Redis unavailable, using in-process cache only: {e}")
+                self._redis_client = None
+        return self._redis_client
+
+    async def resolve(self, clerk_user: Dict[str, Any], db_factory) -> Optional[Tuple[User, Optional[Organization]]]:
+        """
+        Resolve cached local user and organization for verified Clerk claims.
+
+        Returns None when the identity is unknown or the claims changed since
+        the last sync, in which case the caller syncs and calls store().
+        """
+        clerk_id = clerk_user["clerk_id"]
+        current_hash = claims_hash(clerk_user)
+
+        entry = self._entries.get(clerk_id)
+        if entry and entry.expires_at > time.monotonic():
+            if entry.claims_hash == current_hash:
+                self._entries.move_to_end(clerk_id)
+                self.stats["local_hits"] += 1
+                return entry.restore()
+            self.stats["stale_claims"] += 1
+            return None
+
+        ids = await self._get_shared(clerk_id)
+        if ids is None:
+            self.stats["misses"] += 1
+            return None
+        if ids.get("claims_hash") != current_hash:
+            self.stats["stale_claims"] += 1
+            return None
+
+        async with db_factory() as db:
+            user = await db.get(User, uuid.UUID(ids["user_id"]))
+            organization = (
+                await db.get(Organization, uuid.UUID(ids["organization_id"])) if ids.get("organization_id") else None
+            )
+        if user is None or str(user.organization_id or "") != str(ids.get("organization_id") or ""):
+            self.stats["misses"] += 1
+            return None
+
+        self._store_local(clerk_id, current_hash, user, organization)
+        self.stats["redis_hits"] += 1
+        return user, organization
+
+    async def store(self, clerk_user: Dict[str, Any], user: User, organization: Optional[Organization]) -> None:
+        """Cache a freshly synced identity in both tiers"""
+        clerk_id = clerk_user["clerk_id"]
+        current_hash = claims_hash(clerk_user)
+        self._store_local(clerk_id, current_hash, user, organization)
+
+        redis_client = await self.get_redis_client()
+        if not redis_client:
+            return
+        try:
+            await redis_client.setex(
+                f"{self.REDIS_PREFIX}{clerk_id}",
+                self.redis_ttl_seconds,
+                json.dumps({
+                    "user_id": str(user.id),
+                    "organization_id": str(organization.id) if organization else None,
+                    "claims_hash": current_hash
+                })
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ [IDENTITY] Failed to cache identity for {clerk_id}: {e}")
+
+    async def invalidate(self, clerk_id: str) -> None:
+        """Drop an identity from both tiers so the next request resyncs it"""
+        self._entries.pop(clerk_id, None)
+        self.stats["invalidations"] += 1
+
+        redis_client = await self.get_redis_client()
+        if not redis_client:
+            return
+        try:
+            await redis_client.delete(f"{self.REDIS_PREFIX}{clerk_id}")
+        except Exception as e:
+            logger.warning(f"⚠️ [IDENTITY] Failed to invalidate identity for {clerk_id}: {e}")
+
+    def invalidate_organization(self, organization_id) -> None:
+        """Drop in-process snapshots of an organization; Redis only holds its ID"""
+        stale = [
+            clerk_id for clerk_id, entry in self._entries.items()
+            if entry.organization and str(entry.organization["id"]) == str(organization_id)
+        ]
+        for clerk_id in stale:
+            del self._entries[clerk_id]
+        self.stats["invalidations"] += len(stale)
+
+    def forget_user(self, user_id) -> None:
+        """Drop in-process snapshots of a local user, e.g. after a role change elsewhere"""
+        stale = [
+            clerk_id for clerk_id, entry in self._entries.items()
+            if str(entry.user["id"]) == str(user_id)
+        ]
+        for clerk_id in stale:
+            del self._entries[clerk_id]
+        self.stats["invalidations"] += len(stale)
+
+    def _store_local(self, clerk_id: str, current_hash: str, user: User, organization: Optional[Organization]) -> None:
+        self._entries[clerk_id] = IdentityEntry(
+            claims_hash=current_hash,
+            user=snapshot_row(user),
+            organization=snapshot_row(organization) if organization else None,
+            expires_at=time.monotonic() + self.local_ttl_seconds
+        )
+        self._entries.move_to_end(clerk_id)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get_shared(self, clerk_id: str) -> Optional[Dict[str, Any]]:
+        redis_client = await self.get_redis_client()
+        if not redis_client:
+            return None
+        try:
+            cached = await redis_client.get(f"{self.REDIS_PREFIX}{clerk_id}")
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            logger.warning(f"⚠️ [IDENTITY] Identity lookup failed for {clerk_id}: {e}")
+            return None
+
+    def record_login(self, user_id) -> None:
+        """Buffer an authenticated request; written by the next flush"""
+        self.login_writer.record(user_id)
+
+    async def flush_logins(self) -> int:
+        """Write buffered logins in one executemany UPDATE; returns the number of users updated"""
+        return await self.login_writer.flush()
+
+    async def close(self) -> None:
+        """Flush buffered logins and stop the flush loop"""
+        await self.login_writer.close()
+        if self._redis_client:
+            await self._redis_client.close()
+            self._redis_client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["local_hits"] + self.stats["redis_hits"] + self.stats["misses"] + self.stats["stale_claims"]
+        hits = self.stats["local_hits"] + self.stats["redis_hits"]
+        logins = self.login_writer.stats
+        return {
+            **self.stats,
+            "logins_recorded": logins["recorded"],
+            "login_flushes": logins["flushes"],
+            "users_flushed": logins["rows_flushed"],
+            "login_flush_failures": logins["flush_failures"],
+            "entries": len(self._entries),
+            "pending_logins": len(self.login_writer.pending),
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
+
+
+# Global service instance
+identity_cache = IdentityCacheService()
@@ -22,6 +22,7 @@ from app.models.organization_invitation import (
     OrganizationRole, 
     InvitationStatus
 )
+from app.services.principal_service import principal_service
 
 
 class MemberManagementService:
@@ -234,6 +235,7 @@ class MemberManagementService:
         # Update role
         target_user.organization_role = new_role
         await db.commit()
+        await principal_service.invalidate_user(user_id)
         
         return True
     
@@ -306,6 +308,7 @@ class MemberManagementService:
         # Remove user from organization
         target_user.leave_organization()
         await db.commit()
+        await principal_service.invalidate_user(user_id)
         
         return True
     
@@ -350,6 +353,7 @@ class MemberManagementService:
         if member_to_promote:
             member_to_promote.promote_to_admin()
             await db.commit()
+            await principal_service.invalidate_user(member_to_promote.id)
         
         return member_to_promote
     
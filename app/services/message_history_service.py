@@ -13,7 +13,8 @@ class MessageHistoryService:
         db: AsyncSession,
         thread_id: str,
         max_context_size: int,
-        use_memory_context: bool = True
+        use_memory_context: bool = True,
+        model: Optional[str] = None
     ) -> List[dict]:
         """
         Retrieve and filter thread messages based on context size limits.
@@ -23,6 +24,7 @@ class MessageHistoryService:
             thread_id: Thread ID to retrieve messages from
             max_context_size: Maximum tokens allowed in context
             use_memory_context: Whether to include message history
+            model: Agent model string (e.g. "openai:gpt-4o-mini") selecting the token encoding
             
         Returns:
             List of message dictionaries formatted for Pydantic AI
@@ -53,17 +55,20 @@ class MessageHistoryService:
             formatted_messages = []
             total_tokens = 0
             
-            # Process messages from most recent to oldest
-            for message in messages:
-                msg_dict = {
+            msg_dicts = [
+                {
                     "role": str(message.role),
                     "content": str(message.content),
                     "timestamp": message.created_at.isoformat() if message.created_at else None
                 }
-                
-                # Count tokens for this message
-                message_tokens = await token_counter_service.count_message_tokens(msg_dict)
-                
+                for message in messages
+            ]
+            
+            # Count tokens for all messages in one batch
+            token_counts = await token_counter_service.count_messages_tokens(msg_dicts, model=model)
+            
+            # Process messages from most recent to oldest
+            for msg_dict, message_tokens in zip(msg_dicts, token_counts):
                 # Check if adding this message would exceed context limit
                 if total_tokens + message_tokens > max_context_size:
                     logger.debug(f"Context limit reached: {total_tokens} + {message_tokens} > {max_context_size}")
@@ -17,10 +17,60 @@ except ImportError:
     HAS_TESSERACT = False
 
 from app.config.settings import get_settings
+from app.services.extraction_executor import extraction_executor
 
 logger = logging.getLogger(__name__)
 
 
+def _tesseract_extract_sync(image_content: bytes) -> Dict[str, Any]:
+    """Extract text using Tesseract OCR"""
+
+    if not HAS_TESSERACT:
+        raise Exception("Tesseract not available - install pytesseract package")
+
+    # Load image
+    image = Image.open(BytesIO(image_content))
+
+    # Extract text with detailed data
+    data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+
+    # Process OCR results
+    text_regions = []
+    full_text = []
+
+    for i in range(len(data['text'])):
+        if int(data['conf'][i]) > 30:  # Confidence threshold
+            text = data['text'][i].strip()
+            if text:
+                text_regions.append({
+                    "text": text,
+                    "confidence": float(data['conf'][i]) / 100.0,
+                    "geometry": {
+                        "x": data['left'][i],
+                        "y": data['top'][i], 
+                        "width": data['width'][i],
+                        "height": data['height'][i]
+                    },
+                    "block_num": data['block_num'][i],
+                    "line_num": data['line_num'][i],
+                    "word_num": data['word_num'][i]
+                })
+                full_text.append(text)
+
+    return {
+        "text_regions": text_regions,
+        "full_text": " ".join(full_text),
+        "method": "tesseract",
+        "total_confidence": sum([r["confidence"] for r in text_regions]) / max(len(text_regions), 1)
+    }
+
+
+def rasterize_svg(svg_content: bytes) -> bytes:
+    """Convert SVG bytes to PNG bytes using cairosvg (raises ImportError if unavailable)"""
+    import cairosvg
+    return cairosvg.svg2png(bytestring=svg_content)
+
+
 class OCRService:
     """Text extraction from images using OCR"""
     
@@ -43,7 +93,7 @@ class OCRService:
         is_svg = self._is_svg_content(image_content)
         if is_svg:
             logger.info("Converting SVG to PNG for OCR processing")
-            image_content = self._convert_svg_to_png(image_content)
+            image_content = await self._convert_svg_to_png(image_content)
         
         try:
             # Try Tesseract first (free, local)
@@ -58,45 +108,7 @@ class OCRService:
     
     async def _extract_with_tesseract(self, image_content: bytes) -> Dict[str, Any]:
         """Extract text using Tesseract OCR"""
-        
-        if not HAS_TESSERACT:
-            raise Exception("Tesseract not available - install pytesseract package")
-        
-        # Load image
-        image = Image.open(BytesIO(image_content))
-        
-        # Extract text with detailed data
-        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-        
-        # Process OCR results
-        text_regions = []
-        full_text = []
-        
-        for i in range(len(data['text'])):
-            if int(data['conf'][i]) > 30:  # Confidence threshold
-                text = data['text'][i].strip()
-                if text:
-                    text_regions.append({
-                        "text": text,
-                        "confidence": float(data['conf'][i]) / 100.0,
-                        "geometry": {
-                            "x": data['left'][i],
-                            "y": data['top'][i], 
-                            "width": data['width'][i],
-                            "height": data['height'][i]
-                        },
-                        "block_num": data['block_num'][i],
-                        "line_num": data['line_num'][i],
-                        "word_num": data['word_num'][i]
-                    })
-                    full_text.append(text)
-        
-        return {
-            "text_regions": text_regions,
-            "full_text": " ".join(full_text),
-            "method": "tesseract",
-            "total_confidence": sum([r["confidence"] for r in text_regions]) / max(len(text_regions), 1)
-        }
+        return await extraction_executor.run(_tesseract_extract_sync, image_content, payload_size=len(image_content))
     
     async def _extract_with_google_vision(self, image_content: bytes) -> Dict[str, Any]:
         """Extract text using Google Vision API"""
@@ -168,13 +180,12 @@ class OCRService:
         except Exception:
             return False
     
-    def _convert_svg_to_png(self, svg_content: bytes) -> bytes:
+    async def _convert_svg_to_png(self, svg_content: bytes) -> bytes:
         """Convert SVG content to PNG bytes using cairosvg"""
         try:
-            # Try to import cairosvg for SVG conversion
+            # Rasterize off the event loop; ImportError propagates if cairosvg is missing
             try:
-                import cairosvg
-                png_bytes = cairosvg.svg2png(bytestring=svg_content)
+                png_bytes = await extraction_executor.run(rasterize_svg, svg_content, payload_size=len(svg_content))
                 logger.info("Successfully converted SVG to PNG using cairosvg")
                 return png_bytes
             except ImportError:
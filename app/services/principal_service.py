@@ -4,23 +4,44 @@ Principal Service for secure authentication and authorization
 
 This service replaces raw JWT token handling with Principal objects,
 providing caching, organization context, and secure authentication.
+
+Every bearer token - from the FastAPI auth dependency or the MCP principal
+injection middleware - is resolved through authenticate(), which checks two
+cache tiers before doing any Clerk or database work:
+
+- in-process LRU with a short TTL, holding the Principal plus column
+  snapshots of the user, organization and API token rows
+- Redis, shared by all processes, holding the Principal and row IDs
+
+Cached entries are tagged with their user, organization and API token.
+Role, membership, organization and token changes call invalidate_*(), which
+clears the Redis entries for the tag and publishes it on a pub/sub channel so
+every process drops its in-process entries too.
 """
 
+import asyncio
+import hashlib
 import json
 import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, FrozenSet, Iterable
 from jose import jwt, JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
 
 import redis.asyncio as redis
 
 from app.config.settings import get_settings
+from app.models.api_token import APIToken
 from app.models.user import User
 from app.models.organization import Organization
 from app.schemas.principal import Principal, SessionType
-from app.services.clerk_service import clerk_service
+from app.services.identity_cache_service import identity_cache, restore_row, snapshot_row
 
 logger = logging.getLogger(__name__)
 
@@ -30,24 +51,110 @@ class PrincipalExtractionError(Exception):
     pass
 
 
+@dataclass
+class AuthenticatedIdentity:
+    """Result of authenticating a bearer token: the Principal and the rows behind it"""
+    user: User
+    organization: Optional[Organization]
+    auth_method: str  # "api_token", "clerk" or "jwt"
+    claims: Dict[str, Any] = field(default_factory=dict)
+    api_token: Optional[APIToken] = None
+    principal: Optional[Principal] = None
+    
+    @property
+    def tags(self) -> FrozenSet[str]:
+        """Invalidation tags this identity is cached under"""
+        tags = {f"user:{self.user.id}"}
+        if self.organization:
+            tags.add(f"org:{self.organization.id}")
+        if self.api_token:
+            tags.add(f"api_token:{self.api_token.token_hash}")
+        return frozenset(tags)
+    
+    def apply_to_request(self, request: Any) -> None:
+        """Set the request state later dependencies read (organization, API token permissions)"""
+        if request is None:
+            return
+        
+        if self.auth_method == "api_token":
+            request.state.api_token = self.api_token
+            request.state.organization_id = self.organization.id
+            request.state.organization = self.organization
+            request.state.user_permissions = self.api_token.permissions or ["*"]
+            return
+        
+        if self.auth_method == "clerk":
+            request.state.clerk_user = self.claims
+        request.state.auth_method = self.auth_method
+        if self.organization:
+            request.state.organization = self.organization
+            request.state.organization_id = self.organization.id
+
+
+@dataclass
+class CachedPrincipal:
+    """In-process cache entry; rows are kept as column snapshots and rebuilt per request"""
+    principal: Principal
+    auth_method: str
+    claims: Dict[str, Any]
+    user: Dict[str, Any]
+    organization: Optional[Dict[str, Any]]
+    api_token: Optional[Dict[str, Any]]
+    tags: FrozenSet[str]
+    expires_at: float
+    
+    def restore(self) -> AuthenticatedIdentity:
+        return AuthenticatedIdentity(
+            user=restore_row(User, self.user),
+            organization=restore_row(Organization, self.organization),
+            auth_method=self.auth_method,
+            claims=self.claims,
+            api_token=restore_row(APIToken, self.api_token),
+            principal=self.principal
+        )
+
+
 class PrincipalService:
     """
     Service for creating and managing Principal objects with caching.
     
     This service handles:
-    - JWT token validation and Principal extraction
-    - Redis caching for performance (15-minute TTL)
+    - Token validation and Principal extraction for API and MCP requests
+    - Two-tier caching: in-process LRU in front of Redis (15-minute TTL)
+    - Cross-process invalidation over Redis pub/sub
     - Organization context loading
     - Permission mapping and caching
     """
     
+    CACHE_PREFIX = "principal:"
+    TAG_PREFIX = "principal_tag:"
+    # The idle invalidation subscription is PINGed this often to detect dead connections
+    PUBSUB_HEALTH_CHECK_SECONDS = 30
+    
     def __init__(self):
         self.settings = get_settings()
         self._redis_client: Optional[redis.Redis] = None
+        self._redis_retry_at = 0.0
+        self._pubsub_client: Optional[redis.Redis] = None
         
         # Cache configuration
         self.principal_cache_ttl = 900  # 15 minutes in seconds
         self.permission_cache_ttl = 300  # 5 minutes for permissions
+        self.local_cache_ttl = self.settings.principal_local_cache_ttl_seconds
+        self.local_cache_size = self.settings.principal_local_cache_size
+        self.invalidation_channel = self.settings.principal_invalidation_channel
+        
+        self._local: "OrderedDict[str, CachedPrincipal]" = OrderedDict()
+        self._listener_task: Optional[asyncio.Task] = None
+        
+        self.stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "rejected": 0,
+            "invalidations_published": 0,
+            "invalidations_received": 0
+        }
         
         # Permission mappings - could be loaded from database/config
         self.default_permissions = self._load_permission_mappings()
@@ -61,8 +168,8 @@ class PrincipalService:
         }
     
     async def get_redis_client(self) -> Optional[redis.Redis]:
-        """Get or create Redis client for caching."""
-        if self._redis_client is None or self._redis_client.closed:
+        """Get or create Redis client for caching; retried at most every 30 seconds after a failure."""
+        if self._redis_client is None and time.monotonic() >= self._redis_retry_at:
             try:
                 self._redis_client = redis.from_url(
                     str(self.settings.redis_url),
@@ -76,192 +183,321 @@ class PrincipalService:
                 # Test connection
                 await self._redis_client.ping()
                 logger.debug("Redis client connected successfully")
-                
+            
             except Exception as e:
                 logger.warning(f"Redis connection failed, caching disabled: {e}")
                 self._redis_client = None
+                self._redis_retry_at = time.monotonic() + 30
         
         return self._redis_client
     
-    async def extract_principal(
+    def get_pubsub_client(self) -> redis.Redis:
+        """
+        Dedicated client for the invalidation subscription.
+        
+        The shared client's 5s socket timeout would drop an idle subscription every
+        few seconds, losing invalidations published while it resubscribes. Reads
+        here block without a timeout; TCP keepalive and periodic PINGs detect a
+        dead connection instead.
+        """
+        if self._pubsub_client is None:
+            self._pubsub_client = redis.from_url(
+                str(self.settings.redis_url),
+                decode_responses=True,
+                socket_connect_timeout=5,
+                socket_timeout=None,
+                socket_keepalive=True,
+                health_check_interval=self.PUBSUB_HEALTH_CHECK_SECONDS
+            )
+        return self._pubsub_client
+    
+    @classmethod
+    def _cache_key(cls, token: str) -> str:
+        # Use token hash for cache key to avoid storing full token
+        return f"{cls.CACHE_PREFIX}{hashlib.sha256(token.encode()).hexdigest()[:16]}"
+    
+    async def authenticate(
         self,
         token: str,
-        db: AsyncSession,
         session_type: SessionType = SessionType.WEB
+    ) -> Optional[AuthenticatedIdentity]:
+        """
+        Resolve a bearer token (API token, Clerk session or internal JWT).
+        
+        Returns None if the token is invalid, expired or revoked.
+        """
+        self._ensure_listener()
+        cache_key = self._cache_key(token)
+        
+        entry = self._local.get(cache_key)
+        if entry and entry.expires_at > time.monotonic() and not entry.principal.is_token_expired():
+            self._local.move_to_end(cache_key)
+            self.stats["local_hits"] += 1
+            return self._with_session_type(entry.restore(), session_type)
+        
+        identity = await self._get_shared(cache_key)
+        if identity:
+            self.stats["redis_hits"] += 1
+            self._store_local(cache_key, identity)
+            return self._with_session_type(identity, session_type)
+        
+        self.stats["misses"] += 1
+        identity = await self._authenticate_uncached(token)
+        if not identity:
+            self.stats["rejected"] += 1
+            return None
+        
+        identity.principal = await self._build_principal(
+            user=identity.user,
+            organization=identity.organization,
+            jwt_payload=identity.claims,
+            session_type=session_type
+        )
+        self._store_local(cache_key, identity)
+        await self._store_shared(cache_key, identity)
+        
+        logger.debug(f"Principal extracted for user {identity.user.email}, org {identity.organization.name if identity.organization else 'None'}")
+        return identity
+    
+    @staticmethod
+    def _with_session_type(identity: AuthenticatedIdentity, session_type: SessionType) -> AuthenticatedIdentity:
+        if identity.principal.session_type != session_type:
+            identity.principal = identity.principal.model_copy(update={'session_type': session_type})
+        return identity
+    
+    async def _authenticate_uncached(self, token: str) -> Optional[AuthenticatedIdentity]:
+        """Validate a token against its source of truth"""
+        from app.middleware.auth_middleware import clerk_auth
+        
+        if token.startswith("ai_"):
+            return await clerk_auth._authenticate_api_token(token)
+        
+        # Internal JWTs (issued on token refresh) are checked locally first
+        try:
+            jwt_payload = self._verify_internal_jwt(token)
+        except JWTError:
+            return await clerk_auth._authenticate_clerk_token(token)
+        
+        from app.database import AsyncSessionLocal
+        
+        async with AsyncSessionLocal() as db:
+            user = await self._load_user_by_id(db, jwt_payload.get('sub'))
+            if not user:
+                return None
+            organization = await self._load_organization(db, user.organization_id)
+        return AuthenticatedIdentity(user=user, organization=organization, auth_method="jwt", claims=jwt_payload)
+    
+    async def extract_principal(
+        self,
+        token: str,
+        db: Optional[AsyncSession] = None,
+        session_type: SessionType = SessionType.WEB,
+        request_context: Optional[Dict[str, Any]] = None
     ) -> Principal:
         """
-        Extract Principal from JWT token with caching and full context loading.
+        Extract Principal from a bearer token with caching and full context loading.
         
         Args:
-            token: JWT token string
-            db: Database session for loading user/org data
+            token: API token, Clerk session token or internal JWT
+            db: Unused; rows are loaded in short-lived sessions on cache misses
             session_type: Type of session (web, api, mcp, integration)
-            
+            request_context: Caller details included in failure logs
+        
         Returns:
             Principal object with full context
-            
+        
         Raises:
             PrincipalExtractionError: If token is invalid or user not found
         """
         try:
-            # Check cache first
-            cached_principal = await self._get_cached_principal(token)
-            if cached_principal and not cached_principal.is_token_expired():
-                logger.debug(f"Principal cache hit for user {cached_principal.user_id}")
-                return cached_principal.update_last_used()
-            
-            # Validate token and extract user
-            if token.startswith("ai_"):
-                # API token - extract from database
-                user = await self._extract_from_api_token(token, db)
-                jwt_payload = {}  # No JWT for API tokens
-            else:
-                # JWT token - validate with Clerk or internal JWT
-                user, jwt_payload = await self._extract_from_jwt_token(token, db)
-            
-            if not user:
-                raise PrincipalExtractionError("User not found or inactive")
-            
-            # Load organization data
-            organization = await self._load_organization(db, user.organization_id)
-            
-            # Build Principal with full context
-            principal = await self._build_principal(
-                user=user,
-                organization=organization,
-                jwt_payload=jwt_payload,
-                session_type=session_type
-            )
-            
-            # Cache the Principal
-            await self._cache_principal(token, principal)
-            
-            logger.debug(f"Principal extracted for user {user.email}, org {organization.name if organization else 'None'}")
-            return principal
-            
+            identity = await self.authenticate(token, session_type)
         except Exception as e:
-            logger.error(f"Principal extraction failed: {e}")
+            logger.error(f"Principal extraction failed: {e} (context: {request_context or {}})")
             raise PrincipalExtractionError(f"Failed to extract principal: {str(e)}")
+        
+        if not identity:
+            logger.warning(f"Principal extraction rejected token (context: {request_context or {}})")
+            raise PrincipalExtractionError("User not found or inactive")
+        return identity.principal.update_last_used()
+    
+    def _store_local(self, cache_key: str, identity: AuthenticatedIdentity) -> None:
+        self._local[cache_key] = CachedPrincipal(
+            principal=identity.principal,
+            auth_method=identity.auth_method,
+            claims=identity.claims,
+            user=snapshot_row(identity.user),
+            organization=snapshot_row(identity.organization) if identity.organization else None,
+            api_token=snapshot_row(identity.api_token) if identity.api_token else None,
+            tags=identity.tags,
+            expires_at=time.monotonic() + self.local_cache_ttl
+        )
+        self._local.move_to_end(cache_key)
+        if len(self._local) > self.local_cache_size:
+            self._local.popitem(last=False)
+    
+    async def _store_shared(self, cache_key: str, identity: AuthenticatedIdentity) -> None:
+        """Cache Principal and row IDs in Redis, indexed by invalidation tag"""
+        redis_client = await self.get_redis_client()
+        if not redis_client:
+            return
+        
+        seconds_left = (identity.principal.token_expires_at - datetime.now(timezone.utc)).total_seconds()
+        ttl = int(min(self.principal_cache_ttl, seconds_left))
+        if ttl <= 0:
+            return
+        
+        try:
+            # Convert to cache-friendly format
+            cache_data = json.dumps({
+                "principal": identity.principal.to_cache_dict(),
+                "auth_method": identity.auth_method,
+                "claims": identity.claims,
+                "user_id": str(identity.user.id),
+                "organization_id": str(identity.organization.id) if identity.organization else None,
+                "api_token_id": str(identity.api_token.id) if identity.api_token else None
+            }, default=str)
+            
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.setex(cache_key, ttl, cache_data)
+                for tag in identity.tags:
+                    pipe.sadd(f"{self.TAG_PREFIX}{tag}", cache_key)
+                    pipe.expire(f"{self.TAG_PREFIX}{tag}", self.principal_cache_ttl)
+                await pipe.execute()
+            
+            logger.debug(f"Principal cached for user {identity.user.id}")
+        
+        except Exception as e:
+            logger.debug(f"Cache storage failed: {e}")
     
-    async def _get_cached_principal(self, token: str) -> Optional[Principal]:
-        """Get Principal from cache"""
+    async def _get_shared(self, cache_key: str) -> Optional[AuthenticatedIdentity]:
+        """Get Principal from Redis and reload its rows by primary key"""
         redis_client = await self.get_redis_client()
         if not redis_client:
             return None
         
         try:
-            # Use token hash for cache key to avoid storing full token
-            import hashlib
-            cache_key = f"principal:{hashlib.sha256(token.encode()).hexdigest()[:16]}"
-            
             cached_data = await redis_client.get(cache_key)
-            if cached_data:
-                principal_data = json.loads(cached_data)
-                return Principal.from_dict(principal_data)
-                
+            if not cached_data:
+                return None
+            data = json.loads(cached_data)
+            principal = Principal.from_dict(data["principal"])
         except Exception as e:
             logger.debug(f"Cache retrieval failed: {e}")
+            return None
+        
+        if principal.is_token_expired():
+            return None
+        
+        from app.database import AsyncSessionLocal
         
-        return None
+        async with AsyncSessionLocal() as db:
+            user = await db.get(User, uuid.UUID(data["user_id"]))
+            organization = await db.get(Organization, uuid.UUID(data["organization_id"])) if data.get("organization_id") else None
+            api_token = await db.get(APIToken, uuid.UUID(data["api_token_id"])) if data.get("api_token_id") else None
+        
+        # Rows changed without an invalidation (e.g. direct database edits) fall back to a full check
+        if not user or not user.is_active:
+            return None
+        if data.get("organization_id") and (not organization or not organization.is_enabled):
+            return None
+        if data.get("api_token_id") and (not api_token or not api_token.is_active or api_token.is_expired):
+            return None
+        
+        return AuthenticatedIdentity(
+            user=user,
+            organization=organization,
+            auth_method=data["auth_method"],
+            claims=data.get("claims") or {},
+            api_token=api_token,
+            principal=principal
+        )
+    
+    async def invalidate_user(self, user_id: Any) -> None:
+        """Drop cached principals after a user's role, membership or status changes"""
+        await self.invalidate(f"user:{user_id}")
     
-    async def _cache_principal(self, token: str, principal: Principal) -> None:
-        """Cache Principal for performance"""
+    async def invalidate_organization(self, organization_id: Any) -> None:
+        """Drop cached principals of every member after an organization changes"""
+        await self.invalidate(f"org:{organization_id}")
+    
+    async def invalidate_api_token(self, token_hash: str) -> None:
+        """Drop cached principals for an API token that was revoked or changed"""
+        await self.invalidate(f"api_token:{token_hash}")
+    
+    async def invalidate_clerk_profile(self, clerk_id: str) -> None:
+        """Drop every process's cached Clerk profile after Clerk reports a change"""
+        await self.invalidate(f"clerk_user:{clerk_id}")
+    
+    async def invalidate(self, *tags: str) -> None:
+        """Clear tagged entries from Redis and tell every process to drop its local copies"""
+        self._drop_local(tags)
+        
         redis_client = await self.get_redis_client()
         if not redis_client:
             return
         
         try:
-            import hashlib
-            cache_key = f"principal:{hashlib.sha256(token.encode()).hexdigest()[:16]}"
-            
-            # Convert to cache-friendly format
-            cache_data = json.dumps(principal.to_cache_dict())
-            
-            await redis_client.setex(
-                cache_key,
-                self.principal_cache_ttl,
-                cache_data
-            )
-            
-            logger.debug(f"Principal cached for user {principal.user_id}")
-            
+            for tag in tags:
+                tag_key = f"{self.TAG_PREFIX}{tag}"
+                cache_keys = await redis_client.smembers(tag_key)
+                await redis_client.delete(tag_key, *cache_keys)
+            await redis_client.publish(self.invalidation_channel, json.dumps(list(tags)))
+            self.stats["invalidations_published"] += 1
+            logger.debug(f"Principal cache invalidated: {', '.join(tags)}")
         except Exception as e:
-            logger.debug(f"Cache storage failed: {e}")
+            logger.warning(f"⚠️ [PRINCIPAL] Failed to publish invalidation for {', '.join(tags)}: {e}")
     
-    async def _extract_from_api_token(self, token: str, db: AsyncSession) -> Optional[User]:
-        """Extract user from API token"""
-        try:
-            # Parse environment-specific token format: ai_env_token
-            parts = token.split('_', 2)
-            if len(parts) != 3 or parts[0] != 'ai':
-                return None
-            
-            env_prefix, raw_token = parts[1], parts[2]
-            
-            # Validate environment
-            expected_env = self.settings.environment[:3]
-            if env_prefix != expected_env:
-                logger.warning(f"Token environment mismatch: expected {expected_env}, got {env_prefix}")
-                return None
-            
-            # Hash token for lookup
-            import hashlib
-            token_hash = hashlib.sha256(raw_token.encode()).hexdigest()
-            
-            # Find user by API token
-            from app.models.api_token import APIToken
-            
-            result = await db.execute(
-                select(APIToken, User)
-                .join(User, APIToken.user_id == User.id)
-                .where(
-                    APIToken.token_hash == token_hash,
-                    APIToken.is_active == True,
-                    APIToken.expires_at > datetime.now(timezone.utc),
-                    User.is_active == True
-                )
-            )
-            
-            token_data = result.first()
-            if not token_data:
-                return None
-            
-            api_token, user = token_data
-            
-            # Update last used
-            api_token.update_last_used()
-            await db.commit()
-            
-            return user
-            
-        except Exception as e:
-            logger.error(f"API token extraction failed: {e}")
-            return None
+    def _drop_local(self, tags: Iterable[str]) -> None:
+        tags = set(tags)
+        stale = [key for key, entry in self._local.items() if entry.tags & tags]
+        for key in stale:
+            del self._local[key]
+        
+        # The identity cache keeps its own in-process snapshots of the same rows
+        for tag in tags:
+            kind, _, value = tag.partition(":")
+            if kind == "user":
+                identity_cache.forget_user(value)
+            elif kind == "org":
+                identity_cache.invalidate_organization(value)
+            elif kind == "clerk_user":
+                from app.services.clerk_service import clerk_service
+                clerk_service.invalidate_user_profile(value)
     
-    async def _extract_from_jwt_token(self, token: str, db: AsyncSession) -> tuple[Optional[User], Dict[str, Any]]:
-        """Extract user from JWT token"""
-        try:
-            # First try internal JWT validation
+    def _ensure_listener(self) -> None:
+        if self._listener_task is None or self._listener_task.done():
+            self._listener_task = asyncio.create_task(self._listen_for_invalidations())
+    
+    async def _listen_for_invalidations(self) -> None:
+        """Apply invalidations published by other processes; reconnects with backoff"""
+        delay = 1
+        while True:
+            pubsub = self.get_pubsub_client().pubsub()
             try:
-                jwt_payload = self._verify_internal_jwt(token)
-                user = await self._load_user_by_id(db, jwt_payload.get('sub'))
-                if user:
-                    return user, jwt_payload
-            except JWTError:
-                pass  # Fall through to Clerk validation
-            
-            # Try Clerk validation
-            clerk_user = await clerk_service.verify_token(token)
-            if not clerk_user:
-                return None, {}
-            
-            # Sync local user from Clerk data
-            user = await self._sync_user_from_clerk(db, clerk_user)
-            return user, clerk_user
-            
-        except Exception as e:
-            logger.error(f"JWT token extraction failed: {e}")
-            return None, {}
+                await pubsub.subscribe(self.invalidation_channel)
+                # Entries cached while disconnected may have missed invalidations
+                self._local.clear()
+                delay = 1
+                while True:
+                    # Waking up periodically lets the health check PING an idle connection
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=self.PUBSUB_HEALTH_CHECK_SECONDS
+                    )
+                    if not message or message.get("type") != "message":
+                        continue
+                    self._drop_local(json.loads(message["data"]))
+                    self.stats["invalidations_received"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ [PRINCIPAL] Invalidation listener disconnected: {e}; retrying in {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
     
     def _verify_internal_jwt(self, token: str) -> Dict[str, Any]:
         """Verify internal JWT token"""
@@ -275,7 +511,7 @@ class PrincipalService:
         """Load user by ID"""
         if not user_id:
             return None
-            
+        
         result = await db.execute(
             select(User).where(
                 User.id == user_id,
@@ -285,66 +521,6 @@ class PrincipalService:
         )
         return result.scalar_one_or_none()
     
-    async def _sync_user_from_clerk(self, db: AsyncSession, clerk_user: Dict[str, Any]) -> Optional[User]:
-        """Sync user from Clerk data (simplified from auth_middleware)"""
-        try:
-            # Look for existing user
-            result = await db.execute(
-                select(User).where(
-                    (User.clerk_id == clerk_user['clerk_id']) |
-                    (User.email == clerk_user['email'])
-                )
-            )
-            user = result.scalar_one_or_none()
-            
-            if user:
-                # Update existing user
-                user.clerk_id = clerk_user['clerk_id']
-                user.email = clerk_user['email']
-                if clerk_user.get('full_name'):
-                    user.full_name = clerk_user['full_name']
-                user.is_verified = True
-                
-                # Update organization if provided
-                if clerk_user.get('org_id'):
-                    org_id = await self._sync_organization_from_clerk(db, clerk_user)
-                    if org_id:
-                        user.organization_id = org_id
-                
-                await db.commit()
-                await db.refresh(user)
-                return user
-            else:
-                # Would create new user here, but simplified for now
-                logger.warning(f"User not found for Clerk user {clerk_user.get('email')}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"User sync failed: {e}")
-            return None
-    
-    async def _sync_organization_from_clerk(self, db: AsyncSession, clerk_user: Dict[str, Any]) -> Optional[str]:
-        """Sync organization from Clerk data"""
-        org_clerk_id = clerk_user.get('org_id')
-        if not org_clerk_id:
-            return None
-        
-        try:
-            result = await db.execute(
-                select(Organization).where(Organization.clerk_organization_id == org_clerk_id)
-            )
-            org = result.scalar_one_or_none()
-            
-            if org:
-                return org.id
-            else:
-                # Would create new org here, but simplified for now
-                return None
-                
-        except Exception as e:
-            logger.error(f"Organization sync failed: {e}")
-            return None
-    
     async def _load_organization(self, db: AsyncSession, org_id: Optional[str]) -> Optional[Organization]:
         """Load organization data for context."""
         if not org_id:
@@ -358,7 +534,7 @@ class PrincipalService:
                 )
             )
             return result.scalar_one_or_none()
-            
+        
         except Exception as e:
             logger.error(f"Failed to load organization {org_id}: {e}")
             return None
@@ -416,7 +592,7 @@ class PrincipalService:
             roles=roles,
             permissions=permissions,
             scopes=scopes,
-            session_id=jwt_payload.get('jti'),  # JWT ID as session ID
+            session_id=jwt_payload.get('jti') or jwt_payload.get('sid'),  # JWT ID (or Clerk session ID) as session ID
             session_type=session_type,
             token_issued_at=issued_at,
             token_expires_at=expires_at,
@@ -428,13 +604,14 @@ class PrincipalService:
     
     async def refresh_principal_cache(self, token: str) -> None:
         """Force refresh of principal cache"""
+        cache_key = self._cache_key(token)
+        self._local.pop(cache_key, None)
+        
         redis_client = await self.get_redis_client()
         if not redis_client:
             return
         
         try:
-            import hashlib
-            cache_key = f"principal:{hashlib.sha256(token.encode()).hexdigest()[:16]}"
             await redis_client.delete(cache_key)
             logger.debug("Principal cache invalidated")
         except Exception as e:
@@ -467,6 +644,55 @@ class PrincipalService:
             logger.error(f"Failed to get principal for user {user_id}: {e}")
             return None
     
+    async def get_principal_for_user(
+        self,
+        current_user: User,
+        token: str,
+        db: AsyncSession,
+        session_type: SessionType = SessionType.JWT,
+        organization: Optional[Organization] = None,
+        claims: Optional[Dict[str, Any]] = None
+    ) -> Principal:
+        """
+        Build a Principal for a user the caller has already authenticated with token.
+        
+        Args:
+            current_user: User resolved from the token
+            token: Raw bearer token, embedded for MCP tool calls
+            db: Database session used to load the organization if not given
+            session_type: Type of session the token belongs to
+            organization: The user's organization, if already loaded
+            claims: Verified token claims (e.g. iat/exp) to carry into the Principal
+            
+        Returns:
+            Principal with embedded auth token for MCP tool calls
+        """
+        if organization is None or organization.id != current_user.organization_id:
+            organization = await self._load_organization(db, current_user.organization_id)
+        
+        # Create JWT payload with the raw token for MCP tool calls
+        jwt_payload = {
+            **(claims or {}),
+            "token": token,
+            "sub": str(current_user.id),
+            "organization_id": str(current_user.organization_id) if current_user.organization_id else None
+        }
+        
+        # Build Principal with auth context
+        principal = await self._build_principal(
+            user=current_user,
+            organization=organization,
+            jwt_payload=jwt_payload,
+            session_type=session_type
+        )
+        
+        # Set the API token field if this is an API key session
+        if session_type == SessionType.API:
+            principal = principal.model_copy(update={'api_token': token})
+            logger.debug(f"[PRINCIPAL_SERVICE] Set api_token field for user {current_user.id}")
+        
+        return principal
+    
     async def get_principal_from_request(
         self,
         request: Any,  # FastAPI Request object
@@ -506,43 +732,86 @@ class PrincipalService:
                 logger.warning(f"[PRINCIPAL_SERVICE] No auth token found in request for user {current_user.id}")
                 return None
             
-            # Load organization
-            organization = await self._load_organization(db, current_user.organization_id)
-            
-            # Create JWT payload with the raw token for MCP tool calls
-            jwt_payload = {
-                "token": token,
-                "sub": str(current_user.id),
-                "organization_id": str(current_user.organization_id) if current_user.organization_id else None
-            }
-            
-            # Build Principal with auth context
-            principal = await self._build_principal(
-                user=current_user,
-                organization=organization,
-                jwt_payload=jwt_payload,
-                session_type=session_type
+            # Organization already resolved by the auth dependency, if any
+            organization = getattr(request.state, 'organization', None)
+            return await self.get_principal_for_user(
+                current_user, token, db, session_type=session_type, organization=organization
             )
             
-            # Set the API token field if this is an API key session
-            if principal and session_type == SessionType.API and token:
-                # Update the principal with api_token field
-                principal = principal.model_copy(update={'api_token': token})
-                logger.debug(f"[PRINCIPAL_SERVICE] Set api_token field for user {current_user.id}")
-            
-            return principal
-            
         except Exception as e:
             logger.error(f"Failed to get principal from request for user {current_user.id}: {e}")
             return None
     
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rates per cache tier; the Redis rate counts only lookups that missed in-process"""
+        lookups = self.stats["local_hits"] + self.stats["redis_hits"] + self.stats["misses"]
+        shared_lookups = lookups - self.stats["local_hits"]
+        return {
+            **self.stats,
+            "local_entries": len(self._local),
+            "local_hit_rate": self.stats["local_hits"] / lookups if lookups else 0.0,
+            "redis_hit_rate": self.stats["redis_hits"] / shared_lookups if shared_lookups else 0.0,
+            "listener_running": self._listener_task is not None and not self._listener_task.done()
+        }
+    
     async def close(self) -> None:
-        """Close Redis connection"""
+        """Stop the invalidation listener and close Redis connection"""
+        if self._listener_task and not self._listener_task.done():
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+        self._listener_task = None
+        
+        if self._pubsub_client:
+            await self._pubsub_client.aclose()
+            self._pubsub_client = None
+        
         if self._redis_client:
-            await self._redis_client.close()
+            await self._redis_client.aclose()
             self._redis_client = None
             logger.debug("Redis client closed")
 
 
 # Global service instance
-principal_service = PrincipalService()
\ No newline at end of file
+principal_service = PrincipalService()
+
+
+_DISABLED_ORGS_KEY = "principal_disabled_organizations"
+_pending_invalidations: set = set()
+
+
+def _collect_disabled_organizations(session: Session, flush_context: Any, instances: Any) -> None:
+    """Remember organizations whose is_enabled is being switched off in this transaction"""
+    for obj in session.dirty:
+        if isinstance(obj, Organization) and obj.is_enabled is False \
+                and inspect(obj).attrs.is_enabled.history.has_changes():
+            session.info.setdefault(_DISABLED_ORGS_KEY, set()).add(obj.id)
+
+
+def _invalidate_disabled_organizations(session: Session) -> None:
+    """Publish principal invalidations for organizations disabled by the committed transaction"""
+    org_ids = session.info.pop(_DISABLED_ORGS_KEY, None)
+    if not org_ids:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Synchronous sessions (scripts) have no loop; cached principals expire by TTL
+        logger.warning(f"⚠️ [PRINCIPAL] Organizations {org_ids} disabled outside an event loop; not invalidated")
+        return
+    for org_id in org_ids:
+        task = loop.create_task(principal_service.invalidate_organization(org_id))
+        _pending_invalidations.add(task)
+        task.add_done_callback(_pending_invalidations.discard)
+
+
+def _discard_disabled_organizations(session: Session) -> None:
+    session.info.pop(_DISABLED_ORGS_KEY, None)
+
+
+# However an organization gets disabled, every process drops its cached principals
+event.listen(Session, "before_flush", _collect_disabled_organizations)
+event.listen(Session, "after_commit", _invalidate_disabled_organizations)
+event.listen(Session, "after_rollback", _discard_disabled_organizations)
\ No newline at end of file
@@ -3,7 +3,7 @@
 Storage service package for unified file storage
 """
 
-from .backend import StorageBackend
+from .backend import StorageBackend, StreamedUpload, UploadStream
 from .local_backend import LocalStorageBackend
 from .s3_backend import S3StorageBackend
 from .storage_service import StorageService
@@ -12,6 +12,8 @@ from .factory import create_storage_backend, create_storage_service, create_avat
 
 __all__ = [
     "StorageBackend",
+    "StreamedUpload",
+    "UploadStream",
     "LocalStorageBackend", 
     "S3StorageBackend",
     "StorageService",
@@ -3,10 +3,104 @@
 Abstract storage backend interface
 """
 
+import hashlib
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, IO
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, IO, AsyncIterator, Tuple
 from pathlib import Path
 
+try:
+    import magic
+    HAS_MAGIC = True
+except ImportError:
+    HAS_MAGIC = False
+
+
+# Leading bytes inspected for MIME sniffing
+MIME_SNIFF_BYTES = 2048
+
+# Signatures used when python-magic isn't available
+_MIME_SIGNATURES = [
+    (b'%PDF', "application/pdf"),
+    (b'\x89PNG\r\n\x1a\n', "image/png"),
+    (b'\xff\xd8\xff', "image/jpeg"),
+    (b'GIF87a', "image/gif"),
+    (b'GIF89a', "image/gif"),
+    (b'ID3', "audio/mpeg"),
+    (b'PK\x03\x04', "application/zip"),
+]
+
+
+class UploadStream:
+    """
+    Async chunk iterator that hashes, size-checks and MIME-sniffs content as
+    it is consumed, so uploads never need the whole file in memory.
+    """
+    
+    def __init__(self, chunks: AsyncIterator[bytes], max_size: Optional[int] = None):
+        """
+        Args:
+            chunks: Async iterator of content chunks
+            max_size: Maximum allowed total size in bytes
+        """
+        self._chunks = chunks
+        self._hash = hashlib.sha256()
+        self._head = b""
+        self.max_size = max_size
+        self.size = 0
+    
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._iterate()
+    
+    async def _iterate(self) -> AsyncIterator[bytes]:
+        async for chunk in self._chunks:
+            if not chunk:
+                continue
+            
+            self.size += len(chunk)
+            if self.max_size is not None and self.size > self.max_size:
+                raise ValueError(f"File size exceeds maximum allowed size {self.max_size}")
+            
+            self._hash.update(chunk)
+            if len(self._head) < MIME_SNIFF_BYTES:
+                self._head += chunk[:MIME_SNIFF_BYTES - len(self._head)]
+            
+            yield chunk
+    
+    @property
+    def sha256(self) -> str:
+        """SHA-256 hex digest of the content consumed so far"""
+        return self._hash.hexdigest()
+    
+    @property
+    def detected_mime_type(self) -> Optional[str]:
+        """MIME type sniffed from the leading bytes"""
+        if not self._head:
+            return None
+        
+        if HAS_MAGIC:
+            try:
+                detected = magic.from_buffer(self._head, mime=True)
+                if detected and detected != "application/octet-stream":
+                    return detected
+            except Exception:
+                pass
+        
+        for signature, mime_type in _MIME_SIGNATURES:
+            if self._head.startswith(signature):
+                return mime_type
+        return None
+
+
+@dataclass
+class StreamedUpload:
+    """Result of a streaming upload"""
+    url: str
+    key: str
+    size: int
+    sha256: str
+    detected_mime_type: Optional[str] = None
+
 
 class StorageBackend(ABC):
     """Abstract storage backend interface for unified file storage"""
@@ -33,6 +127,56 @@ class StorageBackend(ABC):
         """
         pass
     
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        key: str,
+        content_type: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        max_size: Optional[int] = None
+    ) -> StreamedUpload:
+        """
+        Upload file from an async iterator of chunks
+        
+        Content is hashed, size-checked and MIME-sniffed while it streams.
+        Backends override this to keep peak memory bounded by the chunk size;
+        the default implementation buffers the content and calls upload_file.
+        
+        Args:
+            chunks: Async iterator of content chunks
+            key: Storage key/path for the file
+            content_type: MIME type of the file
+            metadata: Additional metadata to store with file
+            max_size: Maximum allowed size in bytes (raises ValueError if exceeded)
+            
+        Returns:
+            StreamedUpload with URL, size, SHA-256 and sniffed MIME type
+        """
+        stream = UploadStream(chunks, max_size=max_size)
+        content = b"".join([chunk async for chunk in stream])
+        url = await self.upload_file(content, key, content_type=content_type, metadata=metadata)
+        return StreamedUpload(url, key, stream.size, stream.sha256, stream.detected_mime_type)
+    
+    async def move_file(self, source_key: str, destination_key: str) -> bool:
+        """
+        Move file to a new key (e.g. promote a staged upload to its content address)
+        
+        Args:
+            source_key: Current storage key
+            destination_key: New storage key
+            
+        Returns:
+            True if the file was moved, False if the source doesn't exist
+        """
+        content = await self.download_file(source_key)
+        if content is None:
+            return False
+        
+        info = await self.get_file_info(source_key) or {}
+        await self.upload_file(content, destination_key, content_type=info.get('content_type'))
+        await self.delete_file(source_key)
+        return True
+    
     @abstractmethod
     async def download_file(self, key: str) -> Optional[bytes]:
         """
@@ -46,6 +190,38 @@ class StorageBackend(ABC):
         """
         pass
     
+    async def download_stream(
+        self,
+        key: str,
+        chunk_size: Optional[int] = None,
+        byte_range: Optional[Tuple[int, Optional[int]]] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream file content by key
+        
+        Backends override this to avoid holding the whole file in memory;
+        the default implementation downloads the file and slices it.
+        
+        Args:
+            key: Storage key/path for the file
+            chunk_size: Size of yielded chunks in bytes
+            byte_range: Optional inclusive (start, end) byte range; end may be None
+            
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+        """
+        content = await self.download_file(key)
+        if content is None:
+            raise FileNotFoundError(key)
+        
+        if byte_range:
+            start, end = byte_range
+            content = content[start:None if end is None else end + 1]
+        
+        chunk_size = chunk_size or 1024 * 1024
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+    
     @abstractmethod
     async def delete_file(self, key: str) -> bool:
         """
@@ -124,6 +300,15 @@ class StorageBackend(ABC):
         """
         pass
     
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get backend runtime statistics (connection pool, URL caches)
+        
+        Returns:
+            Dictionary of backend-specific counters
+        """
+        return {}
+    
     @property
     @abstractmethod
     def backend_type(self) -> str:
@@ -6,13 +6,13 @@ Local filesystem storage backend implementation
 import os
 import json
 import aiofiles
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, Tuple
 from pathlib import Path
 from datetime import datetime
 from urllib.parse import quote
 
 from app.config.settings import get_settings
-from .backend import StorageBackend
+from .backend import StorageBackend, StreamedUpload, UploadStream
 
 
 class LocalStorageBackend(StorageBackend):
@@ -50,21 +50,83 @@ class LocalStorageBackend(StorageBackend):
         async with aiofiles.open(file_path, 'wb') as f:
             await f.write(content)
         
-        # Store metadata if provided
-        if metadata or content_type:
-            metadata_dict = metadata or {}
-            if content_type:
-                metadata_dict['content_type'] = content_type
-            metadata_dict['uploaded_at'] = datetime.now().isoformat()
-            metadata_dict['file_size'] = len(content)
-            
-            metadata_path = file_path.with_suffix(file_path.suffix + '.meta')
-            async with aiofiles.open(metadata_path, 'w') as f:
-                await f.write(json.dumps(metadata_dict, indent=2))
+        await self._write_metadata(file_path, len(content), content_type, metadata)
         
         # Return access URL
         return f"{self.base_url}/{quote(key)}"
     
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        key: str,
+        content_type: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        max_size: Optional[int] = None
+    ) -> StreamedUpload:
+        """Stream file to local filesystem chunk by chunk"""
+        file_path = self.base_path / key
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Write to a partial file so readers never see a truncated upload
+        partial_path = file_path.with_name(file_path.name + '.part')
+        stream = UploadStream(chunks, max_size=max_size)
+        
+        try:
+            async with aiofiles.open(partial_path, 'wb') as f:
+                async for chunk in stream:
+                    await f.write(chunk)
+            os.replace(partial_path, file_path)
+        except BaseException:
+            partial_path.unlink(missing_ok=True)
+            raise
+        
+        await self._write_metadata(file_path, stream.size, content_type, metadata)
+        
+        return StreamedUpload(
+            url=f"{self.base_url}/{quote(key)}",
+            key=key,
+            size=stream.size,
+            sha256=stream.sha256,
+            detected_mime_type=stream.detected_mime_type
+        )
+    
+    async def move_file(self, source_key: str, destination_key: str) -> bool:
+        """Move file (and its metadata) with an atomic rename"""
+        source_path = self.base_path / source_key
+        if not source_path.is_file():
+            return False
+        
+        destination_path = self.base_path / destination_key
+        destination_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source_path, destination_path)
+        
+        source_meta = source_path.with_suffix(source_path.suffix + '.meta')
+        if source_meta.exists():
+            os.replace(source_meta, destination_path.with_suffix(destination_path.suffix + '.meta'))
+        
+        return True
+    
+    async def _write_metadata(
+        self,
+        file_path: Path,
+        file_size: int,
+        content_type: Optional[str],
+        metadata: Optional[Dict[str, Any]]
+    ) -> None:
+        """Store metadata sidecar file if metadata or content type provided"""
+        if not (metadata or content_type):
+            return
+        
+        metadata_dict = metadata or {}
+        if content_type:
+            metadata_dict['content_type'] = content_type
+        metadata_dict['uploaded_at'] = datetime.now().isoformat()
+        metadata_dict['file_size'] = file_size
+        
+        metadata_path = file_path.with_suffix(file_path.suffix + '.meta')
+        async with aiofiles.open(metadata_path, 'w') as f:
+            await f.write(json.dumps(metadata_dict, indent=2))
+    
     async def download_file(self, key: str) -> Optional[bytes]:
         """Download file from local filesystem"""
         file_path = self.base_path / key
@@ -78,6 +140,32 @@ class LocalStorageBackend(StorageBackend):
         except Exception:
             return None
     
+    async def download_stream(
+        self,
+        key: str,
+        chunk_size: Optional[int] = None,
+        byte_range: Optional[Tuple[int, Optional[int]]] = None
+    ) -> AsyncIterator[bytes]:
+        """Stream file (or a byte range of it) from local filesystem"""
+        file_path = self.base_path / key
+        
+        if not file_path.exists() or not file_path.is_file():
+            raise FileNotFoundError(key)
+        
+        chunk_size = chunk_size or self.settings.upload_chunk_size
+        start, end = byte_range or (0, None)
+        remaining = None if end is None else end - start + 1
+        
+        async with aiofiles.open(file_path, 'rb') as f:
+            await f.seek(start)
+            while remaining is None or remaining > 0:
+                chunk = await f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+    
     async def delete_file(self, key: str) -> bool:
         """Delete file from local filesystem"""
         file_path = self.base_path / key
@@ -156,7 +244,7 @@ class LocalStorageBackend(StorageBackend):
             if prefix_path.is_dir():
                 # List all files recursively under prefix directory
                 for file_path in prefix_path.rglob('*'):
-                    if file_path.is_file() and not file_path.name.endswith('.meta'):
+                    if file_path.is_file() and not file_path.name.endswith(('.meta', '.part')):
                         # Get relative path from base_path
                         relative_path = file_path.relative_to(self.base_path)
                         files.append(str(relative_path))
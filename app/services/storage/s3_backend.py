@@ -3,14 +3,24 @@
 AWS S3 storage backend implementation
 """
 
+import asyncio
+import functools
+import time
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, AsyncIterator, Callable, Tuple
 from datetime import datetime
 from urllib.parse import quote
 
 from app.config.settings import get_settings
-from .backend import StorageBackend
+from .backend import StorageBackend, StreamedUpload, UploadStream
+
+# Presigned URLs are regenerated once this fraction of their lifetime remains
+PRESIGNED_URL_REFRESH_FRACTION = 0.2
+PRESIGNED_URL_CACHE_SIZE = 4096
 
 
 class S3StorageBackend(StorageBackend):
@@ -23,7 +33,8 @@ class S3StorageBackend(StorageBackend):
         access_key: Optional[str] = None,
         secret_key: Optional[str] = None,
         bucket_path: Optional[str] = None,
-        cloudfront_domain: Optional[str] = None
+        cloudfront_domain: Optional[str] = None,
+        endpoint_url: Optional[str] = None
     ):
         """
         Initialize S3 storage backend
@@ -35,6 +46,7 @@ class S3StorageBackend(StorageBackend):
             secret_key: AWS secret key (defaults to settings/env)
             bucket_path: Path prefix within bucket (defaults to settings)
             cloudfront_domain: CloudFront domain for CDN URLs
+            endpoint_url: Custom S3-compatible endpoint (e.g. MinIO for local testing)
         """
         self.settings = get_settings()
         
@@ -46,14 +58,37 @@ class S3StorageBackend(StorageBackend):
         if not self.bucket_name:
             raise ValueError("S3 bucket name is required")
         
-        # Initialize S3 client
+        self.endpoint_url = endpoint_url or self.settings.s3_endpoint_url
+        
+        # Initialize S3 client with a connection pool sized for concurrent requests
         session = boto3.Session(
             aws_access_key_id=access_key or self.settings.aws_access_key_id,
             aws_secret_access_key=secret_key or self.settings.aws_secret_access_key,
             region_name=self.region
         )
         
-        self.s3_client = session.client('s3')
+        pool_size = self.settings.s3_max_pool_connections
+        self.s3_client = session.client(
+            's3',
+            endpoint_url=self.endpoint_url,
+            config=Config(
+                max_pool_connections=pool_size,
+                connect_timeout=self.settings.s3_connect_timeout,
+                read_timeout=self.settings.s3_read_timeout,
+                retries={'max_attempts': 3, 'mode': 'adaptive'},
+                tcp_keepalive=True,
+                # Path-style addressing for S3-compatible stand-ins (MinIO, LocalStack)
+                s3={'addressing_style': 'path'} if self.endpoint_url else None
+            )
+        )
+        
+        # botocore is blocking: run calls on a dedicated pool matching the
+        # connection pool so S3 I/O never blocks the event loop or starves
+        # the default executor
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="s3-io")
+        self._presigned_url_cache: "OrderedDict[Tuple[str, int], Tuple[str, float]]" = OrderedDict()
+        self.presigned_url_cache_hits = 0
+        self.presigned_url_cache_misses = 0
         
         # Validate credentials and bucket access
         self._validate_setup()
@@ -76,6 +111,22 @@ class S3StorageBackend(StorageBackend):
             else:
                 raise ValueError(f"S3 setup validation failed: {e}")
     
+    async def _call(self, method: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking botocore call on the S3 I/O pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get presigned URL cache statistics"""
+        lookups = self.presigned_url_cache_hits + self.presigned_url_cache_misses
+        return {
+            "presigned_url_cache_size": len(self._presigned_url_cache),
+            "presigned_url_cache_hits": self.presigned_url_cache_hits,
+            "presigned_url_cache_misses": self.presigned_url_cache_misses,
+            "presigned_url_cache_hit_rate": round(self.presigned_url_cache_hits / lookups, 4) if lookups else 0.0,
+            "max_pool_connections": self.settings.s3_max_pool_connections
+        }
+    
     def _get_full_key(self, key: str) -> str:
         """Get full S3 key with bucket path prefix"""
         if self.bucket_path:
@@ -89,6 +140,9 @@ class S3StorageBackend(StorageBackend):
         if self.cloudfront_domain:
             # Use CloudFront CDN URL
             return f"https://{self.cloudfront_domain.rstrip('/')}/{quote(full_key)}"
+        elif self.endpoint_url:
+            # S3-compatible endpoint (path-style)
+            return f"{self.endpoint_url.rstrip('/')}/{self.bucket_name}/{quote(full_key)}"
         else:
             # Use direct S3 URL
             return f"https://{self.bucket_name}.s3.{self.region}.amazonaws.com/{quote(full_key)}"
@@ -123,7 +177,7 @@ class S3StorageBackend(StorageBackend):
         
         try:
             # Upload to S3
-            self.s3_client.put_object(**upload_args)
+            await self._call(self.s3_client.put_object, **upload_args)
             
             # Return public URL
             return self._get_public_url(key)
@@ -131,16 +185,123 @@ class S3StorageBackend(StorageBackend):
         except ClientError as e:
             raise Exception(f"Failed to upload file to S3: {e}")
     
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        key: str,
+        content_type: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        max_size: Optional[int] = None
+    ) -> StreamedUpload:
+        """
+        Stream file to S3 using multipart upload
+        
+        Chunks are buffered up to s3_multipart_part_size (S3 requires parts of at
+        least 5 MB except the last), so peak memory is bounded by the part size.
+        Content smaller than one part is sent with a single PutObject.
+        """
+        full_key = self._get_full_key(key)
+        part_size = max(self.settings.s3_multipart_part_size, 5 * 1024 * 1024)
+        stream = UploadStream(chunks, max_size=max_size)
+        
+        object_args = {'Bucket': self.bucket_name, 'Key': full_key}
+        if content_type:
+            object_args['ContentType'] = content_type
+        object_args['Metadata'] = {k: str(v) for k, v in (metadata or {}).items()}
+        object_args['Metadata']['uploaded_at'] = datetime.now().isoformat()
+        
+        buffer = bytearray()
+        upload_id = None
+        parts = []
+        
+        async def upload_part(body: bytes):
+            part_number = len(parts) + 1
+            response = await self._call(
+                self.s3_client.upload_part,
+                Bucket=self.bucket_name,
+                Key=full_key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=body
+            )
+            parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+        
+        try:
+            async for chunk in stream:
+                buffer.extend(chunk)
+                if len(buffer) >= part_size:
+                    if upload_id is None:
+                        response = await self._call(self.s3_client.create_multipart_upload, **object_args)
+                        upload_id = response['UploadId']
+                    await upload_part(bytes(buffer))
+                    buffer.clear()
+            
+            if upload_id is None:
+                await self._call(self.s3_client.put_object, Body=bytes(buffer), **object_args)
+            else:
+                if buffer:
+                    await upload_part(bytes(buffer))
+                await self._call(
+                    self.s3_client.complete_multipart_upload,
+                    Bucket=self.bucket_name,
+                    Key=full_key,
+                    UploadId=upload_id,
+                    MultipartUpload={'Parts': parts}
+                )
+        except BaseException as e:
+            if upload_id is not None:
+                try:
+                    await self._call(
+                        self.s3_client.abort_multipart_upload,
+                        Bucket=self.bucket_name,
+                        Key=full_key,
+                        UploadId=upload_id
+                    )
+                except ClientError:
+                    pass  # Incomplete uploads are also reaped by bucket lifecycle rules
+            if isinstance(e, ClientError):
+                raise Exception(f"Failed to upload file to S3: {e}")
+            raise
+        
+        return StreamedUpload(
+            url=self._get_public_url(key),
+            key=key,
+            size=stream.size,
+            sha256=stream.sha256,
+            detected_mime_type=stream.detected_mime_type
+        )
+    
+    async def move_file(self, source_key: str, destination_key: str) -> bool:
+        """Move object with a server-side copy (no data passes through the API)"""
+        source_full_key = self._get_full_key(source_key)
+        
+        try:
+            await self._call(
+                self.s3_client.copy_object,
+                Bucket=self.bucket_name,
+                Key=self._get_full_key(destination_key),
+                CopySource={'Bucket': self.bucket_name, 'Key': source_full_key},
+                MetadataDirective='COPY'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return False
+            raise Exception(f"Failed to move file in S3: {e}")
+        
+        await self.delete_file(source_key)
+        return True
+    
     async def download_file(self, key: str) -> Optional[bytes]:
         """Download file from S3"""
         full_key = self._get_full_key(key)
         
         try:
-            response = self.s3_client.get_object(
+            response = await self._call(
+                self.s3_client.get_object,
                 Bucket=self.bucket_name,
                 Key=full_key
             )
-            return response['Body'].read()
+            return await self._call(response['Body'].read)
             
         except ClientError as e:
             error_code = e.response['Error']['Code']
@@ -149,12 +310,45 @@ class S3StorageBackend(StorageBackend):
             else:
                 raise Exception(f"Failed to download file from S3: {e}")
     
+    async def download_stream(
+        self,
+        key: str,
+        chunk_size: Optional[int] = None,
+        byte_range: Optional[Tuple[int, Optional[int]]] = None
+    ) -> AsyncIterator[bytes]:
+        """Stream file (or a byte range of it) from S3 without buffering the whole object"""
+        full_key = self._get_full_key(key)
+        chunk_size = chunk_size or self.settings.upload_chunk_size
+        
+        get_args = {'Bucket': self.bucket_name, 'Key': full_key}
+        if byte_range:
+            start, end = byte_range
+            get_args['Range'] = f"bytes={start}-{'' if end is None else end}"
+        
+        try:
+            response = await self._call(self.s3_client.get_object, **get_args)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchKey':
+                raise FileNotFoundError(key)
+            raise Exception(f"Failed to download file from S3: {e}")
+        
+        body = response['Body']
+        try:
+            while True:
+                chunk = await self._call(body.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+    
     async def delete_file(self, key: str) -> bool:
         """Delete file from S3"""
         full_key = self._get_full_key(key)
         
         try:
-            self.s3_client.delete_object(
+            await self._call(
+                self.s3_client.delete_object,
                 Bucket=self.bucket_name,
                 Key=full_key
             )
@@ -169,7 +363,8 @@ class S3StorageBackend(StorageBackend):
         full_key = self._get_full_key(key)
         
         try:
-            self.s3_client.head_object(
+            await self._call(
+                self.s3_client.head_object,
                 Bucket=self.bucket_name,
                 Key=full_key
             )
@@ -192,8 +387,16 @@ class S3StorageBackend(StorageBackend):
         if public or expires_in is None:
             return self._get_public_url(key)
         
-        # Generate signed URL
+        # Generate signed URL (reused until it gets close to expiry)
         full_key = self._get_full_key(key)
+        cache_key = (full_key, expires_in)
+        now = time.monotonic()
+        
+        cached = self._presigned_url_cache.get(cache_key)
+        if cached and cached[1] > now:
+            self._presigned_url_cache.move_to_end(cache_key)
+            self.presigned_url_cache_hits += 1
+            return cached[0]
         
         try:
             signed_url = self.s3_client.generate_presigned_url(
@@ -204,6 +407,14 @@ class S3StorageBackend(StorageBackend):
                 },
                 ExpiresIn=expires_in
             )
+            
+            self.presigned_url_cache_misses += 1
+            # Hand out cached URLs only while most of their lifetime remains
+            reuse_for = expires_in * (1 - PRESIGNED_URL_REFRESH_FRACTION)
+            self._presigned_url_cache[cache_key] = (signed_url, now + reuse_for)
+            while len(self._presigned_url_cache) > PRESIGNED_URL_CACHE_SIZE:
+                self._presigned_url_cache.popitem(last=False)
+            
             return signed_url
             
         except ClientError as e:
@@ -214,7 +425,8 @@ class S3StorageBackend(StorageBackend):
         full_key = self._get_full_key(key)
         
         try:
-            response = self.s3_client.head_object(
+            response = await self._call(
+                self.s3_client.head_object,
                 Bucket=self.bucket_name,
                 Key=full_key
             )
@@ -256,7 +468,7 @@ class S3StorageBackend(StorageBackend):
             if limit:
                 list_args['MaxKeys'] = limit
             
-            response = self.s3_client.list_objects_v2(**list_args)
+            response = await self._call(self.s3_client.list_objects_v2, **list_args)
             
             files = []
             if 'Contents' in response:
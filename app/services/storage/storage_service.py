@@ -4,7 +4,7 @@ Storage service for generic file management operations
 """
 
 import uuid
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, Tuple
 from uuid import UUID
 from datetime import datetime
 from pathlib import Path
@@ -12,7 +12,7 @@ from pathlib import Path
 from fastapi import UploadFile, HTTPException
 
 from app.config.settings import get_settings
-from .backend import StorageBackend
+from .backend import StorageBackend, StreamedUpload
 
 
 class StorageService:
@@ -91,6 +91,48 @@ class StorageService:
             metadata=metadata
         )
     
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        storage_key: str,
+        content_type: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        max_size: Optional[int] = None
+    ) -> StreamedUpload:
+        """
+        Upload content from an async iterator of chunks
+        
+        Args:
+            chunks: Async iterator of content chunks
+            storage_key: Storage key/path for the file
+            content_type: MIME type of content
+            metadata: Optional metadata to store with file
+            max_size: Maximum allowed size in bytes
+            
+        Returns:
+            StreamedUpload with URL, size, SHA-256 and sniffed MIME type
+        """
+        return await self.backend.upload_stream(
+            chunks,
+            key=storage_key,
+            content_type=content_type,
+            metadata=metadata,
+            max_size=max_size
+        )
+    
+    async def move_file(self, source_key: str, destination_key: str) -> bool:
+        """
+        Move file to a new storage key
+        
+        Args:
+            source_key: Current storage key/path
+            destination_key: New storage key/path
+            
+        Returns:
+            True if the file was moved
+        """
+        return await self.backend.move_file(source_key, destination_key)
+    
     async def download_file(self, storage_key: str) -> Optional[bytes]:
         """
         Download file content from storage
@@ -103,6 +145,25 @@ class StorageService:
         """
         return await self.backend.download_file(storage_key)
     
+    def download_stream(
+        self,
+        storage_key: str,
+        chunk_size: Optional[int] = None,
+        byte_range: Optional[Tuple[int, Optional[int]]] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream file content from storage
+        
+        Args:
+            storage_key: Storage key/path for the file
+            chunk_size: Size of yielded chunks in bytes
+            byte_range: Optional inclusive (start, end) byte range
+            
+        Returns:
+            Async iterator of content chunks (raises FileNotFoundError if missing)
+        """
+        return self.backend.download_stream(storage_key, chunk_size=chunk_size, byte_range=byte_range)
+    
     async def get_file_url(
         self,
         storage_key: str,
@@ -232,6 +293,10 @@ class StorageService:
         if len(content) < 1:
             raise ValueError("File is empty")
     
+    def get_stats(self) -> Dict[str, Any]:
+        """Get storage backend statistics"""
+        return {"backend": self.backend_type, **self.backend.get_stats()}
+    
     @property
     def backend_type(self) -> str:
         """Get underlying backend type"""
@@ -1,174 +1,223 @@
 #!/usr/bin/env python3
 """
-Task Cancellation Service - Cancel file processing tasks without storing task IDs
-Uses Celery's built-in inspection and control features
+Task Cancellation Service - Cancel file processing tasks by file ID
+
+File processing tasks are recorded in a Redis registry (file ID -> task IDs)
+when they are published and removed when they finish, so cancelling a file's
+tasks is a direct lookup plus revoke rather than a broadcast to every worker.
+Celery inspection is only used as a fallback when Redis is unavailable.
 """
 
 import logging
 from typing import List, Dict, Any, Optional
-from celery import current_app
+
+import redis
+
 from app.celery_app import celery_app
+from app.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
+FILE_PROCESSING_TASKS = (
+    'app.tasks.file_tasks.process_file_upload',
+    'app.tasks.file_tasks.reprocess_file'
+)
+
+
+class FileTaskRegistry:
+    """Redis hash per file mapping queued or running task IDs to task names"""
+    
+    KEY_PREFIX = "file_tasks:"
+    
+    def __init__(self):
+        self.settings = get_settings()
+        self.ttl_seconds = self.settings.file_task_registry_ttl_seconds
+        self._redis_client: Optional[redis.Redis] = None
+    
+    def get_redis_client(self) -> redis.Redis:
+        if self._redis_client is None:
+            self._redis_client = redis.Redis.from_url(
+                str(self.settings.redis_url),
+                decode_responses=True,
+                socket_connect_timeout=2,
+                socket_timeout=2
+            )
+        return self._redis_client
+    
+    def _key(self, file_id: str) -> str:
+        return f"{self.KEY_PREFIX}{file_id}"
+    
+    def register(self, file_id: str, task_id: str, task_name: str) -> None:
+        pipe = self.get_redis_client().pipeline()
+        pipe.hset(self._key(file_id), task_id, task_name)
+        pipe.expire(self._key(file_id), self.ttl_seconds)
+        pipe.execute()
+    
+    def unregister(self, file_id: str, task_id: str) -> None:
+        self.get_redis_client().hdel(self._key(file_id), task_id)
+    
+    def get_tasks(self, file_ids: List[str]) -> Dict[str, Dict[str, str]]:
+        """Task IDs and names per file, one round trip for any number of files"""
+        pipe = self.get_redis_client().pipeline()
+        for file_id in file_ids:
+            pipe.hgetall(self._key(file_id))
+        return dict(zip(file_ids, pipe.execute()))
+    
+    def clear(self, file_ids: List[str]) -> None:
+        if file_ids:
+            self.get_redis_client().delete(*[self._key(file_id) for file_id in file_ids])
+    
+    def get_all_tasks(self) -> Dict[str, Dict[str, str]]:
+        file_ids = [
+            key[len(self.KEY_PREFIX):]
+            for key in self.get_redis_client().scan_iter(match=f"{self.KEY_PREFIX}*", count=500)
+        ]
+        return {file_id: tasks for file_id, tasks in self.get_tasks(file_ids).items() if tasks}
+
+
+# Global registry instance
+file_task_registry = FileTaskRegistry()
+
 
 class TaskCancellationService:
-    """Service for cancelling file processing tasks using Celery inspection"""
+    """Service for cancelling file processing tasks through the file task registry"""
     
     def __init__(self):
         self.celery = celery_app
+        self.registry = file_task_registry
     
     def cancel_file_processing_tasks(self, file_id: str) -> Dict[str, Any]:
         """
-        Cancel all active processing tasks for a specific file ID
+        Cancel all queued and active processing tasks for a specific file ID
         
         Args:
             file_id: The file ID to cancel tasks for
-            
+        
         Returns:
             Dictionary with cancellation results
         """
-        results = {
-            "file_id": file_id,
-            "cancelled_tasks": [],
-            "failed_cancellations": [],
-            "active_tasks_found": 0,
-            "success": False
-        }
-        
-        try:
-            # Get Celery inspector
-            inspector = self.celery.control.inspect()
-            
-            # Get active tasks from all workers
-            active_tasks = inspector.active()
-            
-            if not active_tasks:
-                logger.info(f"No active tasks found for file {file_id}")
-                results["success"] = True
-                return results
-            
-            # Find tasks processing this file
-            tasks_to_cancel = []
-            
-            for worker, tasks in active_tasks.items():
-                for task_info in tasks:
-                    # Check if this task is processing our file
-                    task_args = task_info.get('args', [])
-                    task_name = task_info.get('name', '')
-                    task_id = task_info.get('id', '')
-                    
-                    # Check for file processing tasks
-                    if (task_name in ['app.tasks.file_tasks.process_file_upload', 
-                                     'app.tasks.file_tasks.reprocess_file'] and 
-                        task_args and str(task_args[0]) == str(file_id)):
-                        
-                        tasks_to_cancel.append({
-                            'task_id': task_id,
-                            'worker': worker,
-                            'task_name': task_name
-                        })
-                        results["active_tasks_found"] += 1
-            
-            # Cancel the found tasks
-            for task_info in tasks_to_cancel:
-                try:
-                    # Revoke the task
-                    self.celery.control.revoke(
-                        task_info['task_id'], 
-                        terminate=True,  # Kill the task if it's already running
-                        signal='SIGKILL'  # Force kill
-                    )
-                    
-                    results["cancelled_tasks"].append({
-                        'task_id': task_info['task_id'],
-                        'worker': task_info['worker'],
-                        'task_name': task_info['task_name']
-                    })
-                    
-                    logger.info(f"Cancelled task {task_info['task_id']} for file {file_id}")
-                    
-                except Exception as e:
-                    error_info = {
-                        'task_id': task_info['task_id'],
-                        'error': str(e)
-                    }
-                    results["failed_cancellations"].append(error_info)
-                    logger.error(f"Failed to cancel task {task_info['task_id']}: {str(e)}")
-            
-            results["success"] = len(results["cancelled_tasks"]) > 0 or len(tasks_to_cancel) == 0
-            
-        except Exception as e:
-            logger.error(f"Error during task cancellation for file {file_id}: {str(e)}")
-            results["error"] = str(e)
-        
-        return results
+        return self.cancel_files_processing_tasks([str(file_id)])["file_results"][str(file_id)]
     
-    def cancel_all_file_tasks_by_pattern(self, file_ids: List[str]) -> Dict[str, Any]:
+    def cancel_files_processing_tasks(self, file_ids: List[str]) -> Dict[str, Any]:
         """
-        Cancel processing tasks for multiple files
+        Cancel processing tasks for many files with one registry lookup and one revoke
         
         Args:
-            file_ids: List of file IDs to cancel tasks for
-            
+            file_ids: File IDs to cancel tasks for
+        
         Returns:
-            Dictionary with batch cancellation results
+            Dictionary with batch and per-file cancellation results
         """
+        file_ids = [str(file_id) for file_id in file_ids]
+        file_results = {
+            file_id: {
+                "file_id": file_id,
+                "cancelled_tasks": [],
+                "failed_cancellations": [],
+                "active_tasks_found": 0,
+                "success": False
+            }
+            for file_id in file_ids
+        }
         batch_results = {
             "total_files": len(file_ids),
             "files_processed": 0,
             "total_cancelled": 0,
-            "file_results": {}
+            "file_results": file_results
         }
         
-        for file_id in file_ids:
-            result = self.cancel_file_processing_tasks(file_id)
-            batch_results["file_results"][file_id] = result
+        try:
+            tasks_by_file = self.registry.get_tasks(file_ids)
+        except redis.RedisError as e:
+            logger.warning(f"File task registry unavailable, falling back to worker inspection: {e}")
+            tasks_by_file = self._find_tasks_by_inspection(file_ids, batch_results)
+            if tasks_by_file is None:
+                return batch_results
+        
+        task_ids = [task_id for tasks in tasks_by_file.values() for task_id in tasks]
+        revoke_error = None
+        if task_ids:
+            try:
+                # A queued task is discarded on receipt; a running one is killed
+                self.celery.control.revoke(task_ids, terminate=True, signal='SIGKILL')
+            except Exception as e:
+                revoke_error = str(e)
+                logger.error(f"Failed to cancel tasks {task_ids}: {revoke_error}")
+        
+        for file_id, tasks in tasks_by_file.items():
+            results = file_results[file_id]
+            results["active_tasks_found"] = len(tasks)
+            for task_id, task_name in tasks.items():
+                if revoke_error:
+                    results["failed_cancellations"].append({'task_id': task_id, 'error': revoke_error})
+                else:
+                    results["cancelled_tasks"].append({'task_id': task_id, 'task_name': task_name})
+                    logger.info(f"Cancelled task {task_id} for file {file_id}")
+            results["success"] = not results["failed_cancellations"]
             batch_results["files_processed"] += 1
-            batch_results["total_cancelled"] += len(result["cancelled_tasks"])
+            batch_results["total_cancelled"] += len(results["cancelled_tasks"])
+        
+        if not revoke_error:
+            try:
+                self.registry.clear([file_id for file_id, tasks in tasks_by_file.items() if tasks])
+            except redis.RedisError as e:
+                logger.warning(f"Failed to clear file task registry entries: {e}")
         
         return batch_results
     
+    def cancel_all_file_tasks_by_pattern(self, file_ids: List[str]) -> Dict[str, Any]:
+        """
+        Cancel processing tasks for multiple files
+        
+        Args:
+            file_ids: List of file IDs to cancel tasks for
+        
+        Returns:
+            Dictionary with batch cancellation results
+        """
+        return self.cancel_files_processing_tasks(file_ids)
+    
+    def _find_tasks_by_inspection(
+        self,
+        file_ids: List[str],
+        batch_results: Dict[str, Any]
+    ) -> Optional[Dict[str, Dict[str, str]]]:
+        """Locate running tasks by broadcasting to all workers; None if that fails too"""
+        try:
+            active_tasks = self.celery.control.inspect().active() or {}
+        except Exception as e:
+            logger.error(f"Error during task cancellation for files {file_ids}: {str(e)}")
+            for results in batch_results["file_results"].values():
+                results["error"] = str(e)
+            return None
+        
+        wanted = set(file_ids)
+        tasks_by_file = {file_id: {} for file_id in file_ids}
+        for worker, tasks in active_tasks.items():
+            for task_info in tasks:
+                task_args = task_info.get('args', [])
+                task_name = task_info.get('name', '')
+                if task_name in FILE_PROCESSING_TASKS and task_args and str(task_args[0]) in wanted:
+                    tasks_by_file[str(task_args[0])][task_info.get('id', '')] = task_name
+        return tasks_by_file
+    
     def get_active_file_processing_tasks(self) -> Dict[str, List[Dict[str, Any]]]:
         """
-        Get all currently active file processing tasks
+        Get all queued and active file processing tasks
         
         Returns:
-            Dictionary mapping file IDs to their active tasks
+            Dictionary mapping file IDs to their tasks
         """
         file_tasks = {}
         
         try:
-            inspector = self.celery.control.inspect()
-            active_tasks = inspector.active()
-            
-            if not active_tasks:
-                return file_tasks
-            
-            for worker, tasks in active_tasks.items():
-                for task_info in tasks:
-                    task_args = task_info.get('args', [])
-                    task_name = task_info.get('name', '')
-                    
-                    # Check for file processing tasks
-                    if (task_name in ['app.tasks.file_tasks.process_file_upload', 
-                                     'app.tasks.file_tasks.reprocess_file'] and 
-                        task_args):
-                        
-                        file_id = str(task_args[0])
-                        
-                        if file_id not in file_tasks:
-                            file_tasks[file_id] = []
-                        
-                        file_tasks[file_id].append({
-                            'task_id': task_info.get('id'),
-                            'worker': worker,
-                            'task_name': task_name,
-                            'started': task_info.get('time_start'),
-                            'args': task_args
-                        })
+            for file_id, tasks in self.registry.get_all_tasks().items():
+                file_tasks[file_id] = [
+                    {'task_id': task_id, 'task_name': task_name}
+                    for task_id, task_name in tasks.items()
+                ]
         
         except Exception as e:
             logger.error(f"Error getting active file processing tasks: {str(e)}")
         
-        return file_tasks
\ No newline at end of file
+        return file_tasks
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+TaskDispatcher - Queue agent tasks and files as soon as they become ready
+
+Listens on PostgreSQL NOTIFY channels fed by triggers on agent_tasks and files
+(see the *_READY_TRIGGER DDL in the models) instead of polling the tables.
+Work that is ready at creation time is still queued directly by the code that
+creates it; notifications cover the rest: tasks scheduled for later, retried
+or released by the lease sweep, and files reset to UPLOADED. A slow sweep on
+connect and every few minutes catches anything missed while disconnected.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select
+
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+AGENT_TASK_CHANNEL = "agent_task_ready"
+FILE_CHANNEL = "file_ready"
+
+
+class TaskDispatcher:
+    """LISTEN/NOTIFY driven dispatcher with a timer for future-scheduled tasks"""
+
+    def __init__(self):
+        settings = get_settings()
+        self.batch_size = settings.task_dispatcher_batch_size
+        self.sweep_seconds = settings.task_dispatcher_sweep_seconds
+        self.sweep_file_limit = settings.task_dispatcher_sweep_file_limit
+        self.reconnect_max_seconds = settings.task_dispatcher_reconnect_max_seconds
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._next_due: Optional[datetime] = None
+        self._pending_files: set = set()
+        self._tasks_due = False
+        self._stopping = False
+
+        self.stats = {
+            "notifications": 0,
+            "tasks_queued": 0,
+            "files_queued": 0,
+            "sweeps": 0,
+            "reconnects": 0,
+            "errors": 0
+        }
+
+    def _get_wakeup(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    def handle_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        """asyncpg listener callback; records the ready work and wakes the dispatch loop"""
+        self.stats["notifications"] += 1
+
+        if channel == FILE_CHANNEL:
+            self._pending_files.add(payload)
+        elif channel == AGENT_TASK_CHANNEL:
+            try:
+                scheduled_at = datetime.fromisoformat(payload)
+            except ValueError:
+                logger.warning(f"⚠️ [DISPATCHER] Bad {channel} payload: {payload!r}")
+                scheduled_at = None
+
+            if scheduled_at is None or scheduled_at <= datetime.now(timezone.utc):
+                self._tasks_due = True
+            elif self._next_due is None or scheduled_at < self._next_due:
+                # Future task: only the timer changes, no need to wake now
+                self._next_due = scheduled_at
+
+        self._get_wakeup().set()
+
+    def _seconds_until_next_due(self) -> Optional[float]:
+        if self._next_due is None:
+            return None
+        return max((self._next_due - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+    async def dispatch_ready_files(self) -> int:
+        """Queue processing for files announced since the last round"""
+        from app.tasks.file_tasks import process_file_upload
+
+        file_ids, self._pending_files = self._pending_files, set()
+        queued = 0
+        for file_id in file_ids:
+            try:
+                process_file_upload.delay(file_id)
+                queued += 1
+            except Exception as e:
+                logger.error(f"❌ [DISPATCHER] Failed to queue file {file_id}: {e}")
+        self.stats["files_queued"] += queued
+        return queued
+
+    async def dispatch_due_tasks(self) -> int:
+        """Claim and queue due agent tasks until none are left, then re-arm the timer"""
+        from app.tasks.agent_tasks import dispatch_due_tasks
+        from app.services.agent_task_service import agent_task_service
+
+        self._tasks_due = False
+        queued = 0
+        while True:
+            batch = await dispatch_due_tasks(limit=self.batch_size)
+            queued += batch
+            if batch < self.batch_size:
+                break
+
+        self._next_due = await agent_task_service.next_scheduled_at()
+        self.stats["tasks_queued"] += queued
+        return queued
+
+    async def sweep(self) -> None:
+        """Safety net: release expired leases and queue anything ready that wasn't announced"""
+        from app.database import get_async_db_session
+        from app.models.file import File, FileStatus
+        from app.services.agent_task_service import agent_task_service
+
+        await agent_task_service.release_expired_leases()
+
+        # Files that became UPLOADED within the last interval were announced and
+        # are likely still waiting in the Celery queue; only re-queue stale ones
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=self.sweep_seconds)
+        async with get_async_db_session() as session:
+            result = await session.execute(
+                select(File.id)
+                .where(
+                    File.status == FileStatus.UPLOADED,
+                    File.is_deleted == False,
+                    File.updated_at < stale_before
+                )
+                .order_by(File.updated_at)
+                .limit(self.sweep_file_limit)
+            )
+            self._pending_files.update(str(file_id) for file_id in result.scalars().all())
+
+        await self.dispatch_ready_files()
+        await self.dispatch_due_tasks()
+        self.stats["sweeps"] += 1
+
+    async def _dispatch_loop(self, connection) -> None:
+        """Dispatch whenever woken by a notification, the task timer or the sweep interval"""
+        wakeup = self._get_wakeup()
+        await self.sweep()
+        last_sweep = time.monotonic()
+
+        while not self._stopping and not connection.is_closed():
+            timeout = self.sweep_seconds - (time.monotonic() - last_sweep)
+            until_due = self._seconds_until_next_due()
+            if until_due is not None:
+                timeout = min(timeout, until_due)
+
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=max(timeout, 0.0))
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+            if self._stopping:
+                break
+
+            if time.monotonic() - last_sweep >= self.sweep_seconds:
+                await self.sweep()
+                last_sweep = time.monotonic()
+                continue
+
+            if self._pending_files:
+                await self.dispatch_ready_files()
+            until_due = self._seconds_until_next_due()
+            if self._tasks_due or (until_due is not None and until_due <= 0):
+                await self.dispatch_due_tasks()
+
+    async def run(self) -> None:
+        """Listen and dispatch until stopped, reconnecting with backoff"""
+        import asyncpg
+
+        dsn = get_settings().database_url.replace("+asyncpg", "")
+        backoff = 1
+
+        while not self._stopping:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                connection.add_termination_listener(lambda _: self._get_wakeup().set())
+                await connection.add_listener(AGENT_TASK_CHANNEL, self.handle_notification)
+                await connection.add_listener(FILE_CHANNEL, self.handle_notification)
+                logger.info(f"📡 [DISPATCHER] Listening on {AGENT_TASK_CHANNEL} and {FILE_CHANNEL}")
+                backoff = 1
+
+                await self._dispatch_loop(connection)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"❌ [DISPATCHER] Dispatch loop failed: {e}")
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+            if not self._stopping:
+                self.stats["reconnects"] += 1
+                logger.info(f"🔄 [DISPATCHER] Reconnecting in {backoff}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.reconnect_max_seconds)
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._get_wakeup().set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending_files": len(self._pending_files),
+            "next_task_due_at": self._next_due.isoformat() if self._next_due else None
+        }
+
+    async def get_latency_stats(self, window_minutes: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Enqueue-to-start latency over recently started work, in seconds.
+
+        Agent tasks are measured from when they became due (creation or
+        scheduled time, whichever is later); files from upload to their first
+        processing attempt. Read from the database, so it covers every worker.
+        """
+        from app.database import get_async_db_session
+        from app.models.agent_task import AgentTask
+        from app.models.file import File
+
+        window_minutes = window_minutes or get_settings().dispatch_latency_window_minutes
+        since = datetime.now(timezone.utc) - timedelta(minutes=window_minutes)
+
+        task_latency = func.extract(
+            "epoch", AgentTask.started_at - func.greatest(AgentTask.scheduled_at, AgentTask.created_at)
+        )
+        file_latency = func.extract("epoch", File.processing_started_at - File.created_at)
+
+        queries = {
+            "agent_tasks": self._latency_query(task_latency).where(AgentTask.started_at >= since),
+            "files": self._latency_query(file_latency).where(
+                File.processing_started_at >= since, File.processing_attempts == 1
+            )
+        }
+
+        stats: Dict[str, Any] = {"window_minutes": window_minutes}
+        try:
+            async with get_async_db_session() as session:
+                for name, query in queries.items():
+                    row = (await session.execute(query)).one()
+                    stats[name] = {
+                        "count": row.count,
+                        "p50_seconds": row.p50,
+                        "p95_seconds": row.p95,
+                        "max_seconds": row.max
+                    }
+        except Exception as e:
+            logger.error(f"❌ [DISPATCHER] Failed to compute dispatch latency: {e}")
+            stats["error"] = str(e)
+        return stats
+
+    @staticmethod
+    def _latency_query(latency):
+        return select(
+            func.count().label("count"),
+            func.percentile_cont(0.5).within_group(latency).label("p50"),
+            func.percentile_cont(0.95).within_group(latency).label("p95"),
+            func.max(latency).label("max")
+        )
+
+
+# Global dispatcher instance
+task_dispatcher = TaskDispatcher()
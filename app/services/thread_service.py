@@ -4,17 +4,56 @@ Thread service for agent-centric conversation management
 """
 
 import logging
-from typing import List, Tuple, Optional
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Optional, Sequence
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc, or_, delete
+from sqlalchemy import select, func, desc, or_, delete, update, bindparam, literal_column, true
 from sqlalchemy.exc import IntegrityError
 
 from app.models.chat import Thread, Message
 from app.models.ai_agent import Agent
+from app.services.token_counter_service import token_counter_service
+from app.utils.pagination import CursorPage, fetch_keyset_page
 
 logger = logging.getLogger(__name__)
 
+# Text search configuration. Query expressions must match the expression
+# indexes from migration 5b8f3e1d7a26 exactly for the planner to use them.
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+TITLE_RANK_WEIGHT = 2.0
+TITLE_HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, HighlightAll=true"
+SNIPPET_HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=10, MaxFragments=2"
+
+
+def _message_search_vector():
+    return func.to_tsvector(SEARCH_CONFIG, Message.content)
+
+
+def _title_search_vector():
+    return func.to_tsvector(SEARCH_CONFIG, func.coalesce(Thread.title, literal_column("''")))
+
+
+def _search_query(query: str):
+    return func.websearch_to_tsquery(SEARCH_CONFIG, query.strip())
+
+
+def _title_substring_match(query: str):
+    """Case-insensitive title substring match (served by the trigram index)"""
+    escaped = query.strip().replace('/', '//').replace('%', '/%').replace('_', '/_')
+    return Thread.title.ilike(f"%{escaped}%", escape='/')
+
+
+@dataclass
+class ThreadSearchResult:
+    """Thread search hit with ranking and highlighted snippets"""
+    thread: Thread
+    rank: float
+    title_highlight: Optional[str] = None
+    matched_message_id: Optional[UUID] = None
+    snippet: Optional[str] = None
+
 
 class ThreadService:
     """Service for agent-centric thread operations"""
@@ -122,51 +161,12 @@ class ThreadService:
         try:
             logger.debug(f"[THREAD_SERVICE] Listing threads for agent {agent_id}, user {user_id}")
             
-            # Validate agent exists and user has access
-            agent_query = select(Agent).where(
-                Agent.id == agent_id,
-                Agent.is_active.is_(True)
-            )
-            result = await db.execute(agent_query)
-            agent = result.scalar_one_or_none()
-            
-            if not agent:
-                logger.warning(f"[THREAD_SERVICE] Agent {agent_id} not found or not active")
+            conditions = await self._thread_list_conditions(db, agent_id, user_id, archived, query)
+            if conditions is None:
                 return [], 0
             
-            # Build base query conditions
-            conditions = [
-                Thread.agent_id == agent_id,
-                Thread.user_id == user_id,
-                Thread.organization_id == agent.organization_id
-            ]
-            
-            # Add archive filter condition if specified
-            if archived is not None:
-                conditions.append(Thread.archived.is_(archived))
-            
-            # Add search condition if query provided
-            if query and query.strip():
-                search_term = f"%{query.strip()}%"
-                logger.debug(f"[THREAD_SERVICE] Adding search condition for term: {search_term}")
-                
-                # Search in thread titles
-                title_condition = Thread.title.ilike(search_term)
-                
-                # Search in message content (requires subquery)
-                message_subquery = select(Message.thread_id).where(
-                    Message.content.ilike(search_term)
-                ).distinct()
-                content_condition = Thread.id.in_(message_subquery)
-                
-                # Combine title and content search with OR logic
-                search_condition = or_(title_condition, content_condition)
-                conditions.append(search_condition)
-                
-                logger.debug("[THREAD_SERVICE] Search conditions added for title and message content")
-            
-            # Query threads
-            thread_query = select(Thread).where(*conditions).order_by(desc(Thread.updated_at))
+            # Query threads (id breaks ties so pages are stable)
+            thread_query = select(Thread).where(*conditions).order_by(desc(Thread.updated_at), desc(Thread.id))
             
             # Count total
             count_query = select(func.count()).select_from(Thread).where(*conditions)
@@ -188,6 +188,197 @@ class ThreadService:
             logger.error(f"[THREAD_SERVICE] Full traceback: {traceback.format_exc()}")
             return [], 0
     
+    async def list_threads_page(
+        self,
+        db: AsyncSession,
+        agent_id: UUID,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        archived: Optional[bool] = False,
+        query: Optional[str] = None,
+        include_total: bool = False
+    ) -> CursorPage[Thread]:
+        """
+        List threads for an agent using keyset pagination on (updated_at, id).
+        
+        Args:
+            db: Database session
+            agent_id: Agent ID to filter by
+            user_id: User ID for ownership validation
+            cursor: Cursor from the previous page (None for the first page)
+            limit: Maximum number of records to return
+            archived: Filter by archive status (False=non-archived, True=archived, None=all)
+            query: Optional search query for titles and message content
+            include_total: Also run a COUNT(*) over the filtered set
+            
+        Returns:
+            CursorPage of threads, newest activity first
+            
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        conditions = await self._thread_list_conditions(db, agent_id, user_id, archived, query)
+        if conditions is None:
+            return CursorPage(items=[], next_cursor=None, total=0 if include_total else None)
+        
+        threads, next_cursor = await fetch_keyset_page(
+            db,
+            select(Thread).where(*conditions),
+            (Thread.updated_at, Thread.id),
+            limit,
+            cursor=cursor
+        )
+        
+        total = None
+        if include_total:
+            total = (await db.execute(select(func.count()).select_from(Thread).where(*conditions))).scalar() or 0
+        
+        logger.debug(f"[THREAD_SERVICE] Found {len(threads)} threads (has_next={next_cursor is not None})")
+        return CursorPage(items=threads, next_cursor=next_cursor, total=total)
+    
+    async def _thread_list_conditions(
+        self,
+        db: AsyncSession,
+        agent_id: UUID,
+        user_id: str,
+        archived: Optional[bool],
+        query: Optional[str]
+    ) -> Optional[list]:
+        """Build thread list filters, or None if the agent is missing or inactive"""
+        # Validate agent exists and user has access
+        agent_query = select(Agent).where(
+            Agent.id == agent_id,
+            Agent.is_active.is_(True)
+        )
+        result = await db.execute(agent_query)
+        agent = result.scalar_one_or_none()
+        
+        if not agent:
+            logger.warning(f"[THREAD_SERVICE] Agent {agent_id} not found or not active")
+            return None
+        
+        # Build base query conditions
+        conditions = [
+            Thread.agent_id == agent_id,
+            Thread.user_id == user_id,
+            Thread.organization_id == agent.organization_id
+        ]
+        
+        # Add archive filter condition if specified
+        if archived is not None:
+            conditions.append(Thread.archived.is_(archived))
+        
+        # Add search condition if query provided
+        if query and query.strip():
+            ts_query = _search_query(query)
+            
+            # Title substring (trigram index) or full-text match, or any
+            # full-text matching message in this thread (scoped semi-join)
+            content_condition = select(Message.id).where(
+                Message.thread_id == Thread.id,
+                _message_search_vector().op('@@')(ts_query)
+            ).exists()
+            conditions.append(or_(_title_substring_match(query), _title_search_vector().op('@@')(ts_query), content_condition))
+            
+            logger.debug("[THREAD_SERVICE] Search conditions added for title and message content")
+        
+        return conditions
+    
+    async def search_threads(
+        self,
+        db: AsyncSession,
+        agent_id: UUID,
+        user_id: str,
+        query: str,
+        limit: int = 20,
+        archived: Optional[bool] = None
+    ) -> List[ThreadSearchResult]:
+        """
+        Full-text search over a user's thread titles and message content.
+        
+        Threads are ranked by their title match plus their best matching
+        message. Highlighted snippets are only built for the returned threads.
+        
+        Args:
+            db: Database session
+            agent_id: Agent ID to scope the search
+            user_id: User ID for ownership validation
+            query: Search query (web search syntax: quoted phrases, OR, -exclusions)
+            limit: Maximum number of threads to return
+            archived: Filter by archive status (None=all)
+            
+        Returns:
+            Ranked search results with highlighted snippets
+        """
+        if not query or not query.strip():
+            return []
+        
+        conditions = await self._thread_list_conditions(db, agent_id, user_id, archived, None)
+        if conditions is None:
+            return []
+        
+        ts_query = _search_query(query)
+        message_vector = _message_search_vector()
+        title_vector = _title_search_vector()
+        
+        # Best matching message per thread, ranked through the GIN index
+        best_message = (
+            select(
+                Message.id.label('message_id'),
+                func.ts_rank_cd(message_vector, ts_query).label('rank')
+            )
+            .where(Message.thread_id == Thread.id, message_vector.op('@@')(ts_query))
+            .order_by(desc('rank'))
+            .limit(1)
+            .lateral('best_message')
+        )
+        title_rank = func.ts_rank_cd(title_vector, ts_query) * TITLE_RANK_WEIGHT
+        rank = (title_rank + func.coalesce(best_message.c.rank, 0)).label('rank')
+        
+        result = await db.execute(
+            select(
+                Thread,
+                best_message.c.message_id,
+                rank,
+                func.ts_headline(SEARCH_CONFIG, func.coalesce(Thread.title, literal_column("''")), ts_query, TITLE_HEADLINE_OPTIONS)
+            )
+            .outerjoin(best_message, true())
+            .where(
+                *conditions,
+                or_(
+                    _title_substring_match(query),
+                    title_vector.op('@@')(ts_query),
+                    best_message.c.message_id.isnot(None)
+                )
+            )
+            .order_by(desc(rank), desc(Thread.updated_at))
+            .limit(limit)
+        )
+        rows = result.all()
+        
+        # Snippets for the page's best messages only (ts_headline re-parses content)
+        message_ids = [message_id for _, message_id, _, _ in rows if message_id]
+        snippets = {}
+        if message_ids:
+            snippet_result = await db.execute(
+                select(Message.id, func.ts_headline(SEARCH_CONFIG, Message.content, ts_query, SNIPPET_HEADLINE_OPTIONS))
+                .where(Message.id.in_(message_ids))
+            )
+            snippets = dict(snippet_result.all())
+        
+        logger.debug(f"[THREAD_SERVICE] Search for agent {agent_id} returned {len(rows)} threads")
+        return [
+            ThreadSearchResult(
+                thread=thread,
+                rank=float(row_rank or 0),
+                title_highlight=title_highlight,
+                matched_message_id=message_id,
+                snippet=snippets.get(message_id)
+            )
+            for thread, message_id, row_rank, title_highlight in rows
+        ]
+    
     async def get_thread(
         self,
         db: AsyncSession,
@@ -281,7 +472,7 @@ class ThreadService:
             # Get messages for the thread
             query = select(Message).where(
                 Message.thread_id == thread_id
-            ).order_by(Message.created_at).offset(offset).limit(limit)
+            ).order_by(Message.created_at, Message.id).offset(offset).limit(limit)
             
             result = await db.execute(query)
             messages = result.scalars().all()
@@ -296,6 +487,50 @@ class ThreadService:
             logger.error(f"[THREAD_SERVICE] Full traceback: {traceback.format_exc()}")
             return []
     
+    async def get_thread_messages_page(
+        self,
+        db: AsyncSession,
+        agent_id: UUID,
+        thread_id: UUID,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Optional[CursorPage[Message]]:
+        """
+        Get messages for a thread using keyset pagination on (created_at, id).
+        
+        Args:
+            db: Database session
+            agent_id: Agent ID for validation
+            thread_id: ID of the thread
+            user_id: User ID for ownership validation
+            cursor: Cursor from the previous page (None for the first page)
+            limit: Maximum number of records to return
+            
+        Returns:
+            CursorPage of messages in chronological order, or None if the
+            thread is not accessible
+            
+        Raises:
+            InvalidCursorError: If the cursor is malformed
+        """
+        thread = await self.get_thread(db, agent_id, thread_id, user_id)
+        if not thread:
+            logger.warning(f"[THREAD_SERVICE] Cannot get messages - thread {thread_id} not accessible")
+            return None
+        
+        messages, next_cursor = await fetch_keyset_page(
+            db,
+            select(Message).where(Message.thread_id == thread_id),
+            (Message.created_at, Message.id),
+            limit,
+            cursor=cursor,
+            descending=False
+        )
+        
+        logger.debug(f"[THREAD_SERVICE] Found {len(messages)} messages for thread {thread_id}")
+        return CursorPage(items=messages, next_cursor=next_cursor)
+    
     async def update_thread(
         self,
         db: AsyncSession,
@@ -432,43 +667,146 @@ class ThreadService:
         self,
         db: AsyncSession,
         thread_id: UUID,
-        increment_count: int = 1
+        increment_count: int = 1,
+        commit: bool = True
     ) -> bool:
         """
         Update thread message counters when messages are added.
         
+        Uses a single UPDATE ... SET total_messages = total_messages + n, so
+        concurrent writers (WebSocket, REST, tool-triggered messages) never lose
+        increments and no row lock is held across Python code.
+        
         Args:
             db: Database session
             thread_id: ID of the thread to update
             increment_count: Number to add to total_messages (default: 1)
+            commit: Commit immediately. Pass False to fold the update into the
+                caller's message-insert transaction (errors are then raised).
             
         Returns:
             True if updated successfully, False otherwise
         """
         try:
-            logger.debug(f"[THREAD_SERVICE] Updating message counters for thread {thread_id}")
-            
-            # Get the thread
-            query = select(Thread).where(Thread.id == thread_id)
-            result = await db.execute(query)
-            thread = result.scalar_one_or_none()
+            result = await db.execute(
+                update(Thread)
+                .where(Thread.id == thread_id)
+                .values(
+                    total_messages=Thread.total_messages + increment_count,
+                    last_message_at=func.now()
+                )
+                .returning(Thread.total_messages)
+            )
+            total_messages = result.scalar_one_or_none()
             
-            if not thread:
+            if total_messages is None:
                 logger.warning(f"[THREAD_SERVICE] Thread {thread_id} not found for counter update")
                 return False
             
-            # Update counters
-            thread.total_messages += increment_count
-            thread.last_message_at = func.now()
-            
-            await db.commit()
-            logger.debug(f"[THREAD_SERVICE] Updated message counters for thread {thread_id}: total={thread.total_messages}")
+            if commit:
+                await db.commit()
+            logger.debug(f"[THREAD_SERVICE] Updated message counters for thread {thread_id}: total={total_messages}")
             return True
             
         except Exception as e:
+            if not commit:
+                raise
             await db.rollback()
             logger.error(f"[THREAD_SERVICE] Error updating message counters for thread {thread_id}: {e}")
             return False
+    
+    async def update_message_counters_batch(
+        self,
+        db: AsyncSession,
+        increments: Dict[UUID, int],
+        commit: bool = True
+    ) -> int:
+        """
+        Atomically apply message counter increments to many threads at once.
+        
+        Sends one executemany UPDATE instead of a round trip per thread. Rows
+        are updated in thread ID order so concurrent batches lock them in a
+        consistent order and cannot deadlock each other.
+        
+        Args:
+            db: Database session
+            increments: Mapping of thread ID to number of messages added
+            commit: Commit immediately (False to join the caller's transaction)
+            
+        Returns:
+            Number of threads in the batch
+        """
+        increments = {thread_id: count for thread_id, count in increments.items() if count}
+        if not increments:
+            return 0
+        
+        threads = Thread.__table__
+        statement = (
+            update(threads)
+            .where(threads.c.id == bindparam('counter_thread_id'))
+            .values(
+                total_messages=threads.c.total_messages + bindparam('counter_increment'),
+                last_message_at=func.now()
+            )
+        )
+        params = [
+            {'counter_thread_id': thread_id, 'counter_increment': count}
+            for thread_id, count in sorted(increments.items(), key=lambda item: str(item[0]))
+        ]
+        
+        await db.execute(statement, params)
+        if commit:
+            await db.commit()
+        
+        logger.debug(f"[THREAD_SERVICE] Applied batched message counters for {len(params)} threads")
+        return len(params)
+    
+    async def import_messages(
+        self,
+        db: AsyncSession,
+        messages: Sequence[Message],
+        model: Optional[str] = None
+    ) -> int:
+        """
+        Bulk insert messages and their thread counters in one transaction.
+        
+        Args:
+            db: Database session
+            messages: Message objects to insert (may span several threads)
+            model: Agent model string selecting the token encoding (default encoding if omitted)
+            
+        Returns:
+            Number of messages imported
+        """
+        if not messages:
+            return 0
+        
+        # Count tokens at write time, like live chat turns, so context windows
+        # over imported threads are sized in tokens
+        uncounted = [message for message in messages if message.token_count is None]
+        if uncounted:
+            token_counts = await token_counter_service.count_messages_tokens([
+                {"role": message.role, "content": message.content} for message in uncounted
+            ], model=model)
+            for message, token_count in zip(uncounted, token_counts):
+                message.token_count = token_count
+        
+        try:
+            db.add_all(messages)
+            await self.update_message_counters_batch(
+                db,
+                Counter(message.thread_id for message in messages),
+                commit=False
+            )
+            await db.commit()
+            
+            logger.info(f"[THREAD_SERVICE] Imported {len(messages)} messages")
+            return len(messages)
+            
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"[THREAD_SERVICE] Error importing messages: {e}")
+            raise
 
     async def generate_title_suggestion(
         self,
@@ -4,20 +4,100 @@ Ticket service for business logic operations
 """
 
 import logging
+from dataclasses import dataclass, field
 from typing import List, Tuple, Optional, Dict, Any
 from uuid import UUID
 from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, desc, asc
+from sqlalchemy import JSON, Select, delete, insert, select, func, and_, or_, desc, asc, literal_column, true, tuple_
 from sqlalchemy.orm import selectinload
 from sqlalchemy.orm.attributes import flag_modified
 
-from app.models.ticket import Ticket, TicketStatus, TicketPriority
+from app.models.ticket import Ticket, TicketStatsRollup, TicketStatus, TicketPriority
 from app.models.user import User
 from app.models.integration import Integration, IntegrationStatus
+from app.utils.pagination import CursorPage, fetch_keyset_page
 
 logger = logging.getLogger(__name__)
 
+# Non-null sort columns backed by (organization_id, column, id) indexes
+KEYSET_SORT_FIELDS = ("created_at", "updated_at")
+
+# Must match the text search configuration of tickets_search_vector_update()
+TICKET_SEARCH_CONFIG = literal_column("'english'::regconfig")
+TICKET_FACET_FIELDS = ("status", "priority", "category")
+
+OPEN_TICKET_STATUSES = (TicketStatus.NEW, TicketStatus.OPEN, TicketStatus.IN_PROGRESS)
+HIGH_PRIORITIES = (TicketPriority.HIGH, TicketPriority.CRITICAL)
+
+
+def _ticket_search_query(query: str):
+    return func.websearch_to_tsquery(TICKET_SEARCH_CONFIG, query.strip())
+
+
+def _overdue_condition(organization_id: UUID, now: datetime):
+    """Open tickets past their SLA; matches the idx_tickets_org_open_sla predicate"""
+    # Inline literals so the planner can prove the partial index predicate
+    # even for generic prepared-statement plans
+    return and_(
+        Ticket.organization_id == organization_id,
+        Ticket.is_deleted == False,
+        Ticket.status.in_([literal_column(f"'{status.value}'") for status in OPEN_TICKET_STATUSES]),
+        Ticket.sla_due_date < now
+    )
+
+
+def _fold_ticket_stats(rows) -> Dict[str, Any]:
+    """Derive dashboard totals and distributions from (status, priority, category) counts"""
+    stats = {
+        "total_tickets": 0,
+        "open_tickets": 0,
+        "resolved_tickets": 0,
+        "overdue_tickets": 0,
+        "high_priority_tickets": 0,
+        "avg_resolution_time_hours": None,  # TODO: Calculate from resolved tickets
+        "avg_first_response_time_hours": None,  # TODO: Calculate from tickets with first response
+        "satisfaction_score": None,  # TODO: Calculate from satisfaction ratings
+        "category_distribution": {},
+        "priority_distribution": {},
+        "status_distribution": {}
+    }
+    for row in rows:
+        count = row.ticket_count
+        stats["total_tickets"] += count
+        if row.status in OPEN_TICKET_STATUSES:
+            stats["open_tickets"] += count
+            if row.priority in HIGH_PRIORITIES:
+                stats["high_priority_tickets"] += count
+        elif row.status == TicketStatus.RESOLVED:
+            stats["resolved_tickets"] += count
+        for name, value in (("category", row.category), ("priority", row.priority), ("status", row.status)):
+            distribution = stats[f"{name}_distribution"]
+            distribution[value.value] = distribution.get(value.value, 0) + count
+    return stats
+
+
+def _collect_ticket_facets(facet_rows: Optional[List[Dict[str, Any]]]) -> Tuple[Dict[str, Dict[str, int]], int]:
+    """Split GROUPING SETS rows into per-field facet counts and the grand total"""
+    facets: Dict[str, Dict[str, int]] = {facet_field: {} for facet_field in TICKET_FACET_FIELDS}
+    total = 0
+    for row in facet_rows or []:
+        facet_field = next((f for f in TICKET_FACET_FIELDS if row.get(f) is not None), None)
+        if facet_field is None:
+            total = row['count']
+        else:
+            facets[facet_field][row[facet_field]] = row['count']
+    return facets, total
+
+
+@dataclass
+class TicketSearchResult:
+    """Ranked ticket search page with facet counts over all matches"""
+    tickets: List[Ticket]
+    ranks: List[float]
+    total: int
+    facets: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
 
 class TicketService:
     """Service for ticket operations"""
@@ -48,77 +128,7 @@ class TicketService:
             Tuple of (tickets, total_count)
         """
         try:
-            # Build query with organization isolation
-            query = select(Ticket).join(User, Ticket.created_by_id == User.id).options(
-                selectinload(Ticket.creator),
-# selectinload(Ticket.files)  # Removed - files now via file_ids array
-            ).filter(User.organization_id == organization_id)
-            
-            # Apply filters
-            if filters:
-                conditions = []
-                
-                # Search in title and description
-                if search := filters.get('search'):
-                    search_condition = or_(
-                        Ticket.title.ilike(f'%{search}%'),
-                        Ticket.description.ilike(f'%{search}%')
-                    )
-                    conditions.append(search_condition)
-                
-                # Status filter
-                if status_list := filters.get('status'):
-                    conditions.append(Ticket.status.in_(status_list))
-                
-                # Category filter
-                if category_list := filters.get('category'):
-                    conditions.append(Ticket.category.in_(category_list))
-                
-                # Priority filter
-                if priority_list := filters.get('priority'):
-                    conditions.append(Ticket.priority.in_(priority_list))
-                
-                # Department filter
-                if department := filters.get('department'):
-                    conditions.append(Ticket.department == department)
-                
-                # User filters
-                if created_by_id := filters.get('created_by_id'):
-                    conditions.append(Ticket.created_by_id == created_by_id)
-                
-                if assigned_to_id := filters.get('assigned_to_id'):
-                    conditions.append(Ticket.assigned_to_id == assigned_to_id)
-                
-                # Date filters
-                if created_after := filters.get('created_after'):
-                    conditions.append(Ticket.created_at >= created_after)
-                
-                if created_before := filters.get('created_before'):
-                    conditions.append(Ticket.created_at <= created_before)
-                
-                # Overdue filter
-                if is_overdue := filters.get('is_overdue'):
-                    now = datetime.now(timezone.utc)
-                    if is_overdue:
-                        conditions.append(
-                            and_(
-                                Ticket.sla_due_date.isnot(None),
-                                Ticket.sla_due_date < now
-                            )
-                        )
-                    else:
-                        conditions.append(
-                            or_(
-                                Ticket.sla_due_date.is_(None),
-                                Ticket.sla_due_date >= now
-                            )
-                        )
-                
-                if conditions:
-                    query = query.where(and_(*conditions))
-            
-            # Exclude soft-deleted records
-            query = query.where(Ticket.is_deleted == False)
+            query = self._build_ticket_list_query(organization_id, filters)
             
             # Get total count
             count_query = select(func.count()).select_from(query.subquery())
@@ -128,9 +138,9 @@ class TicketService:
             # Apply sorting
             sort_column = getattr(Ticket, sort_by, Ticket.created_at)
             if sort_order.lower() == 'asc':
-                query = query.order_by(asc(sort_column))
+                query = query.order_by(asc(sort_column), asc(Ticket.id))
             else:
-                query = query.order_by(desc(sort_column))
+                query = query.order_by(desc(sort_column), desc(Ticket.id))
             
             # Apply pagination
             query = query.offset(offset).limit(limit)
@@ -146,6 +156,233 @@ class TicketService:
             logger.error(f"Error listing tickets: {e}")
             raise
     
+    def _build_ticket_list_query(
+        self,
+        organization_id: UUID,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Select:
+        """Build the filtered, organization-isolated ticket list query (without ordering)"""
+        return select(Ticket).options(
+            selectinload(Ticket.creator),
+        ).where(*self._ticket_list_conditions(organization_id, filters))
+    
+    def _ticket_list_conditions(
+        self,
+        organization_id: UUID,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        """Build organization isolation, soft-delete and filter conditions"""
+        # Organization isolation on the ticket's own column (org-first indexes)
+        conditions = [
+            Ticket.organization_id == organization_id,
+            Ticket.is_deleted == False
+        ]
+        
+        if not filters:
+            return conditions
+        
+        # Full-text search over the weighted title/description/subcategory vector
+        if search := filters.get('search'):
+            conditions.append(Ticket.search_vector.op('@@')(_ticket_search_query(search)))
+        
+        # Status filter
+        if status_list := filters.get('status'):
+            conditions.append(Ticket.status.in_(status_list))
+        
+        # Category filter
+        if category_list := filters.get('category'):
+            conditions.append(Ticket.category.in_(category_list))
+        
+        # Priority filter
+        if priority_list := filters.get('priority'):
+            conditions.append(Ticket.priority.in_(priority_list))
+        
+        # Department filter
+        if department := filters.get('department'):
+            conditions.append(Ticket.department == department)
+        
+        # User filters
+        if created_by_id := filters.get('created_by_id'):
+            conditions.append(Ticket.created_by_id == created_by_id)
+        
+        if assigned_to_id := filters.get('assigned_to_id'):
+            conditions.append(Ticket.assigned_to_id == assigned_to_id)
+        
+        # Date filters
+        if created_after := filters.get('created_after'):
+            conditions.append(Ticket.created_at >= created_after)
+        
+        if created_before := filters.get('created_before'):
+            conditions.append(Ticket.created_at <= created_before)
+        
+        # Overdue filter
+        if is_overdue := filters.get('is_overdue'):
+            now = datetime.now(timezone.utc)
+            if is_overdue:
+                conditions.append(
+                    and_(
+                        Ticket.sla_due_date.isnot(None),
+                        Ticket.sla_due_date < now
+                    )
+                )
+            else:
+                conditions.append(
+                    or_(
+                        Ticket.sla_due_date.is_(None),
+                        Ticket.sla_due_date >= now
+                    )
+                )
+        
+        return conditions
+    
+    async def search_tickets(
+        self,
+        db: AsyncSession,
+        organization_id: UUID,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        offset: int = 0,
+        limit: int = 20
+    ) -> TicketSearchResult:
+        """
+        Ranked full-text ticket search with facet counts.
+        
+        Matches, the ranked page and status/priority/category facet counts
+        come back from a single statement: the filtered match set is computed
+        once as a CTE, paged by rank and grouped with GROUPING SETS.
+        
+        Args:
+            db: Database session
+            organization_id: Organization ID for isolation
+            query: Search query (web search syntax: quoted phrases, OR, -exclusions)
+            filters: Additional filter criteria (same as list_tickets)
+            offset: Pagination offset
+            limit: Pagination limit
+            
+        Returns:
+            TicketSearchResult with ranked tickets, total and facets
+        """
+        filters = {**(filters or {}), 'search': query}
+        ts_query = _ticket_search_query(query)
+        
+        matches = (
+            select(
+                Ticket.id,
+                Ticket.status,
+                Ticket.priority,
+                Ticket.category,
+                Ticket.created_at,
+                func.ts_rank_cd(Ticket.search_vector, ts_query).label('rank')
+            )
+            .where(*self._ticket_list_conditions(organization_id, filters))
+            .cte('matches')
+        )
+        
+        page = (
+            select(matches.c.id, matches.c.rank)
+            .order_by(desc(matches.c.rank), desc(matches.c.created_at), desc(matches.c.id))
+            .offset(offset)
+            .limit(limit)
+            .cte('page')
+        )
+        
+        facet_counts = (
+            select(matches.c.status, matches.c.priority, matches.c.category, func.count().label('count'))
+            .group_by(func.grouping_sets(
+                tuple_(matches.c.status),
+                tuple_(matches.c.priority),
+                tuple_(matches.c.category),
+                tuple_()
+            ))
+            .cte('facet_counts')
+        )
+        facet_summary = select(
+            func.json_agg(
+                func.json_build_object(
+                    literal_column("'status'"), facet_counts.c.status,
+                    literal_column("'priority'"), facet_counts.c.priority,
+                    literal_column("'category'"), facet_counts.c.category,
+                    literal_column("'count'"), facet_counts.c.count
+                ),
+                type_=JSON
+            ).label('facets')
+        ).subquery('facet_summary')
+        
+        # One row per hit (or a single empty row) carrying the shared facets
+        statement = (
+            select(facet_summary.c.facets, page.c.rank, Ticket)
+            .select_from(facet_summary)
+            .outerjoin(page, true())
+            .outerjoin(Ticket, Ticket.id == page.c.id)
+            .options(selectinload(Ticket.creator))
+            .order_by(desc(page.c.rank), desc(Ticket.created_at), desc(Ticket.id))
+        )
+        
+        result = await db.execute(statement)
+        rows = result.all()
+        
+        facets, total = _collect_ticket_facets(rows[0][0] if rows else None)
+        hits = [(ticket, float(rank or 0)) for _, rank, ticket in rows if ticket is not None]
+        
+        logger.info(f"Ticket search returned {len(hits)} of {total} matches")
+        return TicketSearchResult(
+            tickets=[ticket for ticket, _ in hits],
+            ranks=[rank for _, rank in hits],
+            total=total,
+            facets=facets
+        )
+    
+    async def list_tickets_page(
+        self,
+        db: AsyncSession,
+        organization_id: UUID,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        filters: Optional[Dict[str, Any]] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        include_total: bool = False
+    ) -> CursorPage[Ticket]:
+        """
+        List tickets using keyset pagination on (sort_by, id).
+        
+        Args:
+            db: Database session
+            organization_id: Organization ID for isolation
+            cursor: Cursor from the previous page (None for the first page)
+            limit: Pagination limit
+            filters: Filter criteria (same as list_tickets)
+            sort_by: Sort field, one of KEYSET_SORT_FIELDS
+            sort_order: Sort direction
+            include_total: Also run a COUNT(*) over the filtered set
+            
+        Returns:
+            CursorPage of tickets
+            
+        Raises:
+            ValueError: If sort_by is not keyset-paginable or the cursor is invalid
+        """
+        if sort_by not in KEYSET_SORT_FIELDS:
+            raise ValueError(f"Cursor pagination supports sorting by {', '.join(KEYSET_SORT_FIELDS)} only")
+        
+        query = self._build_ticket_list_query(organization_id, filters)
+        
+        total = None
+        if include_total:
+            total = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar() or 0
+        
+        tickets, next_cursor = await fetch_keyset_page(
+            db,
+            query,
+            (getattr(Ticket, sort_by), Ticket.id),
+            limit,
+            cursor=cursor,
+            descending=sort_order.lower() != 'asc'
+        )
+        
+        logger.info(f"Listed {len(tickets)} tickets (cursor page, has_next={next_cursor is not None})")
+        return CursorPage(items=tickets, next_cursor=next_cursor, total=total)
+    
     async def create_ticket(
         self,
         db: AsyncSession,
@@ -828,144 +1065,111 @@ class TicketService:
     async def get_ticket_stats(
         self,
         db: AsyncSession,
-        organization_id: UUID
+        organization_id: UUID,
+        use_rollup: bool = True
     ) -> Dict[str, Any]:
         """
         Get ticket statistics with organization isolation.
         
+        Counts come from ticket_stats_rollup, which the tickets trigger keeps
+        current, so the cost doesn't grow with the number of tickets. Overdue
+        depends on the current time and is counted live in the same statement
+        from the partial open-SLA index.
+        
         Args:
             db: Database session
             organization_id: Organization ID for isolation
+            use_rollup: Read from the rollup table; False aggregates the
+                tickets table directly in a single pass
             
         Returns:
             Organization-specific statistics dictionary
         """
         try:
-            # Base organization filter - join with User table
-            base_filter = lambda: and_(
-                Ticket.is_deleted == False,
-                Ticket.created_by_id == User.id,
-                User.organization_id == organization_id
-            )
-            
-            # Total tickets
-            total_query = select(func.count(Ticket.id)).select_from(
-                Ticket.__table__.join(User.__table__, Ticket.created_by_id == User.id)
-            ).where(base_filter())
-            total_result = await db.execute(total_query)
-            total_tickets = total_result.scalar() or 0
-            
-            # Open tickets
-            open_query = select(func.count(Ticket.id)).select_from(
-                Ticket.__table__.join(User.__table__, Ticket.created_by_id == User.id)
-            ).where(
-                and_(
-                    base_filter(),
-                    Ticket.status.in_([TicketStatus.NEW, TicketStatus.OPEN, TicketStatus.IN_PROGRESS])
-                )
-            )
-            open_result = await db.execute(open_query)
-            open_tickets = open_result.scalar() or 0
-            
-            # Resolved tickets
-            resolved_query = select(func.count(Ticket.id)).select_from(
-                Ticket.__table__.join(User.__table__, Ticket.created_by_id == User.id)
-            ).where(
-                and_(
-                    base_filter(),
-                    Ticket.status == TicketStatus.RESOLVED
-                )
-            )
-            resolved_result = await db.execute(resolved_query)
-            resolved_tickets = resolved_result.scalar() or 0
-            
-            # Overdue tickets
             now = datetime.now(timezone.utc)
-            overdue_query = select(func.count(Ticket.id)).where(
-                and_(
-                    Ticket.is_deleted == False,
-                    Ticket.sla_due_date.isnot(None),
-                    Ticket.sla_due_date < now,
-                    Ticket.status.in_([TicketStatus.NEW, TicketStatus.OPEN, TicketStatus.IN_PROGRESS])
-                )
-            )
-            overdue_result = await db.execute(overdue_query)
-            overdue_tickets = overdue_result.scalar() or 0
-            
-            # High priority tickets
-            high_priority_query = select(func.count(Ticket.id)).where(
-                and_(
-                    Ticket.is_deleted == False,
-                    Ticket.priority.in_([TicketPriority.HIGH, TicketPriority.CRITICAL]),
-                    Ticket.status.in_([TicketStatus.NEW, TicketStatus.OPEN, TicketStatus.IN_PROGRESS])
+            if use_rollup:
+                overdue = select(func.count()).select_from(Ticket).where(
+                    _overdue_condition(organization_id, now)
+                ).scalar_subquery()
+                query = select(
+                    TicketStatsRollup.status,
+                    TicketStatsRollup.priority,
+                    TicketStatsRollup.category,
+                    TicketStatsRollup.ticket_count,
+                    overdue.label('overdue')
+                ).where(
+                    TicketStatsRollup.organization_id == organization_id,
+                    TicketStatsRollup.ticket_count > 0
                 )
-            )
-            high_priority_result = await db.execute(high_priority_query)
-            high_priority_tickets = high_priority_result.scalar() or 0
-            
-            # Category distribution
-            category_query = select(
-                Ticket.category,
-                func.count(Ticket.id).label('count')
-            ).where(
-                Ticket.is_deleted == False
-            ).group_by(Ticket.category)
-            
-            category_result = await db.execute(category_query)
-            category_distribution = {
-                str(row.category.value): row.count 
-                for row in category_result
-            }
-            
-            # Priority distribution
-            priority_query = select(
-                Ticket.priority,
-                func.count(Ticket.id).label('count')
-            ).where(
-                Ticket.is_deleted == False
-            ).group_by(Ticket.priority)
-            
-            priority_result = await db.execute(priority_query)
-            priority_distribution = {
-                str(row.priority.value): row.count 
-                for row in priority_result
-            }
-            
-            # Status distribution
-            status_query = select(
-                Ticket.status,
-                func.count(Ticket.id).label('count')
-            ).where(
-                Ticket.is_deleted == False
-            ).group_by(Ticket.status)
-            
-            status_result = await db.execute(status_query)
-            status_distribution = {
-                str(row.status.value): row.count 
-                for row in status_result
-            }
+                rows = (await db.execute(query)).all()
+                overdue_tickets = rows[0].overdue if rows else 0
+            else:
+                query = select(
+                    Ticket.status,
+                    Ticket.priority,
+                    Ticket.category,
+                    func.count().label('ticket_count'),
+                    func.count().filter(
+                        and_(Ticket.sla_due_date < now, Ticket.status.in_(OPEN_TICKET_STATUSES))
+                    ).label('overdue')
+                ).where(
+                    Ticket.organization_id == organization_id,
+                    Ticket.is_deleted == False
+                ).group_by(Ticket.status, Ticket.priority, Ticket.category)
+                rows = (await db.execute(query)).all()
+                overdue_tickets = sum(row.overdue for row in rows)
             
-            stats = {
-                "total_tickets": total_tickets,
-                "open_tickets": open_tickets,
-                "resolved_tickets": resolved_tickets,
-                "overdue_tickets": overdue_tickets,
-                "high_priority_tickets": high_priority_tickets,
-                "avg_resolution_time_hours": None,  # TODO: Calculate from resolved tickets
-                "avg_first_response_time_hours": None,  # TODO: Calculate from tickets with first response
-                "satisfaction_score": None,  # TODO: Calculate from satisfaction ratings
-                "category_distribution": category_distribution,
-                "priority_distribution": priority_distribution,
-                "status_distribution": status_distribution
-            }
+            stats = _fold_ticket_stats(rows)
+            stats["overdue_tickets"] = overdue_tickets or 0
             
-            logger.info(f"Generated ticket stats: {total_tickets} total, {open_tickets} open")
+            logger.info(f"Generated ticket stats: {stats['total_tickets']} total, {stats['open_tickets']} open")
             return stats
             
         except Exception as e:
             logger.error(f"Error getting ticket stats: {e}")
             raise
-
+    
+    async def rebuild_ticket_stats_rollup(
+        self,
+        db: AsyncSession,
+        organization_id: Optional[UUID] = None
+    ) -> int:
+        """
+        Recompute ticket_stats_rollup from the tickets table.
+        
+        Only needed to repair drift, e.g. after bulk loads with triggers
+        disabled; normal writes keep the rollup current.
+        
+        Args:
+            db: Database session
+            organization_id: Rebuild a single organization, or all when None
+            
+        Returns:
+            Number of rollup rows written
+        """
+        delete_query = delete(TicketStatsRollup)
+        source = select(
+            Ticket.organization_id,
+            Ticket.status,
+            Ticket.priority,
+            Ticket.category,
+            func.count()
+        ).where(Ticket.is_deleted == False)
+        if organization_id is not None:
+            delete_query = delete_query.where(TicketStatsRollup.organization_id == organization_id)
+            source = source.where(Ticket.organization_id == organization_id)
+        source = source.group_by(Ticket.organization_id, Ticket.status, Ticket.priority, Ticket.category)
+        
+        await db.execute(delete_query)
+        result = await db.execute(
+            insert(TicketStatsRollup).from_select(
+                ['organization_id', 'status', 'priority', 'category', 'ticket_count'], source
+            )
+        )
+        await db.commit()
+        
+        logger.info(f"Rebuilt ticket stats rollup ({result.rowcount} rows) for {organization_id or 'all organizations'}")
+        return result.rowcount
 
 # Global service instance
 ticket_service = TicketService()
\ No newline at end of file
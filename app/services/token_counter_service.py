@@ -1,33 +1,140 @@
+import asyncio
+import hashlib
 import tiktoken
-from typing import Dict, Any, List
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_ENCODING = "cl100k_base"  # GPT-4 encoding, also used to approximate non-OpenAI models
+
+
 class TokenCounterService:
-    def __init__(self):
-        self.encoding = tiktoken.get_encoding("cl100k_base")  # GPT-4 encoding
-    
-    async def count_message_tokens(self, message: Dict[str, Any]) -> int:
-        """Count tokens in a message dictionary."""
+    def __init__(self, cache_size: int = 10000):
+        self._encodings: Dict[str, tiktoken.Encoding] = {}
+        self._cache: "OrderedDict[Tuple[str, bytes], int]" = OrderedDict()
+        self._cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def encoding(self) -> tiktoken.Encoding:
+        """Default encoding (loaded lazily)"""
+        return self.get_encoding()
+
+    def get_encoding_name(self, model: Optional[str] = None) -> str:
+        """Resolve the tiktoken encoding name for a model (e.g. "openai:gpt-4o-mini")"""
+        if not model:
+            return DEFAULT_ENCODING
+
+        # Strip Pydantic AI provider prefix
+        model_name = model.split(":", 1)[-1]
         try:
-            content = str(message.get("content", ""))
-            role = str(message.get("role", ""))
-            
-            # Format similar to OpenAI chat format for accurate counting
-            formatted = f"{role}: {content}"
-            return len(self.encoding.encode(formatted))
+            return tiktoken.encoding_name_for_model(model_name)
+        except KeyError:
+            return DEFAULT_ENCODING
+
+    def get_encoding(self, model: Optional[str] = None) -> tiktoken.Encoding:
+        """Get (and memoize) the encoding for a model"""
+        name = self.get_encoding_name(model)
+        encoding = self._encodings.get(name)
+        if encoding is None:
+            encoding = tiktoken.get_encoding(name)
+            self._encodings[name] = encoding
+        return encoding
+
+    async def load_encoding(self, model: Optional[str] = None) -> tiktoken.Encoding:
+        """Get the encoding for a model, building it in a worker thread on first use"""
+        name = self.get_encoding_name(model)
+        encoding = self._encodings.get(name)
+        if encoding is None:
+            # The first load may download and build the BPE ranks; keep it off the event loop
+            encoding = await asyncio.to_thread(tiktoken.get_encoding, name)
+            self._encodings[name] = encoding
+        return encoding
+
+    @staticmethod
+    def _format_message(message: Dict[str, Any]) -> str:
+        # Format similar to OpenAI chat format for accurate counting
+        return f"{message.get('role', '')}: {message.get('content', '')}"
+
+    def _cache_get(self, key: Tuple[str, bytes]) -> Optional[int]:
+        count = self._cache.get(key)
+        if count is None:
+            self.cache_misses += 1
+            return None
+        self._cache.move_to_end(key)
+        self.cache_hits += 1
+        return count
+
+    def _cache_set(self, key: Tuple[str, bytes], count: int) -> None:
+        self._cache[key] = count
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    async def count_messages_tokens(self, messages: List[Dict[str, Any]], model: Optional[str] = None) -> List[int]:
+        """
+        Count tokens for many messages in one batch.
+
+        Previously seen contents are served from an LRU cache keyed by content
+        hash; the remaining texts are batch-encoded in a worker thread so the
+        event loop is never blocked by tokenization.
+        """
+        texts = [self._format_message(message) for message in messages]
+        counts: List[Optional[int]] = [None] * len(texts)
+
+        try:
+            encoding_name = self.get_encoding_name(model)
+            keys = [(encoding_name, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()) for text in texts]
+
+            missing: Dict[Tuple[str, bytes], List[int]] = {}
+            for index, key in enumerate(keys):
+                cached = self._cache_get(key)
+                if cached is not None:
+                    counts[index] = cached
+                else:
+                    missing.setdefault(key, []).append(index)
+
+            if missing:
+                encoding = await self.load_encoding(model)
+                missing_keys = list(missing)
+                missing_texts = [texts[missing[key][0]] for key in missing_keys]
+                encoded = await asyncio.to_thread(encoding.encode_ordinary_batch, missing_texts)
+
+                for key, tokens in zip(missing_keys, encoded):
+                    self._cache_set(key, len(tokens))
+                    for index in missing[key]:
+                        counts[index] = len(tokens)
+
+            return counts
         except Exception as e:
-            logger.error(f"Error counting tokens for message: {e}")
+            logger.error(f"Error counting tokens for {len(messages)} messages: {e}")
             # Fallback: rough estimation (4 chars = 1 token)
-            content_len = len(str(message.get("content", "")))
-            return max(1, content_len // 4)
-    
-    async def count_total_tokens(self, messages: List[Dict[str, Any]]) -> int:
+            return [
+                count if count is not None else max(1, len(str(message.get("content", ""))) // 4)
+                for count, message in zip(counts, messages)
+            ]
+
+    async def count_message_tokens(self, message: Dict[str, Any], model: Optional[str] = None) -> int:
+        """Count tokens in a message dictionary."""
+        counts = await self.count_messages_tokens([message], model=model)
+        return counts[0]
+
+    async def count_total_tokens(self, messages: List[Dict[str, Any]], model: Optional[str] = None) -> int:
         """Count total tokens across multiple messages."""
-        total = 0
-        for message in messages:
-            total += await self.count_message_tokens(message)
-        return total
+        return sum(await self.count_messages_tokens(messages, model=model))
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get token count cache statistics"""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "size": len(self._cache),
+            "max_size": self._cache_size,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0
+        }
 
-token_counter_service = TokenCounterService()
\ No newline at end of file
+token_counter_service = TokenCounterService()
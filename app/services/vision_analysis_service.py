@@ -13,6 +13,8 @@ import xml.etree.ElementTree as ET
 
 from app.config.settings import get_settings
 from app.services.ai_config_service import AIConfigService
+from app.services.extraction_executor import extraction_executor
+from app.services.ocr_service import rasterize_svg
 
 logger = logging.getLogger(__name__)
 
@@ -83,7 +85,7 @@ class VisionAnalysisService:
         
         if is_svg:
             # For SVG files, convert to PNG first
-            image_content = self._convert_svg_to_png(image_content)
+            image_content = await self._convert_svg_to_png(image_content)
         
         # Encode image for API
         image_b64 = base64.b64encode(image_content).decode('utf-8')
@@ -290,13 +292,12 @@ class VisionAnalysisService:
         except Exception:
             return False
     
-    def _convert_svg_to_png(self, svg_content: bytes) -> bytes:
+    async def _convert_svg_to_png(self, svg_content: bytes) -> bytes:
         """Convert SVG content to PNG bytes using cairosvg"""
         try:
-            # Try to import cairosvg for SVG conversion
+            # Rasterize off the event loop; ImportError propagates if cairosvg is missing
             try:
-                import cairosvg
-                png_bytes = cairosvg.svg2png(bytestring=svg_content)
+                png_bytes = await extraction_executor.run(rasterize_svg, svg_content, payload_size=len(svg_content))
                 logger.info("Successfully converted SVG to PNG using cairosvg")
                 return png_bytes
             except ImportError:
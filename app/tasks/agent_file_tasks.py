@@ -4,13 +4,13 @@ Agent File Processing Tasks for asynchronous file content extraction
 """
 
 import logging
-import asyncio
 from typing import Dict, Any
 from uuid import UUID
 from datetime import datetime, timezone
 
 from app.celery_app import celery_app
 from app.services.agent_file_service import agent_file_service
+from app.tasks.async_runtime import run_async
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +34,7 @@ def process_agent_file(self, agent_file_id: str) -> Dict[str, Any]:
         start_time = datetime.now(timezone.utc)
         
         # Run async processing
-        success = asyncio.run(agent_file_service.process_file_content(file_uuid))
+        success = run_async(agent_file_service.process_file_content(file_uuid))
         
         end_time = datetime.now(timezone.utc)
         duration_seconds = (end_time - start_time).total_seconds()
@@ -88,7 +88,7 @@ def batch_process_agent_files(self, agent_id: str, file_ids: list) -> Dict[str,
         for file_id in file_ids:
             try:
                 file_uuid = UUID(file_id)
-                success = asyncio.run(agent_file_service.process_file_content(file_uuid))
+                success = run_async(agent_file_service.process_file_content(file_uuid))
                 
                 if success:
                     results["successful"] += 1
@@ -197,7 +197,7 @@ def validate_agent_file_integrity(self, agent_id: str) -> Dict[str, Any]:
         logger.info(f"Starting file integrity validation for agent {agent_id}")
         
         # Run validation check
-        files_accessible = asyncio.run(agent_file_service.check_file_access(agent_uuid))
+        files_accessible = run_async(agent_file_service.check_file_access(agent_uuid))
         
         # This would implement comprehensive validation:
         # 1. Check if all agent files are accessible
@@ -241,7 +241,7 @@ def generate_context_preview(self, agent_id: str, max_length: int = 1000) -> Dic
         logger.info(f"Generating context preview for agent {agent_id}")
         
         # Assemble context window
-        context = asyncio.run(
+        context = run_async(
             agent_file_service.assemble_context_window(
                 agent_uuid, 
                 max_context_length=max_length
@@ -249,7 +249,7 @@ def generate_context_preview(self, agent_id: str, max_length: int = 1000) -> Dic
         )
         
         # Get file information
-        agent_files = asyncio.run(agent_file_service.get_agent_files(agent_uuid))
+        agent_files = run_async(agent_file_service.get_agent_files(agent_uuid))
         
         results = {
             "agent_id": agent_id,
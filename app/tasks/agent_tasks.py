@@ -5,54 +5,82 @@ Agent Processing Tasks for autonomous multi-channel agent operations
 
 import logging
 import asyncio
-from typing import Dict, Any, List
-from uuid import UUID
+from typing import Dict, Any, List, Optional
+from uuid import UUID, uuid4
 from datetime import datetime, timezone
 
 from app.celery_app import celery_app
+from app.config.settings import get_settings
 from app.services.agent_task_service import agent_task_service
 from app.services.agent_service import agent_service
 from app.services.agent_file_service import agent_file_service
+from app.tasks.async_runtime import async_task, run_async
 
 logger = logging.getLogger(__name__)
 
 
+async def run_with_heartbeat(handler, task, lease_owner: str) -> Dict[str, Any]:
+    """
+    Run a task handler while periodically extending the task's lease.
+    
+    Heartbeats every third of the lease so one missed beat doesn't let the
+    lease lapse; a worker that dies stops heartbeating and the task is
+    released by the next pending-task sweep.
+    """
+    interval = get_settings().agent_task_lease_seconds / 3
+    
+    async def beat():
+        while True:
+            await asyncio.sleep(interval)
+            if not await agent_task_service.heartbeat(task.id, lease_owner):
+                logger.warning(f"Lost lease on task {task.id} while processing")
+                return
+    
+    heartbeat = asyncio.create_task(beat())
+    try:
+        return await handler(task)
+    finally:
+        heartbeat.cancel()
+
+
 @celery_app.task(bind=True, queue="agent_processing")
-def process_agent_task(self, task_id: str) -> Dict[str, Any]:
+def process_agent_task(self, task_id: str, lease_owner: Optional[str] = None) -> Dict[str, Any]:
     """
     Main task processor for autonomous agent operations.
     
     Args:
         task_id: Agent task ID to process
+        lease_owner: Claim token from process_pending_tasks; tasks queued
+            directly on creation are claimed here under a fresh token
         
     Returns:
         Dict: Processing result with status and metadata
     """
     try:
         task_uuid = UUID(task_id)
+        lease_owner = lease_owner or f"worker:{uuid4()}"
         logger.info(f"Starting autonomous processing for task {task_id}")
         start_time = datetime.now(timezone.utc)
         
-        # Get task details
-        task = asyncio.run(agent_task_service.get_task(task_uuid))
+        # Claim the task for this worker; another worker may already have it
+        task = run_async(agent_task_service.start_task(task_uuid, lease_owner))
         if not task:
-            logger.error(f"Task {task_id} not found")
-            return {"status": "error", "error": "Task not found"}
-        
-        # Mark task as processing
-        asyncio.run(agent_task_service.update_task_status(
-            task_uuid, "processing"
-        ))
+            return {"task_id": task_id, "status": "skipped", "reason": "Task not available"}
         
         # Process based on task type
         if task.task_type == "slack_message":
-            result = asyncio.run(process_slack_message(task))
+            handler = process_slack_message
         elif task.task_type == "email":
-            result = asyncio.run(process_email_message(task))
+            handler = process_email_message
         elif task.task_type == "api_request":
-            result = asyncio.run(process_api_request(task))
+            handler = process_api_request
         elif task.task_type == "health_check":
-            result = asyncio.run(perform_health_check(task))
+            handler = perform_health_check
+        else:
+            handler = None
+        
+        if handler:
+            result = run_async(run_with_heartbeat(handler, task, lease_owner))
         else:
             result = {
                 "success": False,
@@ -64,7 +92,7 @@ def process_agent_task(self, task_id: str) -> Dict[str, Any]:
         
         # Update task status based on result
         if result.get("success"):
-            asyncio.run(agent_task_service.update_task_status(
+            run_async(agent_task_service.update_task_status(
                 task_uuid, 
                 "completed", 
                 result_data=result,
@@ -75,7 +103,7 @@ def process_agent_task(self, task_id: str) -> Dict[str, Any]:
             ))
             logger.info(f"✅ Completed task {task_id} in {duration_seconds:.2f}s")
         else:
-            asyncio.run(agent_task_service.update_task_status(
+            run_async(agent_task_service.update_task_status(
                 task_uuid,
                 "failed",
                 error_message=result.get("error", "Unknown error")
@@ -93,7 +121,7 @@ def process_agent_task(self, task_id: str) -> Dict[str, Any]:
         logger.error(f"Error in process_agent_task: {e}")
         # Mark task as failed
         try:
-            asyncio.run(agent_task_service.update_task_status(
+            run_async(agent_task_service.update_task_status(
                 UUID(task_id), "failed", error_message=str(e)
             ))
         except:
@@ -522,7 +550,7 @@ def monitor_agent_health(self, agent_id: str) -> Dict[str, Any]:
         logger.info(f"Monitoring health for agent {agent_id}")
         
         # Create and process health check task
-        health_task = asyncio.run(
+        health_task = run_async(
             agent_task_service.create_health_check_task(agent_uuid)
         )
         
@@ -572,32 +600,50 @@ def cleanup_completed_tasks(self, older_than_days: int = 7) -> Dict[str, Any]:
         return {"error": str(e)}
 
 
+async def dispatch_due_tasks(limit: int = 50) -> int:
+    """
+    Claim due pending tasks and queue them for processing.
+    
+    Claims skip rows locked by concurrent dispatchers, so no task is queued
+    twice. Shared by the periodic sweep and the task dispatcher.
+    
+    Args:
+        limit: Maximum number of tasks to claim
+        
+    Returns:
+        int: Number of tasks queued
+    """
+    lease_owner = f"dispatch:{uuid4()}"
+    claimed_tasks = await agent_task_service.claim_tasks(lease_owner, limit=limit)
+    
+    queued = 0
+    for task in claimed_tasks:
+        try:
+            # Queue task for processing under this claim
+            process_agent_task.delay(str(task.id), lease_owner)
+            queued += 1
+        except Exception as task_error:
+            logger.error(f"Error queuing task {task.id}: {task_error}")
+    
+    return queued
+
+
 # Periodic task to process pending tasks
-@celery_app.task
-def process_pending_tasks():
+@async_task
+async def process_pending_tasks():
     """
     Process all pending tasks across agents.
     """
     try:
         logger.info("Processing pending tasks across all agents")
         
-        # Get pending tasks
-        pending_tasks = asyncio.run(
-            agent_task_service.get_pending_tasks(limit=50)
-        )
-        
-        processed = 0
-        for task in pending_tasks:
-            try:
-                # Queue task for processing
-                process_agent_task.delay(str(task.id))
-                processed += 1
-            except Exception as task_error:
-                logger.error(f"Error queuing task {task.id}: {task_error}")
+        # Return tasks abandoned by dead workers, then claim due tasks
+        await agent_task_service.release_expired_leases()
+        processed = await dispatch_due_tasks(limit=50)
         
         logger.info(f"✅ Queued {processed} pending tasks for processing")
         return {"queued_tasks": processed}
         
     except Exception as e:
         logger.error(f"Error processing pending tasks: {e}")
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
@@ -3,7 +3,6 @@
 Celery tasks for AI-powered operations
 """
 
-import asyncio
 from typing import Dict, Any, List
 from uuid import UUID
 from datetime import datetime, timezone
@@ -14,6 +13,7 @@ from celery.utils.log import get_task_logger
 from app.database import get_db_session
 from app.services.ai_service import AIService
 from app.services.ticket_service import TicketService
+from app.tasks.async_runtime import run_async
 
 # Get logger
 logger = get_task_logger(__name__)
@@ -32,7 +32,7 @@ def create_ticket_with_ai(self, user_input: str, user_id: str, context: Dict[str
     logger.info(f"Creating ticket with AI for user: {user_id}")
     
     try:
-        result = asyncio.run(_create_ticket_with_ai_async(user_input, user_id, context))
+        result = run_async(_create_ticket_with_ai_async(user_input, user_id, context))
         logger.info(f"AI ticket creation completed for user: {user_id}")
         return result
         
@@ -52,7 +52,7 @@ def categorize_ticket(self, ticket_id: str):
     logger.info(f"Categorizing ticket: {ticket_id}")
     
     try:
-        result = asyncio.run(_categorize_ticket_async(ticket_id))
+        result = run_async(_categorize_ticket_async(ticket_id))
         logger.info(f"Ticket categorization completed: {ticket_id}")
         return result
         
@@ -72,7 +72,7 @@ def suggest_ticket_resolution(self, ticket_id: str):
     logger.info(f"Generating resolution suggestions for ticket: {ticket_id}")
     
     try:
-        result = asyncio.run(_suggest_resolution_async(ticket_id))
+        result = run_async(_suggest_resolution_async(ticket_id))
         logger.info(f"Resolution suggestions generated for ticket: {ticket_id}")
         return result
         
@@ -92,7 +92,7 @@ def analyze_sentiment_batch(self, ticket_ids: List[str]):
     logger.info(f"Analyzing sentiment for {len(ticket_ids)} tickets")
     
     try:
-        result = asyncio.run(_analyze_sentiment_batch_async(ticket_ids))
+        result = run_async(_analyze_sentiment_batch_async(ticket_ids))
         logger.info(f"Sentiment analysis completed for {len(ticket_ids)} tickets")
         return result
         
@@ -112,7 +112,7 @@ def generate_ticket_summary(self, ticket_id: str):
     logger.info(f"Generating summary for ticket: {ticket_id}")
     
     try:
-        result = asyncio.run(_generate_summary_async(ticket_id))
+        result = run_async(_generate_summary_async(ticket_id))
         logger.info(f"Summary generated for ticket: {ticket_id}")
         return result
         
@@ -132,7 +132,7 @@ def extract_entities_from_ticket(self, ticket_id: str):
     logger.info(f"Extracting entities from ticket: {ticket_id}")
     
     try:
-        result = asyncio.run(_extract_entities_async(ticket_id))
+        result = run_async(_extract_entities_async(ticket_id))
         logger.info(f"Entity extraction completed for ticket: {ticket_id}")
         return result
         
@@ -152,7 +152,7 @@ def auto_assign_ticket(self, ticket_id: str):
     logger.info(f"Auto-assigning ticket: {ticket_id}")
     
     try:
-        result = asyncio.run(_auto_assign_ticket_async(ticket_id))
+        result = run_async(_auto_assign_ticket_async(ticket_id))
         logger.info(f"Auto-assignment completed for ticket: {ticket_id}")
         return result
         
@@ -172,7 +172,7 @@ def detect_duplicate_tickets(self, ticket_id: str):
     logger.info(f"Detecting duplicates for ticket: {ticket_id}")
     
     try:
-        result = asyncio.run(_detect_duplicates_async(ticket_id))
+        result = run_async(_detect_duplicates_async(ticket_id))
         logger.info(f"Duplicate detection completed for ticket: {ticket_id}")
         return result
         
@@ -193,7 +193,7 @@ def generate_response_suggestions(self, ticket_id: str, agent_id: str):
     logger.info(f"Generating response suggestions for ticket: {ticket_id}, agent: {agent_id}")
     
     try:
-        result = asyncio.run(_generate_response_suggestions_async(ticket_id, agent_id))
+        result = run_async(_generate_response_suggestions_async(ticket_id, agent_id))
         logger.info(f"Response suggestions generated for ticket: {ticket_id}")
         return result
         
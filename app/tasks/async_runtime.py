@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Worker-level async runtime for Celery task bodies
+
+Celery task functions are synchronous. Calling asyncio.run() from them creates
+and tears down an event loop per call, which also throws away the async
+engine's asyncpg connections (they are bound to the loop that opened them),
+HTTP clients and any loop-bound service state. Instead each worker process
+runs one long-lived event loop in a background thread; task bodies submit
+coroutines to it and block for the result. Thread-pool workers share the
+loop, so their coroutines interleave on one connection pool.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from celery.signals import worker_process_init, worker_process_shutdown
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WorkerAsyncRuntime:
+    """One event loop per process, started on first use and restarted after fork"""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "loops_started": 0,
+            "coroutines_run": 0,
+            "failures": 0,
+            "in_flight": 0,
+            "total_seconds": 0.0
+        }
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        # Threads don't survive fork, so a loop inherited from the parent is dead
+        if self._loop is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return self._loop
+
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=self._run_loop, args=(loop,), name="celery-async-runtime", daemon=True
+                )
+                thread.start()
+                self._loop, self._thread, self._pid = loop, thread, os.getpid()
+                self.stats["loops_started"] += 1
+                logger.info(f"🔁 [ASYNC_RUNTIME] Started worker event loop in process {self._pid}")
+        return self._loop
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    def in_runtime_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """
+        Run a coroutine on the worker loop and wait for its result.
+
+        Safe to call from any thread, including one that is itself running an
+        event loop (e.g. eagerly executed tasks inside an async test), but not
+        from a coroutine already running on the worker loop.
+        """
+        if self.in_runtime_thread():
+            coro.close()
+            raise RuntimeError("run() called from the worker event loop; await the coroutine instead")
+
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        self.stats["in_flight"] += 1
+        start = time.perf_counter()
+        try:
+            result = future.result(timeout)
+            self.stats["coroutines_run"] += 1
+            return result
+        except BaseException:
+            self.stats["failures"] += 1
+            if not future.done():
+                future.cancel()
+            raise
+        finally:
+            self.stats["in_flight"] -= 1
+            self.stats["total_seconds"] += time.perf_counter() - start
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Close the async engine's connections on the loop, then stop it"""
+        if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return
+
+        from app.database import async_engine
+
+        try:
+            self.run(async_engine.dispose(), timeout=timeout)
+        except Exception as e:
+            logger.warning(f"⚠️ [ASYNC_RUNTIME] Failed to dispose async engine: {e}")
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._loop.close()
+        self._loop = self._thread = self._pid = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "running": self._loop is not None and self._pid == os.getpid()}
+
+
+# Global runtime instance
+worker_runtime = WorkerAsyncRuntime()
+
+
+def run_async(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Run a coroutine from a synchronous task body on the worker's event loop"""
+    return worker_runtime.run(coro, timeout)
+
+
+def async_task(*args, **options) -> Callable:
+    """
+    Register an ``async def`` function as a Celery task run on the worker loop.
+
+    Accepts the same options as ``celery_app.task``. Celery's request context
+    is thread-local and the coroutine runs on the loop thread, so ``bind`` is
+    not supported; use ``autoretry_for``/``retry_backoff`` for retries, which
+    Celery applies in the worker thread.
+
+        @async_task(queue="agent_processing", autoretry_for=(ConnectionError,))
+        async def refresh_agent(agent_id: str): ...
+    """
+    if options.get("bind"):
+        raise TypeError("async_task does not support bind=True")
+
+    def decorator(fn: Callable[..., Awaitable[Any]]):
+        from app.celery_app import celery_app
+
+        if not asyncio.iscoroutinefunction(fn):
+            raise TypeError(f"async_task expects an async function, got {fn!r}")
+
+        @functools.wraps(fn)
+        def run_on_worker_loop(*task_args, **task_kwargs):
+            return run_async(fn(*task_args, **task_kwargs))
+
+        return celery_app.task(**options)(run_on_worker_loop)
+
+    if len(args) == 1 and callable(args[0]) and not options:
+        return decorator(args[0])
+    return decorator
+
+
+@worker_process_init.connect
+def _reset_inherited_connections(**kwargs):
+    """Drop pooled connections inherited from the parent; each child opens its own"""
+    from app.database import async_engine, engine
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+
+@worker_process_shutdown.connect
+def _stop_worker_runtime(**kwargs):
+    worker_runtime.stop()
@@ -6,12 +6,50 @@ Celery tasks for file processing, analysis, and management
 from typing import Dict, Any
 
 from app.celery_app import celery_app
+from app.tasks.async_runtime import run_async
+from app.services.task_cancellation_service import FILE_PROCESSING_TASKS, file_task_registry
+from celery.signals import before_task_publish, task_postrun, task_revoked
 from celery.utils.log import get_task_logger
 
 # Get logger
 logger = get_task_logger(__name__)
 
 
+# Keep the file -> task registry used for cancellation in step with the queue:
+# entries are written wherever a file task is published and removed when it
+# finishes. A retry republishes under the same task ID, so it stays registered.
+@before_task_publish.connect
+def register_file_task(sender=None, headers=None, body=None, **kwargs):
+    if sender not in FILE_PROCESSING_TASKS:
+        return
+    try:
+        args = body[0] if body else []
+        if args:
+            file_task_registry.register(str(args[0]), headers["id"], sender)
+    except Exception as e:
+        logger.warning(f"Failed to register {sender} task for cancellation: {e}")
+
+
+@task_postrun.connect
+def unregister_file_task(sender=None, task_id=None, args=None, state=None, **kwargs):
+    if sender is None or sender.name not in FILE_PROCESSING_TASKS or not args or state == "RETRY":
+        return
+    try:
+        file_task_registry.unregister(str(args[0]), task_id)
+    except Exception as e:
+        logger.warning(f"Failed to unregister task {task_id}: {e}")
+
+
+@task_revoked.connect
+def unregister_revoked_file_task(request=None, **kwargs):
+    if request is None or request.task not in FILE_PROCESSING_TASKS or not request.args:
+        return
+    try:
+        file_task_registry.unregister(str(request.args[0]), request.id)
+    except Exception as e:
+        logger.warning(f"Failed to unregister revoked task {request.id}: {e}")
+
+
 @celery_app.task(bind=True, retry_backoff=True, max_retries=3)
 def process_file_upload(self, file_id: str, processing_options: Dict[str, Any] = None):
     """
@@ -112,7 +150,8 @@ def _process_file_upload_sync(file_id: str, processing_options: Dict[str, Any] =
     from app.services.file_processing_service import FileProcessingService
     from app.database import SessionLocal
     from app.models.file import File, FileStatus
-    from sqlalchemy import select, and_
+    from sqlalchemy import select, and_, update, func
+    from datetime import datetime, timezone
     from uuid import UUID
     
     # Use synchronous database session for Celery
@@ -139,45 +178,61 @@ def _process_file_upload_sync(file_id: str, processing_options: Dict[str, Any] =
             logger.info(f"File {file_id} is already being processed, skipping")
             return {"status": "already_processing", "file_id": file_id}
         
+        force_reprocess = processing_options.get("force_reprocess", False) if processing_options else False
         if db_file.status == FileStatus.PROCESSED:
-            force_reprocess = processing_options.get("force_reprocess", False) if processing_options else False
             if not force_reprocess:
                 logger.info(f"File {file_id} is already processed, skipping")
                 return {"status": "already_processed", "file_id": file_id}
         
-        # Start processing
-        db_file.start_processing()
-        db.commit()
+        # Identical content in this organization may have finished processing since upload
+        if not force_reprocess:
+            duplicate = db.execute(
+                select(File).where(
+                    and_(
+                        File.organization_id == db_file.organization_id,
+                        File.file_hash == db_file.file_hash,
+                        File.id != db_file.id,
+                        File.status == FileStatus.PROCESSED
+                    )
+                ).limit(1)
+            ).scalar_one_or_none()
+            
+            if duplicate:
+                from app.services.file_service import record_extraction_reuse
+                
+                db_file.copy_extraction_from(duplicate)
+                db.commit()
+                record_extraction_reuse()
+                logger.info(f"Reused extraction results from {duplicate.id} for file {file_id}")
+                return {"status": "completed", "file_id": file_id, "reused_from": str(duplicate.id)}
         
+        # Start processing. The status we read is compared in the UPDATE, so when
+        # the upload endpoint, the dispatcher and the pending-file sweep all queue
+        # the same file only the first worker to get here processes it.
+        claimed = db.execute(
+            update(File)
+            .where(and_(File.id == db_file.id, File.status == db_file.status))
+            .values(
+                status=FileStatus.PROCESSING,
+                processing_started_at=datetime.now(timezone.utc),
+                processing_attempts=func.coalesce(File.processing_attempts, 0) + 1
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if claimed.rowcount == 0:
+            logger.info(f"File {file_id} was claimed by another worker, skipping")
+            return {"status": "already_processing", "file_id": file_id}
+        db.refresh(db_file)
+
         try:
             # Use FileProcessingService methods directly but handle transaction management here
             file_processing_service = FileProcessingService()
             
-            # Use asyncio with explicit event loop policy for better cleanup
-            import asyncio
-            
-            # Create async wrapper that calls service methods
-            async def async_process_with_service():
-                await _process_file_using_service_methods(file_processing_service, db_file)
-            
-            # Run async processing with proper cleanup handling
+            # Run on the worker's persistent event loop, which also works when the
+            # caller already has a loop running (eager execution)
             try:
-                # Use asyncio.run with debug=False to prevent cleanup warnings
-                if hasattr(asyncio, '_get_running_loop') and asyncio._get_running_loop() is not None:
-                    # If there's already a running loop, create a new one in a thread
-                    import concurrent.futures
-                    with concurrent.futures.ThreadPoolExecutor() as executor:
-                        future = executor.submit(asyncio.run, async_process_with_service())
-                        future.result()
-                else:
-                    # Normal case - no existing loop
-                    asyncio.run(async_process_with_service())
-                    
-            except RuntimeError as e:
-                if "Event loop is closed" not in str(e):
-                    raise
-                # Ignore event loop closure errors during cleanup
-                logger.debug(f"Ignored event loop cleanup error: {e}")
+                run_async(_process_file_using_service_methods(file_processing_service, db_file))
                 
             except Exception as e:
                 logger.error(f"Async processing failed: {e}")
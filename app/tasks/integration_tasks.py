@@ -3,7 +3,6 @@
 Celery tasks for third-party integrations
 """
 
-import asyncio
 from typing import Dict, Any
 from uuid import UUID
 from datetime import datetime, timezone, timedelta
@@ -16,6 +15,7 @@ from app.database import get_db_session
 from app.models.integration import Integration, IntegrationStatus
 from app.services.integration_service import IntegrationService
 from app.schemas.integration import IntegrationSyncRequest, IntegrationTestRequest
+from app.tasks.async_runtime import run_async
 
 # Get logger
 logger = get_task_logger(__name__)
@@ -33,7 +33,7 @@ def sync_integration(self, integration_id: str, sync_type: str = "incremental"):
     logger.info(f"Starting sync for integration: {integration_id}, type: {sync_type}")
     
     try:
-        result = asyncio.run(_sync_integration_async(integration_id, sync_type))
+        result = run_async(_sync_integration_async(integration_id, sync_type))
         logger.info(f"Sync completed for integration: {integration_id}")
         return result
         
@@ -50,7 +50,7 @@ def sync_all_active_integrations(self):
     logger.info("Starting sync for all active integrations")
     
     try:
-        result = asyncio.run(_sync_all_active_integrations_async())
+        result = run_async(_sync_all_active_integrations_async())
         logger.info(f"Synced {result['synced']} integrations")
         return result
         
@@ -71,7 +71,7 @@ def test_integration_connection(self, integration_id: str, test_type: str = "con
     logger.info(f"Testing integration: {integration_id}, type: {test_type}")
     
     try:
-        result = asyncio.run(_test_integration_async(integration_id, test_type))
+        result = run_async(_test_integration_async(integration_id, test_type))
         logger.info(f"Test completed for integration: {integration_id}")
         return result
         
@@ -88,7 +88,7 @@ def health_check_integrations(self):
     logger.info("Starting health checks for active integrations")
     
     try:
-        result = asyncio.run(_health_check_integrations_async())
+        result = run_async(_health_check_integrations_async())
         logger.info(f"Health checked {result['checked']} integrations")
         return result
         
@@ -110,7 +110,7 @@ def send_to_integration(self, integration_id: str, data: Dict[str, Any], action:
     logger.info(f"Sending data to integration: {integration_id}, action: {action}")
     
     try:
-        result = asyncio.run(_send_to_integration_async(integration_id, data, action))
+        result = run_async(_send_to_integration_async(integration_id, data, action))
         logger.info(f"Data sent to integration: {integration_id}")
         return result
         
@@ -131,7 +131,7 @@ def process_webhook_event(self, integration_id: str, event_data: Dict[str, Any])
     logger.info(f"Processing webhook from integration: {integration_id}")
     
     try:
-        result = asyncio.run(_process_webhook_async(integration_id, event_data))
+        result = run_async(_process_webhook_async(integration_id, event_data))
         logger.info(f"Webhook processed for integration: {integration_id}")
         return result
         
@@ -151,7 +151,7 @@ def cleanup_failed_sync_attempts(self, older_than_hours: int = 24):
     logger.info(f"Cleaning up failed sync attempts older than {older_than_hours} hours")
     
     try:
-        result = asyncio.run(_cleanup_failed_syncs_async(older_than_hours))
+        result = run_async(_cleanup_failed_syncs_async(older_than_hours))
         logger.info(f"Cleaned up {result['cleaned']} failed sync attempts")
         return result
         
@@ -171,7 +171,7 @@ def sync_salesforce_data(self, integration_id: str):
     logger.info(f"Starting Salesforce sync for integration: {integration_id}")
     
     try:
-        result = asyncio.run(_sync_salesforce_async(integration_id))
+        result = run_async(_sync_salesforce_async(integration_id))
         logger.info(f"Salesforce sync completed for integration: {integration_id}")
         return result
         
@@ -191,7 +191,7 @@ def sync_jira_tickets(self, integration_id: str):
     logger.info(f"Starting Jira sync for integration: {integration_id}")
     
     try:
-        result = asyncio.run(_sync_jira_async(integration_id))
+        result = run_async(_sync_jira_async(integration_id))
         logger.info(f"Jira sync completed for integration: {integration_id}")
         return result
         
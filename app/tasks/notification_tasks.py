@@ -3,7 +3,6 @@
 Celery tasks for notifications and communications
 """
 
-import asyncio
 from typing import Dict, Any, List
 from uuid import UUID
 from datetime import datetime, timezone
@@ -14,6 +13,7 @@ from celery.utils.log import get_task_logger
 from app.database import get_db_session
 from app.services.ticket_service import TicketService
 from app.services.user_service import UserService
+from app.tasks.async_runtime import run_async
 
 # Get logger
 logger = get_task_logger(__name__)
@@ -33,7 +33,7 @@ def send_email_notification(self, recipient_email: str, subject: str, body: str,
     logger.info(f"Sending email to: {recipient_email}")
     
     try:
-        result = asyncio.run(_send_email_async(recipient_email, subject, body, template))
+        result = run_async(_send_email_async(recipient_email, subject, body, template))
         logger.info(f"Email sent to: {recipient_email}")
         return result
         
@@ -55,7 +55,7 @@ def send_slack_notification(self, channel: str, message: str, attachments: List[
     logger.info(f"Sending Slack message to: {channel}")
     
     try:
-        result = asyncio.run(_send_slack_async(channel, message, attachments))
+        result = run_async(_send_slack_async(channel, message, attachments))
         logger.info(f"Slack message sent to: {channel}")
         return result
         
@@ -77,7 +77,7 @@ def send_teams_notification(self, webhook_url: str, message: str, card_data: Dic
     logger.info("Sending Teams notification")
     
     try:
-        result = asyncio.run(_send_teams_async(webhook_url, message, card_data))
+        result = run_async(_send_teams_async(webhook_url, message, card_data))
         logger.info("Teams notification sent")
         return result
         
@@ -97,7 +97,7 @@ def notify_ticket_created(self, ticket_id: str):
     logger.info(f"Sending ticket creation notifications for: {ticket_id}")
     
     try:
-        result = asyncio.run(_notify_ticket_created_async(ticket_id))
+        result = run_async(_notify_ticket_created_async(ticket_id))
         logger.info(f"Ticket creation notifications sent for: {ticket_id}")
         return result
         
@@ -119,7 +119,7 @@ def notify_ticket_updated(self, ticket_id: str, update_type: str, updated_by: st
     logger.info(f"Sending ticket update notifications for: {ticket_id}, type: {update_type}")
     
     try:
-        result = asyncio.run(_notify_ticket_updated_async(ticket_id, update_type, updated_by))
+        result = run_async(_notify_ticket_updated_async(ticket_id, update_type, updated_by))
         logger.info(f"Ticket update notifications sent for: {ticket_id}")
         return result
         
@@ -140,7 +140,7 @@ def notify_sla_breach(self, ticket_id: str, sla_type: str):
     logger.info(f"Sending SLA breach notification for ticket: {ticket_id}, type: {sla_type}")
     
     try:
-        result = asyncio.run(_notify_sla_breach_async(ticket_id, sla_type))
+        result = run_async(_notify_sla_breach_async(ticket_id, sla_type))
         logger.info(f"SLA breach notification sent for: {ticket_id}")
         return result
         
@@ -160,7 +160,7 @@ def send_daily_digest(self, user_id: str):
     logger.info(f"Sending daily digest for user: {user_id}")
     
     try:
-        result = asyncio.run(_send_daily_digest_async(user_id))
+        result = run_async(_send_daily_digest_async(user_id))
         logger.info(f"Daily digest sent for user: {user_id}")
         return result
         
@@ -180,7 +180,7 @@ def send_bulk_notifications(self, notifications: List[Dict[str, Any]]):
     logger.info(f"Sending {len(notifications)} bulk notifications")
     
     try:
-        result = asyncio.run(_send_bulk_notifications_async(notifications))
+        result = run_async(_send_bulk_notifications_async(notifications))
         logger.info(f"Bulk notifications completed: {result['sent']} sent, {result['failed']} failed")
         return result
         
@@ -201,7 +201,7 @@ def send_escalation_notice(self, ticket_id: str, escalation_level: int):
     logger.info(f"Sending escalation notice for ticket: {ticket_id}, level: {escalation_level}")
     
     try:
-        result = asyncio.run(_send_escalation_notice_async(ticket_id, escalation_level))
+        result = run_async(_send_escalation_notice_async(ticket_id, escalation_level))
         logger.info(f"Escalation notice sent for: {ticket_id}")
         return result
         
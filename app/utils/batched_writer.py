@@ -0,0 +1,93 @@
+"""
+Buffered, batched usage writes.
+
+Hot request paths record "key was used now" in memory; a background loop
+writes the latest timestamp and the number of uses per key in one executemany
+UPDATE per flush interval. Callers supply the UPDATE statement and how a
+buffered (key, last seen, count) entry maps to its bind parameters.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy.sql.dml import Update
+
+logger = logging.getLogger(__name__)
+
+RowParams = Callable[[Any, datetime, int], Dict[str, Any]]
+
+
+class BatchedUsageWriter:
+    """Coalesces per-key usage in memory and writes it in periodic batched UPDATEs"""
+    
+    def __init__(self, statement: Update, row_params: RowParams, flush_seconds: float, log_tag: str):
+        self.statement = statement
+        self.row_params = row_params
+        self.flush_seconds = flush_seconds
+        self.log_tag = log_tag
+        
+        # key -> (last seen, uses since last flush)
+        self.pending: Dict[Any, Tuple[datetime, int]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        self.stats = {
+            "recorded": 0,
+            "flushes": 0,
+            "rows_flushed": 0,
+            "flush_failures": 0
+        }
+    
+    def record(self, key) -> None:
+        """Buffer one use of key; written by the next flush"""
+        _, count = self.pending.get(key, (None, 0))
+        self.pending[key] = (datetime.now(timezone.utc), count + 1)
+        self.stats["recorded"] += 1
+        
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+    
+    async def _flush_loop(self) -> None:
+        while self.pending:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                self.stats["flush_failures"] += 1
+                logger.error(f"❌ [{self.log_tag}] Batched usage flush failed: {e}")
+    
+    async def flush(self) -> int:
+        """Write buffered usage in one executemany UPDATE; returns the number of rows sent"""
+        if not self.pending:
+            return 0
+        
+        pending, self.pending = self.pending, {}
+        rows = [self.row_params(key, last_seen, count) for key, (last_seen, count) in pending.items()]
+        
+        from app.database import AsyncSessionLocal
+        
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(self.statement, rows)
+                await db.commit()
+        except Exception:
+            # Put the counts back so they are retried with the next flush
+            for key, (last_seen, count) in pending.items():
+                newer_seen, newer_count = self.pending.get(key, (last_seen, 0))
+                self.pending[key] = (max(last_seen, newer_seen), count + newer_count)
+            raise
+        
+        self.stats["flushes"] += 1
+        self.stats["rows_flushed"] += len(rows)
+        logger.debug(f"🕒 [{self.log_tag}] Flushed usage for {len(rows)} rows")
+        return len(rows)
+    
+    async def close(self) -> None:
+        """Flush buffered usage and stop the flush loop"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"❌ [{self.log_tag}] Batched usage flush failed on shutdown: {e}")
@@ -0,0 +1,147 @@
+"""
+Keyset (cursor) pagination utilities.
+
+Pages are addressed by the sort key of the last row seen instead of an OFFSET,
+so fetching page N costs the same as fetching page 1. Cursors are opaque,
+URL-safe tokens that encode the sort key values of that last row together with
+the sort they were issued for.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Sequence, Tuple, TypeVar
+from uuid import UUID
+
+from sqlalchemy import Select, asc, desc, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+T = TypeVar("T")
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor is malformed or was issued for a different sort"""
+
+
+@dataclass
+class CursorPage(Generic[T]):
+    """One page of keyset-paginated results"""
+    items: List[T]
+    next_cursor: Optional[str]
+    total: Optional[int] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, UUID):
+        return {"uuid": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "uuid" in value:
+            return UUID(value["uuid"])
+        raise ValueError(f"Unknown cursor value: {value}")
+    return value
+
+
+def encode_cursor(sort_key: str, values: Sequence[Any]) -> str:
+    """
+    Encode the sort key values of the last row on a page into an opaque cursor.
+
+    Args:
+        sort_key: Identifier of the sort the cursor belongs to (e.g. "updated_at:desc")
+        values: Values of the keyset columns for the last row
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps({"s": sort_key, "v": [_encode_value(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: str) -> Tuple[Any, ...]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor string from a previous page
+        sort_key: Sort the current request uses; must match the cursor's sort
+
+    Returns:
+        Tuple of keyset column values
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or belongs to another sort
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = tuple(_decode_value(v) for v in payload["v"])
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid pagination cursor: {e}")
+
+    if payload.get("s") != sort_key:
+        raise InvalidCursorError("Pagination cursor does not match the requested sort order")
+    return values
+
+
+async def fetch_keyset_page(
+    db: AsyncSession,
+    query: Select,
+    columns: Sequence[InstrumentedAttribute],
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = True
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of ORM rows ordered by a unique, non-null keyset.
+
+    The last column must make the ordering unique (normally the primary key).
+    A matching composite index on the keyset columns lets the database seek
+    straight to the cursor position.
+
+    Args:
+        db: Database session
+        query: Filtered select of a single ORM entity, without ORDER BY/LIMIT
+        columns: Keyset columns, e.g. (Thread.updated_at, Thread.id)
+        limit: Page size
+        cursor: Cursor from the previous page, or None for the first page
+        descending: Sort direction applied to every keyset column
+
+    Returns:
+        Tuple of (rows, next_cursor); next_cursor is None on the last page
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or belongs to another sort
+    """
+    sort_key = ",".join(column.key for column in columns) + (":desc" if descending else ":asc")
+
+    if cursor:
+        values = decode_cursor(cursor, sort_key)
+        if len(values) != len(columns):
+            raise InvalidCursorError("Pagination cursor does not match the requested sort order")
+        keyset = tuple_(*columns)
+        query = query.where(keyset < tuple_(*values) if descending else keyset > tuple_(*values))
+
+    direction = desc if descending else asc
+    result = await db.execute(query.order_by(*[direction(column) for column in columns]).limit(limit + 1))
+    rows = list(result.scalars().all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort_key, [getattr(rows[-1], column.key) for column in columns])
+
+    return rows, next_cursor
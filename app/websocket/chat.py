@@ -3,12 +3,14 @@
 Agent-Aware Chat WebSocket endpoints for real-time thread messaging
 """
 
+import hashlib
 import json
 import logging
 from typing import Dict, Any, Optional, List
 from uuid import UUID
 from datetime import datetime
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from jose import jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 import asyncio
 
@@ -16,11 +18,68 @@ from app.database import get_db_session
 from app.services.thread_service import thread_service
 from app.services.ai_chat_service import ai_chat_service
 from app.dependencies import get_current_user_from_token
+from app.schemas.principal import Principal, SessionType
+from app.services.principal_service import principal_service
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ws/chat", tags=["Agent-Aware Chat WebSocket"])
 
+# AI response chunk protocols, negotiated with the ``stream_protocol`` query parameter.
+# v1 (legacy): every chunk frame carries the cumulative ``content`` plus the ``chunk``.
+# v2: chunk frames carry only the ``delta`` and a sequence number; the completion
+#     frame carries a sha256 checksum of the full content for client verification.
+STREAM_PROTOCOL_CUMULATIVE = "v1"
+STREAM_PROTOCOL_DELTA = "v2"
+SUPPORTED_STREAM_PROTOCOLS = [STREAM_PROTOCOL_CUMULATIVE, STREAM_PROTOCOL_DELTA]
+
+
+class ResponseChunkEncoder:
+    """Builds ai_response_chunk / ai_response_complete payloads for a negotiated protocol"""
+    
+    def __init__(self, protocol: str, agent_id: UUID):
+        self.protocol = protocol
+        self.agent_id = str(agent_id)
+        self.seq = 0
+        self.streamed_text = ""
+    
+    def chunk_data(self, chunk: str) -> Dict[str, Any]:
+        """Record a streamed chunk and return the chunk frame data"""
+        self.streamed_text += chunk
+        
+        if self.protocol == STREAM_PROTOCOL_DELTA:
+            data = {
+                "seq": self.seq,
+                "delta": chunk,
+                "agent_id": self.agent_id
+            }
+        else:
+            data = {
+                "content": self.streamed_text,
+                "is_complete": False,
+                "agent_id": self.agent_id,
+                "chunk": chunk
+            }
+        
+        self.seq += 1
+        return data
+    
+    def complete_data(self, full_response: str) -> Dict[str, Any]:
+        """Return protocol-specific fields for the completion frame"""
+        if self.protocol != STREAM_PROTOCOL_DELTA:
+            return {"content": full_response}
+        
+        data = {
+            "protocol": STREAM_PROTOCOL_DELTA,
+            "chunk_count": self.seq,
+            "checksum": f"sha256:{hashlib.sha256(full_response.encode('utf-8')).hexdigest()}"
+        }
+        # Only resend the content when it differs from the concatenated deltas
+        # (e.g. fallback responses after a streaming error)
+        if full_response != self.streamed_text:
+            data["content"] = full_response
+        return data
+
 
 class AgentConnectionManager:
     """Manages agent-aware WebSocket connections for thread-based chat"""
@@ -29,7 +88,16 @@ class AgentConnectionManager:
         self.active_connections: Dict[str, WebSocket] = {}
         self.connection_metadata: Dict[str, Dict[str, Any]] = {}
     
-    async def connect(self, websocket: WebSocket, connection_id: str, agent_id: UUID, thread_id: UUID, user_id: str):
+    async def connect(
+        self,
+        websocket: WebSocket,
+        connection_id: str,
+        agent_id: UUID,
+        thread_id: UUID,
+        user_id: str,
+        stream_protocol: str = STREAM_PROTOCOL_CUMULATIVE,
+        token: Optional[str] = None
+    ):
         """Accept WebSocket connection with agent context"""
         await websocket.accept()
         self.active_connections[connection_id] = websocket
@@ -37,6 +105,8 @@ class AgentConnectionManager:
             "agent_id": str(agent_id),
             "thread_id": str(thread_id),
             "user_id": user_id,
+            "stream_protocol": stream_protocol,
+            "token": token,
             "connected_at": asyncio.get_event_loop().time()
         }
         logger.info(f"Agent-aware WebSocket connection established: {connection_id} (agent: {agent_id}, thread: {thread_id})")
@@ -61,9 +131,26 @@ class AgentConnectionManager:
             websocket = self.active_connections[connection_id]
             await websocket.send_json(data)
     
+    async def try_send_json_message(self, data: Dict[Any, Any], connection_id: str) -> bool:
+        """Send JSON message, dropping the connection instead of raising if the client is gone"""
+        if connection_id not in self.active_connections:
+            return False
+        try:
+            await self.active_connections[connection_id].send_json(data)
+            return True
+        except Exception as e:
+            logger.info(f"Agent-aware WebSocket send failed, dropping {connection_id}: {e}")
+            self.disconnect(connection_id)
+            return False
+    
     def get_connection_context(self, connection_id: str) -> Optional[Dict[str, Any]]:
         """Get connection metadata"""
         return self.connection_metadata.get(connection_id)
+    
+    def update_connection_token(self, connection_id: str, token: str):
+        """Replace the token later messages on this connection are authorized with"""
+        if connection_id in self.connection_metadata:
+            self.connection_metadata[connection_id]["token"] = token
 
 
 # Global agent-aware connection manager instance
@@ -76,12 +163,17 @@ async def agent_chat_websocket_endpoint(
     agent_id: UUID,
     thread_id: UUID,
     token: str,
+    stream_protocol: str = STREAM_PROTOCOL_CUMULATIVE,
     db: AsyncSession = Depends(get_db_session)
 ):
     """WebSocket endpoint for real-time agent-aware chat streaming"""
     
     connection_id = None
     try:
+        if stream_protocol not in SUPPORTED_STREAM_PROTOCOLS:
+            await websocket.close(code=1008, reason=f"Unsupported stream protocol: {stream_protocol}")
+            return
+        
         # Authenticate user from token
         current_user = await get_current_user_from_token(token, db)
         if not current_user:
@@ -103,7 +195,9 @@ async def agent_chat_websocket_endpoint(
         
         # Create connection ID with agent context
         connection_id = f"{user_id}:{agent_id}:{thread_id}"
-        await manager.connect(websocket, connection_id, agent_id, thread_id, user_id)
+        await manager.connect(
+            websocket, connection_id, agent_id, thread_id, user_id, stream_protocol, token
+        )
         
         # Send connection established message with agent context
         await manager.send_json_message({
@@ -119,7 +213,9 @@ async def agent_chat_websocket_endpoint(
                     "agent_tool_calling",
                     "tool_call_progress",
                     "file_attachments"
-                ]
+                ],
+                "stream_protocol": stream_protocol,
+                "supported_stream_protocols": SUPPORTED_STREAM_PROTOCOLS
             },
             "timestamp": datetime.now().isoformat()
         }, connection_id)
@@ -216,6 +312,22 @@ async def handle_agent_send_message(
             }, connection_id)
             return
         
+        # Re-verify the session per message so MCP calls never carry an expired
+        # token; clients send a fresh one with the message before it expires
+        context = manager.get_connection_context(connection_id) or {}
+        token = data.get("data", {}).get("token") or context.get("token")
+        current_user = await get_current_user_from_token(token, db) if token else None
+        if not current_user or str(current_user.id) != user_id:
+            await manager.send_json_message({
+                "type": "error",
+                "data": {
+                    "error_code": "TOKEN_EXPIRED",
+                    "error_message": "Session token is invalid or expired; send a fresh token with the message"
+                }
+            }, connection_id)
+            return
+        manager.update_connection_token(connection_id, token)
+        
         # Validate thread access through thread service
         thread = await thread_service.get_thread(db, agent_id, thread_id, user_id)
         if not thread:
@@ -242,8 +354,9 @@ async def handle_agent_send_message(
         }, connection_id)
         
         # Generate AI response with streaming and tool call progress
+        principal = await build_connection_principal(current_user, token, db)
         await stream_agent_ai_response(
-            connection_id, agent_id, thread_id, user_id, message_content, attachments
+            connection_id, agent_id, thread_id, user_id, message_content, attachments, principal
         )
         
     except Exception as e:
@@ -257,19 +370,42 @@ async def handle_agent_send_message(
         }, connection_id)
 
 
+async def build_connection_principal(current_user, token: str, db: AsyncSession) -> Optional[Principal]:
+    """Principal for MCP tool calls, built from the user the token was just verified for"""
+    try:
+        return await principal_service.get_principal_for_user(
+            current_user,
+            token,
+            db,
+            session_type=SessionType.WEB,
+            claims=jwt.get_unverified_claims(token)
+        )
+    except Exception as e:
+        logger.warning(f"Could not build Principal for WebSocket user {current_user.id}; tools run without it: {e}")
+        return None
+
+
 async def stream_agent_ai_response(
     connection_id: str,
     agent_id: UUID,
     thread_id: UUID,
     user_id: str,
     user_message: str,
-    attachments: List[Dict[str, Any]] = None
+    attachments: List[Dict[str, Any]] = None,
+    principal: Optional[Principal] = None
 ):
-    """Stream AI response in real-time with tool call progress reporting"""
+    """
+    Stream AI response in real-time with tool call progress reporting.
+    
+    Frames are sent with try_send_json_message, so a client that disconnects
+    mid-stream stops receiving them but the agent run still completes and the
+    interaction is persisted: tools may already have acted on the user's behalf
+    and the thread history should record it.
+    """
     
     try:
         # Send AI response start notification
-        await manager.send_json_message({
+        await manager.try_send_json_message({
             "type": "ai_response_start",
             "data": {
                 "message": "Agent is processing your request...",
@@ -280,7 +416,7 @@ async def stream_agent_ai_response(
         }, connection_id)
         
         # Send tool call progress if agent might use tools
-        await manager.send_json_message({
+        await manager.try_send_json_message({
             "type": "tool_call_progress",
             "data": {
                 "status": "analyzing_request",
@@ -290,44 +426,80 @@ async def stream_agent_ai_response(
         }, connection_id)
         
         # Stream AI response using the agent-centric chat service
+        context = manager.get_connection_context(connection_id) or {}
+        encoder = ResponseChunkEncoder(
+            context.get("stream_protocol", STREAM_PROTOCOL_CUMULATIVE), agent_id
+        )
         full_response = ""
         tool_calls_used = []
+        events_received = 0
         
         try:
-            # Use streaming from the AI chat service
-            async for chunk in ai_chat_service.stream_message_to_thread(
+            # Forward model deltas and tool activity as the agent produces them
+            async for event in ai_chat_service.stream_message_to_thread(
                 agent_id=str(agent_id),
                 thread_id=str(thread_id),
                 user_id=user_id,
                 message=user_message,
-                attachments=attachments
+                attachments=attachments,
+                principal=principal
             ):
-                full_response += chunk
+                events_received += 1
+                event_type = event.get("type")
                 
-                # Send streaming chunk
-                await manager.send_json_message({
-                    "type": "ai_response_chunk",
-                    "data": {
-                        "content": full_response,
-                        "is_complete": False,
-                        "agent_id": str(agent_id),
-                        "chunk": chunk
-                    }
-                }, connection_id)
+                if event_type == "text_delta":
+                    full_response += event["delta"]
+                    
+                    # Send streaming chunk
+                    await manager.try_send_json_message({
+                        "type": "ai_response_chunk",
+                        "data": encoder.chunk_data(event["delta"])
+                    }, connection_id)
                 
-                # Small delay for realistic streaming
-                await asyncio.sleep(0.05)
+                elif event_type == "tool_call":
+                    await manager.try_send_json_message({
+                        "type": "tool_call_progress",
+                        "data": {
+                            "status": "tool_call_started",
+                            "message": f"Calling tool {event['tool_name']}...",
+                            "tool_name": event["tool_name"],
+                            "tool_call_id": event["tool_call_id"],
+                            "agent_id": str(agent_id)
+                        }
+                    }, connection_id)
+                
+                elif event_type == "tool_result":
+                    await manager.try_send_json_message({
+                        "type": "tool_call_progress",
+                        "data": {
+                            "status": "tool_call_completed",
+                            "message": f"Tool {event['tool_name']} completed",
+                            "tool_name": event["tool_name"],
+                            "tool_call_id": event["tool_call_id"],
+                            "agent_id": str(agent_id)
+                        }
+                    }, connection_id)
+                
+                elif event_type == "final":
+                    ai_response = event["response"]
+                    full_response = ai_response.content
+                    tool_calls_used = getattr(ai_response, 'tools_used', [])
         
         except Exception as stream_error:
             logger.error(f"Streaming error: {stream_error}")
-            # Fallback to non-streaming response
+            if events_received:
+                # Output was already streamed and tools may have run; re-running
+                # the agent would repeat their side effects
+                raise
+            # Nothing was streamed yet, so a non-streaming run is safe
             try:
                 ai_response = await ai_chat_service.send_message_to_thread(
                     agent_id=str(agent_id),
                     thread_id=str(thread_id),
                     user_id=user_id,
                     message=user_message,
-                    attachments=attachments
+                    attachments=attachments,
+                    principal=principal
                 )
                 full_response = ai_response.content
                 tool_calls_used = getattr(ai_response, 'tools_used', [])
@@ -338,7 +510,7 @@ async def stream_agent_ai_response(
         
         # Send tool call completion if tools were used
         if tool_calls_used:
-            await manager.send_json_message({
+            await manager.try_send_json_message({
                 "type": "tool_calls_complete",
                 "data": {
                     "tools_used": tool_calls_used,
@@ -348,10 +520,10 @@ async def stream_agent_ai_response(
             }, connection_id)
         
         # Send final completion message
-        await manager.send_json_message({
+        await manager.try_send_json_message({
             "type": "ai_response_complete",
             "data": {
-                "content": full_response,
+                **encoder.complete_data(full_response),
                 "role": "assistant",
                 "thread_id": str(thread_id),
                 "agent_id": str(agent_id),
@@ -363,7 +535,7 @@ async def stream_agent_ai_response(
         
     except Exception as e:
         logger.error(f"Error streaming agent AI response: {e}")
-        await manager.send_json_message({
+        await manager.try_send_json_message({
             "type": "error",
             "data": {
                 "error_code": "AI_RESPONSE_FAILED",
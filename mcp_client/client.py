@@ -59,6 +59,30 @@ from app.schemas.principal import Principal
 
 logger = logging.getLogger(__name__)
 
+
+class CachedToolsMCPServer(MCPServerStreamableHTTP):
+    """
+    Streamable HTTP MCP server that reuses a previously discovered tool list.
+    
+    The server is built per agent run with the caller's current auth headers;
+    only the tools/list result is shared between runs, through tool_list_cache
+    (any object with get(key) and set(key, value)) under tool_list_key.
+    """
+    
+    tool_list_cache: Any = None
+    tool_list_key: Any = None
+    
+    async def list_tools(self):
+        if self.tool_list_cache is not None:
+            cached_tools = self.tool_list_cache.get(self.tool_list_key)
+            if cached_tools is not None:
+                return cached_tools
+        tools = await super().list_tools()
+        if self.tool_list_cache is not None:
+            self.tool_list_cache.set(self.tool_list_key, tools)
+        return tools
+
+
 class MCPClient:
     """
     MCP Client for connecting to MCP server.
@@ -334,6 +358,56 @@ class MCPClient:
             logger.error(f"[MCP_CLIENT] ❌ Failed to create agent MCP client: {e}")
             return None
     
+    def create_agent_toolset(
+        self,
+        agent_id: str,
+        tools: list,
+        principal: Principal,
+        tool_list_cache: Any = None,
+        tool_list_key: Any = None
+    ) -> Optional[MCPServerStreamableHTTP]:
+        """
+        Create a per-run, tool-filtered MCP toolset authenticated with the principal's current token.
+        
+        Unlike create_agent_client, nothing is cached per token: the toolset only
+        carries the auth headers, and tool discovery is served from
+        tool_list_cache when an earlier run already listed the tools.
+        
+        Args:
+            agent_id: Agent UUID
+            tools: List of tools this agent can access
+            principal: Principal whose token authenticates the run's tool calls
+            tool_list_cache: Shared store of discovered tool lists (get/set)
+            tool_list_key: Key of this agent configuration and principal scope in tool_list_cache
+            
+        Returns:
+            MCPServerStreamableHTTP: Filtered toolset or None if the principal has no valid token
+        """
+        try:
+            if not principal or not principal.is_token_valid():
+                logger.error(f"[MCP_CLIENT] ❌ No valid principal for agent {agent_id}")
+                return None
+            
+            headers = self._get_auth_headers_from_principal(principal)
+            if not headers:
+                logger.error(f"[MCP_CLIENT] ❌ Could not extract auth headers from principal for agent {agent_id}")
+                return None
+            
+            server = CachedToolsMCPServer(f"{self.mcp_server_url}/mcp/", headers=headers)
+            server.tool_list_cache = tool_list_cache
+            server.tool_list_key = tool_list_key
+            server._principal = principal
+            server.get_principal = lambda: principal
+            server.is_authenticated = lambda: True
+            
+            if not tools:
+                return server
+            return create_filtered_mcp_client(server, tools, agent_id)
+            
+        except Exception as e:
+            logger.error(f"[MCP_CLIENT] ❌ Failed to create agent MCP toolset: {e}")
+            return None
+    
     def get_agent_client(self, agent_id: str, tools: list, principal: Optional[Principal] = None) -> Optional[MCPServerStreamableHTTP]:
         """
         Get agent-specific MCP client, creating if necessary.
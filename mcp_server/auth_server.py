@@ -18,11 +18,11 @@ AUTHENTICATION FLOW:
 4. Tools make authenticated API calls to backend services
 """
 
+import hmac
 import os
 import sys
 import json
 import logging
-import httpx
 from dotenv import load_dotenv
 from typing import Dict, Any, Optional
 from fastmcp import FastMCP, Context
@@ -38,6 +38,8 @@ from fastmcp.server.dependencies import get_context
 # Add project root to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from mcp_server.tools.http_client import cleanup_http_clients, get_http_client, get_http_client_stats
+
 logger = logging.getLogger(__name__)
 
 
@@ -86,6 +88,9 @@ mcp.add_middleware(ErrorHandlingMiddleware(include_traceback=True))
 # API base URL for backend calls
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 
+# Shared secret for scraping /metrics; the route is disabled when unset
+METRICS_TOKEN = os.getenv("MCP_METRICS_TOKEN", "")
+
 logger.info("✅ FastMCP server initialized with token authentication")
 # logger.info(f"✅ Configured {len(DEVELOPMENT_TOKENS)} development tokens")
 logger.info(f"✅ API base URL: {API_BASE_URL}")
@@ -105,6 +110,21 @@ async def health_check(request: Request):
     })
 
 
+@mcp.custom_route("/metrics", ["GET"])
+async def http_client_metrics(request: Request):
+    """Backend connection reuse, circuit breaker state and per-tool latency histograms.
+    
+    Custom routes bypass the MCP auth middleware, so the bearer token is compared
+    here against MCP_METRICS_TOKEN. Without that setting the route is not served.
+    """
+    if not METRICS_TOKEN:
+        return JSONResponse({"error": "not found"}, status_code=404)
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        return JSONResponse({"error": "unauthorized"}, status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    return JSONResponse({"http_clients": get_http_client_stats()})
+
+
 @mcp.tool
 async def list_tickets(
     ctx: Context,
@@ -195,28 +215,30 @@ async def list_tickets(
         
         logging.debug(f"Making API call with params: {params}")
         
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            response = await client.get(
-                f"{API_BASE_URL}/api/v1/tickets/",
-                headers=api_headers,
-                params=params
-            )
+        client = await get_http_client(API_BASE_URL)
+        response = await client.make_request(
+            "GET",
+            "/api/v1/tickets/",
+            auth_headers=api_headers,
+            params=params,
+            tool="list_tickets"
+        )
+        
+        if response.status_code == 200:
+            logger.info(f"Successfully retrieved tickets ")
+            logger.info(f"✅ Retrieved tickets: {response.status_code}")
+            logger.info(f"✅ Retrieved tickets: {response.json()}")
+            logger.info(f"✅ Retrieved tickets: {response.text}")
+            return response.text
+        else:
+            error_msg = f"API call failed: HTTP {response.status_code} - {response.text}"
+            logger.error(error_msg)
+            return json.dumps({
+                "error": "Failed to retrieve tickets",
+                "status_code": response.status_code,
+                "message": response.text
+            })
             
-            if response.status_code == 200:
-                logger.info(f"Successfully retrieved tickets ")
-                logger.info(f"✅ Retrieved tickets: {response.status_code}")
-                logger.info(f"✅ Retrieved tickets: {response.json()}")
-                logger.info(f"✅ Retrieved tickets: {response.text}")
-                return response.text
-            else:
-                error_msg = f"API call failed: HTTP {response.status_code} - {response.text}"
-                logger.error(error_msg)
-                return json.dumps({
-                    "error": "Failed to retrieve tickets",
-                    "status_code": response.status_code,
-                    "message": response.text
-                })
-                
     except Exception as e:
         error_msg = f"Tool execution failed: {str(e)}"
         logger.error(error_msg)
@@ -332,29 +354,31 @@ async def create_ticket(
             "Content-Type": "application/json"
         }
         
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            # Log the actual request payload being sent
-            logger.info(f"🔍 [TRACE] create_ticket request payload: {json.dumps(payload, indent=2)}")
-            logger.info(f"🔍 [TRACE] create_ticket request URL: {API_BASE_URL}/api/v1/tickets/")
-            
-            # Create the ticket
-            create_resp = await client.post(
-                f"{API_BASE_URL}/api/v1/tickets/",
-                headers=api_headers,
-                json=payload
-            )
-            
-            if create_resp.status_code not in [200, 201]:
-                error_msg = f"API call failed: HTTP {create_resp.status_code} - {create_resp.text}"
-                logger.error(error_msg)
-                return json.dumps({
-                    "error": "Failed to create ticket",
-                    "status_code": create_resp.status_code,
-                    "message": create_resp.text
-                })
-            
-            # Return the create response JSON (with attachments included if provided)
-            return create_resp.text
+        # Log the actual request payload being sent
+        logger.info(f"🔍 [TRACE] create_ticket request payload: {json.dumps(payload, indent=2)}")
+        logger.info(f"🔍 [TRACE] create_ticket request URL: {API_BASE_URL}/api/v1/tickets/")
+        
+        # Create the ticket
+        client = await get_http_client(API_BASE_URL)
+        create_resp = await client.make_request(
+            "POST",
+            "/api/v1/tickets/",
+            auth_headers=api_headers,
+            json_data=payload,
+            tool="create_ticket"
+        )
+        
+        if create_resp.status_code not in [200, 201]:
+            error_msg = f"API call failed: HTTP {create_resp.status_code} - {create_resp.text}"
+            logger.error(error_msg)
+            return json.dumps({
+                "error": "Failed to create ticket",
+                "status_code": create_resp.status_code,
+                "message": create_resp.text
+            })
+        
+        # Return the create response JSON (with attachments included if provided)
+        return create_resp.text
         
     except Exception as e:
         error_msg = f"Create ticket failed: {str(e)}"
@@ -449,25 +473,27 @@ async def search_tickets(
         
         logger.info(f"Making search API call with params: {params}")
         
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            response = await client.get(
-                f"{API_BASE_URL}/api/v1/tickets/search/",
-                headers=api_headers,
-                params=params
-            )
+        client = await get_http_client(API_BASE_URL)
+        response = await client.make_request(
+            "GET",
+            "/api/v1/tickets/search/",
+            auth_headers=api_headers,
+            params=params,
+            tool="search_tickets"
+        )
+        
+        if response.status_code == 200:
+            logger.info(f"✅ Search completed: {response.status_code}")
+            return response.text
+        else:
+            error_msg = f"Search API call failed: HTTP {response.status_code} - {response.text}"
+            logger.error(error_msg)
+            return json.dumps({
+                "error": "Failed to search tickets",
+                "status_code": response.status_code,
+                "message": response.text
+            })
             
-            if response.status_code == 200:
-                logger.info(f"✅ Search completed: {response.status_code}")
-                return response.text
-            else:
-                error_msg = f"Search API call failed: HTTP {response.status_code} - {response.text}"
-                logger.error(error_msg)
-                return json.dumps({
-                    "error": "Failed to search tickets",
-                    "status_code": response.status_code,
-                    "message": response.text
-                })
-                
     except Exception as e:
         error_msg = f"Search failed: {str(e)}"
         logger.error(error_msg)
@@ -519,31 +545,33 @@ async def get_ticket(
         
         logger.info(f"Getting ticket {ticket_id}")
         
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            response = await client.get(
-                f"{API_BASE_URL}/api/v1/tickets/{ticket_id}/",
-                headers=api_headers
-            )
+        client = await get_http_client(API_BASE_URL)
+        response = await client.make_request(
+            "GET",
+            f"/api/v1/tickets/{ticket_id}/",
+            auth_headers=api_headers,
+            tool="get_ticket"
+        )
+        
+        if response.status_code == 200:
+            logger.info(f"✅ Retrieved ticket {ticket_id}")
+            return response.text
+        elif response.status_code == 404:
+            logger.info(f"Ticket {ticket_id} not found")
+            return json.dumps({
+                "error": "Ticket not found",
+                "ticket_id": ticket_id
+            })
+        else:
+            error_msg = f"API call failed: HTTP {response.status_code} - {response.text}"
+            logger.error(error_msg)
+            return json.dumps({
+                "error": "Failed to retrieve ticket",
+                "status_code": response.status_code,
+                "ticket_id": ticket_id,
+                "message": response.text
+            })
             
-            if response.status_code == 200:
-                logger.info(f"✅ Retrieved ticket {ticket_id}")
-                return response.text
-            elif response.status_code == 404:
-                logger.info(f"Ticket {ticket_id} not found")
-                return json.dumps({
-                    "error": "Ticket not found",
-                    "ticket_id": ticket_id
-                })
-            else:
-                error_msg = f"API call failed: HTTP {response.status_code} - {response.text}"
-                logger.error(error_msg)
-                return json.dumps({
-                    "error": "Failed to retrieve ticket",
-                    "status_code": response.status_code,
-                    "ticket_id": ticket_id,
-                    "message": response.text
-                })
-                
     except Exception as e:
         error_msg = f"Get ticket failed: {str(e)}"
         logger.error(error_msg)
@@ -560,24 +588,24 @@ async def get_system_health(ctx: Context) -> str:
     logger.info("Checking system health")
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(f"{API_BASE_URL}/health")
+        client = await get_http_client(API_BASE_URL)
+        response = await client.make_request("GET", "/health", timeout=10.0, tool="get_system_health")
+        
+        if response.status_code == 200:
+            logger.info("System health check successful")
+            return json.dumps({
+                "status": "healthy",
+                "api_status": response.text,
+                "mcp_server": "operational"
+            })
+        else:
+            logger.warning(f"API health check returned {response.status_code}")
+            return json.dumps({
+                "status": "degraded", 
+                "api_status_code": response.status_code,
+                "mcp_server": "operational"
+            })
             
-            if response.status_code == 200:
-                logger.info("System health check successful")
-                return json.dumps({
-                    "status": "healthy",
-                    "api_status": response.text,
-                    "mcp_server": "operational"
-                })
-            else:
-                logger.warning(f"API health check returned {response.status_code}")
-                return json.dumps({
-                    "status": "degraded", 
-                    "api_status_code": response.status_code,
-                    "mcp_server": "operational"
-                })
-                
     except Exception as e:
         error_msg = f"Health check failed: {str(e)}"
         logger.error(error_msg)
@@ -705,36 +733,29 @@ async def update_ticket(
             "Content-Type": "application/json"
         }
         
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            # Choose endpoint based on use_patch
-            method = "PATCH" if use_patch else "PUT"
-            
-            if use_patch:
-                # Use PATCH for partial updates
-                response = await client.patch(
-                    f"{API_BASE_URL}/api/v1/tickets/{ticket_id}",
-                    headers=api_headers,
-                    json=payload
-                )
-            else:
-                # Use PUT for full replacement
-                response = await client.put(
-                    f"{API_BASE_URL}/api/v1/tickets/{ticket_id}",
-                    headers=api_headers,
-                    json=payload
-                )
-            
-            if response.status_code not in [200, 201]:
-                error_msg = f"API call failed: HTTP {response.status_code} - {response.text}"
-                logger.error(error_msg)
-                return json.dumps({
-                    "error": f"Failed to update ticket with {method}",
-                    "status_code": response.status_code,
-                    "message": response.text
-                })
-            
-            # Return the updated ticket
-            return response.text
+        # PATCH for partial updates, PUT for full replacement
+        method = "PATCH" if use_patch else "PUT"
+        
+        client = await get_http_client(API_BASE_URL)
+        response = await client.make_request(
+            method,
+            f"/api/v1/tickets/{ticket_id}",
+            auth_headers=api_headers,
+            json_data=payload,
+            tool="update_ticket"
+        )
+        
+        if response.status_code not in [200, 201]:
+            error_msg = f"API call failed: HTTP {response.status_code} - {response.text}"
+            logger.error(error_msg)
+            return json.dumps({
+                "error": f"Failed to update ticket with {method}",
+                "status_code": response.status_code,
+                "message": response.text
+            })
+        
+        # Return the updated ticket
+        return response.text
         
     except Exception as e:
         error_msg = f"Update ticket failed: {str(e)}"
@@ -749,6 +770,7 @@ async def update_ticket(
 # Available tools: list_tickets, create_ticket, search_tickets, get_ticket, update_ticket, get_system_health
 logger.info(f"✅ Registered 6 FastMCP tools")
 logger.info("✅ All tools use API-based calls (no direct database access)")
+logger.info("✅ Backend calls share one pooled HTTP client (metrics at /metrics)")
 logger.info("✅ Authentication context available to all tools")
 
 if __name__ == "__main__":
@@ -770,9 +792,17 @@ if __name__ == "__main__":
     
     # Run the FastMCP server with HTTP transport
     import asyncio
-    asyncio.run(mcp.run_http_async(
-        host=host,
-        port=port,
-        log_level=log_level,
-        transport="http"
-    ))
\ No newline at end of file
+    
+    async def serve():
+        try:
+            await mcp.run_http_async(
+                host=host,
+                port=port,
+                log_level=log_level,
+                transport="http"
+            )
+        finally:
+            # Close pooled backend connections
+            await cleanup_http_clients()
+    
+    asyncio.run(serve())
\ No newline at end of file
@@ -56,38 +56,38 @@ class PrincipalInjectionMiddleware:
             jwt_token = auth_header[7:]  # Remove 'Bearer ' prefix
             
             # Extract Principal (this is the ONLY place JWT tokens are handled!)
+            # Resolved through the same two-tier principal cache as the API
             try:
-                from app.database import get_db_session
+                from app.schemas.principal import SessionType
                 from app.services.principal_service import principal_service
                 
-                async with get_db_session() as db:
-                    principal = await principal_service.extract_principal(
-                        token=jwt_token,
-                        db=db,
-                        request_context={
-                            'client_ip': headers.get('X-Forwarded-For'),
-                            'user_agent': headers.get('User-Agent'),
-                            'request_id': headers.get('X-Request-ID'),
-                            'tool_name': tool_name
-                        }
-                    )
-                    
-                    # Inject Principal context into tool args
-                    args['_mcp_context'] = {
-                        'principal': principal.to_cache_dict(),
-                        'metadata': {
-                            'tool_name': tool_name,
-                            'request_headers': {k: v for k, v in headers.items() if not k.startswith('Authorization')},
-                            'timestamp': datetime.utcnow().isoformat()
-                        }
+                principal = await principal_service.extract_principal(
+                    token=jwt_token,
+                    session_type=SessionType.MCP,
+                    request_context={
+                        'client_ip': headers.get('X-Forwarded-For'),
+                        'user_agent': headers.get('User-Agent'),
+                        'request_id': headers.get('X-Request-ID'),
+                        'tool_name': tool_name
                     }
-                    
-                    self.logger.info(
-                        f"✅ Principal context injected for tool: {tool_name} (user: {principal.email}, org: {principal.organization_id})"
-                    )
-                    
-                    return args
-                    
+                )
+                
+                # Inject Principal context into tool args
+                args['_mcp_context'] = {
+                    'principal': principal.to_cache_dict(),
+                    'metadata': {
+                        'tool_name': tool_name,
+                        'request_headers': {k: v for k, v in headers.items() if not k.startswith('Authorization')},
+                        'timestamp': datetime.utcnow().isoformat()
+                    }
+                }
+                
+                self.logger.info(
+                    f"✅ Principal context injected for tool: {tool_name} (user: {principal.email}, org: {principal.organization_id})"
+                )
+                
+                return args
+                
             except Exception as e:
                 self.logger.error(f"❌ Principal extraction failed for tool {tool_name}: {e}")
                 # Return args without context - tools will handle missing context
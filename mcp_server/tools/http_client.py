@@ -8,13 +8,16 @@ This module provides a high-performance HTTP client for MCP tools with:
 - Authentication header support
 - HTTP/2 support for better performance
 - Singleton pattern for optimal resource management
+- Connection reuse and per-tool latency metrics
 """
 
 import httpx
 import asyncio
+import bisect
 import logging
+import os
 import time
-from typing import Optional, Dict, Any, ClassVar
+from typing import Optional, Dict, Any, ClassVar, List
 
 # Import the debug logger
 try:
@@ -26,6 +29,58 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Pool limits apply per backend URL; each URL gets its own client instance
+MAX_CONNECTIONS = int(os.getenv("MCP_HTTP_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("MCP_HTTP_MAX_KEEPALIVE_CONNECTIONS", "100"))
+KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("MCP_HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram in milliseconds"""
+    
+    BUCKETS_MS: ClassVar[List[float]] = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def observe(self, duration_ms: float):
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+    
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of observations"""
+        if not self.count:
+            return None
+        threshold = fraction * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.BUCKETS_MS, self.counts):
+            seen += bucket_count
+            if seen >= threshold:
+                return bound
+        return self.max_ms
+    
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound:g}": count for bound, count in zip(self.BUCKETS_MS, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": buckets
+        }
+
+
+# Responses meaning the backend (or its proxy) can't serve requests right now
+UNAVAILABLE_STATUS_CODES = frozenset({502, 503, 504})
+
 
 class CircuitBreaker:
     """Circuit breaker pattern for HTTP client resilience"""
@@ -66,19 +121,36 @@ class AuthenticatedHTTPClient:
     _instances: ClassVar[Dict[str, 'AuthenticatedHTTPClient']] = {}
     _lock: ClassVar[Optional[asyncio.Lock]] = None
     
-    def __init__(self, backend_url: str, max_connections: int = 100):
+    def __init__(
+        self,
+        backend_url: str,
+        max_connections: int = MAX_CONNECTIONS,
+        max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = KEEPALIVE_EXPIRY_SECONDS
+    ):
         self.backend_url = backend_url
         self._client: Optional[httpx.AsyncClient] = None
         self._max_connections = max_connections
+        self._max_keepalive_connections = min(max_keepalive_connections, max_connections)
+        self._keepalive_expiry = keepalive_expiry
         self._circuit_breaker = CircuitBreaker(failure_threshold=5, recovery_timeout=30)
         
+        self._latency: Dict[str, LatencyHistogram] = {}
+        self.stats = {
+            "requests": 0,
+            "new_connections": 0,
+            "reused_connections": 0,
+            "failures": 0,
+            "circuit_rejections": 0
+        }
+        
     async def _get_client(self) -> httpx.AsyncClient:
         """Get or create connection-pooled HTTP client"""
         if not self._client or self._client.is_closed:
             limits = httpx.Limits(
-                max_keepalive_connections=self._max_connections,
+                max_keepalive_connections=self._max_keepalive_connections,
                 max_connections=self._max_connections,
-                keepalive_expiry=30.0
+                keepalive_expiry=self._keepalive_expiry
             )
             timeout = httpx.Timeout(30.0, connect=5.0)
             
@@ -98,11 +170,16 @@ class AuthenticatedHTTPClient:
         auth_headers: Optional[Dict[str, str]] = None,
         params: Optional[Dict[str, Any]] = None,
         json_data: Optional[Dict[str, Any]] = None,
-        timeout: Optional[float] = None
+        timeout: Optional[float] = None,
+        tool: Optional[str] = None
     ) -> httpx.Response:
-        """Make authenticated HTTP request with circuit breaker protection"""
+        """Make authenticated HTTP request with circuit breaker protection
+        
+        Latency is recorded under the tool name, or the endpoint when no tool is given.
+        """
         
         if not self._circuit_breaker.can_execute():
+            self.stats["circuit_rejections"] += 1
             raise httpx.HTTPError("Circuit breaker open - service unavailable")
         
         headers = {}
@@ -118,6 +195,14 @@ class AuthenticatedHTTPClient:
         else:
             logger.debug(f"Unauthenticated request: {method} {endpoint}")
         
+        opened_connection = False
+        
+        async def trace(event_name: str, info: Dict[str, Any]):
+            # httpcore only connects when no pooled connection was available
+            nonlocal opened_connection
+            if event_name == "connection.connect_tcp.started":
+                opened_connection = True
+        
         try:
             client = await self._get_client()
             start_time = time.time()
@@ -129,11 +214,13 @@ class AuthenticatedHTTPClient:
                 headers=headers,
                 params=params,
                 json=json_data,
-                timeout=timeout
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                extensions={"trace": trace}
             )
             
             # Debug log the request/response
             duration_ms = (time.time() - start_time) * 1000
+            self._record(tool or endpoint, duration_ms, opened_connection)
             log_http_request_response_pair(
                 method=method,
                 url=url,
@@ -144,13 +231,45 @@ class AuthenticatedHTTPClient:
                 duration_ms=duration_ms
             )
             
-            self._circuit_breaker.record_success()
+            # The breaker is shared by every tool and tenant, so only signs that the
+            # backend itself is unavailable count - not a 500 caused by one bad request
+            if response.status_code in UNAVAILABLE_STATUS_CODES:
+                self._circuit_breaker.record_failure()
+            else:
+                self._circuit_breaker.record_success()
             return response
             
-        except Exception as e:
+        except httpx.TransportError as e:
+            self.stats["failures"] += 1
             self._circuit_breaker.record_failure()
             logger.error(f"HTTP request failed: {method} {endpoint} - {e}")
             raise
+        except Exception as e:
+            self.stats["failures"] += 1
+            logger.error(f"HTTP request failed: {method} {endpoint} - {e}")
+            raise
+    
+    def _record(self, name: str, duration_ms: float, opened_connection: bool):
+        self.stats["requests"] += 1
+        self.stats["new_connections" if opened_connection else "reused_connections"] += 1
+        if name not in self._latency:
+            self._latency[name] = LatencyHistogram()
+        self._latency[name].observe(duration_ms)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Connection reuse, circuit breaker state and per-tool latency histograms"""
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "connection_reuse_rate": self.stats["reused_connections"] / requests if requests else 0.0,
+            "circuit_breaker": self._circuit_breaker.state,
+            "limits": {
+                "max_connections": self._max_connections,
+                "max_keepalive_connections": self._max_keepalive_connections,
+                "keepalive_expiry_seconds": self._keepalive_expiry
+            },
+            "latency_ms": {name: histogram.snapshot() for name, histogram in self._latency.items()}
+        }
     
     async def close(self):
         """Close HTTP client and cleanup connections"""
@@ -194,4 +313,9 @@ async def get_http_client(backend_url: str = "http://app:8000") -> Authenticated
 
 async def cleanup_http_clients():
     """Cleanup all HTTP clients"""
-    await AuthenticatedHTTPClient.cleanup_all()
\ No newline at end of file
+    await AuthenticatedHTTPClient.cleanup_all()
+
+
+def get_http_client_stats() -> Dict[str, Any]:
+    """Stats for every pooled client, keyed by backend URL"""
+    return {url: instance.get_stats() for url, instance in AuthenticatedHTTPClient._instances.items()}
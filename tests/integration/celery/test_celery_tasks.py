@@ -61,6 +61,8 @@ def test_celery_configuration():
     # Check task routing
     task_routes = celery_app.conf.task_routes
     assert "app.tasks.file_tasks.*" in task_routes
+    assert "app.tasks.agent_tasks.*" in task_routes
+    assert "app.tasks.agent_tasks" in celery_app.conf.include
     # AI, integration, and notification tasks are temporarily disabled
     
     print("✅ Celery configuration correct")
@@ -134,6 +136,11 @@ def test_task_queue_routing():
     file_task_route = celery_app.conf.task_routes.get("app.tasks.file_tasks.*")
     assert file_task_route["queue"] == "file_processing"
     
+    # Agent tasks queued by the task dispatcher
+    routes = celery_app.conf.task_routes
+    assert routes["app.tasks.agent_tasks.*"]["queue"] == "agent_processing"
+    assert routes["app.tasks.agent_tasks.cleanup_completed_tasks"]["queue"] == "agent_maintenance"
+    
     # Other task routes are temporarily disabled
     
     print("✅ Task queue routing configured correctly")
@@ -18,6 +18,19 @@ from app.models.user import User
 from app.models.organization import Organization
 
 
+def serve_content(file_service, file_obj, content):
+    """Serve content through FileService.open_file_stream as an async chunk iterator"""
+    async def open_file_stream(db_file, byte_range=None):
+        start, end = byte_range or (0, len(content) - 1)
+        
+        async def chunks():
+            yield content[start:end + 1]
+        return chunks()
+    
+    file_obj.file_size = len(content)
+    file_service.open_file_stream = AsyncMock(side_effect=open_file_stream)
+
+
 class TestFileServingIntegration:
     """Integration tests for enhanced file serving"""
     
@@ -75,7 +88,7 @@ class TestFileServingIntegration:
         mock_file_service = AsyncMock()
         mock_file_service_class.return_value = mock_file_service
         mock_file_service.get_file.return_value = mock_file_image
-        mock_file_service.get_file_content.return_value = b"fake image content"
+        serve_content(mock_file_service, mock_file_image, b"fake image content")
         
         # Set matching organization
         mock_file_image.organization_id = mock_user.organization_id
@@ -87,6 +100,7 @@ class TestFileServingIntegration:
         assert response.headers["content-type"] == "image/jpeg"
         assert "inline" in response.headers["content-disposition"]
         assert mock_file_image.filename in response.headers["content-disposition"]
+        assert response.content == b"fake image content"
 
     @patch('app.api.v1.files.get_current_user')
     @patch('app.api.v1.files.get_db_session')
@@ -100,7 +114,7 @@ class TestFileServingIntegration:
         mock_file_service = AsyncMock()
         mock_file_service_class.return_value = mock_file_service
         mock_file_service.get_file.return_value = mock_file_pdf
-        mock_file_service.get_file_content.return_value = b"fake pdf content"
+        serve_content(mock_file_service, mock_file_pdf, b"fake pdf content")
         
         # Set matching organization
         mock_file_pdf.organization_id = mock_user.organization_id
@@ -136,7 +150,7 @@ class TestFileServingIntegration:
         mock_file_service = AsyncMock()
         mock_file_service_class.return_value = mock_file_service
         mock_file_service.get_file.return_value = mock_file_zip
-        mock_file_service.get_file_content.return_value = b"fake zip content"
+        serve_content(mock_file_service, mock_file_zip, b"fake zip content")
         
         # Test new endpoint
         response = client.get(f"/api/v1/files/{mock_file_zip.id}/storage/{mock_file_zip.filename}")
@@ -158,7 +172,7 @@ class TestFileServingIntegration:
         mock_file_service = AsyncMock()
         mock_file_service_class.return_value = mock_file_service
         mock_file_service.get_file.return_value = mock_file_image
-        mock_file_service.get_file_content.return_value = b"fake image content"
+        serve_content(mock_file_service, mock_file_image, b"fake image content")
         
         # Set matching organization
         mock_file_image.organization_id = mock_user.organization_id
@@ -255,7 +269,7 @@ class TestUploadResponseUrlFormat:
         
         mock_file_service = AsyncMock()
         mock_file_service_class.return_value = mock_file_service
-        mock_file_service.create_file_record.return_value = mock_file_obj
+        mock_file_service.create_file_record_from_stream.return_value = mock_file_obj
         
         # Mock Celery task
         mock_task_result = MagicMock()
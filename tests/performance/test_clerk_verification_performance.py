@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for Clerk session verification
+
+Measures per-request auth overhead of local verification: a cold RSA
+signature check for each new token and a cached lookup for repeat requests
+with the same token. After warm-up neither path may call Clerk.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import jwt
+import pytest
+from clerk_backend_api import models
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.services.clerk_service import ClerkSessionVerifier
+
+TOKENS = 200
+REQUESTS_PER_TOKEN = 10
+
+
+def build_verifier(key) -> ClerkSessionVerifier:
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(key.public_key(), as_dict=True)
+    jwks = models.Jwks(keys=[models.Keys(**jwk, kid="key-1", use="sig", alg="RS256")])
+    client = SimpleNamespace(jwks=SimpleNamespace(get_jwks_async=AsyncMock(return_value=jwks)))
+    return ClerkSessionVerifier(client)
+
+
+def sign(key, session: int) -> str:
+    now = int(time.time())
+    claims = {"sub": "user_1", "sid": f"sess_{session}", "iat": now, "exp": now + 300}
+    return jwt.encode(claims, key, algorithm="RS256", headers={"kid": "key-1"})
+
+
+@pytest.mark.performance
+class TestClerkVerificationPerformance:
+    """Auth overhead per request without network calls"""
+
+    def test_local_verification_overhead(self):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        verifier = build_verifier(key)
+        tokens = [sign(key, session) for session in range(TOKENS)]
+
+        async def run():
+            await verifier.verify(sign(key, -1))  # warm-up: loads the JWKS
+
+            start = time.perf_counter()
+            for token in tokens:
+                await verifier.verify(token)
+            cold_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(REQUESTS_PER_TOKEN):
+                for token in tokens:
+                    await verifier.verify(token)
+            cached_seconds = time.perf_counter() - start
+            return cold_seconds, cached_seconds
+
+        cold_seconds, cached_seconds = asyncio.run(run())
+        cold_us = cold_seconds / TOKENS * 1e6
+        cached_us = cached_seconds / (TOKENS * REQUESTS_PER_TOKEN) * 1e6
+
+        print(
+            f"\n📊 Clerk session verification: {cold_us:.0f}µs/token signature check, "
+            f"{cached_us:.1f}µs/request cached, {verifier.client.jwks.get_jwks_async.await_count} JWKS fetch"
+        )
+        assert verifier.client.jwks.get_jwks_async.await_count == 1
+        assert verifier.get_stats()["cache_hits"] == TOKENS * REQUESTS_PER_TOKEN
+        assert cached_us * 5 < cold_us
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark for TicketService.get_ticket_stats
+
+Compares the legacy eight-query statistics path against the single-pass
+FILTER aggregate and the trigger-maintained rollup on a seeded million-ticket
+dataset. Needs a disposable PostgreSQL database (superuser, for seeding with
+session_replication_role = replica):
+
+    TICKET_STATS_BENCHMARK_DATABASE_URL=postgresql+asyncpg://... pytest tests/performance/test_ticket_stats_performance.py
+"""
+
+import os
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import and_, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models.base import Base
+from app.models.ticket import Ticket, TicketPriority, TicketStatus
+from app.services.ticket_service import TicketService
+
+BENCHMARK_URL = os.getenv("TICKET_STATS_BENCHMARK_DATABASE_URL")
+BENCHMARK_SCHEMA = "ticket_stats_benchmark"
+TICKET_COUNT = int(os.getenv("TICKET_STATS_BENCHMARK_TICKETS", "1000000"))
+ORGANIZATION_COUNT = 10
+ROUNDS = 5
+
+OPEN_STATUSES = [TicketStatus.NEW, TicketStatus.OPEN, TicketStatus.IN_PROGRESS]
+
+SEED_TICKETS = text(f"""
+    INSERT INTO tickets (
+        id, title, description, status, priority, category, urgency, created_by_id, organization_id,
+        business_impact, last_activity_at, communication_count, escalation_level, source_channel,
+        sla_breached, sla_due_date, created_at, updated_at, is_deleted
+    )
+    SELECT
+        gen_random_uuid(), 'Ticket ' || g, 'Seeded benchmark ticket',
+        (enum_range(NULL::ticketstatus))[1 + g % 7],
+        (enum_range(NULL::ticketpriority))[1 + g % 4],
+        (enum_range(NULL::ticketcategory))[1 + g % 9],
+        'medium', :user_id, (CAST(:organization_ids AS uuid[]))[1 + g % {ORGANIZATION_COUNT}],
+        'low', now(), 0, 0, 'web', false,
+        CASE WHEN g % 5 = 0 THEN now() - interval '1 day' WHEN g % 5 = 1 THEN now() + interval '1 day' END,
+        now(), now(), g % 50 = 0
+    FROM generate_series(1, :ticket_count) AS g
+""")
+
+
+async def legacy_ticket_stats(db: AsyncSession, organization_id: uuid.UUID) -> dict:
+    """The previous implementation: one round trip and scan per figure"""
+    base = and_(Ticket.organization_id == organization_id, Ticket.is_deleted == False)
+    now = datetime.now(timezone.utc)
+    count = select(func.count(Ticket.id))
+
+    stats = {
+        "total_tickets": (await db.execute(count.where(base))).scalar(),
+        "open_tickets": (await db.execute(count.where(base, Ticket.status.in_(OPEN_STATUSES)))).scalar(),
+        "resolved_tickets": (await db.execute(count.where(base, Ticket.status == TicketStatus.RESOLVED))).scalar(),
+        "overdue_tickets": (await db.execute(count.where(
+            base, Ticket.sla_due_date < now, Ticket.status.in_(OPEN_STATUSES)
+        ))).scalar(),
+        "high_priority_tickets": (await db.execute(count.where(
+            base,
+            Ticket.priority.in_([TicketPriority.HIGH, TicketPriority.CRITICAL]),
+            Ticket.status.in_(OPEN_STATUSES)
+        ))).scalar(),
+    }
+    for name, column in (("category", Ticket.category), ("priority", Ticket.priority), ("status", Ticket.status)):
+        result = await db.execute(select(column, func.count(Ticket.id)).where(base).group_by(column))
+        stats[f"{name}_distribution"] = {value.value: total for value, total in result.all()}
+    return stats
+
+
+async def median_seconds(stats_call) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        await stats_call()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+@pytest.mark.performance
+@pytest.mark.skipif(not BENCHMARK_URL, reason="TICKET_STATS_BENCHMARK_DATABASE_URL not set")
+class TestTicketStatsPerformance:
+    """Dashboard statistics cost on a large tickets table"""
+
+    @pytest.mark.asyncio
+    async def test_rollup_and_single_pass_beat_legacy_queries(self):
+        engine = create_async_engine(
+            BENCHMARK_URL,
+            connect_args={"server_settings": {"search_path": f"{BENCHMARK_SCHEMA},public"}}
+        )
+        organization_ids = [uuid.uuid4() for _ in range(ORGANIZATION_COUNT)]
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE"))
+                await conn.execute(text(f"CREATE SCHEMA {BENCHMARK_SCHEMA}"))
+                await conn.run_sync(Base.metadata.create_all)
+                # Skip foreign keys and triggers while seeding; the rollup is rebuilt below
+                await conn.execute(text("SET LOCAL session_replication_role = replica"))
+                await conn.execute(SEED_TICKETS, {
+                    "user_id": uuid.uuid4(),
+                    "organization_ids": organization_ids,
+                    "ticket_count": TICKET_COUNT
+                })
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.execute(text("VACUUM ANALYZE tickets"))
+
+            service = TicketService()
+            organization_id = organization_ids[0]
+            async with AsyncSession(engine) as db:
+                await service.rebuild_ticket_stats_rollup(db)
+
+                legacy = await legacy_ticket_stats(db, organization_id)
+                single_pass = await service.get_ticket_stats(db, organization_id, use_rollup=False)
+                rollup = await service.get_ticket_stats(db, organization_id)
+                assert {key: single_pass[key] for key in legacy} == legacy
+                assert rollup == single_pass
+
+                legacy_seconds = await median_seconds(lambda: legacy_ticket_stats(db, organization_id))
+                single_pass_seconds = await median_seconds(
+                    lambda: service.get_ticket_stats(db, organization_id, use_rollup=False)
+                )
+                rollup_seconds = await median_seconds(lambda: service.get_ticket_stats(db, organization_id))
+
+            print(
+                f"\n📊 Ticket stats over {TICKET_COUNT:,} tickets ({ORGANIZATION_COUNT} organizations): "
+                f"legacy {legacy_seconds * 1000:.1f}ms, single-pass {single_pass_seconds * 1000:.1f}ms, "
+                f"rollup {rollup_seconds * 1000:.1f}ms"
+            )
+            assert single_pass_seconds < legacy_seconds
+            assert rollup_seconds < single_pass_seconds
+        finally:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCHMARK_SCHEMA} CASCADE"))
+            await engine.dispose()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for TokenCounterService
+
+Compares the legacy one-message-at-a-time encoding path against the batched,
+cached API on a realistic thread history (repeated system prompt and file
+context plus distinct user/assistant turns).
+"""
+
+import time
+import pytest
+import tiktoken
+
+from app.services.token_counter_service import TokenCounterService
+
+
+def _load_encoding():
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:  # Encoding files are downloaded on first use
+        pytest.skip(f"cl100k_base encoding unavailable: {e}")
+
+
+def _build_history(turns: int = 200):
+    system_prompt = "You are a helpful customer support agent. " * 40
+    file_context = "---FILE ATTACHMENTS---\n" + "log line: connection reset by peer\n" * 200
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": f"Turn {i}: my sync keeps failing. {file_context}"[:4000]})
+        messages.append({"role": "assistant", "content": f"Turn {i}: let's check your network settings first."})
+    return messages
+
+
+@pytest.mark.performance
+class TestTokenCounterPerformance:
+    """Performance characteristics of batch and cached token counting"""
+    
+    @pytest.mark.asyncio
+    async def test_batch_cached_counting_beats_per_message_encoding(self):
+        encoding = _load_encoding()
+        messages = _build_history()
+        
+        # Legacy path: encode every message individually on every call
+        start = time.perf_counter()
+        legacy_counts = [len(encoding.encode(f"{m['role']}: {m['content']}")) for m in messages]
+        legacy_seconds = time.perf_counter() - start
+        
+        service = TokenCounterService()
+        service._encodings["cl100k_base"] = encoding
+        
+        start = time.perf_counter()
+        first_counts = await service.count_messages_tokens(messages)
+        first_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        second_counts = await service.count_messages_tokens(messages)
+        cached_seconds = time.perf_counter() - start
+        
+        print(
+            f"\nper-message: {legacy_seconds * 1000:.1f}ms, "
+            f"batch (cold): {first_seconds * 1000:.1f}ms, "
+            f"batch (warm cache): {cached_seconds * 1000:.1f}ms"
+        )
+        
+        assert first_counts == legacy_counts
+        assert second_counts == legacy_counts
+        assert cached_seconds < legacy_seconds
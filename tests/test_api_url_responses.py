@@ -68,7 +68,7 @@ class TestAPIUrlResponses:
         
         mock_file_service = AsyncMock()
         mock_file_service_class.return_value = mock_file_service
-        mock_file_service.create_file_record.return_value = mock_file
+        mock_file_service.create_file_record_from_stream.return_value = mock_file
         
         # Mock Celery task
         mock_task_result = MagicMock()
@@ -193,7 +193,7 @@ class TestAPIUrlResponses:
         
         mock_file_service = AsyncMock()
         mock_file_service_class.return_value = mock_file_service
-        mock_file_service.create_file_record.return_value = test_file
+        mock_file_service.create_file_record_from_stream.return_value = test_file
         mock_file_service.get_file.return_value = test_file
         mock_file_service.get_files_for_organization.return_value = [test_file]
         
@@ -166,7 +166,7 @@ class TestFileAPIEndpointUrls:
         # Mock the file service and processing
         with pytest.MonkeyPatch().context() as m:
             mock_file_service = MagicMock()
-            mock_file_service.create_file_record = AsyncMock(return_value=mock_file)
+            mock_file_service.create_file_record_from_stream = AsyncMock(return_value=mock_file)
             
             # Simulate the upload response creation logic
             processing_required = mock_file.file_type in [FileType.DOCUMENT, FileType.IMAGE, FileType.AUDIO, FileType.VIDEO, FileType.TEXT]
@@ -0,0 +1,94 @@
+"""
+Shared fixtures for unit tests that run services against in-memory SQLite.
+
+Services take an AsyncSession; AsyncSessionShim stands in for one over a
+synchronous SQLite session on a StaticPool engine, so every session sees the
+same database.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+
+class AsyncSessionShim:
+    """Minimal AsyncSession stand-in over a synchronous SQLite session
+
+    calls, when given, records each round trip. interleave yields to the event
+    loop before every statement and commit, so concurrent callers interleave
+    the way they do against PostgreSQL; SQLite serializes the writers.
+    """
+
+    def __init__(self, engine, calls=None, interleave=False):
+        self._session = Session(engine, expire_on_commit=False)
+        self._calls = calls
+        self._interleave = interleave
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._session.close()
+        return False
+
+    async def _round_trip(self, *call):
+        if self._calls is not None:
+            self._calls.append(call)
+        if self._interleave:
+            await asyncio.sleep(0)
+
+    async def get(self, model, ident):
+        await self._round_trip("get", model.__name__)
+        return self._session.get(model, ident)
+
+    async def execute(self, statement, params=None):
+        await self._round_trip("execute", len(params) if params else 0)
+        return self._session.execute(statement, params)
+
+    def add_all(self, instances):
+        self._session.add_all(instances)
+
+    async def commit(self):
+        if self._interleave:
+            await asyncio.sleep(0)
+        self._session.commit()
+
+    async def rollback(self):
+        self._session.rollback()
+
+
+@pytest.fixture
+def make_engine():
+    """Returns a factory for StaticPool SQLite engines with the given models' tables"""
+    engines = []
+
+    def factory(*models):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        for model in models:
+            model.__table__.create(engine)
+        engines.append(engine)
+        return engine
+
+    yield factory
+    for engine in engines:
+        engine.dispose()
+
+
+@pytest.fixture
+def db_calls():
+    return []
+
+
+@pytest.fixture
+def db_factory(engine, db_calls):
+    """AsyncSessionLocal replacement over the module's engine fixture"""
+    return lambda: AsyncSessionShim(engine, db_calls)
+
+
+@pytest.fixture
+def interleaving_db_factory(engine):
+    """Sessions over the module's engine that yield before every round trip"""
+    return lambda: AsyncSessionShim(engine, interleave=True)
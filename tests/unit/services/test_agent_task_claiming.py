@@ -0,0 +1,183 @@
+"""
+Agent task claiming hands every task to exactly one worker.
+
+SQLite serializing the interleaved claimers stands in for the row locks
+SKIP LOCKED relies on in PostgreSQL; the PostgreSQL statement itself is
+checked separately.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401 - register related tables for the AgentTask foreign keys
+from app.models.agent_task import AgentTask
+from app.services.agent_task_service import AgentTaskService
+
+
+@pytest.fixture
+def engine(make_engine):
+    return make_engine(AgentTask)
+
+
+def add_tasks(engine, count, **fields):
+    tasks = [
+        AgentTask(
+            id=uuid.uuid4(),
+            agent_id=uuid.uuid4(),
+            task_type="api_request",
+            task_data={},
+            status=fields.get("status", "pending"),
+            priority=fields.get("priority", 5),
+            scheduled_at=fields.get("scheduled_at", datetime.now(timezone.utc) - timedelta(seconds=1)),
+            retry_count=fields.get("retry_count", 0),
+            max_retries=3,
+            lease_owner=fields.get("lease_owner"),
+            lease_expires_at=fields.get("lease_expires_at"),
+        )
+        for _ in range(count)
+    ]
+    task_ids = [task.id for task in tasks]
+    with Session(engine) as session:
+        session.add_all(tasks)
+        session.commit()
+    return task_ids
+
+
+def load(engine, task_id):
+    with Session(engine) as session:
+        return session.execute(select(AgentTask).where(AgentTask.id == task_id)).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_claimers_never_share_a_task(engine, interleaving_db_factory):
+    task_ids = add_tasks(engine, 60)
+    service = AgentTaskService()
+    claimed = {}
+
+    async def worker(name):
+        db = interleaving_db_factory()
+        while batch := await service.claim_tasks(name, limit=4, db=db):
+            claimed.setdefault(name, []).extend(task.id for task in batch)
+
+    await asyncio.gather(*[worker(f"worker-{i}") for i in range(8)])
+
+    all_claims = [task_id for ids in claimed.values() for task_id in ids]
+    assert sorted(all_claims) == sorted(task_ids)
+    assert len(claimed) > 1
+    for name, ids in claimed.items():
+        task = load(engine, ids[0])
+        assert task.status == "assigned"
+        assert task.lease_owner == name
+        assert task.lease_expires_at is not None
+
+
+@pytest.mark.asyncio
+async def test_claims_follow_priority_and_skip_future_tasks(engine, interleaving_db_factory):
+    (urgent,) = add_tasks(engine, 1, priority=1)
+    add_tasks(engine, 3, priority=7)
+    (future,) = add_tasks(engine, 1, priority=1, scheduled_at=datetime.now(timezone.utc) + timedelta(hours=1))
+
+    claimed = await AgentTaskService().claim_tasks("worker", limit=2, db=interleaving_db_factory())
+
+    assert claimed[0].id == urgent
+    assert claimed[1].priority == 7
+    assert load(engine, future).status == "pending"
+
+
+@pytest.mark.asyncio
+async def test_start_task_only_succeeds_for_the_lease_holder(engine, interleaving_db_factory):
+    service = AgentTaskService()
+    db = interleaving_db_factory()
+    (task_id,) = add_tasks(engine, 1)
+    await service.claim_tasks("dispatcher-a", db=db)
+
+    assert await service.start_task(task_id, "dispatcher-b", db=db) is None
+    started = await service.start_task(task_id, "dispatcher-a", db=db)
+
+    assert started.status == "processing"
+    assert started.started_at is not None
+    # A duplicate delivery after the task started is a no-op
+    assert await service.start_task(task_id, "dispatcher-a", db=db) is None
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_extends_lease_of_holder_only(engine, interleaving_db_factory):
+    service = AgentTaskService()
+    db = interleaving_db_factory()
+    (task_id,) = add_tasks(engine, 1)
+    await service.start_task(task_id, "worker", lease_seconds=10, db=db)
+    first_expiry = load(engine, task_id).lease_expires_at
+
+    assert await service.heartbeat(task_id, "worker", lease_seconds=600, db=db)
+    assert not await service.heartbeat(task_id, "intruder", db=db)
+    assert load(engine, task_id).lease_expires_at > first_expiry
+
+
+@pytest.mark.asyncio
+async def test_expired_leases_are_released_or_failed(engine, interleaving_db_factory):
+    expired = datetime.now(timezone.utc) - timedelta(minutes=1)
+    (never_started,) = add_tasks(engine, 1, status="assigned", lease_owner="dead", lease_expires_at=expired)
+    (retryable,) = add_tasks(engine, 1, status="processing", lease_owner="dead", lease_expires_at=expired)
+    (exhausted,) = add_tasks(engine, 1, status="processing", lease_owner="dead", lease_expires_at=expired, retry_count=3)
+    (healthy,) = add_tasks(
+        engine, 1, status="processing", lease_owner="alive",
+        lease_expires_at=datetime.now(timezone.utc) + timedelta(minutes=5)
+    )
+
+    released = await AgentTaskService().release_expired_leases(db=interleaving_db_factory())
+
+    assert released == 3
+    task = load(engine, never_started)
+    assert (task.status, task.retry_count, task.lease_owner) == ("pending", 0, None)
+    task = load(engine, retryable)
+    assert (task.status, task.retry_count) == ("pending", 1)
+    assert "lease expired" in task.last_error
+    task = load(engine, exhausted)
+    assert task.status == "failed"
+    assert task.completed_at is not None
+    assert load(engine, healthy).lease_owner == "alive"
+
+
+@pytest.mark.asyncio
+async def test_interrupted_attempt_counts_like_a_failure(engine, interleaving_db_factory):
+    expired = datetime.now(timezone.utc) - timedelta(minutes=1)
+    (retried,) = add_tasks(engine, 1, status="processing", lease_owner="dead", lease_expires_at=expired)
+    # Third attempt of three: mark_failed would not retry it, so the sweep must not either
+    (last_attempt,) = add_tasks(
+        engine, 1, status="processing", lease_owner="dead", lease_expires_at=expired, retry_count=2
+    )
+
+    await AgentTaskService().release_expired_leases(db=interleaving_db_factory())
+
+    task = load(engine, retried)
+    assert (task.status, task.retry_count) == ("pending", 1)
+    # Backed off min(2 ** retry_count, 60) minutes, so it isn't re-claimed straight away
+    assert task.scheduled_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) + timedelta(seconds=110)
+    assert [entry["attempt"] for entry in task.error_history] == [1]
+    task = load(engine, last_attempt)
+    assert (task.status, task.retry_count) == ("failed", 3)
+    assert task.error_history[0]["error"] == task.last_error
+
+
+@pytest.mark.asyncio
+async def test_claim_statement_uses_skip_locked_subselect():
+    db = AsyncMock()
+    db.__aenter__.return_value = db
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = []
+    db.execute.return_value = result
+
+    await AgentTaskService().claim_tasks("worker", limit=10, db=db)
+
+    sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE agent_tasks SET")
+    assert "ORDER BY agent_tasks.priority, agent_tasks.scheduled_at" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "RETURNING" in sql
@@ -118,13 +118,15 @@ async def test_context_limits_fallback():
         messages.append(msg)
     
     # Mock token counting to fail
-    with patch('app.services.token_counter_service.token_counter_service') as mock_token_service:
-        mock_token_service.count_message_tokens.side_effect = Exception("Token counting failed")
+    with patch(
+        'app.services.ai_chat_service.token_counter_service.count_messages_tokens',
+        AsyncMock(side_effect=Exception("Token counting failed"))
+    ):
         
         # Should fallback to keeping last 10 messages
         limited = await ai_chat_service._apply_context_limits(messages, 1000)
         
-        assert len(limited) == 10  # Fallback limit
+        assert limited == messages[-10:]  # Fallback limit
 
 @pytest.mark.asyncio
 async def test_get_thread_history_thread_not_found():
@@ -158,7 +160,7 @@ async def test_get_thread_history_thread_not_found():
 
 @pytest.mark.asyncio
 async def test_get_thread_history_with_context_limits():
-    """Test message filtering with context limits."""
+    """Test context limits are applied in SQL so only in-budget messages are loaded."""
     thread_id = str(uuid.uuid4())
     user_id = "test_user"
     agent_id = str(uuid.uuid4())
@@ -176,9 +178,9 @@ async def test_get_thread_history_with_context_limits():
         thread_result = MagicMock()
         thread_result.scalar_one_or_none.return_value = thread_mock
         
-        # Mock many messages
+        # The windowed query only returns the newest messages that fit the budget
         messages = []
-        for i in range(20):
+        for i in range(5):
             msg = MagicMock()
             msg.role = "user" if i % 2 == 0 else "assistant"
             msg.content = f"Message {i}"
@@ -190,10 +192,6 @@ async def test_get_thread_history_with_context_limits():
         # Configure mock to return thread first, then messages
         mock_db.execute.side_effect = [thread_result, messages_result]
         
-        # Mock context limits to return only first 5 messages
-        limited_messages = messages[:5]
-        mock_apply_limits.return_value = limited_messages
-        
         # Test the method with context limits
         history = await ai_chat_service.get_thread_history(
             thread_id=thread_id,
@@ -204,6 +202,40 @@ async def test_get_thread_history_with_context_limits():
             use_memory_context=True
         )
         
-        # Verify context limits were applied
-        mock_apply_limits.assert_called_once_with(messages, 100)
-        assert len(history) == 5
\ No newline at end of file
+        # Verify the budget was pushed down into the messages query
+        messages_query = str(mock_db.execute.call_args_list[1].args[0])
+        assert "running_tokens" in messages_query
+        assert "token_count" in messages_query
+        mock_apply_limits.assert_not_called()
+        assert len(history) == 5
+
+
+def test_context_window_query_orders_newest_first():
+    """Test the running token total is accumulated from the newest message."""
+    query = ai_chat_service._build_context_window_query(uuid.uuid4(), 500)
+    compiled = str(query)
+    
+    assert "coalesce(messages.token_count" in compiled
+    assert "sum(anon_2.tokens) OVER (ORDER BY anon_2.created_at DESC, anon_2.id DESC)" in compiled
+    assert "ORDER BY messages.created_at DESC, messages.id DESC" in compiled
+    assert "running_tokens <=" in compiled
+
+
+def test_context_window_query_only_sums_the_newest_rows():
+    """At most max_context_size newest messages can fit, so the window sum never scans the whole thread."""
+    query = ai_chat_service._build_context_window_query(uuid.uuid4(), 500)
+    compiled = str(query.compile(compile_kwargs={"literal_binds": True}))
+    
+    assert "ORDER BY messages.created_at DESC, messages.id DESC" in compiled
+    assert "LIMIT 500" in compiled
+
+
+def test_context_window_query_keeps_short_threads_whole():
+    """Threads of ten messages or fewer bypass the token budget, even a tiny one."""
+    query = ai_chat_service._build_context_window_query(uuid.uuid4(), 3)
+    compiled = str(query.compile(compile_kwargs={"literal_binds": True}))
+    
+    # One row past the short-thread size tells a short thread from a long one
+    assert "LIMIT 11" in compiled
+    assert "count(*) OVER ()" in compiled
+    assert "running_tokens <= 3 OR anon_1.window_size <= 10" in compiled
@@ -0,0 +1,128 @@
+"""
+API token usage is buffered in memory and written in batches instead of
+updating the token row on every authenticated request.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401 - register related tables for the token foreign keys
+from app.middleware.auth_middleware import AuthMiddleware
+from app.models.api_token import APIToken
+from app.models.organization import Organization
+from app.models.user import User
+from app.services.api_token_usage_service import APITokenUsageService
+from app.services.principal_service import AuthenticatedIdentity
+
+
+@pytest.fixture
+def engine(make_engine):
+    return make_engine(Organization, User, APIToken)
+
+
+@pytest.fixture
+def api_token(engine):
+    with Session(engine, expire_on_commit=False) as session:
+        org = Organization(id=uuid.uuid4(), name="Acme", is_enabled=True)
+        user = User(
+            id=uuid.uuid4(), email="ada@example.com", full_name="Ada Lovelace", organization_id=org.id,
+            login_count="0", failed_login_attempts="0"
+        )
+        token = APIToken(
+            id=uuid.uuid4(), name="ci", token_hash="a" * 64, user_id=user.id, organization_id=org.id,
+            permissions=["tickets:read"], is_active=True, expires_at=datetime.now(timezone.utc) + timedelta(days=30)
+        )
+        session.add_all([org, user, token])
+        session.commit()
+        return token
+
+
+@pytest.fixture
+def usage():
+    service = APITokenUsageService()
+    service.writer.flush_seconds = 3600
+    yield service
+    if service.writer._flush_task:
+        service.writer._flush_task.cancel()
+
+
+def stored_token(engine, token_id):
+    with Session(engine) as session:
+        return session.execute(select(APIToken).where(APIToken.id == token_id)).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_requests_are_coalesced_into_one_batched_update(usage, engine, api_token, db_factory, db_calls):
+    for _ in range(5):
+        usage.record_use(api_token.id)
+    usage.record_use(uuid.uuid4())  # deleted tokens are skipped by the UPDATE
+    
+    with patch("app.database.AsyncSessionLocal", db_factory):
+        assert await usage.flush() == 2
+        assert await usage.flush() == 0
+        usage.record_use(api_token.id)
+        await usage.flush()
+    
+    assert db_calls == [("execute", 2), ("execute", 1)]
+    stored = stored_token(engine, api_token.id)
+    assert stored.usage_count == 6
+    assert stored.last_used_at is not None
+
+
+@pytest.mark.asyncio
+async def test_last_used_is_never_moved_backwards(usage, engine, api_token, db_factory):
+    later = datetime(2030, 1, 1)
+    with Session(engine) as session:
+        session.get(APIToken, api_token.id).last_used_at = later
+        session.commit()
+    
+    usage.record_use(api_token.id)
+    with patch("app.database.AsyncSessionLocal", db_factory):
+        await usage.flush()
+    
+    stored = stored_token(engine, api_token.id)
+    assert stored.last_used_at.replace(tzinfo=None) == later
+    assert stored.usage_count == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_counts_for_the_next_one(usage, api_token):
+    usage.record_use(api_token.id)
+    usage.record_use(api_token.id)
+    
+    broken = MagicMock(side_effect=RuntimeError("database down"))
+    with patch("app.database.AsyncSessionLocal", broken), pytest.raises(RuntimeError):
+        await usage.flush()
+    usage.record_use(api_token.id)
+    
+    assert usage.writer.pending[api_token.id][1] == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_token_requests_are_recorded_without_database_writes(usage, api_token):
+    user = User(id=api_token.user_id, email="ada@example.com", is_active=True)
+    organization = Organization(id=api_token.organization_id, name="Acme")
+    identity = AuthenticatedIdentity(
+        user=user, organization=organization, auth_method="api_token",
+        claims={"exp": int(api_token.expires_at.timestamp())}, api_token=api_token
+    )
+    principal_service = SimpleNamespace(authenticate=AsyncMock(return_value=identity))
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="ai_dev_secret")
+    session_factory = MagicMock()
+    
+    with patch("app.middleware.auth_middleware.principal_service", principal_service), \
+         patch("app.middleware.auth_middleware.api_token_usage", usage), \
+         patch("app.middleware.auth_middleware.AsyncSessionLocal", session_factory):
+        for _ in range(3):
+            await AuthMiddleware()(SimpleNamespace(state=SimpleNamespace()), credentials)
+    
+    session_factory.assert_not_called()
+    assert usage.writer.pending[api_token.id][1] == 3
+    assert usage.get_stats()["requests_recorded"] == 3
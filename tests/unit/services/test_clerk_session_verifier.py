@@ -0,0 +1,178 @@
+"""
+Clerk session tokens are verified locally against cached signing keys.
+
+Tokens are signed with a throwaway RSA key; the Clerk client is a stand-in that
+serves it as the JWKS and counts profile lookups.
+"""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import jwt
+import pytest
+from clerk_backend_api import models
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.routers.clerk_webhooks import handle_user_updated
+from app.services.clerk_service import ClerkService, ClerkSessionVerifier
+
+
+def generate_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def jwks_for(**keys):
+    return models.Jwks(keys=[
+        models.Keys(**jwt.algorithms.RSAAlgorithm.to_jwk(key.public_key(), as_dict=True), kid=kid, use="sig", alg="RS256")
+        for kid, key in keys.items()
+    ])
+
+
+def sign(key, kid="key-1", **claims):
+    now = int(time.time())
+    payload = {"sub": "user_1", "iat": now, "nbf": now, "exp": now + 60, "azp": "https://app.example.com", **claims}
+    return jwt.encode(payload, key, algorithm="RS256", headers={"kid": kid})
+
+
+class FakeClerk:
+    def __init__(self, jwks):
+        self.jwks = SimpleNamespace(get_jwks_async=AsyncMock(return_value=jwks))
+        self.users = SimpleNamespace(get_async=AsyncMock(side_effect=self._user))
+
+    @staticmethod
+    async def _user(user_id):
+        return SimpleNamespace(
+            id=user_id, email_addresses=[SimpleNamespace(email_address="ada@example.com")], phone_numbers=[],
+            external_accounts=[], first_name="Ada", last_name="Lovelace", image_url=None,
+            created_at=0, updated_at=0
+        )
+
+
+@pytest.fixture
+def key():
+    return generate_key()
+
+
+@pytest.fixture
+def client(key):
+    return FakeClerk(jwks_for(**{"key-1": key}))
+
+
+@pytest.fixture
+def verifier(client):
+    verifier = ClerkSessionVerifier(client)
+    verifier.authorized_parties = ["https://app.example.com"]
+    return verifier
+
+
+@pytest.fixture
+def service(client, verifier):
+    service = ClerkService()
+    service.client = client
+    service.session_verifier = verifier
+    return service
+
+
+@pytest.mark.asyncio
+async def test_valid_token_verified_once_then_served_from_cache(verifier, client, key):
+    token = sign(key)
+
+    first = await verifier.verify(token)
+    second = await verifier.verify(token)
+
+    assert first["sub"] == second["sub"] == "user_1"
+    assert client.jwks.get_jwks_async.await_count == 1
+    assert verifier.get_stats()["verified"] == 1
+    assert verifier.get_stats()["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("claims", [
+    {"exp": int(time.time()) - 60},
+    {"azp": "https://evil.example.com"},
+])
+async def test_expired_or_foreign_tokens_rejected(verifier, key, claims):
+    with pytest.raises(jwt.InvalidTokenError):
+        await verifier.verify(sign(key, **claims))
+    assert verifier.get_stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_token_signed_by_another_key_rejected(verifier):
+    with pytest.raises(jwt.InvalidSignatureError):
+        await verifier.verify(sign(generate_key()))
+
+
+@pytest.mark.asyncio
+async def test_rotated_key_triggers_refresh_and_unknown_keys_are_throttled(verifier, client, key):
+    await verifier.verify(sign(key))
+
+    rotated = generate_key()
+    client.jwks.get_jwks_async.return_value = jwks_for(**{"key-1": key, "key-2": rotated})
+    verifier._last_attempt -= verifier.min_refresh_seconds
+
+    assert (await verifier.verify(sign(rotated, kid="key-2")))["sub"] == "user_1"
+    assert client.jwks.get_jwks_async.await_count == 2
+
+    for _ in range(5):
+        with pytest.raises(jwt.InvalidTokenError, match="Unknown Clerk signing key"):
+            await verifier.verify(sign(rotated, kid="forged"))
+    assert client.jwks.get_jwks_async.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_previous_keys(verifier, client, key):
+    await verifier.verify(sign(key))
+    client.jwks.get_jwks_async.side_effect = RuntimeError("clerk unavailable")
+    verifier._last_attempt = verifier._fetched_at = time.monotonic() - verifier.refresh_seconds
+
+    await verifier.refresh()
+
+    assert (await verifier.verify(sign(key, sid="other-session")))["sub"] == "user_1"
+    assert verifier.get_stats()["jwks_refresh_failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_static_pem_key_needs_no_jwks(key):
+    from cryptography.hazmat.primitives import serialization
+
+    pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+    verifier = ClerkSessionVerifier(None, jwt_key=pem)
+
+    assert (await verifier.verify(sign(key, kid="anything")))["sub"] == "user_1"
+
+
+@pytest.mark.asyncio
+async def test_verify_token_merges_org_claims_and_caches_profile(service, client, key):
+    token = sign(key, o={"id": "org_1", "slg": "acme", "rol": "admin"})
+
+    user = await service.verify_token(token)
+    again = await service.verify_token(sign(key, o={"id": "org_2", "slg": "other", "rol": "member"}))
+
+    assert user["email"] == "ada@example.com"
+    assert (user["org_id"], user["org_slug"], user["org_role"]) == ("org_1", "acme", "admin")
+    assert again["org_id"] == "org_2"
+    assert client.users.get_async.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_returns_none_without_profile_lookup(service, client):
+    assert await service.verify_token("not-a-jwt") is None
+    client.users.get_async.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_user_updated_webhook_invalidates_profile(service, client, key, monkeypatch):
+    monkeypatch.setattr("app.routers.clerk_webhooks.clerk_service", service)
+    await service.verify_token(sign(key))
+
+    db = AsyncMock()
+    db.execute.return_value.scalar_one_or_none = lambda: None
+    await handle_user_updated(db, {"id": "user_1"})
+    await service.verify_token(sign(key))
+
+    assert client.users.get_async.await_count == 2
+    assert service.get_stats()["profile_cache"]["invalidations"] == 1
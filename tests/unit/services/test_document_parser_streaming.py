@@ -0,0 +1,111 @@
+import logging
+import os
+import pytest
+
+pymupdf = pytest.importorskip("pymupdf")
+
+from app.services.document_parser_service import DocumentParserService
+from app.services.extraction_executor import extraction_executor
+
+
+def make_pdf(page_count: int) -> bytes:
+    doc = pymupdf.open()
+    for number in range(page_count):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {number + 1} troubleshooting notes")
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+@pytest.fixture
+def parser_service():
+    service = DocumentParserService()
+    service.settings = service.settings.model_copy(update={"pdf_page_batch_size": 4})
+    return service
+
+
+@pytest.mark.asyncio
+async def test_stream_pdf_pages_yields_all_pages_in_order(parser_service):
+    """Pages come back in document order across page-range batches."""
+    content = make_pdf(10)
+
+    pages = [page async for page in parser_service.stream_pdf_pages(content, ["TEXT"])]
+
+    assert [page["page_number"] for page in pages] == list(range(1, 11))
+    assert "Page 7 troubleshooting notes" in pages[6]["text"]
+
+
+@pytest.mark.asyncio
+async def test_stream_pdf_pages_stops_extracting_when_consumer_stops(parser_service):
+    """Breaking out early skips extraction of the remaining page ranges."""
+    content = make_pdf(40)
+    jobs_before = extraction_executor.stats["thread_jobs"] + extraction_executor.stats["process_jobs"]
+
+    stream = parser_service.stream_pdf_pages(content, ["TEXT"])
+    consumed = []
+    async for page in stream:
+        consumed.append(page)
+        if len(consumed) == 3:
+            break
+    await stream.aclose()
+
+    jobs = extraction_executor.stats["thread_jobs"] + extraction_executor.stats["process_jobs"] - jobs_before
+    # Page count plus the first batch (at most one range in flight for small PDFs)
+    assert len(consumed) == 3
+    assert jobs <= 3
+
+
+@pytest.mark.asyncio
+async def test_analyze_pdf_does_not_log_page_text(parser_service, caplog):
+    """Full page text is never written to the logs."""
+    content = make_pdf(2)
+
+    with caplog.at_level(logging.DEBUG, logger="app.services.document_parser_service"):
+        result = await parser_service.analyze_document(content, ["TEXT"])
+
+    assert result["metadata"]["total_pages"] == 2
+    assert "troubleshooting notes" not in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_empty_pages_are_rendered_in_the_extraction_job(parser_service):
+    """Pages without text come back with an OCR-ready image from the same job."""
+    doc = pymupdf.open()
+    doc.new_page().insert_text((72, 72), "Typed page")
+    doc.new_page().draw_rect(pymupdf.Rect(72, 72, 200, 200), fill=(0, 0, 0))  # scanned-style, no text
+    content = doc.tobytes()
+    doc.close()
+    jobs_before = extraction_executor.stats["thread_jobs"] + extraction_executor.stats["process_jobs"]
+
+    pages = [page async for page in parser_service.stream_pdf_pages(
+        content, ["TEXT"], page_count=2, render_empty_pages=True
+    )]
+
+    assert "image" not in pages[0]
+    assert pages[1]["image"].startswith(b"\x89PNG")
+    assert extraction_executor.stats["thread_jobs"] + extraction_executor.stats["process_jobs"] - jobs_before == 1
+
+
+@pytest.mark.asyncio
+async def test_process_pool_jobs_read_the_pdf_from_a_temp_file(parser_service, monkeypatch):
+    """Page-range jobs get a file path, not a pickled copy of the whole PDF."""
+    content = make_pdf(10)
+    sources = []
+    run = extraction_executor.run
+
+    async def spy(func, source, *args, **kwargs):
+        sources.append(source)
+        return await run(func, source, *args, **kwargs)
+
+    monkeypatch.setattr(extraction_executor, "process_min_bytes", 0)
+    monkeypatch.setattr(extraction_executor, "run", spy)
+    try:
+        pages = [page async for page in parser_service.stream_pdf_pages(content, ["TEXT"], page_count=10)]
+    finally:
+        extraction_executor.shutdown()
+
+    assert [page["page_number"] for page in pages] == list(range(1, 11))
+    assert len(sources) == 3 and len(set(sources)) == 1
+    assert isinstance(sources[0], str)
+    assert not os.path.exists(sources[0])
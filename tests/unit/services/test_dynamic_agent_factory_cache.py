@@ -0,0 +1,152 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import MagicMock, patch
+from app.services.dynamic_agent_factory import AgentCache, DynamicAgentFactory
+
+
+def create_agent_model(prompt="You are helpful.", tools=None):
+    agent_model = MagicMock()
+    agent_model.id = uuid.uuid4()
+    agent_model.is_ready = True
+    agent_model.prompt = prompt
+    agent_model.model_provider = "openai"
+    agent_model.model_name = "primary"
+    agent_model.get_configuration.side_effect = lambda: {"prompt": agent_model.prompt, "tools": tools or []}
+    return agent_model
+
+
+@pytest.fixture
+def factory(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    return DynamicAgentFactory()
+
+
+@pytest.mark.asyncio
+async def test_create_agent_reuses_cached_agent(factory):
+    """Second turn on the same agent config and principal reuses the built agent."""
+    agent_model = create_agent_model()
+    
+    agent1 = await factory.create_agent(agent_model)
+    agent2 = await factory.create_agent(agent_model)
+    
+    assert agent1 is not None
+    assert agent1 is agent2
+    stats = factory.get_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_config_change_builds_new_agent(factory):
+    """Changing the agent configuration produces a new cache key."""
+    agent_model = create_agent_model()
+    
+    agent1 = await factory.create_agent(agent_model)
+    agent_model.prompt = "You are a billing specialist."
+    agent2 = await factory.create_agent(agent_model)
+    
+    assert agent1 is not agent2
+
+
+def create_principal(token="token-1", roles=("member",), user_id="user-a"):
+    return SimpleNamespace(
+        user_id=user_id, organization_id="org-1", roles=list(roles), permissions=["tickets:read"], api_token=token
+    )
+
+
+@pytest.mark.asyncio
+async def test_agent_is_shared_between_principals(factory):
+    """The built agent holds no principal state, so every caller reuses it."""
+    agent_model = create_agent_model()
+    
+    agent_a = await factory.create_agent(agent_model, create_principal(user_id="user-a"))
+    agent_b = await factory.create_agent(agent_model, create_principal(user_id="user-b", roles=("admin",)))
+    
+    assert agent_a is agent_b
+
+
+def test_toolsets_are_built_per_run_with_the_current_token(factory):
+    """Cached agents hold no MCP toolset; each run gets one for the caller's token."""
+    agent_model = create_agent_model(tools=["list_tickets"])
+    principal = create_principal(token="token-2")
+    
+    with patch("app.services.dynamic_agent_factory.mcp_client") as client:
+        toolsets = factory.get_toolsets(agent_model, principal)
+    
+    client.create_agent_toolset.assert_called_once_with(
+        agent_id=str(agent_model.id),
+        tools=["list_tickets"],
+        principal=principal,
+        tool_list_cache=factory._tool_list_cache,
+        tool_list_key=factory._get_tool_list_key(agent_model, principal)
+    )
+    assert toolsets == [client.create_agent_toolset.return_value]
+
+
+def test_tool_list_key_follows_scope_not_token(factory):
+    """Discovered tools are shared across rotated tokens but not across users or roles."""
+    agent_model = create_agent_model(tools=["list_tickets"])
+    
+    key1 = factory._get_tool_list_key(agent_model, create_principal(token="token-1"))
+    key2 = factory._get_tool_list_key(agent_model, create_principal(token="token-2"))
+    key3 = factory._get_tool_list_key(agent_model, create_principal(token="token-2", roles=("admin",)))
+    key4 = factory._get_tool_list_key(agent_model, create_principal(user_id="user-b"))
+    
+    assert key1 == key2
+    assert key3 != key1
+    assert key4 != key1
+
+
+@pytest.mark.asyncio
+async def test_cached_tools_server_lists_tools_once(factory):
+    """Later runs' toolsets serve tools/list from the cache instead of the MCP server."""
+    from mcp_client.client import CachedToolsMCPServer, MCPServerStreamableHTTP
+    
+    listed = []
+    
+    async def list_tools(server):
+        listed.append(server)
+        return ["tool-def"]
+    
+    key = ("agent", "v1", "scope")
+    with patch.object(MCPServerStreamableHTTP, "list_tools", list_tools):
+        for token in ("token-1", "token-2"):
+            server = CachedToolsMCPServer("http://mcp/mcp/", headers={"Authorization": f"Bearer {token}"})
+            server.tool_list_cache = factory._tool_list_cache
+            server.tool_list_key = key
+            assert await server.list_tools() == ["tool-def"]
+    
+    assert len(listed) == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_agent_drops_entries(factory):
+    """Explicit invalidation forces a rebuild."""
+    agent_model = create_agent_model()
+    
+    agent1 = await factory.create_agent(agent_model)
+    assert factory.invalidate_agent(agent_model.id) == 1
+    agent2 = await factory.create_agent(agent_model)
+    
+    assert agent1 is not agent2
+
+
+def test_agent_cache_ttl_and_lru_eviction():
+    """Entries expire after the TTL and the LRU bound is enforced."""
+    cache = AgentCache(max_size=2, ttl_seconds=10)
+    
+    with patch("app.services.dynamic_agent_factory.time.monotonic", return_value=100.0):
+        cache.set(("a", "v1", "p"), "agent-a")
+        cache.set(("b", "v1", "p"), "agent-b")
+        assert cache.get(("a", "v1", "p")) == "agent-a"
+        cache.set(("c", "v1", "p"), "agent-c")  # evicts least recently used "b"
+        assert cache.get(("b", "v1", "p")) is None
+    
+    with patch("app.services.dynamic_agent_factory.time.monotonic", return_value=111.0):
+        assert cache.get(("a", "v1", "p")) is None
+    
+    stats = cache.get_stats()
+    assert stats["evictions"] == 2
+    assert stats["size"] == 1
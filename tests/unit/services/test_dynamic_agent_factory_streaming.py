@@ -0,0 +1,101 @@
+import json
+import uuid
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from pydantic_ai import Agent as PydanticAgent
+from pydantic_ai.messages import ModelMessage, ToolReturnPart
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+from app.services.dynamic_agent_factory import dynamic_agent_factory
+from app.schemas.ai_response import ChatResponse, AgentContext
+from app.schemas.principal import Principal
+
+
+def _agent_model():
+    agent_model = MagicMock()
+    agent_model.id = uuid.uuid4()
+    agent_model.max_iterations = 5
+    return agent_model
+
+
+def _output_tool_deltas(tool_name: str, content: str):
+    """Split a final_result tool call into several partial JSON deltas."""
+    args = json.dumps({"content": content, "confidence": 0.9})
+    for i in range(0, len(args), 7):
+        # The tool name is only sent with the first delta, as real providers do
+        yield {0: DeltaToolCall(name=tool_name if i == 0 else None, json_args=args[i:i + 7], tool_call_id="out-1")}
+
+
+async def _collect(agent):
+    with patch.object(dynamic_agent_factory, 'create_agent', AsyncMock(return_value=agent)), \
+         patch.object(dynamic_agent_factory, 'get_toolsets', MagicMock(return_value=[])), \
+         patch('app.services.dynamic_agent_factory.agent_service') as mock_agent_service:
+        mock_agent_service.record_agent_usage = AsyncMock()
+        return [
+            event async for event in dynamic_agent_factory.stream_message_with_agent(
+                agent_model=_agent_model(),
+                message="Hello",
+                context=AgentContext(user_input="Hello")
+            )
+        ]
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_incremental_output_content():
+    """Structured output content is streamed as deltas before the run finishes."""
+    
+    async def stream_function(messages: list[ModelMessage], info: AgentInfo):
+        for delta in _output_tool_deltas(info.output_tools[0].name, "Your ticket has been created successfully."):
+            yield delta
+    
+    agent = PydanticAgent(FunctionModel(stream_function=stream_function), deps_type=Principal, output_type=ChatResponse)
+    events = await _collect(agent)
+    
+    deltas = [e["delta"] for e in events if e["type"] == "text_delta"]
+    assert len(deltas) > 1
+    assert "".join(deltas) == "Your ticket has been created successfully."
+    
+    assert events[-1]["type"] == "final"
+    assert events[-1]["response"].content == "Your ticket has been created successfully."
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_tool_calls_and_results():
+    """Function tool calls produce tool_call and tool_result events in order."""
+    
+    async def stream_function(messages: list[ModelMessage], info: AgentInfo):
+        already_called = any(
+            isinstance(part, ToolReturnPart) for msg in messages for part in getattr(msg, 'parts', [])
+        )
+        if not already_called:
+            yield {0: DeltaToolCall(name="lookup_ticket", json_args='{"ticket_id": "T-1"}', tool_call_id="call-1")}
+        else:
+            for delta in _output_tool_deltas(info.output_tools[0].name, "Ticket T-1 is open."):
+                yield delta
+    
+    agent = PydanticAgent(FunctionModel(stream_function=stream_function), deps_type=Principal, output_type=ChatResponse)
+    
+    @agent.tool_plain
+    def lookup_ticket(ticket_id: str) -> str:
+        return f"{ticket_id}: open"
+    
+    events = await _collect(agent)
+    types = [e["type"] for e in events]
+    
+    assert types.index("tool_call") < types.index("tool_result") < types.index("text_delta")
+    tool_result = next(e for e in events if e["type"] == "tool_result")
+    assert tool_result["tool_name"] == "lookup_ticket"
+    assert tool_result["content"] == "T-1: open"
+    
+    final = events[-1]["response"]
+    assert final.content == "Ticket T-1 is open."
+    assert "lookup_ticket" in final.tools_used
+
+
+@pytest.mark.asyncio
+async def test_stream_returns_fallback_when_agent_unavailable():
+    """A missing agent yields a single final fallback event."""
+    events = await _collect(None)
+    
+    assert len(events) == 1
+    assert events[0]["type"] == "final"
+    assert events[0]["response"].requires_escalation is True
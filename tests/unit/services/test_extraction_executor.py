@@ -0,0 +1,157 @@
+import asyncio
+import time
+import pytest
+from app.services.extraction_executor import ExtractionExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = ExtractionExecutor()
+    executor.max_concurrency = 2
+    executor.timeout_seconds = 5
+    executor.process_min_bytes = 1024
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_small_payload_runs_in_thread(executor):
+    """Payloads below the threshold skip the process pool."""
+    result = await executor.run(len, b"x" * 10, payload_size=10)
+
+    assert result == 10
+    assert executor.stats["thread_jobs"] == 1
+    assert executor.stats["process_jobs"] == 0
+    assert executor._pool is None
+
+
+@pytest.mark.asyncio
+async def test_large_payload_runs_in_process_pool(executor):
+    """Payloads at or above the threshold are routed to the process pool."""
+    payload = b"x" * 4096
+    result = await executor.run(len, payload, payload_size=len(payload))
+
+    assert result == 4096
+    assert executor.stats["process_jobs"] == 1
+    assert executor._pool is not None
+
+
+@pytest.mark.asyncio
+async def test_timeout_raises_and_is_counted(executor):
+    """A job exceeding its timeout raises TimeoutError without blocking the loop."""
+    with pytest.raises(TimeoutError):
+        await executor.run(time.sleep, 0.5, timeout=0.05)
+
+    assert executor.stats["timeouts"] == 1
+    assert executor.stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_limits_parallel_jobs(executor):
+    """No more than max_concurrency jobs run at once."""
+    executor.max_concurrency = 1
+    active = 0
+    peak = 0
+
+    def job():
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        time.sleep(0.05)
+        active -= 1
+        return True
+
+    results = await asyncio.gather(*[executor.run(job) for _ in range(3)])
+
+    assert results == [True, True, True]
+    assert peak == 1
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_during_extraction(executor):
+    """Other coroutines keep running while an extraction job is busy."""
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    await executor.run(time.sleep, 0.2)
+    task.cancel()
+
+    assert ticks >= 5
+
+
+@pytest.mark.asyncio
+async def test_timeout_only_fails_the_job_that_timed_out(executor):
+    """A stuck process job doesn't cancel other jobs queued on the same pool."""
+    executor.max_workers = 2
+    payload_size = executor.process_min_bytes
+    # Warm up both workers so spawn time doesn't count against the timeouts below
+    await asyncio.gather(*[executor.run(time.sleep, 0.3, payload_size=payload_size, timeout=30) for _ in range(2)])
+    old_pool = executor._pool
+    workers = list(executor._pool_processes[old_pool])
+
+    executor.max_concurrency = 4
+    stuck, *finished = await asyncio.gather(
+        executor.run(time.sleep, 30, payload_size=payload_size, timeout=0.3),
+        executor.run(time.sleep, 1.0, payload_size=payload_size, timeout=30),
+        # Queued behind the busy workers when the pool is retired
+        executor.run(time.sleep, 0.1, payload_size=payload_size, timeout=30),
+        executor.run(time.sleep, 0.1, payload_size=payload_size, timeout=30),
+        return_exceptions=True
+    )
+
+    assert isinstance(stuck, TimeoutError)
+    assert finished == [None, None, None]
+    assert executor.stats["timeouts"] == 1
+    assert executor.stats["pool_restarts"] == 1
+
+    # Once nobody waits on the retired pool its stuck worker is terminated
+    for _ in range(50):
+        if not any(worker.is_alive() for worker in workers):
+            break
+        await asyncio.sleep(0.1)
+    assert not any(worker.is_alive() for worker in workers)
+    assert await executor.run(len, b"x" * payload_size, payload_size=payload_size) == payload_size
+    assert executor._pool is not old_pool
+
+
+@pytest.mark.asyncio
+async def test_timed_out_thread_job_keeps_its_slot_until_it_finishes(executor):
+    """Threads can't be interrupted, so the concurrency cap still counts them."""
+    executor.max_concurrency = 1
+    start = time.monotonic()
+
+    with pytest.raises(TimeoutError):
+        await executor.run(time.sleep, 0.3, timeout=0.05)
+    assert executor.stats["abandoned"] == 1
+
+    await executor.run(len, b"x")
+    assert time.monotonic() - start >= 0.3
+    assert executor.stats["abandoned"] == 0
+
+
+@pytest.mark.asyncio
+async def test_serial_thread_jobs_never_overlap(executor):
+    """Jobs calling into non-thread-safe libraries (PyMuPDF) share one thread."""
+    executor.max_concurrency = 4
+    active = 0
+    peak = 0
+
+    def job():
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        time.sleep(0.05)
+        active -= 1
+        return True
+
+    results = await asyncio.gather(*[executor.run(job, serial=True) for _ in range(4)])
+
+    assert results == [True] * 4
+    assert peak == 1
+    assert executor.stats["serial_jobs"] == 4
@@ -0,0 +1,132 @@
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.dml import Update
+
+from app.models.file import FileStatus
+from app.services.file_cleanup_service import FileCleanupService
+from app.utils.pagination import InvalidCursorError
+
+
+def compile_pg(statement):
+    return statement.compile(dialect=postgresql.dialect())
+
+
+def batch_rows(*orphaned_flags, status=FileStatus.PROCESSED):
+    return [
+        SimpleNamespace(
+            id=uuid.UUID(int=index + 1), filename=f"file-{index}.png", file_size=100, status=status, orphaned=orphaned
+        )
+        for index, orphaned in enumerate(orphaned_flags)
+    ]
+
+
+def rows_result(rows):
+    result = MagicMock()
+    result.all.return_value = rows
+    return result
+
+
+def update_result(rowcount, first_id=1):
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = [uuid.UUID(int=first_id + index) for index in range(rowcount)]
+    return result
+
+
+@pytest.fixture
+def db():
+    return AsyncMock()
+
+
+@pytest.mark.asyncio
+async def test_dry_run_reports_orphans_without_deleting(db):
+    db.execute.side_effect = [rows_result(batch_rows(True, False)), rows_result(batch_rows(True))]
+
+    report = await FileCleanupService().scan_orphaned_files(db, uuid.uuid4(), dry_run=True, batch_size=2)
+
+    assert report.files_scanned == 3
+    assert report.orphaned_files == 2
+    assert report.orphaned_bytes == 200
+    assert report.batches == 2
+    assert report.completed
+    assert len(report.orphan_samples) == 2
+    assert not any(isinstance(call.args[0], Update) for call in db.execute.call_args_list)
+    db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_scan_is_one_anti_join_per_batch_scoped_to_the_organization(db):
+    organization_id = uuid.uuid4()
+    db.execute.return_value = rows_result([])
+
+    await FileCleanupService().scan_orphaned_files(db, organization_id, batch_size=50)
+
+    compiled = compile_pg(db.execute.call_args.args[0])
+    sql = str(compiled)
+    assert "CAST(messages.attachments AS JSONB) @>" in sql
+    assert "CAST(tickets.attachments AS JSONB) @>" in sql
+    assert "threads.organization_id" in sql and "tickets.organization_id" in sql
+    assert "LIMIT" in sql and "ORDER BY files.id" in sql
+    assert compiled.params["param_1"] == 50
+    assert organization_id in compiled.params.values()
+
+
+@pytest.mark.asyncio
+async def test_bounded_run_resumes_from_cursor(db):
+    service = FileCleanupService()
+    first_batch = batch_rows(False, True)
+    db.execute.return_value = rows_result(first_batch)
+
+    first = await service.scan_orphaned_files(db, uuid.uuid4(), batch_size=2, max_batches=1)
+
+    assert first.batches == 1
+    assert not first.completed
+
+    db.execute.reset_mock()
+    db.execute.return_value = rows_result([])
+    second = await service.scan_orphaned_files(db, uuid.uuid4(), cursor=first.next_cursor, batch_size=2)
+
+    assert second.completed
+    params = compile_pg(db.execute.call_args.args[0]).params
+    assert first_batch[-1].id in params.values()
+
+
+@pytest.mark.asyncio
+async def test_cleanup_soft_deletes_and_commits_each_batch(db):
+    db.execute.side_effect = [
+        rows_result(batch_rows(True, True)), update_result(2),
+        rows_result(batch_rows(False, True)), update_result(1, first_id=2),
+        rows_result([]),
+    ]
+
+    report = await FileCleanupService().scan_orphaned_files(db, uuid.uuid4(), dry_run=False, batch_size=2)
+
+    assert report.orphaned_files == 3
+    assert report.files_deleted == 3
+    assert db.commit.await_count == 2
+    update_sql = str(compile_pg(db.execute.call_args_list[1].args[0]))
+    assert update_sql.startswith("UPDATE files SET status=")
+    assert "NOT ((EXISTS" in update_sql  # references re-checked at delete time
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_is_rejected(db):
+    with pytest.raises(InvalidCursorError):
+        await FileCleanupService().scan_orphaned_files(db, uuid.uuid4(), cursor="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_cleanup_revokes_processing_of_deleted_pending_files(db):
+    # Two pending orphans, but only the first is still unreferenced at delete time
+    db.execute.side_effect = [rows_result(batch_rows(True, True, status=FileStatus.PROCESSING)), update_result(1)]
+    cancellation = MagicMock()
+    cancellation.return_value.cancel_files_processing_tasks.return_value = {"total_cancelled": 1}
+
+    with patch("app.services.task_cancellation_service.TaskCancellationService", cancellation):
+        report = await FileCleanupService().scan_orphaned_files(db, uuid.uuid4(), dry_run=False, batch_size=5)
+
+    assert report.files_deleted == 1
+    cancellation.return_value.cancel_files_processing_tasks.assert_called_once_with([str(uuid.UUID(int=1))])
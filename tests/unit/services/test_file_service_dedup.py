@@ -0,0 +1,172 @@
+import uuid
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.exc import IntegrityError
+from app.models.file import File, FileStatus, FileType
+from app.services import file_service as file_service_module
+from app.services.file_service import DuplicateFileError, FileService, get_dedup_stats
+
+
+def query_result(value):
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = value
+    return result
+
+
+@pytest.fixture
+def db():
+    session = AsyncMock()
+    session.add = MagicMock()
+    return session
+
+
+@pytest.fixture
+def service():
+    service = FileService()
+    service.storage_service = MagicMock()
+    service.storage_service.upload_content = AsyncMock(return_value="http://example.com/file")
+    service.storage_service.file_exists = AsyncMock(return_value=False)
+    service.storage_service.delete_file = AsyncMock(return_value=True)
+    return service
+
+
+@pytest.fixture(autouse=True)
+def reset_stats(monkeypatch):
+    monkeypatch.setattr(file_service_module, "_dedup_stats", {
+        "uploads": 0, "blob_reuses": 0, "extraction_reuses": 0, "bytes_saved": 0
+    })
+
+
+def processed_file(organization_id):
+    source = File()
+    source.id = uuid.uuid4()
+    source.organization_id = organization_id
+    source.file_path = f"attachments/{organization_id}/ab/abc123"
+    source.file_type = FileType.IMAGE
+    source.status = FileStatus.PROCESSED
+    source.extracted_context = {"image": {"description": "login error dialog"}}
+    source.extraction_method = "vision_ocr"
+    source.content_summary = "Screenshot of a login error"
+    source.language_detection = "en"
+    return source
+
+
+@pytest.mark.asyncio
+async def test_duplicate_content_reuses_blob_and_extraction(db, service):
+    """Identical content in the organization skips storage and processing."""
+    organization_id = uuid.uuid4()
+    source = processed_file(organization_id)
+    # Same-uploader lookup finds nothing, org-wide dedup lookup finds the processed file
+    db.execute.side_effect = [query_result(None), query_result(source)]
+
+    new_file = await service.create_file_record(
+        db=db,
+        filename="screenshot.png",
+        mime_type="image/png",
+        file_size=2048,
+        file_content=b"png bytes",
+        uploaded_by_id=uuid.uuid4(),
+        organization_id=organization_id
+    )
+
+    service.storage_service.upload_content.assert_not_called()
+    assert new_file.file_path == source.file_path
+    assert new_file.status == FileStatus.PROCESSED
+    assert new_file.extracted_context == source.extracted_context
+    assert new_file.content_summary == source.content_summary
+
+    stats = get_dedup_stats()
+    assert stats["blob_reuses"] == 1
+    assert stats["extraction_reuses"] == 1
+    assert stats["bytes_saved"] == 2048
+    assert stats["dedup_hit_rate"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_new_content_is_stored_under_content_address(db, service):
+    """Unseen content is uploaded once under an org-scoped hash key."""
+    organization_id = uuid.uuid4()
+    db.execute.side_effect = [query_result(None), query_result(None)]
+
+    new_file = await service.create_file_record(
+        db=db,
+        filename="app.log",
+        mime_type="text/plain",
+        file_size=9,
+        file_content=b"log lines",
+        uploaded_by_id=uuid.uuid4(),
+        organization_id=organization_id
+    )
+
+    service.storage_service.upload_content.assert_awaited_once()
+    assert new_file.file_path == f"attachments/{organization_id}/{new_file.file_hash[:2]}/{new_file.file_hash}"
+    assert new_file.status == FileStatus.UPLOADED
+    assert get_dedup_stats()["blob_reuses"] == 0
+
+
+@pytest.mark.asyncio
+async def test_hard_delete_keeps_blob_shared_by_other_files(db, service):
+    """A blob referenced by another upload is not removed from storage."""
+    db_file = processed_file(uuid.uuid4())
+    db_file.uploaded_by_id = uuid.uuid4()
+    service.get_file = AsyncMock(return_value=db_file)
+    db.scalar = AsyncMock(return_value=1)
+
+    deleted = await service.delete_file(db, db_file.id, db_file.uploaded_by_id, hard_delete=True)
+
+    assert deleted is True
+    service.storage_service.delete_file.assert_not_called()
+    db.delete.assert_awaited_once_with(db_file)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicate_upload_is_reported_as_duplicate(db, service):
+    """Losing the insert race on the uploader/hash index surfaces as a duplicate, not a 500."""
+    organization_id = uuid.uuid4()
+    winner = processed_file(organization_id)
+    db.execute.side_effect = [query_result(None), query_result(None), query_result(winner)]
+    db.commit.side_effect = IntegrityError("INSERT INTO files", {}, Exception("uq_files_org_uploader_hash"))
+
+    with pytest.raises(DuplicateFileError) as exc_info:
+        await service.create_file_record(
+            db=db,
+            filename="app.log",
+            mime_type="text/plain",
+            file_size=9,
+            file_content=b"log lines",
+            uploaded_by_id=uuid.uuid4(),
+            organization_id=organization_id
+        )
+
+    db.rollback.assert_awaited_once()
+    assert exc_info.value.existing_file_id == winner.id
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("references, deleted", [(0, True), (1, False)])
+async def test_losing_insert_race_discards_unreferenced_blob(db, service, references, deleted):
+    """A blob stored for the losing row is removed unless another file row points at it."""
+    organization_id = uuid.uuid4()
+    winner = processed_file(organization_id)
+    winner.file_path = "attachments/2024/05/legacy-upload.png"
+    db.execute.side_effect = [query_result(None), query_result(None), query_result(winner)]
+    db.commit.side_effect = IntegrityError("INSERT INTO files", {}, Exception("uq_files_org_uploader_hash"))
+    db.scalar = AsyncMock(return_value=references)
+
+    with pytest.raises(DuplicateFileError):
+        await service.create_file_record(
+            db=db,
+            filename="app.log",
+            mime_type="text/plain",
+            file_size=9,
+            file_content=b"log lines",
+            uploaded_by_id=uuid.uuid4(),
+            organization_id=organization_id
+        )
+
+    storage_key = service.storage_service.upload_content.call_args.kwargs["storage_key"]
+    assert storage_key != winner.file_path
+    if deleted:
+        service.storage_service.delete_file.assert_awaited_once_with(storage_key)
+    else:
+        service.storage_service.delete_file.assert_not_called()
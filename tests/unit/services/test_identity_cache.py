@@ -0,0 +1,187 @@
+"""
+Authenticated requests resolve users from the identity cache instead of
+rewriting the user row on every call.
+
+A dict-backed Redis stand-in is shared between cache instances, which play
+the part of separate API processes.
+"""
+
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401 - register related tables for the User foreign keys
+from app.middleware.auth_middleware import AuthMiddleware
+from app.models.organization import Organization
+from app.models.user import User
+from app.services.identity_cache_service import IdentityCacheService
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.values[key] = value
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+
+@pytest.fixture
+def engine(make_engine):
+    return make_engine(Organization, User)
+
+
+@pytest.fixture
+def shared_redis():
+    return FakeRedis()
+
+
+def make_cache(shared_redis):
+    cache = IdentityCacheService()
+    cache._redis_client = shared_redis
+    return cache
+
+
+@pytest.fixture
+def cache(shared_redis):
+    return make_cache(shared_redis)
+
+
+@pytest.fixture
+def identity(engine):
+    with Session(engine, expire_on_commit=False) as session:
+        org = Organization(id=uuid.uuid4(), name="Acme", clerk_organization_id="org_1", is_enabled=True)
+        user = User(
+            id=uuid.uuid4(), email="ada@example.com", full_name="Ada Lovelace", clerk_id="user_1",
+            organization_id=org.id, login_count="3", failed_login_attempts="0"
+        )
+        session.add_all([org, user])
+        session.commit()
+        return user, org
+
+
+def claims(**overrides):
+    return {
+        "clerk_id": "user_1", "email": "ada@example.com", "full_name": "Ada Lovelace",
+        "image_url": None, "org_id": "org_1", "org_slug": "acme", "org_role": "admin", **overrides
+    }
+
+
+@pytest.mark.asyncio
+async def test_local_hit_returns_detached_copies_without_database(cache, identity, db_factory, db_calls):
+    user, org = identity
+    await cache.store(claims(), user, org)
+
+    first_user, first_org = await cache.resolve(claims(), db_factory)
+    second_user, _ = await cache.resolve(claims(), db_factory)
+
+    assert db_calls == []
+    assert (first_user.id, first_user.email, first_org.name) == (user.id, "ada@example.com", "Acme")
+    assert first_user is not second_user
+    assert cache.get_stats()["local_hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_changed_claims_force_a_resync(cache, identity, db_factory):
+    await cache.store(claims(), *identity)
+
+    assert await cache.resolve(claims(org_role="basic_member"), db_factory) is None
+    assert await cache.resolve(claims(email="ada@new.example.com"), db_factory) is None
+    assert cache.get_stats()["stale_claims"] == 2
+
+
+@pytest.mark.asyncio
+async def test_other_process_resolves_through_redis_with_primary_key_reads(cache, shared_redis, identity, db_factory, db_calls):
+    await cache.store(claims(), *identity)
+    other_process = make_cache(shared_redis)
+
+    user, org = await other_process.resolve(claims(), db_factory)
+    await other_process.resolve(claims(), db_factory)
+
+    assert user.id == identity[0].id and org.id == identity[1].id
+    assert db_calls == [("get", "User"), ("get", "Organization")]
+    assert other_process.get_stats()["redis_hits"] == 1
+    assert other_process.get_stats()["local_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_clears_both_tiers(cache, shared_redis, identity, db_factory):
+    await cache.store(claims(), *identity)
+
+    await cache.invalidate("user_1")
+
+    assert await cache.resolve(claims(), db_factory) is None
+    assert await make_cache(shared_redis).resolve(claims(), db_factory) is None
+
+
+@pytest.mark.asyncio
+async def test_invalidate_organization_drops_local_snapshots(cache, identity, db_factory, db_calls):
+    await cache.store(claims(), *identity)
+
+    cache.invalidate_organization(identity[1].id)
+    await cache.resolve(claims(), db_factory)
+
+    assert ("get", "Organization") in db_calls
+
+
+@pytest.mark.asyncio
+async def test_logins_are_coalesced_into_one_batched_update(cache, engine, identity, db_factory, db_calls):
+    user, _ = identity
+    cache.login_writer.flush_seconds = 3600
+    for _ in range(5):
+        cache.record_login(user.id)
+    cache.record_login(uuid.uuid4())  # unknown users are skipped by the UPDATE
+
+    with patch("app.database.AsyncSessionLocal", db_factory):
+        assert await cache.flush_logins() == 2
+        assert await cache.flush_logins() == 0
+    cache.login_writer._flush_task.cancel()
+
+    assert db_calls == [("execute", 2)]
+    with Session(engine) as session:
+        stored = session.execute(select(User).where(User.id == user.id)).scalar_one()
+        assert stored.login_count == "8"
+        assert stored.last_login_at is not None
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_counts_for_the_next_one(cache, identity):
+    user, _ = identity
+    cache.login_writer.flush_seconds = 3600
+    cache.record_login(user.id)
+    cache.record_login(user.id)
+    cache.login_writer._flush_task.cancel()
+
+    broken = MagicMock(side_effect=RuntimeError("database down"))
+    with patch("app.database.AsyncSessionLocal", broken), pytest.raises(RuntimeError):
+        await cache.flush_logins()
+
+    assert cache.login_writer.pending[user.id][1] == 2
+
+
+@pytest.mark.asyncio
+async def test_middleware_syncs_once_then_serves_requests_from_cache(cache, identity, db_factory):
+    middleware = AuthMiddleware()
+    middleware._sync_local_user = AsyncMock(return_value=identity)
+    request = MagicMock()
+    cache.login_writer.flush_seconds = 3600
+
+    with patch("app.middleware.auth_middleware.clerk_service.verify_token", AsyncMock(return_value=claims())), \
+         patch("app.middleware.auth_middleware.identity_cache", cache), \
+         patch("app.middleware.auth_middleware.AsyncSessionLocal", db_factory):
+        for _ in range(3):
+            user = await middleware._validate_clerk_token("token", request)
+            assert user.id == identity[0].id
+    cache.login_writer._flush_task.cancel()
+
+    middleware._sync_local_user.assert_awaited_once()
+    assert request.state.organization_id == identity[1].id
+    assert cache.login_writer.pending[identity[0].id][1] == 3
@@ -0,0 +1,370 @@
+"""
+Principal resolution through the two-tier cache shared by the API auth
+dependency and the MCP principal injection middleware.
+
+Token validation is mocked; two PrincipalService instances sharing a
+dict-backed Redis stand-in (with pub/sub) play separate processes.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.middleware.auth_middleware import AuthMiddleware
+from app.models.api_token import APIToken
+from app.models.organization import Organization
+from app.models.user import User
+from app.schemas.principal import SessionType
+from app.services.principal_service import (
+    AuthenticatedIdentity,
+    PrincipalService,
+    _collect_disabled_organizations,
+    _invalidate_disabled_organizations,
+    principal_service,
+)
+from mcp_server.middleware.principal_injection import PrincipalInjectionMiddleware
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args) for name, args in self.commands]
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.redis.subscribers.setdefault(channel, []).append(self.queue)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        return await self.queue.get()
+
+    async def aclose(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+        self.subscribers = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.values[key] = value
+
+    async def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    async def expire(self, key, ttl):
+        pass
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.sets.pop(key, None)
+
+    async def publish(self, channel, data):
+        for queue in self.subscribers.get(channel, []):
+            queue.put_nowait({"type": "message", "data": data})
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+
+class FakeSession:
+    """Primary-key lookups against a dict of rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.gets = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def get(self, model, ident):
+        self.gets.append(model.__name__)
+        return self.rows.get((model, ident))
+
+
+@pytest.fixture
+def organization():
+    return Organization(id=uuid.uuid4(), name="Acme", plan="basic", is_enabled=True)
+
+
+@pytest.fixture
+def user(organization):
+    return User(
+        id=uuid.uuid4(), email="ada@example.com", full_name="Ada Lovelace", is_active=True,
+        organization_id=organization.id, login_count="0", failed_login_attempts="0"
+    )
+
+
+@pytest.fixture
+def api_token(user, organization):
+    return APIToken(
+        id=uuid.uuid4(), name="ci", token_hash="a" * 64, user_id=user.id, organization_id=organization.id,
+        permissions=["tickets:read"], is_active=True, expires_at=datetime.now(timezone.utc) + timedelta(days=30)
+    )
+
+
+@pytest.fixture
+def rows(user, organization, api_token):
+    return {(User, user.id): user, (Organization, organization.id): organization, (APIToken, api_token.id): api_token}
+
+
+@pytest.fixture
+def session(rows):
+    return FakeSession(rows)
+
+
+@pytest.fixture
+def shared_redis():
+    return FakeRedis()
+
+
+@pytest_asyncio.fixture
+async def services(shared_redis, session):
+    created = []
+
+    async def make():
+        service = PrincipalService()
+        service._redis_client = shared_redis
+        service._pubsub_client = shared_redis
+        service._authenticate_uncached = AsyncMock()
+        service._ensure_listener()
+        for _ in range(3):
+            await asyncio.sleep(0)  # let the listener subscribe
+        created.append(service)
+        return service
+
+    with patch("app.database.AsyncSessionLocal", lambda: session):
+        yield make
+    for service in created:
+        service._listener_task.cancel()
+
+
+def clerk_identity(user, organization, exp_in=60):
+    exp = int((datetime.now(timezone.utc) + timedelta(seconds=exp_in)).timestamp())
+    claims = {"clerk_id": "user_1", "email": user.email, "org_role": "admin", "exp": exp, "iat": exp - 60, "sid": "sess_1"}
+    return AuthenticatedIdentity(user=user, organization=organization, auth_method="clerk", claims=claims)
+
+
+def token_identity(user, organization, api_token):
+    return AuthenticatedIdentity(
+        user=user, organization=organization, auth_method="api_token",
+        claims={"exp": int(api_token.expires_at.timestamp())}, api_token=api_token
+    )
+
+
+@pytest.mark.asyncio
+async def test_validated_once_then_served_in_process(services, user, organization):
+    service = await services()
+    service._authenticate_uncached.return_value = clerk_identity(user, organization)
+
+    first = await service.authenticate("session-token")
+    second = await service.authenticate("session-token")
+
+    service._authenticate_uncached.assert_awaited_once()
+    assert first.principal.session_id == second.principal.session_id == "sess_1"
+    assert second.user is not first.user and second.user.id == user.id
+    assert second.organization.name == "Acme"
+    assert service.get_stats()["local_hits"] == 1
+    assert service.get_stats()["local_hit_rate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_other_process_hits_redis_and_reloads_rows_by_primary_key(services, session, user, organization):
+    service, other = await services(), await services()
+    service._authenticate_uncached.return_value = clerk_identity(user, organization)
+    await service.authenticate("session-token")
+
+    identity = await other.authenticate("session-token", SessionType.MCP)
+    await other.authenticate("session-token")
+
+    other._authenticate_uncached.assert_not_awaited()
+    assert identity.principal.session_type == SessionType.MCP
+    assert identity.user.email == user.email
+    assert session.gets == ["User", "Organization"]
+    assert other.get_stats()["redis_hits"] == 1
+    assert other.get_stats()["local_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_entries_do_not_outlive_the_session_token(services, shared_redis, user, organization):
+    service = await services()
+    service._authenticate_uncached.return_value = clerk_identity(user, organization, exp_in=-1)
+
+    await service.authenticate("session-token")
+    await service.authenticate("session-token")
+
+    assert service._authenticate_uncached.await_count == 2
+    assert shared_redis.values == {}
+
+
+@pytest.mark.asyncio
+async def test_role_change_invalidates_every_process(services, shared_redis, user, organization):
+    service, other = await services(), await services()
+    service._authenticate_uncached.return_value = clerk_identity(user, organization)
+    other._authenticate_uncached.return_value = clerk_identity(user, organization)
+    await service.authenticate("session-token")
+    await other.authenticate("session-token")
+
+    await service.invalidate_user(user.id)
+    await asyncio.sleep(0)
+
+    assert not shared_redis.values
+    assert other.get_stats()["invalidations_received"] == 1
+    await other.authenticate("session-token")
+    other._authenticate_uncached.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_clerk_profile_change_reaches_every_process(services):
+    service, other = await services(), await services()
+
+    with patch("app.services.clerk_service.clerk_service.invalidate_user_profile") as invalidate_profile:
+        await service.invalidate_clerk_profile("user_clerk_123")
+        await asyncio.sleep(0)
+
+    assert other.get_stats()["invalidations_received"] == 1
+    assert [c.args for c in invalidate_profile.call_args_list] == [("user_clerk_123",)] * 2
+
+
+@pytest.mark.asyncio
+async def test_organization_change_invalidates_members(services, user, organization):
+    service = await services()
+    service._authenticate_uncached.return_value = clerk_identity(user, organization)
+    await service.authenticate("session-token")
+
+    await service.invalidate_organization(organization.id)
+    await service.authenticate("session-token")
+
+    assert service._authenticate_uncached.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_revoked_api_token_is_not_served_from_cache(services, user, organization, api_token):
+    service = await services()
+    service._authenticate_uncached.return_value = token_identity(user, organization, api_token)
+    await service.authenticate("ai_dev_secret")
+
+    await service.invalidate_api_token(api_token.token_hash)
+    service._authenticate_uncached.return_value = None
+
+    assert await service.authenticate("ai_dev_secret") is None
+    assert service.get_stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_entry_for_deactivated_token_falls_back_to_validation(services, user, organization, api_token):
+    service, other = await services(), await services()
+    service._authenticate_uncached.return_value = token_identity(user, organization, api_token)
+    await service.authenticate("ai_dev_secret")
+    api_token.is_active = False  # changed directly in the database, no invalidation
+    other._authenticate_uncached.return_value = None
+
+    assert await other.authenticate("ai_dev_secret") is None
+    other._authenticate_uncached.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_redis_entry_for_disabled_organization_falls_back_to_validation(services, user, organization):
+    service, other = await services(), await services()
+    service._authenticate_uncached.return_value = clerk_identity(user, organization)
+    await service.authenticate("session-token")
+    organization.is_enabled = False  # changed directly in the database, no invalidation
+    other._authenticate_uncached.return_value = None
+
+    assert await other.authenticate("session-token") is None
+    other._authenticate_uncached.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_disabling_an_organization_publishes_an_invalidation(organization):
+    organization.is_enabled = False
+    session = SimpleNamespace(dirty=[organization], info={})
+
+    with patch.object(principal_service, "invalidate_organization", AsyncMock()) as invalidate:
+        _collect_disabled_organizations(session, None, None)
+        _invalidate_disabled_organizations(session)
+        await asyncio.sleep(0)
+
+    invalidate.assert_awaited_once_with(organization.id)
+    assert session.info == {}
+
+
+@pytest.mark.asyncio
+async def test_api_dependency_restores_request_state_from_cache(services, user, organization, api_token):
+    service = await services()
+    service._authenticate_uncached.return_value = token_identity(user, organization, api_token)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="ai_dev_secret")
+
+    with patch("app.middleware.auth_middleware.principal_service", service):
+        for _ in range(2):
+            request = SimpleNamespace(state=SimpleNamespace())
+            authenticated = await AuthMiddleware()(request, credentials)
+
+            assert authenticated.id == user.id
+            assert request.state.organization_id == organization.id
+            assert request.state.user_permissions == ["tickets:read"]
+            assert request.state.api_token.token_hash == api_token.token_hash
+
+    service._authenticate_uncached.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_mcp_middleware_resolves_through_the_same_cache(services, user, organization):
+    service = await services()
+    service._authenticate_uncached.return_value = clerk_identity(user, organization)
+    await service.authenticate("session-token")
+
+    with patch("app.services.principal_service.principal_service", service):
+        args = await PrincipalInjectionMiddleware().process_tool_call(
+            "list_tickets", {}, {"Authorization": "Bearer session-token"}
+        )
+
+    service._authenticate_uncached.assert_awaited_once()
+    assert args["_mcp_context"]["principal"]["user_id"] == str(user.id)
+    assert args["_mcp_context"]["principal"]["session_type"] == SessionType.MCP
+
+
+def test_invalidation_subscription_uses_a_client_without_read_timeout():
+    client = PrincipalService().get_pubsub_client()
+
+    options = client.connection_pool.connection_kwargs
+    assert options["socket_timeout"] is None
+    assert options["socket_keepalive"] is True
+    assert options["health_check_interval"] == PrincipalService.PUBSUB_HEALTH_CHECK_SECONDS
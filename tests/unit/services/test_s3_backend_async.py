@@ -0,0 +1,97 @@
+import threading
+import pytest
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
+from app.services.storage.local_backend import LocalStorageBackend
+from app.services.storage.s3_backend import S3StorageBackend
+
+
+def make_s3_backend(endpoint_url=None):
+    backend = S3StorageBackend.__new__(S3StorageBackend)
+    backend.settings = MagicMock(upload_chunk_size=4, s3_max_pool_connections=2)
+    backend.bucket_name = "bucket"
+    backend.region = "us-east-1"
+    backend.bucket_path = "tenant"
+    backend.cloudfront_domain = None
+    backend.endpoint_url = endpoint_url
+    backend._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="s3-io")
+    backend._presigned_url_cache = OrderedDict()
+    backend.presigned_url_cache_hits = 0
+    backend.presigned_url_cache_misses = 0
+    backend.s3_client = MagicMock()
+    return backend
+
+
+@pytest.mark.asyncio
+async def test_s3_calls_run_on_dedicated_io_pool():
+    """Blocking botocore calls never run on the event loop thread."""
+    backend = make_s3_backend()
+    threads = []
+    backend.s3_client.delete_object.side_effect = lambda **kwargs: threads.append(threading.current_thread().name)
+
+    assert await backend.delete_file("a.txt") is True
+
+    assert threads[0].startswith("s3-io")
+    backend.s3_client.delete_object.assert_called_once_with(Bucket="bucket", Key="tenant/a.txt")
+
+
+@pytest.mark.asyncio
+async def test_s3_download_stream_reads_body_in_chunks_with_range():
+    """Ranged downloads are requested from S3 and yielded chunk by chunk."""
+    backend = make_s3_backend()
+    body = MagicMock(wraps=BytesIO(b"0123456789"))
+    backend.s3_client.get_object.return_value = {"Body": body}
+
+    chunks = [chunk async for chunk in backend.download_stream("a.bin", byte_range=(2, None))]
+
+    assert chunks == [b"0123", b"4567", b"89"]
+    assert backend.s3_client.get_object.call_args.kwargs["Range"] == "bytes=2-"
+    body.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_s3_download_stream_missing_key_raises_file_not_found():
+    backend = make_s3_backend()
+    backend.s3_client.get_object.side_effect = ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+
+    with pytest.raises(FileNotFoundError):
+        async for _ in backend.download_stream("missing"):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_presigned_urls_are_reused_until_near_expiry(monkeypatch):
+    """Repeated signing of the same key returns the cached URL while it is fresh."""
+    backend = make_s3_backend()
+    backend.s3_client.generate_presigned_url.side_effect = ["https://signed/1", "https://signed/2"]
+    now = [1000.0]
+    monkeypatch.setattr("app.services.storage.s3_backend.time.monotonic", lambda: now[0])
+
+    assert await backend.get_file_url("a.png", expires_in=100) == "https://signed/1"
+    now[0] += 50
+    assert await backend.get_file_url("a.png", expires_in=100) == "https://signed/1"
+    now[0] += 40  # only 10% of the lifetime left
+    assert await backend.get_file_url("a.png", expires_in=100) == "https://signed/2"
+
+    stats = backend.get_stats()
+    assert stats["presigned_url_cache_hits"] == 1
+    assert stats["presigned_url_cache_misses"] == 2
+
+
+def test_public_url_uses_custom_endpoint():
+    backend = make_s3_backend(endpoint_url="http://localhost:9000/")
+
+    assert backend._get_public_url("a b.txt") == "http://localhost:9000/bucket/tenant/a%20b.txt"
+
+
+@pytest.mark.asyncio
+async def test_local_download_stream_honours_byte_range(tmp_path):
+    backend = LocalStorageBackend(base_path=str(tmp_path))
+    await backend.upload_file(b"abcdefghij", "doc.txt")
+
+    chunks = [chunk async for chunk in backend.download_stream("doc.txt", chunk_size=3, byte_range=(1, 7))]
+
+    assert chunks == [b"bcd", b"efg", b"h"]
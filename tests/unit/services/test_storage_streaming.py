@@ -0,0 +1,157 @@
+import hashlib
+import uuid
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from PIL import Image
+from unittest.mock import AsyncMock, MagicMock
+from app.services.storage.backend import UploadStream
+from app.services.storage.local_backend import LocalStorageBackend
+from app.services.storage.s3_backend import S3StorageBackend
+from app.services.file_service import FileService
+
+CHUNK = 1024 * 1024
+
+
+async def chunked(content: bytes, size: int = CHUNK):
+    for start in range(0, len(content), size):
+        yield content[start:start + size]
+
+
+@pytest.mark.asyncio
+async def test_upload_stream_hashes_and_sniffs_incrementally():
+    """Hash, size and MIME type are computed while chunks pass through."""
+    image = BytesIO()
+    Image.new("RGB", (64, 64), color="white").save(image, format="PNG")
+    content = image.getvalue() + b"\x00" * 5000
+    stream = UploadStream(chunked(content, 100))
+
+    received = b"".join([chunk async for chunk in stream])
+
+    assert received == content
+    assert stream.size == len(content)
+    assert stream.sha256 == hashlib.sha256(content).hexdigest()
+    assert stream.detected_mime_type == "image/png"
+
+
+@pytest.mark.asyncio
+async def test_upload_stream_rejects_oversized_content():
+    """Size limit is enforced before the oversized chunk is passed on."""
+    stream = UploadStream(chunked(b"x" * 3000, 1000), max_size=2500)
+
+    with pytest.raises(ValueError):
+        async for _ in stream:
+            pass
+
+
+@pytest.mark.asyncio
+async def test_local_upload_stream_and_move(tmp_path):
+    """Local backend streams to disk atomically and promotes with a rename."""
+    backend = LocalStorageBackend(base_path=str(tmp_path))
+    content = b"log line\n" * 200_000
+
+    upload = await backend.upload_stream(chunked(content), "incoming/abc", content_type="text/plain")
+
+    assert upload.size == len(content)
+    assert upload.sha256 == hashlib.sha256(content).hexdigest()
+    assert not (tmp_path / "incoming" / "abc.part").exists()
+
+    assert await backend.move_file("incoming/abc", "blobs/final") is True
+    assert await backend.download_file("blobs/final") == content
+    assert not await backend.file_exists("incoming/abc")
+    assert (await backend.get_file_info("blobs/final"))["content_type"] == "text/plain"
+
+
+@pytest.mark.asyncio
+async def test_local_upload_stream_cleans_up_partial_file(tmp_path):
+    """A rejected upload leaves nothing behind."""
+    backend = LocalStorageBackend(base_path=str(tmp_path))
+
+    with pytest.raises(ValueError):
+        await backend.upload_stream(chunked(b"x" * 4096, 1024), "incoming/big", max_size=2048)
+
+    assert list(tmp_path.rglob("*")) == [tmp_path / "incoming"]
+
+
+def make_s3_backend():
+    backend = S3StorageBackend.__new__(S3StorageBackend)
+    backend.settings = MagicMock(s3_multipart_part_size=5 * 1024 * 1024)
+    backend.bucket_name = "bucket"
+    backend.region = "us-east-1"
+    backend.bucket_path = ""
+    backend.cloudfront_domain = None
+    backend.endpoint_url = None
+    backend._executor = ThreadPoolExecutor(max_workers=2)
+    backend.s3_client = MagicMock()
+    backend.s3_client.create_multipart_upload.return_value = {"UploadId": "upload-1"}
+    backend.s3_client.upload_part.side_effect = lambda **kwargs: {"ETag": f"etag-{kwargs['PartNumber']}"}
+    return backend
+
+
+@pytest.mark.asyncio
+async def test_s3_upload_stream_uses_multipart_parts():
+    """Large streams are sent as bounded multipart parts."""
+    backend = make_s3_backend()
+    content = b"y" * (12 * CHUNK)
+
+    upload = await backend.upload_stream(chunked(content), "incoming/big", content_type="application/pdf")
+
+    part_sizes = [len(call.kwargs["Body"]) for call in backend.s3_client.upload_part.call_args_list]
+    assert part_sizes == [5 * CHUNK, 5 * CHUNK, 2 * CHUNK]
+    completed = backend.s3_client.complete_multipart_upload.call_args.kwargs
+    assert [part["PartNumber"] for part in completed["MultipartUpload"]["Parts"]] == [1, 2, 3]
+    backend.s3_client.put_object.assert_not_called()
+    assert upload.sha256 == hashlib.sha256(content).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_s3_upload_stream_small_file_uses_single_put():
+    """Content smaller than one part avoids multipart overhead."""
+    backend = make_s3_backend()
+
+    await backend.upload_stream(chunked(b"small"), "incoming/small")
+
+    backend.s3_client.put_object.assert_called_once()
+    backend.s3_client.create_multipart_upload.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_s3_upload_stream_aborts_on_failure():
+    """A failed stream aborts the multipart upload."""
+    backend = make_s3_backend()
+
+    with pytest.raises(ValueError):
+        await backend.upload_stream(chunked(b"z" * (8 * CHUNK)), "incoming/big", max_size=7 * CHUNK)
+
+    backend.s3_client.abort_multipart_upload.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_create_file_record_from_stream_discards_duplicate_staging_blob():
+    """Duplicate content is staged, hashed, then dropped in favour of the stored blob."""
+    service = FileService()
+    service.storage_service = MagicMock()
+    service.storage_service.upload_stream = AsyncMock(return_value=MagicMock(
+        size=10, sha256="ab" * 32, detected_mime_type="image/png"
+    ))
+    service.storage_service.move_file = AsyncMock(return_value=True)
+    service.storage_service.delete_file = AsyncMock(return_value=True)
+
+    organization_id = uuid.uuid4()
+    existing = MagicMock(file_path=f"attachments/{organization_id}/ab/{'ab' * 32}", status=None)
+    service._register_file_content = AsyncMock(return_value=existing)
+
+    result = await service.create_file_record_from_stream(
+        db=AsyncMock(),
+        filename="screenshot",
+        mime_type="application/octet-stream",
+        chunks=chunked(b"0123456789"),
+        uploaded_by_id=uuid.uuid4(),
+        organization_id=organization_id
+    )
+
+    assert result is existing
+    args = service._register_file_content.call_args.args
+    assert args[2] == "image/png"  # sniffed type replaces generic client type
+    staging_key = service.storage_service.upload_stream.call_args.kwargs["storage_key"]
+    service.storage_service.delete_file.assert_awaited_once_with(staging_key)
@@ -0,0 +1,156 @@
+"""
+File task cancellation through the Redis file -> task registry.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+import redis
+
+from app.services.task_cancellation_service import FileTaskRegistry, TaskCancellationService
+from app.tasks.file_tasks import register_file_task, unregister_file_task, unregister_revoked_file_task
+
+PROCESS = "app.tasks.file_tasks.process_file_upload"
+REPROCESS = "app.tasks.file_tasks.reprocess_file"
+
+
+class FakeRedis:
+    """The handful of hash commands the registry uses, pipelined or not"""
+
+    def __init__(self):
+        self.hashes = {}
+        self._queued = []
+
+    def pipeline(self):
+        return self
+
+    def hset(self, key, field, value):
+        self._queued.append(lambda: self.hashes.setdefault(key, {}).__setitem__(field, value))
+        return self
+
+    def expire(self, key, seconds):
+        return self
+
+    def hgetall(self, key):
+        self._queued.append(lambda: dict(self.hashes.get(key, {})))
+        return self
+
+    def execute(self):
+        queued, self._queued = self._queued, []
+        return [command() for command in queued]
+
+    def hdel(self, key, field):
+        self.hashes.get(key, {}).pop(field, None)
+        if not self.hashes.get(key, True):
+            del self.hashes[key]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+    def scan_iter(self, match, count):
+        return [key for key in list(self.hashes) if key.startswith(match.rstrip("*"))]
+
+
+@pytest.fixture
+def registry():
+    registry = FileTaskRegistry()
+    registry._redis_client = FakeRedis()
+    return registry
+
+
+@pytest.fixture
+def service(registry):
+    service = TaskCancellationService()
+    service.registry = registry
+    service.celery = MagicMock()
+    return service
+
+
+def test_cancel_is_a_lookup_and_revoke_without_inspecting_workers(service, registry):
+    registry.register("file-1", "task-a", PROCESS)
+    registry.register("file-1", "task-b", REPROCESS)
+
+    result = service.cancel_file_processing_tasks("file-1")
+
+    service.celery.control.inspect.assert_not_called()
+    service.celery.control.revoke.assert_called_once_with(["task-a", "task-b"], terminate=True, signal="SIGKILL")
+    assert result["success"]
+    assert result["active_tasks_found"] == 2
+    assert {task["task_id"] for task in result["cancelled_tasks"]} == {"task-a", "task-b"}
+    assert registry.get_tasks(["file-1"]) == {"file-1": {}}
+
+
+def test_file_without_tasks_is_a_successful_no_op(service):
+    result = service.cancel_file_processing_tasks("file-1")
+
+    service.celery.control.revoke.assert_not_called()
+    assert result["success"]
+    assert result["active_tasks_found"] == 0
+
+
+def test_bulk_cancel_revokes_all_files_in_one_call(service, registry):
+    for index in range(20):
+        registry.register(f"file-{index}", f"task-{index}", PROCESS)
+
+    results = service.cancel_files_processing_tasks([f"file-{index}" for index in range(25)])
+
+    service.celery.control.revoke.assert_called_once()
+    assert len(service.celery.control.revoke.call_args.args[0]) == 20
+    assert results["total_cancelled"] == 20
+    assert results["files_processed"] == 25
+    assert registry.get_all_tasks() == {}
+
+
+def test_failed_revoke_keeps_registry_entries(service, registry):
+    registry.register("file-1", "task-a", PROCESS)
+    service.celery.control.revoke.side_effect = RuntimeError("broker down")
+
+    result = service.cancel_file_processing_tasks("file-1")
+
+    assert not result["success"]
+    assert result["failed_cancellations"] == [{"task_id": "task-a", "error": "broker down"}]
+    assert registry.get_tasks(["file-1"]) == {"file-1": {"task-a": PROCESS}}
+
+
+def test_falls_back_to_worker_inspection_when_redis_is_down(service):
+    service.registry = MagicMock()
+    service.registry.get_tasks.side_effect = redis.ConnectionError("refused")
+    service.celery.control.inspect.return_value.active.return_value = {
+        "worker-1": [
+            {"id": "task-a", "name": PROCESS, "args": ["file-1"]},
+            {"id": "task-b", "name": PROCESS, "args": ["file-2"]},
+        ]
+    }
+
+    result = service.cancel_file_processing_tasks("file-1")
+
+    service.celery.control.revoke.assert_called_once_with(["task-a"], terminate=True, signal="SIGKILL")
+    assert result["active_tasks_found"] == 1
+
+
+def test_signals_register_on_publish_and_clear_on_completion(registry):
+    with patch("app.tasks.file_tasks.file_task_registry", registry):
+        register_file_task(sender=PROCESS, headers={"id": "task-a"}, body=(["file-1"], {}, {}))
+        register_file_task(sender="app.tasks.file_tasks.cleanup_failed_uploads", headers={"id": "x"}, body=([24], {}, {}))
+        assert registry.get_all_tasks() == {"file-1": {"task-a": PROCESS}}
+
+        # A retry republishes under the same ID and must stay registered
+        unregister_file_task(sender=SimpleNamespace(name=PROCESS), task_id="task-a", args=["file-1"], state="RETRY")
+        assert registry.get_all_tasks() == {"file-1": {"task-a": PROCESS}}
+
+        unregister_file_task(sender=SimpleNamespace(name=PROCESS), task_id="task-a", args=["file-1"], state="SUCCESS")
+        assert registry.get_all_tasks() == {}
+
+        register_file_task(sender=REPROCESS, headers={"id": "task-b"}, body=(["file-2"], {}, {}))
+        unregister_revoked_file_task(request=SimpleNamespace(task=REPROCESS, id="task-b", args=["file-2"]))
+        assert registry.get_all_tasks() == {}
+
+
+def test_registry_outage_does_not_block_publishing():
+    broken = MagicMock()
+    broken.register.side_effect = redis.ConnectionError("refused")
+
+    with patch("app.tasks.file_tasks.file_task_registry", broken):
+        register_file_task(sender=PROCESS, headers={"id": "task-a"}, body=(["file-1"], {}, {}))
@@ -0,0 +1,157 @@
+"""
+Task dispatcher reacts to NOTIFY payloads instead of polling.
+
+Enqueueing and claiming are mocked; the loop is driven with a fake connection
+and notifications delivered the way asyncpg calls listener callbacks.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.task_dispatcher import AGENT_TASK_CHANNEL, FILE_CHANNEL, TaskDispatcher
+
+
+def notify(dispatcher, channel, payload):
+    dispatcher.handle_notification(None, 1234, channel, payload)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = TaskDispatcher()
+    dispatcher.batch_size = 2
+    return dispatcher
+
+
+def test_future_task_arms_timer_for_earliest_schedule(dispatcher):
+    soon = datetime.now(timezone.utc) + timedelta(minutes=5)
+    later = soon + timedelta(minutes=5)
+
+    notify(dispatcher, AGENT_TASK_CHANNEL, later.isoformat())
+    notify(dispatcher, AGENT_TASK_CHANNEL, soon.isoformat())
+    notify(dispatcher, AGENT_TASK_CHANNEL, later.isoformat())
+
+    assert not dispatcher._tasks_due
+    assert dispatcher._next_due == soon
+    assert 290 < dispatcher._seconds_until_next_due() <= 300
+
+
+def test_due_task_and_file_notifications_mark_work(dispatcher):
+    notify(dispatcher, AGENT_TASK_CHANNEL, (datetime.now(timezone.utc) - timedelta(seconds=1)).isoformat())
+    notify(dispatcher, FILE_CHANNEL, "file-1")
+    notify(dispatcher, FILE_CHANNEL, "file-1")
+
+    assert dispatcher._tasks_due
+    assert dispatcher._pending_files == {"file-1"}
+    assert dispatcher._get_wakeup().is_set()
+    assert dispatcher.stats["notifications"] == 3
+
+
+@pytest.mark.asyncio
+async def test_dispatch_claims_until_batch_runs_short_then_rearms_timer(dispatcher):
+    next_due = datetime.now(timezone.utc) + timedelta(hours=1)
+    dispatcher._tasks_due = True
+
+    with patch("app.tasks.agent_tasks.dispatch_due_tasks", AsyncMock(side_effect=[2, 2, 1])) as claim, \
+         patch("app.services.agent_task_service.agent_task_service.next_scheduled_at",
+               AsyncMock(return_value=next_due)):
+        queued = await dispatcher.dispatch_due_tasks()
+
+    assert queued == 5
+    assert claim.await_count == 3
+    assert not dispatcher._tasks_due
+    assert dispatcher._next_due == next_due
+
+
+@pytest.mark.asyncio
+async def test_loop_queues_work_when_notified(dispatcher):
+    connection = FakeConnection()
+    queued_files = []
+
+    with patch.object(dispatcher, "sweep", AsyncMock()) as sweep, \
+         patch.object(dispatcher, "dispatch_due_tasks", AsyncMock(return_value=1)) as dispatch_tasks, \
+         patch("app.tasks.file_tasks.process_file_upload.delay", side_effect=queued_files.append):
+        loop = asyncio.create_task(dispatcher._dispatch_loop(connection))
+        await asyncio.sleep(0)
+
+        notify(dispatcher, FILE_CHANNEL, "file-1")
+        notify(dispatcher, AGENT_TASK_CHANNEL, datetime.now(timezone.utc).isoformat())
+        await asyncio.sleep(0.05)
+
+        dispatcher.stop()
+        await asyncio.wait_for(loop, timeout=1)
+
+    sweep.assert_awaited_once()
+    dispatch_tasks.assert_awaited_once()
+    assert queued_files == ["file-1"]
+
+
+@pytest.mark.asyncio
+async def test_loop_wakes_when_future_task_falls_due(dispatcher):
+    dispatcher._next_due = datetime.now(timezone.utc) + timedelta(milliseconds=50)
+
+    async def dispatched():
+        dispatcher._next_due = None
+        dispatcher.stop()
+        return 1
+
+    with patch.object(dispatcher, "sweep", AsyncMock()), \
+         patch.object(dispatcher, "dispatch_due_tasks", AsyncMock(side_effect=dispatched)) as dispatch_tasks:
+        await asyncio.wait_for(dispatcher._dispatch_loop(FakeConnection()), timeout=1)
+
+    dispatch_tasks.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_latency_is_measured_from_readiness_to_start():
+    session = AsyncMock()
+    row = MagicMock(count=3, p50=0.2, p95=0.9, max=1.5)
+    session.execute.return_value.one = MagicMock(return_value=row)
+    session_factory = MagicMock()
+    session_factory.return_value.__aenter__.return_value = session
+
+    with patch("app.database.get_async_db_session", session_factory):
+        stats = await TaskDispatcher().get_latency_stats(window_minutes=15)
+
+    assert stats["window_minutes"] == 15
+    assert stats["agent_tasks"] == {"count": 3, "p50_seconds": 0.2, "p95_seconds": 0.9, "max_seconds": 1.5}
+    task_sql = str(session.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+    assert "percentile_cont(%(percentile_cont_1)s) WITHIN GROUP" in task_sql
+    assert "greatest(agent_tasks.scheduled_at, agent_tasks.created_at)" in task_sql
+    file_sql = str(session.execute.call_args_list[1].args[0].compile(dialect=postgresql.dialect()))
+    assert "files.processing_started_at - files.created_at" in file_sql
+
+
+@pytest.mark.asyncio
+async def test_sweep_requeues_only_stale_uploaded_files(dispatcher):
+    session = AsyncMock()
+    session.execute.return_value.scalars = MagicMock(return_value=MagicMock(all=MagicMock(return_value=["file-1"])))
+    session_factory = MagicMock()
+    session_factory.return_value.__aenter__.return_value = session
+    queued_files = []
+
+    with patch("app.database.get_async_db_session", session_factory), \
+         patch("app.services.agent_task_service.agent_task_service.release_expired_leases", AsyncMock()), \
+         patch.object(dispatcher, "dispatch_due_tasks", AsyncMock(return_value=0)), \
+         patch("app.tasks.file_tasks.process_file_upload.delay", side_effect=queued_files.append):
+        await dispatcher.sweep()
+
+    assert queued_files == ["file-1"]
+    query = session.execute.call_args.args[0]
+    sql = str(query.compile(dialect=postgresql.dialect()))
+    assert "files.updated_at < %(updated_at_1)s" in sql
+    assert "LIMIT" in sql
+    params = query.compile(dialect=postgresql.dialect()).params
+    assert params["updated_at_1"] <= datetime.now(timezone.utc) - timedelta(seconds=dispatcher.sweep_seconds)
+    assert params["param_1"] == dispatcher.sweep_file_limit
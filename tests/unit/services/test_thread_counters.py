@@ -0,0 +1,75 @@
+"""
+Thread message counters stay exact under concurrent writers.
+"""
+
+import asyncio
+import uuid
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401 - register related tables for the Thread foreign keys
+from app.models.chat import Thread, Message
+from app.services.thread_service import ThreadService
+
+
+@pytest.fixture
+def engine(make_engine):
+    return make_engine(Thread, Message)
+
+
+def create_threads(engine, count):
+    thread_ids = [uuid.uuid4() for _ in range(count)]
+    with Session(engine) as session:
+        session.add_all([
+            Thread(id=thread_id, agent_id=uuid.uuid4(), user_id="user", organization_id=uuid.uuid4(), total_messages=0)
+            for thread_id in thread_ids
+        ])
+        session.commit()
+    return thread_ids
+
+
+def totals(engine):
+    with Session(engine) as session:
+        return dict(session.execute(select(Thread.id, Thread.total_messages)).all())
+
+
+@pytest.mark.asyncio
+async def test_parallel_writers_never_lose_increments(engine, interleaving_db_factory):
+    (thread_id,) = create_threads(engine, 1)
+    service = ThreadService()
+
+    async def writer():
+        db = interleaving_db_factory()
+        for _ in range(10):
+            assert await service.update_message_counters(db, thread_id, increment_count=2)
+
+    await asyncio.gather(*[writer() for _ in range(25)])
+
+    assert totals(engine)[thread_id] == 500
+
+
+@pytest.mark.asyncio
+async def test_missing_thread_is_reported(interleaving_db_factory):
+    db = interleaving_db_factory()
+
+    assert await ThreadService().update_message_counters(db, uuid.uuid4()) is False
+
+
+@pytest.mark.asyncio
+async def test_import_messages_batches_counters_across_threads(engine, interleaving_db_factory):
+    first, second = create_threads(engine, 2)
+    service = ThreadService()
+
+    async def importer():
+        db = interleaving_db_factory()
+        messages = [Message(thread_id=first, role="user", content="hi") for _ in range(3)]
+        messages.append(Message(thread_id=second, role="assistant", content="hello"))
+        assert await service.import_messages(db, messages) == 4
+
+    await asyncio.gather(*[importer() for _ in range(10)])
+
+    assert totals(engine) == {first: 30, second: 10}
+    with Session(engine) as session:
+        assert session.query(Message).count() == 40
+        assert session.query(Message).filter(Message.token_count.is_(None)).count() == 0
@@ -0,0 +1,91 @@
+import uuid
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.dialects import postgresql
+
+from app.models.chat import Thread
+from app.services.thread_service import ThreadService
+
+
+def compile_pg(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def result_with(**attrs):
+    result = MagicMock()
+    for name, value in attrs.items():
+        getattr(result, name).return_value = value
+    return result
+
+
+@pytest.fixture
+def agent():
+    return MagicMock(organization_id=uuid.uuid4())
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_threads_and_builds_snippets_for_page_only(agent):
+    thread = Thread(id=uuid.uuid4(), title="Login error on SSO")
+    message_id = uuid.uuid4()
+    db = AsyncMock()
+    db.execute.side_effect = [
+        result_with(scalar_one_or_none=agent),
+        result_with(all=[(thread, message_id, 0.8, "<mark>Login</mark> error on SSO")]),
+        result_with(all=[(message_id, "users cannot <mark>login</mark> after the update")]),
+    ]
+
+    results = await ThreadService().search_threads(db, uuid.uuid4(), "user", "login")
+
+    assert len(results) == 1
+    assert results[0].thread is thread
+    assert results[0].rank == 0.8
+    assert results[0].snippet == "users cannot <mark>login</mark> after the update"
+
+    search_sql = compile_pg(db.execute.call_args_list[1].args[0])
+    # Scoped to the user's threads for the agent, ranked, best message via lateral join
+    assert "threads.user_id = " in search_sql and "threads.agent_id = " in search_sql
+    assert "LEFT OUTER JOIN LATERAL" in search_sql
+    assert "ORDER BY rank DESC" in search_sql
+    snippet_sql = compile_pg(db.execute.call_args_list[2].args[0])
+    assert "ts_headline" in snippet_sql and "messages.id IN" in snippet_sql
+
+
+@pytest.mark.asyncio
+async def test_search_expressions_match_migration_indexes(agent):
+    """The planner only uses the expression indexes when expressions are identical."""
+    db = AsyncMock()
+    db.execute.side_effect = [result_with(scalar_one_or_none=agent), result_with(all=[])]
+
+    await ThreadService().search_threads(db, uuid.uuid4(), "user", "invoice")
+
+    sql = compile_pg(db.execute.call_args_list[1].args[0])
+    assert "to_tsvector('english'::regconfig, messages.content) @@" in sql
+    assert "to_tsvector('english'::regconfig, coalesce(threads.title, '')) @@" in sql
+    assert "ILIKE" in sql  # trigram-backed title substring match
+
+
+@pytest.mark.asyncio
+async def test_list_threads_query_filter_no_longer_scans_all_messages(agent):
+    db = AsyncMock()
+    db.execute.side_effect = [
+        result_with(scalar_one_or_none=agent),
+        result_with(scalars=MagicMock(all=MagicMock(return_value=[]))),
+        result_with(scalar=0),
+    ]
+
+    await ThreadService().list_threads(db, uuid.uuid4(), "user", query="50%_off")
+
+    sql = compile_pg(db.execute.call_args_list[1].args[0])
+    assert "EXISTS (SELECT messages.id" in sql
+    assert "messages.thread_id = threads.id" in sql
+    assert "messages.content ILIKE" not in sql
+    params = db.execute.call_args_list[1].args[0].compile(dialect=postgresql.dialect()).params
+    assert "%50/%/_off%" in params.values()
+
+
+@pytest.mark.asyncio
+async def test_blank_search_skips_database():
+    db = AsyncMock()
+
+    assert await ThreadService().search_threads(db, uuid.uuid4(), "user", "   ") == []
+    db.execute.assert_not_called()
@@ -0,0 +1,71 @@
+import uuid
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.dialects import postgresql
+
+from app.models.ticket import Ticket
+from app.services.ticket_service import TicketService
+
+
+def compile_pg(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+FACET_ROWS = [
+    {"status": "open", "priority": None, "category": None, "count": 7},
+    {"status": "resolved", "priority": None, "category": None, "count": 3},
+    {"status": None, "priority": "high", "category": None, "count": 10},
+    {"status": None, "priority": None, "category": "technical", "count": 10},
+    {"status": None, "priority": None, "category": None, "count": 10},
+]
+
+
+@pytest.mark.asyncio
+async def test_search_returns_ranked_page_and_facets_from_one_statement():
+    first, second = Ticket(id=uuid.uuid4()), Ticket(id=uuid.uuid4())
+    result = MagicMock()
+    result.all.return_value = [(FACET_ROWS, 0.9, first), (FACET_ROWS, 0.4, second)]
+    db = AsyncMock()
+    db.execute.return_value = result
+
+    search = await TicketService().search_tickets(db, uuid.uuid4(), "vpn timeout", filters={"status": ["open"]})
+
+    db.execute.assert_awaited_once()
+    assert search.tickets == [first, second]
+    assert search.ranks == [0.9, 0.4]
+    assert search.total == 10
+    assert search.facets == {
+        "status": {"open": 7, "resolved": 3},
+        "priority": {"high": 10},
+        "category": {"technical": 10},
+    }
+
+    sql = compile_pg(db.execute.call_args.args[0])
+    assert "tickets.search_vector @@ websearch_to_tsquery('english'::regconfig" in sql
+    assert "GROUPING SETS" in sql
+    assert "tickets.organization_id = " in sql
+    assert "JOIN users" not in sql
+
+
+@pytest.mark.asyncio
+async def test_search_without_matches_still_reports_empty_facets():
+    result = MagicMock()
+    result.all.return_value = [(None, None, None)]
+    db = AsyncMock()
+    db.execute.return_value = result
+
+    search = await TicketService().search_tickets(db, uuid.uuid4(), "nothing matches")
+
+    assert search.tickets == []
+    assert search.total == 0
+    assert search.facets == {"status": {}, "priority": {}, "category": {}}
+
+
+def test_list_query_isolates_by_ticket_organization_with_full_text_filter():
+    query = TicketService()._build_ticket_list_query(uuid.uuid4(), {"search": "printer"})
+
+    sql = compile_pg(query)
+    assert "JOIN users" not in sql
+    assert "tickets.organization_id = " in sql
+    assert "tickets.search_vector @@" in sql
+    assert "ILIKE" not in sql
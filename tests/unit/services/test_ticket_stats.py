@@ -0,0 +1,121 @@
+"""
+Ticket statistics from the single-pass aggregate and the per-organization rollup.
+
+Runs against an in-memory SQLite database; the rollup trigger is PostgreSQL
+only, so the rollup is populated with rebuild_ticket_stats_rollup.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401 - register related tables for the Ticket foreign keys
+from app.models.ticket import Ticket, TicketCategory, TicketPriority, TicketStatsRollup, TicketStatus
+from app.services.ticket_service import TicketService
+
+
+@compiles(TSVECTOR, "sqlite")
+def _tsvector_as_text(element, compiler, **kw):
+    return "TEXT"
+
+
+@pytest.fixture
+def engine(make_engine):
+    return make_engine(Ticket, TicketStatsRollup)
+
+
+def add_ticket(session, organization_id, status, priority=TicketPriority.MEDIUM,
+               category=TicketCategory.GENERAL, sla_due_date=None, is_deleted=False):
+    session.add(Ticket(
+        id=uuid.uuid4(),
+        title="Ticket",
+        description="Details",
+        status=status,
+        priority=priority,
+        category=category,
+        created_by_id=uuid.uuid4(),
+        organization_id=organization_id,
+        sla_due_date=sla_due_date,
+        is_deleted=is_deleted
+    ))
+
+
+@pytest.fixture
+def organization_id(engine):
+    organization_id = uuid.uuid4()
+    past_due = datetime.now(timezone.utc) - timedelta(hours=2)
+    with Session(engine) as session:
+        add_ticket(session, organization_id, TicketStatus.NEW, TicketPriority.CRITICAL, TicketCategory.BUG, sla_due_date=past_due)
+        add_ticket(session, organization_id, TicketStatus.OPEN, TicketPriority.HIGH, TicketCategory.BUG)
+        add_ticket(session, organization_id, TicketStatus.IN_PROGRESS, sla_due_date=past_due)
+        add_ticket(session, organization_id, TicketStatus.RESOLVED, TicketPriority.HIGH, sla_due_date=past_due)
+        add_ticket(session, organization_id, TicketStatus.CLOSED, category=TicketCategory.BILLING)
+        add_ticket(session, organization_id, TicketStatus.OPEN, is_deleted=True)
+        # Another organization's tickets must not leak into the counts
+        add_ticket(session, uuid.uuid4(), TicketStatus.OPEN, TicketPriority.CRITICAL, sla_due_date=past_due)
+        session.commit()
+    return organization_id
+
+
+EXPECTED = {
+    "total_tickets": 5,
+    "open_tickets": 3,
+    "resolved_tickets": 1,
+    "overdue_tickets": 2,
+    "high_priority_tickets": 2,
+    "category_distribution": {"bug": 2, "general": 2, "billing": 1},
+    "priority_distribution": {"critical": 1, "high": 2, "medium": 2},
+    "status_distribution": {"new": 1, "open": 1, "in_progress": 1, "resolved": 1, "closed": 1},
+}
+
+
+def assert_expected(stats):
+    for key, value in EXPECTED.items():
+        assert stats[key] == value, key
+
+
+@pytest.mark.asyncio
+async def test_single_pass_aggregate_is_organization_scoped(engine, organization_id, db_factory):
+    stats = await TicketService().get_ticket_stats(db_factory(), organization_id, use_rollup=False)
+
+    assert_expected(stats)
+
+
+@pytest.mark.asyncio
+async def test_rollup_matches_single_pass_aggregate(engine, organization_id, db_factory):
+    service = TicketService()
+    db = db_factory()
+
+    assert await service.rebuild_ticket_stats_rollup(db) == 6  # 5 + 1 for the other organization
+    stats = await service.get_ticket_stats(db, organization_id)
+
+    assert_expected(stats)
+
+
+@pytest.mark.asyncio
+async def test_rollup_rebuild_for_one_organization_leaves_others(engine, organization_id, db_factory):
+    service = TicketService()
+    db = db_factory()
+    await service.rebuild_ticket_stats_rollup(db)
+
+    with Session(engine) as session:
+        add_ticket(session, organization_id, TicketStatus.PENDING)
+        session.commit()
+    await service.rebuild_ticket_stats_rollup(db, organization_id)
+
+    with Session(engine) as session:
+        assert session.query(TicketStatsRollup).count() == 7
+    assert (await service.get_ticket_stats(db, organization_id))["total_tickets"] == 6
+
+
+@pytest.mark.asyncio
+async def test_empty_organization_has_zero_stats(db_factory):
+    stats = await TicketService().get_ticket_stats(db_factory(), uuid.uuid4())
+
+    assert stats["total_tickets"] == 0
+    assert stats["overdue_tickets"] == 0
+    assert stats["status_distribution"] == {}
@@ -47,4 +47,82 @@ async def test_count_tokens_with_invalid_data():
     invalid_message = {"invalid": "data"}
     count = await token_counter_service.count_message_tokens(invalid_message)
     assert isinstance(count, int)
-    assert count >= 1  # Should fallback gracefully
\ No newline at end of file
+    assert count >= 1  # Should fallback gracefully
+
+class _CountingEncoding:
+    """Whitespace tokenizer that records how many texts were encoded."""
+    
+    def __init__(self):
+        self.encoded_texts = []
+    
+    def encode_ordinary_batch(self, texts):
+        self.encoded_texts.extend(texts)
+        return [text.split() for text in texts]
+
+
+def _service_with_fake_encoding():
+    from app.services.token_counter_service import TokenCounterService, DEFAULT_ENCODING
+    
+    service = TokenCounterService(cache_size=3)
+    encoding = _CountingEncoding()
+    service._encodings[DEFAULT_ENCODING] = encoding
+    return service, encoding
+
+@pytest.mark.asyncio
+async def test_count_messages_tokens_batches_and_caches():
+    """Test batch counting encodes each distinct content once."""
+    service, encoding = _service_with_fake_encoding()
+    messages = [
+        {"role": "system", "content": "You are a helpful support agent"},
+        {"role": "user", "content": "My printer is broken"},
+        {"role": "system", "content": "You are a helpful support agent"},
+    ]
+    
+    counts = await service.count_messages_tokens(messages)
+    assert counts == [7, 5, 7]
+    assert len(encoding.encoded_texts) == 2  # duplicate system prompt encoded once
+    
+    await service.count_messages_tokens(messages)
+    assert len(encoding.encoded_texts) == 2  # served entirely from cache
+    assert service.get_cache_stats()["hits"] == 3
+
+@pytest.mark.asyncio
+async def test_token_cache_is_bounded():
+    """Test least recently used entries are evicted beyond the cache size."""
+    service, encoding = _service_with_fake_encoding()
+    
+    for i in range(5):
+        await service.count_message_tokens({"role": "user", "content": f"message {i}"})
+    
+    assert service.get_cache_stats()["size"] == 3
+
+def test_encoding_selected_per_model():
+    """Test model strings (with provider prefix) map to their tiktoken encoding."""
+    from app.services.token_counter_service import TokenCounterService
+    
+    service = TokenCounterService()
+    assert service.get_encoding_name("openai:gpt-4o-mini") == "o200k_base"
+    assert service.get_encoding_name("gpt-4") == "cl100k_base"
+    assert service.get_encoding_name("anthropic:claude-3-5-sonnet") == "cl100k_base"
+    assert service.get_encoding_name(None) == "cl100k_base"
+
+@pytest.mark.asyncio
+async def test_model_encoding_is_loaded_off_the_event_loop():
+    """Test the model's encoding is built in a worker thread and used for counting."""
+    import threading
+    from unittest.mock import patch
+    from app.services.token_counter_service import TokenCounterService
+    
+    loads = []
+    
+    def get_encoding(name):
+        loads.append((name, threading.get_ident()))
+        return _CountingEncoding()
+    
+    service = TokenCounterService()
+    with patch("app.services.token_counter_service.tiktoken.get_encoding", side_effect=get_encoding):
+        await service.count_messages_tokens([{"role": "user", "content": "hi"}], model="openai:gpt-4o-mini")
+        await service.count_messages_tokens([{"role": "user", "content": "hello"}], model="openai:gpt-4o-mini")
+    
+    assert [name for name, _ in loads] == ["o200k_base"]
+    assert loads[0][1] != threading.get_ident()
@@ -0,0 +1,113 @@
+"""
+Worker async runtime: one persistent event loop per Celery worker process.
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.tasks.async_runtime import WorkerAsyncRuntime, async_task
+
+
+@pytest.fixture
+def runtime():
+    runtime = WorkerAsyncRuntime()
+    yield runtime
+    engine = MagicMock(dispose=AsyncMock())
+    with patch("app.database.async_engine", engine):
+        runtime.stop()
+    if runtime.get_stats()["loops_started"]:
+        engine.dispose.assert_awaited_once()
+
+
+async def current_loop():
+    return asyncio.get_running_loop()
+
+
+def test_loop_and_loop_bound_state_survive_between_calls(runtime):
+    lock_holder = {}
+
+    async def create_lock():
+        lock_holder["lock"] = asyncio.Lock()
+
+    async def use_lock():
+        async with lock_holder["lock"]:
+            return True
+
+    first_loop = runtime.run(current_loop())
+    runtime.run(create_lock())
+
+    assert runtime.run(use_lock())
+    assert runtime.run(current_loop()) is first_loop
+    assert runtime.get_stats()["loops_started"] == 1
+    assert runtime.get_stats()["coroutines_run"] == 4
+
+
+def test_worker_threads_share_the_loop_concurrently(runtime):
+    loops = []
+
+    async def slow():
+        await asyncio.sleep(0.2)
+        return asyncio.get_running_loop()
+
+    threads = [threading.Thread(target=lambda: loops.append(runtime.run(slow()))) for _ in range(5)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.perf_counter() - start < 0.6
+    assert len(set(map(id, loops))) == 1
+
+
+def test_exceptions_propagate_to_the_caller(runtime):
+    async def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        runtime.run(fail())
+    assert runtime.get_stats()["failures"] == 1
+    assert runtime.get_stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_callable_from_a_thread_already_running_a_loop(runtime):
+    assert runtime.run(current_loop()) is not asyncio.get_running_loop()
+
+
+def test_nested_run_on_the_worker_loop_is_rejected(runtime):
+    async def nested():
+        runtime.run(current_loop())
+
+    with pytest.raises(RuntimeError, match="worker event loop"):
+        runtime.run(nested())
+
+
+def test_new_loop_after_fork(runtime):
+    parent_loop = runtime.run(current_loop())
+    runtime._pid = -1  # as seen from a forked child
+
+    assert runtime.run(current_loop()) is not parent_loop
+    assert runtime.get_stats()["loops_started"] == 2
+
+
+def test_async_task_runs_coroutine_on_worker_loop():
+    @async_task(name="tests.async_runtime.add")
+    async def add(a, b):
+        await asyncio.sleep(0)
+        return a + b
+
+    assert add.name == "tests.async_runtime.add"
+    assert add.apply(args=[2, 3]).get() == 5
+
+
+def test_async_task_rejects_bind_and_sync_functions():
+    with pytest.raises(TypeError):
+        async_task(bind=True)
+
+    with pytest.raises(TypeError):
+        async_task(name="tests.async_runtime.sync")(lambda: None)
@@ -0,0 +1,111 @@
+"""
+File download endpoints: byte ranges and missing stored content.
+"""
+
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.api.v1.files import download_file_content, parse_range_header, serve_file_with_filename
+
+
+CONTENT = b"0123456789" * 10
+
+
+def make_request(range_header=None):
+    headers = [(b"range", range_header.encode())] if range_header else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.fixture
+def file_obj():
+    return SimpleNamespace(
+        id=uuid.uuid4(), filename="notes.txt", mime_type="text/plain", file_size=len(CONTENT),
+        file_path="attachments/notes", organization_id=uuid.uuid4(), record_download=MagicMock()
+    )
+
+
+@pytest.fixture
+def file_service(file_obj):
+    async def open_file_stream(db_file, byte_range=None):
+        start, end = byte_range or (0, len(CONTENT) - 1)
+        
+        async def chunks():
+            yield CONTENT[start:end + 1]
+        return chunks()
+    
+    service = MagicMock()
+    service.get_file = AsyncMock(return_value=file_obj)
+    service.open_file_stream = AsyncMock(side_effect=open_file_stream)
+    with patch("app.api.v1.files.FileService", return_value=service):
+        yield service
+
+
+async def body_of(response):
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=10-19", (10, 19)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=-5", (95, 99)),
+    ("bytes=95-500", (95, 99)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+])
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, 100) == expected
+
+
+def test_unsatisfiable_range_is_416():
+    with pytest.raises(HTTPException) as exc_info:
+        parse_range_header("bytes=100-", 100)
+    
+    assert exc_info.value.status_code == 416
+    assert exc_info.value.headers["Content-Range"] == "bytes */100"
+
+
+@pytest.mark.asyncio
+async def test_range_request_returns_partial_content(file_service, file_obj):
+    user = SimpleNamespace(organization_id=file_obj.organization_id)
+    
+    response = await serve_file_with_filename(
+        file_obj.id, "notes.txt", make_request("bytes=10-19"), db=AsyncMock(), current_user=user
+    )
+    
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 10-19/100"
+    assert response.headers["content-length"] == "10"
+    assert await body_of(response) == CONTENT[10:20]
+    file_obj.record_download.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_full_download_advertises_ranges(file_service, file_obj):
+    user = SimpleNamespace(organization_id=file_obj.organization_id)
+    
+    response = await download_file_content(file_obj.id, make_request(), db=AsyncMock(), current_user=user)
+    
+    assert response.status_code == 200
+    assert response.headers["accept-ranges"] == "bytes"
+    assert await body_of(response) == CONTENT
+    file_obj.record_download.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_missing_stored_content_is_404(file_service, file_obj):
+    file_service.open_file_stream.side_effect = FileNotFoundError(file_obj.file_path)
+    user = SimpleNamespace(organization_id=file_obj.organization_id)
+    
+    for call in (
+        download_file_content(file_obj.id, make_request(), db=AsyncMock(), current_user=user),
+        serve_file_with_filename(file_obj.id, "notes.txt", make_request(), db=AsyncMock(), current_user=user),
+    ):
+        with pytest.raises(HTTPException) as exc_info:
+            await call
+        assert exc_info.value.status_code == 404
@@ -0,0 +1,87 @@
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401 - register related tables for foreign keys
+from app.models.chat import Thread, Message
+from app.services.ticket_service import TicketService
+from app.utils.pagination import InvalidCursorError, decode_cursor, encode_cursor, fetch_keyset_page
+
+
+@pytest.fixture
+def engine(make_engine):
+    return make_engine(Thread, Message)
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+def test_cursor_round_trip_preserves_types():
+    values = (datetime(2026, 1, 2, 3, 4, 5, 678), uuid.uuid4())
+    cursor = encode_cursor("updated_at,id:desc", values)
+
+    assert decode_cursor(cursor, "updated_at,id:desc") == values
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor("created_at,id:asc", [1, 2])])
+def test_invalid_or_foreign_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "updated_at,id:desc")
+
+
+@pytest.mark.asyncio
+async def test_walking_pages_returns_every_row_once_despite_ties(session, db_factory):
+    """Rows sharing a timestamp are split across pages without gaps or repeats."""
+    thread_id = uuid.uuid4()
+    session.add(Thread(id=thread_id, agent_id=uuid.uuid4(), user_id="u", organization_id=uuid.uuid4()))
+    base = datetime(2026, 1, 1)
+    # Groups of three messages share a created_at value
+    session.add_all([
+        Message(id=uuid.uuid4(), thread_id=thread_id, role="user", content=str(i), created_at=base + timedelta(seconds=i // 3))
+        for i in range(23)
+    ])
+    session.commit()
+    db = db_factory()
+    query = select(Message).where(Message.thread_id == thread_id)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = await fetch_keyset_page(db, query, (Message.created_at, Message.id), 5, cursor=cursor, descending=False)
+        seen.extend(rows)
+        pages += 1
+        if cursor is None:
+            break
+
+    expected = session.execute(query.order_by(Message.created_at, Message.id)).scalars().all()
+    assert [m.id for m in seen] == [m.id for m in expected]
+    assert pages == 5
+
+
+@pytest.mark.asyncio
+async def test_descending_pages_follow_updated_at(session, db_factory):
+    base = datetime(2026, 1, 1)
+    threads = [
+        Thread(id=uuid.uuid4(), agent_id=uuid.uuid4(), user_id="u", organization_id=uuid.uuid4(),
+               updated_at=base + timedelta(minutes=i))
+        for i in range(4)
+    ]
+    session.add_all(threads)
+    session.commit()
+    db = db_factory()
+
+    first, cursor = await fetch_keyset_page(db, select(Thread), (Thread.updated_at, Thread.id), 3)
+    second, last_cursor = await fetch_keyset_page(db, select(Thread), (Thread.updated_at, Thread.id), 3, cursor=cursor)
+
+    assert [t.id for t in first + second] == [t.id for t in reversed(threads)]
+    assert last_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_ticket_cursor_pages_require_keyset_sort():
+    with pytest.raises(ValueError):
+        await TicketService().list_tickets_page(db=None, organization_id=uuid.uuid4(), sort_by="priority")
@@ -0,0 +1,182 @@
+"""
+MCP tools call the backend through one pooled HTTP client.
+
+A minimal keep-alive HTTP/1.1 server on localhost stands in for the backend
+and counts the TCP connections it accepts.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import pytest
+import pytest_asyncio
+from starlette.requests import Request
+
+from mcp_server.tools.http_client import AuthenticatedHTTPClient, LatencyHistogram
+
+
+class KeepAliveBackend:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.connections = 0
+        self.paths = []
+        self.server = None
+    
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+    
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+    
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                content_length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    if name.lower() == "content-length":
+                        content_length = int(value)
+                await reader.readexactly(content_length)
+                self.paths.append(request_line.split()[1].decode())
+                
+                body = json.dumps({"items": []}).encode()
+                writer.write(
+                    f"HTTP/1.1 {self.status_code} X\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+@pytest_asyncio.fixture
+async def backend():
+    backend = KeepAliveBackend()
+    backend.url = await backend.start()
+    yield backend
+    await backend.stop()
+
+
+@pytest_asyncio.fixture
+async def client(backend):
+    client = AuthenticatedHTTPClient(backend.url)
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_sequential_calls_reuse_one_connection(backend, client):
+    for _ in range(5):
+        response = await client.make_request("GET", "/api/v1/tickets/", tool="list_tickets")
+        assert response.status_code == 200
+    
+    stats = client.get_stats()
+    assert backend.connections == 1
+    assert (stats["new_connections"], stats["reused_connections"]) == (1, 4)
+    assert stats["connection_reuse_rate"] == 0.8
+
+
+@pytest.mark.asyncio
+async def test_latency_is_recorded_per_tool(client):
+    await client.make_request("GET", "/api/v1/tickets/", tool="list_tickets")
+    await client.make_request("GET", "/api/v1/tickets/1/", tool="get_ticket")
+    await client.make_request("GET", "/health")
+    
+    latency = client.get_stats()["latency_ms"]
+    assert set(latency) == {"list_tickets", "get_ticket", "/health"}
+    assert latency["list_tickets"]["count"] == 1
+    assert sum(latency["get_ticket"]["buckets"].values()) == 1
+
+
+@pytest.mark.asyncio
+async def test_server_errors_open_the_circuit(backend, client):
+    backend.status_code = 503
+    for _ in range(5):
+        await client.make_request("GET", "/health")
+    
+    with pytest.raises(httpx.HTTPError, match="Circuit breaker open"):
+        await client.make_request("GET", "/health")
+    
+    assert len(backend.paths) == 5
+    assert client.get_stats()["circuit_rejections"] == 1
+
+
+@pytest.mark.asyncio
+async def test_application_errors_do_not_open_the_circuit(backend, client):
+    backend.status_code = 500
+    for _ in range(6):
+        response = await client.make_request("GET", "/api/v1/tickets/", tool="create_ticket")
+        assert response.status_code == 500
+    
+    assert client.get_stats()["circuit_breaker"] == "closed"
+    assert client.get_stats()["circuit_rejections"] == 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_route_requires_the_metrics_token():
+    import mcp_server.auth_server as auth_server
+    
+    def request(headers):
+        return Request({"type": "http", "method": "GET", "path": "/metrics", "headers": headers})
+    
+    with patch.object(auth_server, "METRICS_TOKEN", "scrape-secret"):
+        rejected = await auth_server.http_client_metrics(request([]))
+        forged = await auth_server.http_client_metrics(request([(b"authorization", b"Bearer ai_dev_secret")]))
+        accepted = await auth_server.http_client_metrics(request([(b"authorization", b"Bearer scrape-secret")]))
+    
+    assert (rejected.status_code, forged.status_code, accepted.status_code) == (401, 401, 200)
+
+
+@pytest.mark.asyncio
+async def test_metrics_route_is_disabled_without_a_token():
+    import mcp_server.auth_server as auth_server
+    
+    request = Request({"type": "http", "method": "GET", "path": "/metrics",
+                       "headers": [(b"authorization", b"Bearer anything")]})
+    with patch.object(auth_server, "METRICS_TOKEN", ""):
+        response = await auth_server.http_client_metrics(request)
+    
+    assert response.status_code == 404
+
+
+def test_histogram_percentiles_use_bucket_upper_bounds():
+    histogram = LatencyHistogram()
+    for duration_ms in [3, 4, 8, 40, 40, 40, 40, 40, 40, 900]:
+        histogram.observe(duration_ms)
+    
+    snapshot = histogram.snapshot()
+    assert snapshot["p50_ms"] == 50
+    assert snapshot["p95_ms"] == 1000
+    assert snapshot["buckets"]["le_50"] == 6
+    assert snapshot["max_ms"] == 900
+
+
+@pytest.mark.asyncio
+async def test_auth_server_tools_share_the_pooled_client(backend):
+    import mcp_server.auth_server as auth_server
+    
+    token = SimpleNamespace(token="ai_dev_secret")
+    with patch.object(auth_server, "API_BASE_URL", backend.url), \
+         patch.object(auth_server, "get_access_token", return_value=token), \
+         patch.object(auth_server, "get_http_request"), \
+         patch.object(auth_server, "get_http_headers"), \
+         patch.object(auth_server, "get_context"):
+        await auth_server.list_tickets.fn(None)
+        await auth_server.search_tickets.fn(None, search="printer")
+        await auth_server.get_ticket.fn(None, ticket_id="42")
+        stats = auth_server.get_http_client_stats()[backend.url]
+    await auth_server.cleanup_http_clients()
+    
+    assert backend.connections == 1
+    assert backend.paths[1].startswith("/api/v1/tickets/search/?search=printer")
+    assert set(stats["latency_ms"]) == {"list_tickets", "search_tickets", "get_ticket"}
+    assert stats["reused_connections"] == 2
@@ -0,0 +1,210 @@
+"""
+Unit tests for the negotiated AI response chunk protocols
+"""
+
+import hashlib
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.websocket import chat as chat_ws
+from app.websocket.chat import (
+    ResponseChunkEncoder,
+    STREAM_PROTOCOL_CUMULATIVE,
+    STREAM_PROTOCOL_DELTA,
+)
+
+
+class TestResponseChunkEncoder:
+    """Test chunk/complete frame payloads for each protocol version"""
+    
+    def test_cumulative_protocol_keeps_legacy_shape(self):
+        encoder = ResponseChunkEncoder(STREAM_PROTOCOL_CUMULATIVE, uuid.uuid4())
+        
+        encoder.chunk_data("Hello")
+        frame = encoder.chunk_data(" world")
+        
+        assert frame["content"] == "Hello world"
+        assert frame["chunk"] == " world"
+        assert frame["is_complete"] is False
+        assert encoder.complete_data("Hello world") == {"content": "Hello world"}
+    
+    def test_delta_protocol_sends_only_deltas_with_sequence_numbers(self):
+        encoder = ResponseChunkEncoder(STREAM_PROTOCOL_DELTA, uuid.uuid4())
+        
+        frames = [encoder.chunk_data(part) for part in ["Hel", "lo ", "world"]]
+        
+        assert [f["seq"] for f in frames] == [0, 1, 2]
+        assert [f["delta"] for f in frames] == ["Hel", "lo ", "world"]
+        assert all("content" not in f for f in frames)
+    
+    def test_delta_protocol_completion_carries_checksum(self):
+        encoder = ResponseChunkEncoder(STREAM_PROTOCOL_DELTA, uuid.uuid4())
+        encoder.chunk_data("Hello ")
+        encoder.chunk_data("world")
+        
+        complete = encoder.complete_data("Hello world")
+        
+        assert complete["chunk_count"] == 2
+        assert complete["checksum"] == "sha256:" + hashlib.sha256(b"Hello world").hexdigest()
+        assert "content" not in complete
+    
+    def test_delta_protocol_resends_content_when_final_differs(self):
+        encoder = ResponseChunkEncoder(STREAM_PROTOCOL_DELTA, uuid.uuid4())
+        encoder.chunk_data("Partial")
+        
+        complete = encoder.complete_data("I encountered an error processing your request.")
+        
+        assert complete["content"] == "I encountered an error processing your request."
+
+
+class TestStreamAgentAIResponsePrincipal:
+    """The message's Principal must reach the agent run so MCP tool calls are authorized"""
+    
+    @pytest.fixture
+    def connection(self):
+        connection_id = "user:agent:thread"
+        chat_ws.manager.connection_metadata[connection_id] = {"stream_protocol": STREAM_PROTOCOL_DELTA}
+        yield connection_id
+        chat_ws.manager.connection_metadata.pop(connection_id, None)
+    
+    async def test_streaming_path_passes_principal(self, connection):
+        principal = MagicMock()
+        seen = {}
+        
+        async def fake_stream(**kwargs):
+            seen.update(kwargs)
+            yield {"type": "text_delta", "delta": "Hi"}
+        
+        with patch.object(chat_ws.ai_chat_service, "stream_message_to_thread", side_effect=fake_stream):
+            await chat_ws.stream_agent_ai_response(
+                connection, uuid.uuid4(), uuid.uuid4(), "user", "Hello", principal=principal
+            )
+        
+        assert seen["principal"] is principal
+    
+    async def test_fallback_path_passes_principal(self, connection):
+        principal = MagicMock()
+        
+        async def failing_stream(**kwargs):
+            raise RuntimeError("stream failed")
+            yield
+        
+        fallback = AsyncMock(return_value=MagicMock(content="Hi", tools_used=[]))
+        with patch.object(chat_ws.ai_chat_service, "stream_message_to_thread", side_effect=failing_stream), \
+                patch.object(chat_ws.ai_chat_service, "send_message_to_thread", fallback):
+            await chat_ws.stream_agent_ai_response(
+                connection, uuid.uuid4(), uuid.uuid4(), "user", "Hello", principal=principal
+            )
+        
+        assert fallback.call_args.kwargs["principal"] is principal
+
+
+
+class TestStreamAgentAIResponseFailures:
+    """The agent is only re-run when nothing was streamed, and a disconnect doesn't stop the run"""
+    
+    @pytest.fixture
+    def connection(self):
+        connection_id = "user:agent:thread"
+        websocket = MagicMock()
+        websocket.send_json = AsyncMock()
+        chat_ws.manager.active_connections[connection_id] = websocket
+        chat_ws.manager.connection_metadata[connection_id] = {"stream_protocol": STREAM_PROTOCOL_DELTA}
+        yield connection_id, websocket
+        chat_ws.manager.disconnect(connection_id)
+    
+    async def test_failure_after_streamed_output_does_not_rerun_agent(self, connection):
+        connection_id, websocket = connection
+        
+        async def failing_stream(**kwargs):
+            yield {"type": "tool_call", "tool_name": "create_ticket", "tool_call_id": "call-1"}
+            raise RuntimeError("stream failed")
+        
+        fallback = AsyncMock()
+        with patch.object(chat_ws.ai_chat_service, "stream_message_to_thread", side_effect=failing_stream), \
+                patch.object(chat_ws.ai_chat_service, "send_message_to_thread", fallback):
+            await chat_ws.stream_agent_ai_response(connection_id, uuid.uuid4(), uuid.uuid4(), "user", "Hello")
+        
+        fallback.assert_not_called()
+        assert websocket.send_json.call_args.args[0]["data"]["error_code"] == "AI_RESPONSE_FAILED"
+    
+    async def test_disconnect_mid_stream_finishes_run_without_fallback(self, connection):
+        connection_id, websocket = connection
+        sent = []
+        
+        async def send_json(data):
+            if data["type"] == "ai_response_chunk" and any(f["type"] == "ai_response_chunk" for f in sent):
+                raise RuntimeError("WebSocket is not connected")
+            sent.append(data)
+        
+        websocket.send_json = AsyncMock(side_effect=send_json)
+        persisted = []
+        
+        async def stream(**kwargs):
+            yield {"type": "text_delta", "delta": "Hel"}
+            yield {"type": "text_delta", "delta": "lo"}
+            yield {"type": "final", "response": MagicMock(content="Hello", tools_used=[])}
+            # stream_message_to_thread persists the interaction after the final event
+            persisted.append(True)
+        
+        fallback = AsyncMock()
+        with patch.object(chat_ws.ai_chat_service, "stream_message_to_thread", side_effect=stream), \
+                patch.object(chat_ws.ai_chat_service, "send_message_to_thread", fallback):
+            await chat_ws.stream_agent_ai_response(connection_id, uuid.uuid4(), uuid.uuid4(), "user", "Hello")
+        
+        assert persisted == [True]
+        fallback.assert_not_called()
+        assert connection_id not in chat_ws.manager.active_connections
+        assert [frame["type"] for frame in sent][-1] == "ai_response_chunk"
+
+
+class TestSendMessageReverifiesToken:
+    """Each message is authorized with the connection's current token, not the one seen at connect"""
+    
+    @pytest.fixture
+    def connection(self):
+        connection_id = "user-1:agent:thread"
+        chat_ws.manager.connection_metadata[connection_id] = {"token": "old-token"}
+        yield connection_id
+        chat_ws.manager.connection_metadata.pop(connection_id, None)
+    
+    async def test_fresh_token_replaces_stored_token_and_builds_principal(self, connection):
+        user = MagicMock(id="user-1")
+        principal = MagicMock()
+        verify = AsyncMock(return_value=user)
+        stream = AsyncMock()
+        
+        with patch.object(chat_ws, "get_current_user_from_token", verify), \
+                patch.object(chat_ws, "build_connection_principal", AsyncMock(return_value=principal)), \
+                patch.object(chat_ws.thread_service, "get_thread", AsyncMock(return_value=MagicMock())), \
+                patch.object(chat_ws, "stream_agent_ai_response", stream):
+            await chat_ws.handle_agent_send_message(
+                {"data": {"content": "Hello", "token": "new-token"}},
+                connection, uuid.uuid4(), uuid.uuid4(), "user-1", MagicMock()
+            )
+        
+        assert verify.call_args.args[0] == "new-token"
+        assert chat_ws.manager.connection_metadata[connection]["token"] == "new-token"
+        assert stream.call_args.args[-1] is principal
+    
+    async def test_expired_token_does_not_run_agent(self, connection):
+        stream = AsyncMock()
+        
+        with patch.object(chat_ws, "get_current_user_from_token", AsyncMock(return_value=None)), \
+                patch.object(chat_ws, "stream_agent_ai_response", stream):
+            await chat_ws.handle_agent_send_message(
+                {"data": {"content": "Hello"}}, connection, uuid.uuid4(), uuid.uuid4(), "user-1", MagicMock()
+            )
+        
+        stream.assert_not_called()
+    
+    async def test_principal_build_failure_runs_without_principal(self):
+        user = MagicMock(id="user-1")
+        
+        with patch.object(chat_ws.principal_service, "get_principal_for_user", AsyncMock(side_effect=RuntimeError("db"))), \
+                patch.object(chat_ws.jwt, "get_unverified_claims", return_value={}):
+            principal = await chat_ws.build_connection_principal(user, "token", MagicMock())
+        
+        assert principal is None